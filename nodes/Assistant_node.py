@@ -19,7 +19,6 @@ from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from .base_node import BaseNode
 from src.workflows.node_registry import register_node
-from src.api.handler import process_api_request
 from docx import Document
 from docx.shared import Pt, RGBColor, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
@@ -51,6 +50,8 @@ import difflib
 
 @register_node('AssistantNode')
 class AssistantNode(BaseNode):
+    worker_pool = "persistent"  # Monitors its folder until the workflow stops
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.stop_event = Event()
@@ -1070,21 +1071,14 @@ class AssistantNode(BaseNode):
                             num_results = 3
                             
                         # Send search query to search API
-                        search_request = {
-                            'content': search_query.strip(),
-                            'num_results': num_results,
-                            'skip': 0,
-                            'format': 'json'
-                        }
-                        
-                        print(f"[DEBUG] Sending search request to {search_api_endpoint}: {search_request}")
-                        
-                        # Send to API handler
-                        search_results = process_api_request(
+                        print(f"[DEBUG] Sending search request to {search_api_endpoint}: {search_query.strip()}")
+                        response = self.send_api_request(
+                            search_query.strip(),
                             search_api_endpoint,
-                            self.config,
-                            search_request
+                            num_results=num_results,
+                            skip=0
                         )
+                        search_results = response.content if response.success else None
                         
                         if search_results:
                             # Replace the search tag with the results
@@ -2328,21 +2322,25 @@ class AssistantNode(BaseNode):
         if search_tags:
             for search_query in search_tags:
                 print(f"[DEBUG] Processing search query: {search_query}")
-                search_api = self.properties.get('search_api_endpoint')
+                search_api = self.properties.get('search_api_endpoint', {}).get('default')
                 if search_api:
                     print(f"[DEBUG] Using search API endpoint: {search_api}")
-                    num_results = self.properties.get('num_search_results', 3)
-                    search_request = {
-                        'content': search_query.strip(),
-                        'num_results': num_results,
-                        'skip': 0,
-                        'format': 'json'
-                    }
-                    print(f"[DEBUG] Sending search request to {search_api}: {search_request}")
-                    search_response = process_api_request(search_api, search_request, self.config)
-                    if isinstance(search_response, dict) and 'urls' in search_response:
-                        urls.extend(search_response['urls'])
-                        print(f"[DEBUG] Found {len(search_response['urls'])} valid URLs")
+                    try:
+                        num_results = int(self.properties.get('num_search_results', {}).get('default', 3))
+                    except (TypeError, ValueError):
+                        num_results = 3
+                    print(f"[DEBUG] Sending search request to {search_api}: {search_query.strip()}")
+                    search_response = self.send_api_request(
+                        search_query.strip(),
+                        search_api,
+                        num_results=num_results,
+                        skip=0
+                    )
+                    raw = search_response.raw_response if search_response.success else None
+                    found = raw.get('results') if isinstance(raw, dict) else None
+                    if found:
+                        urls.extend(found)
+                        print(f"[DEBUG] Found {len(found)} valid URLs")
                     else:
                         print("[DEBUG] No valid URLs found in search response")
         
@@ -1,7 +1,6 @@
 # nodes/chat_node.py
 from .base_node import BaseNode
 from src.workflows.node_registry import register_node
-from src.api.handler import process_api_request
 
 @register_node('TemplateNode')
 class BasicNode(BaseNode):
@@ -82,7 +81,7 @@ class BasicNode(BaseNode):
         output = {'output': incoming_input}
         return output #use this to return the processed output if not using api endpoint.
 
-    # def send_to_api(self, combined_input, api_details):
+    # def send_to_api(self, combined_input, api_endpoint):
     #     """
     #     Sends the combined input to the specified API and returns the response.
     #     """
@@ -90,52 +89,19 @@ class BasicNode(BaseNode):
     #         print("[BasicNode] No input provided to send to the API.")
     #         return "No input provided."
 
-    #     if not api_details:
-    #         print("[BasicNode] No API details provided.")
-    #         return "API details are missing."
-
     #     # Construct the prompt using the combined input
     #     prompt = combined_input
-    #     print(f"[BasicNode] Constructed prompt: '{prompt}'")  # Debug statement
-
-    #     # Send the prompt to the API
-    #     api_response_content = process_api_request(api_details, prompt)
-    #     print(f"[BasicNode] Raw API response content: {api_response_content}")  # Debug statement
-
-    #     if api_response_content is None:
-    #         print("[BasicNode] API response is None.")
-    #         return "API response is None."
-
-    #     if not isinstance(api_response_content, dict):
-    #         print("[BasicNode] API response is not a dictionary.")
-    #         return "Invalid API response format."
-
-    #     if 'error' in api_response_content:
-    #         error_message = api_response_content.get('error', 'Unknown error occurred.')
-    #         print(f"[BasicNode] API Error: {error_message}")  # Debug statement
-    #         return f"API Error: {error_message}"
 
-    #     # Extract the actual response based on API type
-    #     api_type = api_details.get('api_type')
-    #     if api_type == "OpenAI":
-    #         response = api_response_content.get('choices', [{}])[0].get('message', {}).get('content', 'No response available')
-    #     elif api_type == "Ollama":
-    #         if isinstance(api_response_content, dict):
-    #             # Adjusted to match the actual response structure from Ollama
-    #             message = api_response_content.get('message', {})
-    #             response = message.get('content', 'No response available')
-    #         elif isinstance(api_response_content, str):
-    #             response = api_response_content
-    #         else:
-    #             response = 'No response available'
-    #     else:
-    #         response = 'Unsupported API type.'
-    #         print(f"[BasicNode] Unsupported API type: {api_type}")  # Debug statement
+    #     # Send the prompt through the shared API service (retries, rate limits and
+    #     # token logging are handled there); the response is the same for every provider
+    #     response = self.send_api_request(prompt, api_endpoint)
 
-    #     print(f"[BasicNode] Extracted response: '{response}'")  # Debug statement
+    #     if not response.success:
+    #         print(f"[BasicNode] API Error: {response.error}")  # Debug statement
+    #         return f"API Error: {response.error}"
 
     #     # Return the API response as a string
-    #     return response #this is the output if using the api endpoint
+    #     return response.content #this is the output if using the api endpoint
 
     def requires_api_call(self):
         return False  # Set to True if this node makes an API call
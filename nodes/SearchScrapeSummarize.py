@@ -23,7 +23,6 @@ from bs4 import BeautifulSoup
 
 from .base_node import BaseNode
 from src.workflows.node_registry import register_node
-from src.api.handler import process_api_request
 
 @register_node('SearchScrapeSummarizeNode')
 class SearchScrapeSummarizeNode(BaseNode):
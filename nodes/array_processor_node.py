@@ -5,10 +5,11 @@ Each array element is processed through a loop of API calls until a specified co
 The process involves two different prompts and a search condition.
 """
 import os
+import threading
 
 from .base_node import BaseNode
+from src.workflows.cancellation import WorkflowCancelled
 from src.workflows.node_registry import register_node
-from src.api.handler import process_api_request
 from utils.progress_window import ProgressWindow
 
 @register_node('ArrayProcessorNode')
@@ -54,6 +55,13 @@ class ArrayProcessorNode(BaseNode):
                 'default': '10',
                 'description': 'Maximum number of iterations per array element'
             },
+            'batch_mode': {
+                'type': 'boolean',
+                'label': 'Batch Mode',
+                'default': False,
+                'description': 'Submit each validation/refinement round for all elements as one provider batch '
+                               '(OpenAI/Claude). Cheaper for large arrays, but rounds can take hours.'
+            },
             'api_endpoint': {
                 'type': 'dropdown',
                 'label': 'API Endpoint',
@@ -83,25 +91,15 @@ class ArrayProcessorNode(BaseNode):
             print(f"[ArrayProcessorNode] Available API endpoints: {api_list}")
         return api_list
 
-    def make_api_call(self, prompt, api_details):
+    def make_api_call(self, prompt, api_name):
         """Make an API call and extract the response."""
-        api_response_content = process_api_request(api_details, prompt)
-        
-        if 'error' in api_response_content:
-            print(f"[ArrayProcessorNode] API Error: {api_response_content['error']}")
+        response = self.send_api_request(prompt, api_name)
+        if not response.success:
+            print(f"[ArrayProcessorNode] API Error: {response.error}")
             return None
+        return response.content
 
-        # Extract the response based on API type
-        api_type = api_details.get('api_type')
-        if api_type == "OpenAI":
-            return api_response_content.get('choices', [{}])[0].get('message', {}).get('content', '')
-        elif api_type == "Ollama":
-            message = api_response_content.get('message', {})
-            return message.get('content', '') if isinstance(message, dict) else ''
-        else:
-            return 'Unsupported API type.'
-
-    def process_single_element(self, element, api_details, validation_prompt_template, refinement_prompt_template, search_string, max_iterations, progress_window=None):
+    def process_single_element(self, element, api_name, validation_prompt_template, refinement_prompt_template, search_string, max_iterations, progress_window=None):
         """Process a single array element through the validation-refinement loop."""
         iteration_count = 0
         current_validation_input = str(element)
@@ -114,13 +112,14 @@ class ArrayProcessorNode(BaseNode):
             if progress_window and progress_window.is_cancelled():
                 print("[ArrayProcessorNode] Processing cancelled by user during iteration")
                 return "CANCELLED"
+            self.raise_if_cancelled()
             
             # Prepare validation prompt by appending the current input to the template
             full_validation_prompt = f"{validation_prompt_template}\n\nContent to Review:\n{current_validation_input}"
             print(f"\n[ArrayProcessorNode] Iteration {iteration_count + 1}: Sending validation prompt to API:")
             print(f"[ArrayProcessorNode] Validation Prompt: {full_validation_prompt}")
             
-            validation_result = self.make_api_call(full_validation_prompt, api_details)
+            validation_result = self.make_api_call(full_validation_prompt, api_name)
             if validation_result is None:
                 print("[ArrayProcessorNode] Error: API call failed during validation")
                 return None
@@ -149,13 +148,14 @@ class ArrayProcessorNode(BaseNode):
                 return accumulated_result
 
             print("[ArrayProcessorNode] Search string not found, proceeding to refinement")
+            self.raise_if_cancelled()
             
             # Prepare refinement prompt by including both the content and the validation result
             full_refinement_prompt = f"{refinement_prompt_template}\n\nOriginal Content:\n{current_validation_input}\n\nReview and Suggestions:\n{validation_result}"
             print(f"[ArrayProcessorNode] Sending refinement prompt to API:")
             print(f"[ArrayProcessorNode] Refinement Prompt: {full_refinement_prompt}")
             
-            refined_result = self.make_api_call(full_refinement_prompt, api_details)
+            refined_result = self.make_api_call(full_refinement_prompt, api_name)
             if refined_result is None:
                 print("[ArrayProcessorNode] Error: API call failed during refinement")
                 return None
@@ -173,6 +173,80 @@ class ArrayProcessorNode(BaseNode):
         print(f"[ArrayProcessorNode] Finished processing element. Accumulated result: {accumulated_result}")
         return accumulated_result
 
+    def process_batch(self, input_array, api_endpoint_name, validation_prompt_template, refinement_prompt_template, search_string, max_iterations, progress_window=None):
+        """
+        Batch-mode counterpart of process_single_element for the whole array.
+
+        Each iteration sends the validation prompts of all unfinished elements
+        as one batch, then the refinement prompts of those that did not pass
+        as another.  Returns results in element order (None where an element
+        failed or never passed), or "CANCELLED".
+        """
+        total = len(input_array)
+        current_inputs = [str(element) for element in input_array]
+        results = [None] * total
+        active = list(range(total))
+        cancel_event = threading.Event()
+
+        def on_progress(finished, count, stage, iteration):
+            if self.is_cancelled():
+                cancel_event.set()
+            if progress_window:
+                if progress_window.is_cancelled():
+                    cancel_event.set()
+                progress_window.update_progress(total - len(active), f"Iteration {iteration + 1} {stage} batch: {finished}/{count} done")
+
+        for iteration in range(max_iterations):
+            if not active:
+                break
+            self.raise_if_cancelled()
+            print(f"[ArrayProcessorNode] Batch iteration {iteration + 1}: validating {len(active)} element(s)")
+            validations = self.send_api_batch(
+                [f"{validation_prompt_template}\n\nContent to Review:\n{current_inputs[i]}" for i in active],
+                api_endpoint_name,
+                on_progress=lambda finished, count: on_progress(finished, count, "validation", iteration),
+                cancel_event=cancel_event
+            )
+            self.raise_if_cancelled()
+            if cancel_event.is_set():
+                return "CANCELLED"
+
+            needs_refinement = []
+            for i, response in zip(active, validations):
+                if not response.success:
+                    print(f"[ArrayProcessorNode] Error: validation failed for element {i + 1}: {response.error}")
+                elif search_string in response.content:
+                    # Same choice as process_single_element: original on the first pass, refined content after
+                    results[i] = str(input_array[i]) if iteration == 0 else current_inputs[i]
+                else:
+                    needs_refinement.append((i, response.content))
+
+            # A refinement in the last iteration would never be validated
+            if not needs_refinement or iteration + 1 >= max_iterations:
+                break
+
+            print(f"[ArrayProcessorNode] Batch iteration {iteration + 1}: refining {len(needs_refinement)} element(s)")
+            refinements = self.send_api_batch(
+                [f"{refinement_prompt_template}\n\nOriginal Content:\n{current_inputs[i]}\n\nReview and Suggestions:\n{validation}"
+                 for i, validation in needs_refinement],
+                api_endpoint_name,
+                on_progress=lambda finished, count: on_progress(finished, count, "refinement", iteration),
+                cancel_event=cancel_event
+            )
+            self.raise_if_cancelled()
+            if cancel_event.is_set():
+                return "CANCELLED"
+
+            active = []
+            for (i, _), response in zip(needs_refinement, refinements):
+                if response.success:
+                    current_inputs[i] = response.content
+                    active.append(i)
+                else:
+                    print(f"[ArrayProcessorNode] Error: refinement failed for element {i + 1}: {response.error}")
+
+        return results
+
     def process(self, inputs):
         """Process the input array through the validation-refinement loop."""
         input_array = inputs.get('input', [])
@@ -186,9 +260,32 @@ class ArrayProcessorNode(BaseNode):
         refinement_prompt = self.properties.get('refinement_prompt', {}).get('default', '')
         search_string = self.properties.get('search_string', {}).get('default', '')
         max_iterations = int(self.properties.get('max_iterations', {}).get('default', '10'))
+        batch_mode = self.properties.get('batch_mode', {}).get('default', False)
 
         # Create progress window
         progress_window = ProgressWindow("Processing Array", len(input_array))
+        try:
+            return self._process_array(input_array, api_endpoint_name, validation_prompt, refinement_prompt,
+                                       search_string, max_iterations, batch_mode, progress_window)
+        except WorkflowCancelled:
+            print("[ArrayProcessorNode] Workflow stopped")
+            progress_window.close()
+            raise
+
+    def _process_array(self, input_array, api_endpoint_name, validation_prompt, refinement_prompt,
+                       search_string, max_iterations, batch_mode, progress_window):
+        if batch_mode:
+            if api_endpoint_name not in self.config.get('interfaces', {}):
+                print(f"[ArrayProcessorNode] API interface '{api_endpoint_name}' not found in configuration.")
+                progress_window.close()
+                return {"output": f"API interface '{api_endpoint_name}' not found in configuration."}
+            results = self.process_batch(input_array, api_endpoint_name, validation_prompt, refinement_prompt,
+                                         search_string, max_iterations, progress_window)
+            progress_window.close()
+            if results == "CANCELLED":
+                print("[ArrayProcessorNode] Batch processing cancelled by user")
+                return {"output": "Processing cancelled by user"}
+            return {"output": "\n\n".join(str(result) for result in results) if results else ""}
         
         # Process each element
         results = []
@@ -200,10 +297,10 @@ class ArrayProcessorNode(BaseNode):
             if progress_window.is_cancelled():
                 print("[ArrayProcessorNode] Processing cancelled by user")
                 return {"output": "Processing cancelled by user"}
+            self.raise_if_cancelled()
             
-            # Get API details from configuration
-            api_details = self.config['interfaces'].get(api_endpoint_name)
-            if not api_details:
+            # Check the API interface exists in the configuration
+            if api_endpoint_name not in self.config.get('interfaces', {}):
                 print(f"[ArrayProcessorNode] API interface '{api_endpoint_name}' not found in configuration.")
                 progress_window.close()
                 return {"output": f"API interface '{api_endpoint_name}' not found in configuration."}
@@ -211,7 +308,7 @@ class ArrayProcessorNode(BaseNode):
             # Process the element
             result = self.process_single_element(
                 element,
-                api_details,
+                api_endpoint_name,
                 validation_prompt,
                 refinement_prompt,
                 search_string,
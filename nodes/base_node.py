@@ -1,18 +1,28 @@
 # nodes/base_node.py
 from abc import ABC, abstractmethod
 from services.api_service import APIService, APIRequest, APIResponse
+from services.async_api_service import AsyncAPIService
 from services.pricing_service import PricingService
 from services.token_logger import TokenLogger
+from src.workflows.cancellation import WorkflowCancelled
 
 class BaseNode(ABC):
     """
     Abstract Base Class for all nodes.
     """
 
+    # Set by process_node_graph in streaming mode; receives text deltas from send_api_request.
+    stream_callback = None
+    # Set by process_node_graph to the run's stop event; long-running nodes call raise_if_cancelled().
+    cancel_token = None
+    # Worker pool this node type runs in: io, llm, cpu or persistent (see src/workflows/worker_pools.py).
+    worker_pool = "llm"
+
     def __init__(self, node_id, config):
         self.id = node_id
         self.config = config
         self._api_service = APIService(config)
+        self._async_api_service = AsyncAPIService(config)
         self.properties = self.define_properties()
         self.inputs = self.define_inputs()      # Initialize inputs
         self.outputs = self.define_outputs()    # Initialize outputs
@@ -52,6 +62,10 @@ class BaseNode(ABC):
     def send_api_request(self, content: str, api_name: str, **kwargs) -> APIResponse:
         """
         Send a request to the API service.
+
+        When the graph runner has attached a ``stream_callback`` to this node,
+        the request is streamed and each text delta is passed to the callback
+        as it arrives; the returned APIResponse is the same either way.
         
         Args:
             content: Content to send to the API
@@ -61,25 +75,137 @@ class BaseNode(ABC):
         Returns:
             APIResponse object containing the response
         """
+        if self.stream_callback is not None:
+            return self.stream_api_request(content, api_name, on_token=self.stream_callback, **kwargs)
+
+        request = self._build_api_request(content, api_name, kwargs)
+        if self.config.get('use_async_api', True):
+            # Shares the per-interface concurrency limits with every other node
+            response = self._async_api_service.send_request_sync(request)
+        else:
+            response = self._api_service.send_request(request)
+        self._log_api_usage(response, api_name, kwargs)
+        return response
+
+    def send_api_requests(self, contents, api_name: str, **kwargs):
+        """
+        Send several prompts to one endpoint concurrently.
+
+        The requests run on the async API loop, bounded by the interface's
+        ``max_concurrency``, without a thread per prompt.
+
+        Returns:
+            List of APIResponse objects in the same order as ``contents``
+        """
+        requests = [self._build_api_request(content, api_name, kwargs) for content in contents]
+        responses = self._async_api_service.send_many_sync(requests)
+        for response in responses:
+            self._log_api_usage(response, api_name, kwargs)
+        return responses
+
+    def send_api_batch(self, contents, api_name: str, on_progress=None, cancel_event=None, **kwargs):
+        """
+        Send several prompts as one provider-side batch and wait for the results.
+
+        Interfaces without a batch endpoint fall back to ``send_api_requests``.
+        See APIService.submit_batch for ``on_progress`` and ``cancel_event``
+        (defaults to the workflow's cancellation token).
+
+        Returns:
+            List of APIResponse objects in the same order as ``contents``
+        """
+        if not self._api_service.supports_batch(api_name):
+            return self.send_api_requests(contents, api_name, **kwargs)
+        requests = [self._build_api_request(content, api_name, kwargs) for content in contents]
+        if cancel_event is None:
+            cancel_event = self.cancel_token
+        responses = self._api_service.submit_batch(requests, on_progress=on_progress, cancel_event=cancel_event)
+        for response in responses:
+            self._log_api_usage(response, api_name, kwargs)
+        return responses
+
+    def stream_api_request(self, content: str, api_name: str, on_token=None, **kwargs) -> APIResponse:
+        """
+        Stream a request to the API service, calling ``on_token(delta)`` for each text delta.
+
+        The stream is closed early if the workflow is cancelled.
+
+        Returns:
+            APIResponse object containing the complete response
+        """
+        request = self._build_api_request(content, api_name, kwargs)
+        stream = self._api_service.stream_request(request)
+        while True:
+            if self.is_cancelled():
+                stream.close()
+                return APIResponse(success=False, error="Cancelled: workflow was stopped")
+            try:
+                delta = next(stream)
+            except StopIteration as done:
+                response = done.value
+                break
+            if on_token is not None:
+                try:
+                    on_token(delta)
+                except Exception as e:
+                    print(f"[{self.__class__.__name__}] Stream callback error: {e}")
+        self._log_api_usage(response, api_name, kwargs)
+        return response
+
+    def fit_prompt(self, blocks, api_name: str, **kwargs):
+        """
+        Join prompt blocks into a prompt that fits the interface's context window.
+
+        Accepts ``model``, ``max_tokens``, ``summarize`` and ``separator``; see
+        APIService.fit_prompt.  Cuts are reported in the console.
+
+        Returns:
+            services.prompt_budget.PromptFit
+        """
+        model = kwargs.pop('model', None)
+        if not isinstance(model, str) or not model.strip():
+            model = None
+        fit = self._api_service.fit_prompt(api_name, blocks, model=model, **kwargs)
+        if fit.trimmed:
+            print(f"[{self.__class__.__name__}] Prompt trimmed to fit the context window "
+                  f"({fit.tokens}/{fit.budget} tokens): "
+                  + ", ".join(f"{cut['label'] or 'block'} {cut['action']}" for cut in fit.cuts))
+        return fit
+
+    def is_cancelled(self) -> bool:
+        """True once the workflow running this node has been stopped."""
+        return self.cancel_token is not None and self.cancel_token.is_set()
+
+    def raise_if_cancelled(self):
+        """Raise WorkflowCancelled once the workflow is stopped; call before each API call in a loop."""
+        if self.is_cancelled():
+            raise WorkflowCancelled()
+
+    def _build_api_request(self, content: str, api_name: str, kwargs) -> APIRequest:
         model = kwargs.get('model')
         if not isinstance(model, str) or not model.strip():
             api_config = self.config.get('interfaces', {}).get(api_name, {})
             selected_model = api_config.get('selected_model')
             model = selected_model if isinstance(selected_model, str) else None
 
-        request = APIRequest(
+        cacheable = kwargs.get('cacheable')
+        if cacheable is None:
+            cacheable = self.properties.get('cacheable', {}).get('default', False)
+
+        return APIRequest(
             content=content,
             api_name=api_name,
             model=model,
             max_tokens=kwargs.get('max_tokens'),
             temperature=kwargs.get('temperature'),
             # Pass all other kwargs as additional_params
-            additional_params=kwargs
+            additional_params=kwargs,
+            cacheable=bool(cacheable)
         )
-        response = self._api_service.send_request(request)
-        
-        # Log token usage for all API calls
-        if response.success and hasattr(response, 'total_tokens'):
+
+    def _log_api_usage(self, response: APIResponse, api_name: str, kwargs):
+        # Log token usage for all API calls; cache hits used no tokens
+        if response.success and not response.cached and hasattr(response, 'total_tokens'):
             # Get node name from properties
             node_name = self.properties.get('node_name', {}).get('default', self.__class__.__name__)
             
@@ -100,8 +226,6 @@ class BaseNode(ABC):
 
             # Log token usage with pricing-normalized model if available
             TokenLogger.log_token_usage(node_name, api_name, pricing_model or model, token_usage)
-        
-        return response
 
     @abstractmethod
     def process(self, inputs):
@@ -158,9 +282,22 @@ class BaseNode(ABC):
             'description': {'type': 'text', 'default': 'No description provided.'},
             'Prompt': {'type': 'textarea', 'default': ''},
             'is_start_node': {'type': 'boolean', 'default': False},
-            'is_end_node': {'type': 'boolean', 'default': False}
+            'is_end_node': {'type': 'boolean', 'default': False},
+            # Reuse earlier responses to identical requests (see response_cache in config.yaml)
+            'cacheable': {'type': 'boolean', 'default': False},
+            # Overrides the node type's worker pool; empty uses the type's default
+            'worker_pool': {'type': 'dropdown', 'label': 'Worker Pool',
+                            'options': ['', 'io', 'llm', 'cpu', 'persistent'], 'default': ''}
         }
 
+    def can_run_in_process(self, inputs):
+        """
+        Whether this run can execute in a separate process (cpu pool with
+        ``worker_pools.processes`` enabled).  Nodes that need the GUI, the
+        stop event or streaming must return False.
+        """
+        return False
+
     def requires_api_call(self):
         """
         Indicates whether this node requires an API call.
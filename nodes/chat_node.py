@@ -2,6 +2,7 @@
 from .base_node import BaseNode
 from src.workflows.node_registry import register_node
 from src.database.db_tools import DatabaseManager
+from services.prompt_budget import PromptBlock, KEEP, DROP
 import tkinter as tk
 from tkinter import END, messagebox
 from tkinter import ttk
@@ -9,7 +10,6 @@ from src.export.formatting import apply_formatting
 import threading
 import re
 import os
-from src.api.handler import process_api_request
 import time
 import traceback
 
@@ -77,7 +77,7 @@ class ChatNode(BaseNode):
         return props
 
     def get_databases(self):
-        db_manager = DatabaseManager()
+        db_manager = DatabaseManager.get_shared()
         return db_manager.list_databases()
 
     def process(self, inputs):
@@ -113,7 +113,7 @@ class ChatNode(BaseNode):
         print("[ChatNode] Getting database configuration")
         database_property = self.properties.get('database', {})
         selected_database = database_property.get('value') or database_property.get('default', '')
-        db_manager = DatabaseManager()
+        db_manager = DatabaseManager.get_shared()
         self.chat_history = []
         prompt_text = (
             self.properties.get('prompt', {}).get('value')
@@ -196,7 +196,7 @@ class ChatNode(BaseNode):
             database_property = self.properties.get('database', {})
             selected_database = database_property.get('value') or database_property.get('default', '')
 
-            db_manager = DatabaseManager()
+            db_manager = DatabaseManager.get_shared()
 
             self.create_chat_window(parent_window, api_endpoint_name, selected_database, db_manager)
         except Exception as e:
@@ -555,56 +555,37 @@ class ChatNode(BaseNode):
             content: The latest user message or modified input
             api_name: Name of the API endpoint to use
         """
-        api_config = self.config['interfaces'].get(api_name, {})
-        
-        # Format the chat history for the API request
-        messages = []
-        for msg in self.chat_history:
-            messages.append({
-                'role': msg['role'],
-                'content': msg['content']
-            })
-            
-        # Convert messages to a single string with clear formatting
-        formatted_history = "\n\n".join([
-            f"{msg['role'].upper()}: {msg['content']}"
-            for msg in messages
-        ])
-        
-        # Send the formatted history to the API
-        return super().send_api_request(
-            content=formatted_history,
-            api_name=api_name,
-            **{
-                'model': api_config.get('selected_model'),
-                'max_tokens': api_config.get('max_tokens'),
-                'temperature': 0.7
-            }
-        )
+        return self.send_api_request_with_history(self.chat_history, api_name)
 
     def send_api_request_with_history(self, chat_history, api_name):
         """
-        Send the given chat history to the API endpoint
+        Send the given chat history to the API endpoint.
+
+        The oldest messages are left out when the history no longer fits the
+        model's context window; the latest message is always sent.
         Args:
             chat_history: The chat history to send
             api_name: Name of the API endpoint to use
         """
         api_config = self.config['interfaces'].get(api_name, {})
-        
-        # Format the chat history for the API request
-        messages = []
-        for msg in chat_history:
-            messages.append({
-                'role': msg['role'],
-                'content': msg['content']
-            })
-            
-        # Convert messages to a single string with clear formatting
-        formatted_history = "\n\n".join([
-            f"{msg['role'].upper()}: {msg['content']}"
-            for msg in messages
-        ])
-        
+
+        # One block per message, formatted as "ROLE: content"; older messages
+        # have lower priority so they are dropped first.
+        blocks = [
+            PromptBlock(
+                f"{msg['role'].upper()}: {msg['content']}",
+                priority=index,
+                label=f"{msg['role']} message {index + 1}",
+                shrink=KEEP if index == len(chat_history) - 1 else DROP
+            )
+            for index, msg in enumerate(chat_history)
+        ]
+        formatted_history = self.fit_prompt(
+            blocks, api_name,
+            model=api_config.get('selected_model'),
+            max_tokens=api_config.get('max_tokens')
+        ).prompt
+
         # Send the formatted history to the API
         return super().send_api_request(
             content=formatted_history,
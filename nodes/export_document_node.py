@@ -24,6 +24,7 @@ from src.workflows.node_registry import register_node
 @register_node('ExportDocumentNode')
 class ExportDocumentNode(BaseNode):
     """Node that exports input text to Word, Excel, or Text documents."""
+    worker_pool = "cpu"
     
     def define_inputs(self):
         return ['input']  # Single input for the text to export
@@ -187,6 +188,11 @@ class ExportDocumentNode(BaseNode):
             print(f"[ExportDocumentNode] {error_msg}")
             return {'output': error_msg}
     
+    def can_run_in_process(self, inputs):
+        # The save dialog needs the GUI; only exports to a configured folder qualify
+        output_folder = str(self._get_property_value('output_folder', '') or '').strip()
+        return bool(output_folder) and os.path.isdir(output_folder)
+
     def _sanitize_filename(self, filename):
         """Remove invalid characters from filename."""
         invalid_chars = '<>:"/\\|?*'
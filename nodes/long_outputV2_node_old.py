@@ -9,7 +9,6 @@ import os
 
 from .base_node import BaseNode
 from src.workflows.node_registry import register_node  # Import the decorator
-from src.api.handler import process_api_request  # Correct import
 from utils.progress_window import ProgressWindow
 from utils.array_review_window import ArrayReviewWindow
 
@@ -111,18 +110,11 @@ class LongOutputV2Node(BaseNode):
         progress_window = ProgressWindow("Processing Text", len(items))
 
         # Retrieve API details from configuration
-        api_details = self.config['interfaces'].get(api_endpoint_name)
-        if not api_details:
+        if api_endpoint_name not in self.config.get('interfaces', {}):
             print(f"[LongOutputNodeV2] API interface '{api_endpoint_name}' not found in configuration.")
             progress_window.close()
             return {"output": f"API interface '{api_endpoint_name}' not found in configuration."}
 
-        api_type = api_details.get('api_type')
-        if not api_type:
-            print(f"[LongOutputNodeV2] API type not specified for endpoint '{api_endpoint_name}'.")
-            progress_window.close()
-            return {"output": f"API type not specified for endpoint '{api_endpoint_name}'."}
-
         # Initialize responses based on output type
         responses = [] if use_array else ''
 
@@ -165,22 +157,15 @@ As a professional writer, please craft detailed content for the chapter/section
             print(f"[LongOutputNodeV2] Processing with {prompt_type} prompt")
             print(f"[LongOutputNodeV2] Prompt: {prompt}")
 
-            # Make the API call using process_api_request
-            api_response_content = process_api_request(api_details, prompt)
+            # Make the API call through the shared API service
+            response = self.send_api_request(prompt, api_endpoint_name)
 
-            if 'error' in api_response_content:
-                print(f"[LongOutputNodeV2] API Error: {api_response_content['error']}")
+            if not response.success:
+                print(f"[LongOutputNodeV2] API Error: {response.error}")
                 progress_window.close()
-                return {"output": f"API Error: {api_response_content['error']}"}
-
-            # Extract the actual response based on API type
-            if api_type == "OpenAI":
-                api_response = api_response_content.get('choices', [{}])[0].get('message', {}).get('content', '')
-            elif api_type == "Ollama":
-                message = api_response_content.get('message', {})
-                api_response = message.get('content', '') if isinstance(message, dict) else ''
-            else:
-                api_response = 'Unsupported API type.'
+                return {"output": f"API Error: {response.error}"}
+
+            api_response = response.content or ''
 
             print(f"[LongOutputNodeV2] API Response for item {i+1}: {api_response}")
 
@@ -7,7 +7,8 @@ and accumulates the responses either as a combined string or as an array of resp
 """
 from .base_node import BaseNode
 from src.workflows.node_registry import register_node  # Import the decorator
-from src.api.handler import process_api_request  # Correct import
+from services.api_service import APIResponse
+from services.token_counter import TokenCounter
 from utils.progress_window import ProgressWindow
 from utils.array_review_window import ArrayReviewWindow
 import time
@@ -196,17 +197,17 @@ if the section above starts with "(Continued)" then only include "(Continued) -
         
         return 0
 
-    def estimate_tokens(self, text):
-        """Rough estimate of tokens in text"""
-        return len(text.split()) * 1.3  # Rough estimate: 1.3 tokens per word
+    def estimate_tokens(self, text, model=None):
+        """Tokens in text for the given model"""
+        return TokenCounter.count(text, model)
 
-    def process_with_retry(self, api_details, prompt, max_retries=3, timeout=None, cooldown=None, request_delay=None):
+    def process_with_retry(self, api_name, prompt, max_retries=3, timeout=None, cooldown=None, request_delay=None):
         """Process API request with retry logic and rate limit handling"""
         import time
         for attempt in range(max_retries):
             try:
                 # Make the API call
-                response = self._make_api_call(api_details, prompt)
+                response = self._make_api_call(api_name, prompt)
                 return response
             except Exception as e:
                 print(f"[LongOutputNodeV3] Attempt {attempt + 1} failed: {str(e)}")
@@ -218,22 +219,23 @@ if the section above starts with "(Continued)" then only include "(Continued) -
                 else:
                     raise e
 
-    def _make_api_call(self, api_details, prompt):
+    def _make_api_call(self, api_name, prompt):
         """Internal method to make the actual API call"""
         try:
             # Check rate limits before making request
-            estimated_tokens = self.estimate_tokens(prompt)
+            model = self.config.get('interfaces', {}).get(api_name, {}).get('selected_model')
+            estimated_tokens = self.estimate_tokens(prompt, model)
             self.check_rate_limits(estimated_tokens)
             
             print("[LongOutputNodeV3] Making API call...")
-            response = process_api_request(api_details, prompt)
+            response = self.send_api_request(prompt, api_name)
             print("[LongOutputNodeV3] API call completed")
             
             return response
             
         except Exception as e:
             print(f"[LongOutputNodeV3] Exception in api_call: {str(e)}")
-            return {'error': str(e)}
+            return APIResponse(success=False, error=str(e))
 
     def process(self, inputs):
         print("[LongOutputNodeV3] Starting process method.")
@@ -274,8 +276,7 @@ if the section above starts with "(Continued)" then only include "(Continued) -
                 return {'prompt': [] if use_array else ''}
             
             # Get API configuration
-            api_details = self.config['interfaces'].get(api_endpoint)
-            if not api_details:
+            if api_endpoint not in self.config.get('interfaces', {}):
                 error_msg = f"API interface '{api_endpoint}' not found in configuration"
                 print(f"[LongOutputNodeV3] Error: {error_msg}")
                 return {'prompt': error_msg}
@@ -339,23 +340,15 @@ if the section above starts with "(Continued)" then only include "(Continued) -
                         prompt_type = "middle"
                     
                     # Make the API call with retry logic
-                    api_response = self.process_with_retry(api_details, prompt, max_retries=3, timeout=30, cooldown=60, request_delay=1)
-                    if 'error' in api_response:
-                        error_msg = api_response['error']
+                    api_response = self.process_with_retry(api_endpoint, prompt, max_retries=3, timeout=30, cooldown=60, request_delay=1)
+                    if not api_response.success:
+                        error_msg = api_response.error
                         print(f"[LongOutputNodeV3] API Error: {error_msg}")
                         if use_array:
                             return {'prompt': [f'[ERROR]: {error_msg}']}
                         return {'prompt': f'[ERROR]: {error_msg}'}
                     
-                    # Extract the response based on API type
-                    api_type = api_details.get('api_type', 'OpenAI')
-                    if api_type == "OpenAI":
-                        response_text = api_response.get('choices', [{}])[0].get('message', {}).get('content', '')
-                    elif api_type == "Ollama":
-                        message = api_response.get('message', {})
-                        response_text = message.get('content', '') if isinstance(message, dict) else ''
-                    else:
-                        response_text = 'Unsupported API type.'
+                    response_text = api_response.content or ''
                     
                     print(f"[LongOutputNodeV3] API Response for item {i+1}: {response_text[:100]}...")
                     
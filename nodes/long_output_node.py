@@ -8,7 +8,6 @@ and accumulates the responses by appending each new response to the previous one
 from .base_node import BaseNode
 import os
 from src.workflows.node_registry import register_node  # Import the decorator
-from src.api.handler import process_api_request  # Correct import
 
 @register_node('LongOutputNode')
 class LongOutputNode(BaseNode):
@@ -91,16 +90,10 @@ class LongOutputNode(BaseNode):
             return {"output": "No valid items found in input."}
 
         # Retrieve API details from configuration
-        api_details = self.config['interfaces'].get(api_endpoint_name)
-        if not api_details:
+        if api_endpoint_name not in self.config.get('interfaces', {}):
             print(f"[LongOutputNode] API interface '{api_endpoint_name}' not found in configuration.")
             return {"output": f"API interface '{api_endpoint_name}' not found."}  # Or handle as error
 
-        api_type = api_details.get('api_type')
-        if not api_type:
-            print(f"[LongOutputNode] API type not specified for endpoint '{api_endpoint_name}'.")
-            return {"output": f"API type not specified for endpoint '{api_endpoint_name}'."}
-
         # Initialize combined_response and last_response
         combined_response = ''
         last_response = ''
@@ -119,21 +112,14 @@ class LongOutputNode(BaseNode):
 
             print(f"[LongOutputNode] Sending to API: {prompt}")
 
-            # Make the API call using process_api_request
-            api_response_content = process_api_request(api_details, prompt)
+            # Make the API call through the shared API service
+            response = self.send_api_request(prompt, api_endpoint_name)
 
-            if 'error' in api_response_content:
-                print(f"[LongOutputNode] API Error: {api_response_content['error']}")
-                return {"output": f"API Error: {api_response_content['error']}"}
+            if not response.success:
+                print(f"[LongOutputNode] API Error: {response.error}")
+                return {"output": f"API Error: {response.error}"}
 
-            # Extract the actual response based on API type
-            if api_type == "OpenAI":
-                api_response = api_response_content.get('choices', [{}])[0].get('message', {}).get('content', '')
-            elif api_type == "Ollama":
-                message = api_response_content.get('message', {})
-                api_response = message.get('content', '') if isinstance(message, dict) else ''
-            else:
-                api_response = 'Unsupported API type.'
+            api_response = response.content or ''
 
             print(f"[LongOutputNode] API Response: {api_response}")
 
@@ -5,20 +5,22 @@ LongOutputV4Node: Enhanced version of LongOutputV3Node with additional features:
 - Rate limiting and retry logic for API calls
 - Progress tracking during processing
 - Final array review window after processing completes
+- Optional batch mode that submits all items as one provider batch
 """
 from .base_node import BaseNode
+from src.workflows.cancellation import WorkflowCancelled
 from src.workflows.node_registry import register_node
+from services.token_counter import TokenCounter
 from utils.progress_window import ProgressWindow
 from utils.array_review_window import ArrayReviewWindow
 import tkinter as tk
 from tkinter import ttk
 import requests
 from bs4 import BeautifulSoup
-import time
 import os
-from src.api.handler import process_api_request
 import sys
 import os
+import threading
 
 # Import the SearchScrapeSummarizeNode for web search functionality
 from .SearchScrapeSummarize import SearchScrapeSummarizeNode
@@ -329,20 +331,8 @@ class LongOutputV4Node(BaseNode):
         # Call parent's init first to set up properties
         super().__init__(node_id=node_id, config=config)
         
-        # Update rate limits based on actual API limits
-        self.rpm_limit = 100  # Requests per minute
-        self.rph_limit = 5000  # Requests per hour
-        self.tpm_limit = 1000000  # Tokens per minute
-        
-        # Tracking variables
-        self.request_times = []
-        self.hourly_requests = []
-        self.token_counts = []
-        
-        # Timing configuration
-        self.default_timeout = 30
-        self.default_cooldown = 60
-        self.min_request_delay = 1
+        # Rate limits and retries are handled per interface by APIService
+        # (RateLimiter, RetryPolicy, CircuitBreaker), configured in config.yaml.
 
     def define_inputs(self):
         return ['input']  # Input from the previous node
@@ -369,6 +359,12 @@ class LongOutputV4Node(BaseNode):
                 'default': 10,
                 'description': 'Number of items to process in each chunk'
             },
+            'batch_mode': {
+                'type': 'boolean',
+                'default': False,
+                'description': 'Submit all items as one provider batch (OpenAI/Claude). Cheaper for long jobs, '
+                               'but items are written without the previous section as context and results can take hours'
+            },
             'Instructions for how to processthe first element in the array': {
                 'type': 'textarea',
                 'default': 'Please just repeat the title content below exactly and nothing else:\n\n',
@@ -443,127 +439,90 @@ if the section above starts with "(Continued)" then only include "(Continued) -
             print(f"[LongOutputNodeV4] Available API endpoints: {api_list}")  # Debug statement
         return api_list
 
-    def check_rate_limits(self, prompt_tokens=0):
-        """Check and wait for rate limits if necessary"""
-        current_time = time.time()
-        minute_ago = current_time - 60
-        hour_ago = current_time - 3600
-        
-        # Clean up old entries
-        self.request_times = [t for t in self.request_times if t > minute_ago]
-        self.token_counts = self.token_counts[-len(self.request_times):]
-        self.hourly_requests = [t for t in self.hourly_requests if t > hour_ago]
-        
-        # Only wait if we're very close to limits
-        if len(self.hourly_requests) >= self.rph_limit * 0.95:  # 95% of limit
-            wait_time = self.hourly_requests[0] - hour_ago
-            if wait_time > 0:
-                print(f"[LongOutputNodeV4] Close to hourly limit ({len(self.hourly_requests)}/{self.rph_limit}). Waiting {wait_time:.1f}s...")
-                time.sleep(wait_time)
-        
-        if len(self.request_times) >= self.rpm_limit * 0.95:  # 95% of limit
-            wait_time = self.request_times[0] - minute_ago
-            if wait_time > 0:
-                print(f"[LongOutputNodeV4] Close to minute limit ({len(self.request_times)}/{self.rpm_limit}). Waiting {wait_time:.1f}s...")
-                time.sleep(wait_time)
-        
-        # Check TPM (tokens per minute)
-        current_tpm = sum(self.token_counts)
-        if current_tpm + prompt_tokens > self.tpm_limit * 0.95:  # 95% of limit
-            wait_time = 60 * ((current_tpm + prompt_tokens - self.tpm_limit) / self.tpm_limit)
-            print(f"[LongOutputNodeV4] Close to token limit ({current_tpm}/{self.tpm_limit}). Waiting {wait_time:.1f}s...")
-            time.sleep(wait_time)
-        
-        # Update tracking
-        current_time = time.time()
-        self.request_times.append(current_time)
-        self.hourly_requests.append(current_time)
-        self.token_counts.append(prompt_tokens)
-
-    def estimate_tokens(self, text):
-        """Rough estimate of tokens in text"""
-        if not text:
-            return 0
-        # Very rough estimate: 1 token ≈ 4 characters
-        return len(text) // 4
-
-    def process_with_retry(self, api_name, prompt, max_tokens=None, max_retries=3, timeout=None, cooldown=None, request_delay=None):
-        """Process API request with retry logic and rate limit handling"""
-        print(f"[LongOutputNodeV4] Processing API request with {max_retries} retries")
-        
-        timeout = timeout or self.default_timeout
-        cooldown = cooldown or self.default_cooldown
-        request_delay = request_delay or self.min_request_delay
-        
-        for attempt in range(max_retries):
-            try:
-                # Check rate limits before making request
-                self.check_rate_limits(self.estimate_tokens(prompt))
-                
-                # Use the API service from BaseNode instead of direct process_api_request
-                api_response = self.send_api_request(
-                    content=prompt,
-                    api_name=api_name,
-                    model=self.config['interfaces'][api_name].get('selected_model'),
-                    max_tokens=max_tokens
-                )
-                
-                if not api_response.success:
-                    raise Exception(f"API request failed: {api_response.error}")
-                
-                # Return the content directly
-                return api_response.content
-                
-            except Exception as e:
-                print(f"[LongOutputNodeV4] Error in API request (attempt {attempt+1}/{max_retries}): {str(e)}")
-                
-                if attempt < max_retries - 1:
-                    # Calculate backoff time (exponential backoff with jitter)
-                    import random
-                    backoff_time = min(cooldown, (2 ** attempt) * request_delay * (0.5 + random.random()))
-                    print(f"[LongOutputNodeV4] Retrying in {backoff_time:.2f} seconds...")
-                    time.sleep(backoff_time)
-                else:
-                    print("[LongOutputNodeV4] Max retries reached, giving up")
-                    return None
-        
-        return None
+    def estimate_tokens(self, text, model=None):
+        """Tokens in text for the given model"""
+        return TokenCounter.count(text, model)
+
+    def process_with_retry(self, api_name, prompt, max_tokens=None):
+        """Send an API request; APIService retries transient failures and applies the circuit breaker"""
+        api_response = self.send_api_request(
+            content=prompt,
+            api_name=api_name,
+            model=self.config['interfaces'][api_name].get('selected_model'),
+            max_tokens=max_tokens
+        )
+
+        if not api_response.success:
+            print(f"[LongOutputNodeV4] Error in API request: {api_response.error}")
+            return None
+
+        # Return the content directly
+        return api_response.content
+
+    def build_item_prompt(self, i, item, items, input_text, previous_response=""):
+        """Build the prompt for item *i* from the node's templates"""
+        if i == 0:
+            return self.get_property('Instructions for how to processthe first element in the array', '') + str(item)
+
+        # Build context section - only include the first item (title) and the current item for context
+        context = self.get_property('Instructions for how to process the Original user request and original content', '')
+        if isinstance(input_text, str):
+            # Extract just the title (first paragraph) from input_text
+            title = input_text.split('\n\n')[0] if '\n\n' in input_text else input_text
+            context += title + "\n\n"
+        else:
+            # If input_text is an array, use the first item as title
+            context += str(input_text[0]) + "\n\n"
+
+        # Static instruction section
+        instructions = self.get_property('Main instructions for array element to focus on', '')
+
+        # Section with current item
+        section = self.get_property('Instructions for how the AI should use the next array element for context', '') + str(item) + "\n\n"
+
+        # Formatting instructions
+        formatting = self.get_property('Instructions for custom formatting', '')
+
+        # Combine all parts
+        return context + previous_response + instructions + section + formatting
+
+    def process_batch(self, items, input_text, api_endpoint, max_tokens, progress_window):
+        """
+        Submit every item as one provider-side batch.
+
+        Items are written independently, so unlike the serial path a prompt
+        does not include the previous item's response.  Returns the responses
+        in item order, an error message string, or None if cancelled.
+        """
+        indexed = [(i, item) for i, item in enumerate(items) if item and str(item).strip()]
+        prompts = [self.build_item_prompt(i, item, items, input_text) for i, item in indexed]
+        cancel_event = threading.Event()
+
+        def on_progress(finished, total):
+            if progress_window.is_cancelled() or self.is_cancelled():
+                cancel_event.set()
+            progress_window.update_progress(finished, f"Batch of {total} items: {finished} done")
+
+        print(f"[LongOutputNodeV4] Submitting {len(prompts)} items as a batch to {api_endpoint}")
+        api_responses = self.send_api_batch(
+            prompts,
+            api_endpoint,
+            on_progress=on_progress,
+            cancel_event=cancel_event,
+            model=self.config['interfaces'][api_endpoint].get('selected_model'),
+            max_tokens=max_tokens
+        )
+        if self.is_cancelled():
+            progress_window.close()
+        self.raise_if_cancelled()
+        if cancel_event.is_set():
+            return None
+        failed = [(i, r.error) for (i, _), r in zip(indexed, api_responses) if not r.success]
+        if failed:
+            print(f"[LongOutputNodeV4] Error: {len(failed)} batch item(s) failed, first: item {failed[0][0] + 1}: {failed[0][1]}")
+            return f"Batch request failed for {len(failed)} item(s): {failed[0][1]}"
+        return [r.content for r in api_responses]
 
-    def adjust_rate_limits_from_response(self, response):
-        """Adjust rate limits based on API response headers"""
-        if 'rate_limits' in response:
-            limits = response['rate_limits']
-            
-            # Log current limits
-            print("\n[LongOutputNodeV4] Current API Rate Limits:")
-            for key, value in limits.items():
-                if value is not None:
-                    print(f"[LongOutputNodeV4] {key}: {value}")
-            
-            # Update our limits if we get new information
-            remaining_requests = limits.get('x-ratelimit-remaining-requests')
-            reset_requests = limits.get('x-ratelimit-reset-requests')
-            remaining_tokens = limits.get('x-ratelimit-remaining-tokens')
-            reset_tokens = limits.get('x-ratelimit-reset-tokens')
-            
-            if remaining_requests is not None and remaining_requests.isdigit():
-                remaining = int(remaining_requests)
-                if remaining < 10:  # If we're running low on requests
-                    print(f"[LongOutputNodeV4] Warning: Only {remaining} requests remaining!")
-                    if reset_requests and reset_requests.isdigit():
-                        wait_time = int(reset_requests)
-                        print(f"[LongOutputNodeV4] Rate limit will reset in {wait_time} seconds")
-                        return wait_time
-            
-            if remaining_tokens is not None and remaining_tokens.isdigit():
-                remaining = int(remaining_tokens)
-                if remaining < 1000:  # If we're running low on tokens
-                    print(f"[LongOutputNodeV4] Warning: Only {remaining} tokens remaining!")
-                    if reset_tokens and reset_tokens.isdigit():
-                        wait_time = int(reset_tokens)
-                        print(f"[LongOutputNodeV4] Token limit will reset in {wait_time} seconds")
-                        return wait_time
-        
     def process(self, inputs):
         print("[LongOutputNodeV4] Starting process method.")
         
@@ -572,13 +531,7 @@ if the section above starts with "(Continued)" then only include "(Continued) -
         use_array = self.get_property('use_array', False)
         chunk_size = int(self.get_property('chunk_size', 10))
         api_endpoint = self.get_property('api_endpoint', '')
-        
-        # Get prompt templates from properties
-        first_element_template = self.get_property('Instructions for how to processthe first element in the array', '')
-        context_template = self.get_property('Instructions for how to process the Original user request and original content', '')
-        instruction_template = self.get_property('Main instructions for array element to focus on', '')
-        section_template = self.get_property('Instructions for how the AI should use the next array element for context', '')
-        formatting_template = self.get_property('Instructions for custom formatting', '')
+        batch_mode = self.get_property('batch_mode', False)
         
         if not input_text:
             return {'prompt': [] if use_array else ''}
@@ -606,6 +559,22 @@ if the section above starts with "(Continued)" then only include "(Continued) -
         # Process items directly without initial review
         # Create progress window for API processing
         progress_window = ProgressWindow(len(items))
+
+        if batch_mode:
+            result = self.process_batch(items, input_text, api_endpoint, max_tokens, progress_window)
+            progress_window.close()
+            if result is None:
+                print("[LongOutputNodeV4] Batch processing cancelled by user")
+                return {'prompt': ['Processing cancelled by user'] if use_array else 'Processing cancelled by user'}
+            if isinstance(result, str):
+                return {'prompt': [f'[ERROR]: {result}'] if use_array else f'[ERROR]: {result}'}
+            if not use_array:
+                return {'prompt': '\n\n'.join(result)}
+            reviewed_responses = ArrayReviewWindow(result).show()
+            if reviewed_responses is None:
+                print("[LongOutputNodeV4] User cancelled during final review")
+                return {'prompt': []}
+            return {'prompt': reviewed_responses}
         
         # Initialize responses array or string
         if use_array:
@@ -640,6 +609,7 @@ if the section above starts with "(Continued)" then only include "(Continued) -
                                 partial_responses = [r.strip() for r in partial_content.split('---CHAPTER_BREAK---') if r.strip()]
                                 return {'prompt': partial_responses if partial_responses else ['Processing cancelled by user']}
                         return {'prompt': 'Processing cancelled by user' if not use_array else ['Processing cancelled by user']}
+                    self.raise_if_cancelled()
                     
                     # Show progress with current item number and first line of content
                     first_line = str(item).split('\n')[0] if item else ''
@@ -654,52 +624,7 @@ if the section above starts with "(Continued)" then only include "(Continued) -
                         continue
                     
                     # Format the prompt with the current item
-                    if i == 0:
-                        prompt = first_element_template + str(item)
-                    elif i == len(items) - 1:
-                        # Build context section - only include the first item (title) and the current item for context
-                        context = context_template
-                        if isinstance(input_text, str):
-                            # Extract just the title (first paragraph) from input_text
-                            title = input_text.split('\n\n')[0] if '\n\n' in input_text else input_text
-                            context += title + "\n\n"
-                        else:
-                            # If input_text is an array, use the first item as title
-                            context += str(input_text[0]) + "\n\n"
-                        
-                        # Static instruction section
-                        instructions = instruction_template
-                        
-                        # Section with current item
-                        section = section_template + str(item) + "\n\n"
-                        
-                        # Formatting instructions
-                        formatting = formatting_template
-                        
-                        # Combine all parts
-                        prompt = context + previous_response + instructions + section + formatting
-                    else:
-                        # Build context section - only include the first item (title) and the current item for context
-                        context = context_template
-                        if isinstance(input_text, str):
-                            # Extract just the title (first paragraph) from input_text
-                            title = input_text.split('\n\n')[0] if '\n\n' in input_text else input_text
-                            context += title + "\n\n"
-                        else:
-                            # If input_text is an array, use the first item as title
-                            context += str(input_text[0]) + "\n\n"
-                        
-                        # Static instruction section
-                        instructions = instruction_template
-                        
-                        # Section with current item
-                        section = section_template + str(item) + "\n\n"
-                        
-                        # Formatting instructions
-                        formatting = formatting_template
-                        
-                        # Combine all parts
-                        prompt = context + previous_response + instructions + section + formatting
+                    prompt = self.build_item_prompt(i, item, items, input_text, previous_response)
                     
                     # Make the API call
                     api_response = self.process_with_retry(api_endpoint, prompt, max_tokens=max_tokens)
@@ -791,7 +716,11 @@ if the section above starts with "(Continued)" then only include "(Continued) -
                 return {'prompt': reviewed_responses}
             else:
                 return {'prompt': responses}
-                
+
+        except WorkflowCancelled:
+            print("[LongOutputNodeV4] Workflow stopped")
+            progress_window.close()
+            raise
         finally:
             # Clean up temp file if it exists
             if temp_file:
@@ -3022,33 +3022,19 @@ class MasterAgentNode(AssistantNode):
                 return {"text": reply, "files": output_files}
 
             # 5. Delete the documents by doc_id
-            deleted_count = 0
             documents = manager._load_documents_index(db_name)
-            chunk_metadata = manager._load_chunk_metadata(db_name)
-
             for doc_id in doc_ids_to_delete:
                 # Find the document source name for logging
                 doc_record = next(
                     (d for d in documents if d.get("doc_id") == doc_id), None
                 )
                 source_name = doc_record.get("source", doc_id) if doc_record else doc_id
+                self.update_log(f"[Deletion] Removing doc_id={doc_id} ({source_name})")
 
-                # Remove from documents index and chunk metadata
-                orig_doc_count = len(documents)
-                orig_chunk_count = len(chunk_metadata)
-                documents = [d for d in documents if d.get("doc_id") != doc_id]
-                chunk_metadata = [c for c in chunk_metadata if c.get("doc_id") != doc_id]
-
-                if len(documents) < orig_doc_count or len(chunk_metadata) < orig_chunk_count:
-                    deleted_count += 1
-                    self.update_log(f"[Deletion] Removed doc_id={doc_id} ({source_name})")
+            delete_result = manager.delete_documents_by_id(db_name, list(doc_ids_to_delete))
+            deleted_count = delete_result.get("documents_removed", 0) if delete_result.get("success") else 0
 
             if deleted_count > 0:
-                # Save updated indexes and rebuild FAISS
-                manager._save_documents_index(db_name, documents)
-                manager._save_chunk_metadata(db_name, chunk_metadata)
-                manager._rebuild_faiss_index(db_name, chunk_metadata)
-
                 previews_str = "\n".join(deleted_previews[:5])
                 reply = (
                     f"Done! I've removed {deleted_count} entry/entries from my database:\n\n"
@@ -4503,8 +4489,8 @@ class MasterAgentNode(AssistantNode):
             return None
 
     def _get_db_manager(self):
-        """Get or create a DatabaseManager instance and ensure the DB exists."""
-        manager = DatabaseManager()
+        """Get the shared DatabaseManager instance and ensure the DB exists."""
+        manager = DatabaseManager.get_shared()
         db_name = self._get_db_name()
         manager.ensure_database(db_name)
         return manager, db_name
@@ -4513,14 +4499,17 @@ class MasterAgentNode(AssistantNode):
         """Query the RAG database for relevant existing knowledge."""
         try:
             manager, db_name = self._get_db_manager()
-            results = manager.search(db_name, message, top_k=5)
+            # Embed once; the vector is reused for the cross-database lookup.
+            query_vectors = manager.embed_queries([message])
+            results = manager.search_many([message], [db_name], top_k=5, query_vectors=query_vectors)[db_name][0]
             if not results:
                 # Also search all available databases for cross-workflow knowledge
-                all_dbs = manager.list_databases()
-                for other_db in all_dbs:
-                    if other_db == db_name:
-                        continue
-                    other_results = manager.search(other_db, message, top_k=3)
+                other_dbs = [other_db for other_db in manager.list_databases() if other_db != db_name]
+                other_hits = manager.search_many(
+                    [message], other_dbs, top_k=3, query_vectors=query_vectors, max_workers=4
+                )
+                for other_db in other_dbs:
+                    other_results = other_hits[other_db][0]
                     if other_results:
                         results.extend(other_results)
                     if len(results) >= 5:
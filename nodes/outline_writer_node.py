@@ -1,6 +1,5 @@
 from .base_node import BaseNode
 from src.workflows.node_registry import register_node
-from src.api.handler import process_api_request
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QTextEdit, 
                            QPushButton, QCheckBox, QApplication,
                            QMenu, QSizePolicy, QFileDialog, QMessageBox)
@@ -270,30 +269,14 @@ class OutlineWriterNode(BaseNode):
             if not selected_api:
                 return "No API endpoint selected."
             
-            api_details = self.config['interfaces'].get(selected_api, {})
-            if not api_details:
+            if selected_api not in self.config.get('interfaces', {}):
                 return "API details not found for the selected endpoint."
             
-            # Use process_api_request instead of send_to_api
-            api_response_content = process_api_request(api_details, prompt)
-            
-            # Extract the actual response based on API type
-            api_type = api_details.get('api_type')
-            if api_type == "OpenAI":
-                response = api_response_content.get('choices', [{}])[0].get('message', {}).get('content', 'No response available')
-            elif api_type == "Ollama":
-                if isinstance(api_response_content, dict):
-                    message = api_response_content.get('message', {})
-                    response = message.get('content', 'No response available')
-                elif isinstance(api_response_content, str):
-                    response = api_response_content
-                else:
-                    response = 'No response available'
-            else:
-                response = 'Unsupported API type.'
-                print(f"[OutlineWriterNode] Unsupported API type: {api_type}")
-            
-            return response
+            api_response = self.send_api_request(prompt, selected_api)
+            if not api_response.success:
+                print(f"[OutlineWriterNode] API Error: {api_response.error}")
+                return f"API Error: {api_response.error}"
+            return api_response.content or 'No response available'
             
         except Exception as e:
             print(f"Error in process_with_api: {str(e)}")
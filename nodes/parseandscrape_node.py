@@ -30,6 +30,7 @@ class ParseAndScrapeNode(BaseNode):
     - Replaces URLs in the original text with scraped content
     - Outputs the final combined text
     """
+    worker_pool = "io"
 
     def define_inputs(self):
         return ['input']  # Single input for the user prompt
@@ -6,7 +6,6 @@ import unicodedata
 import os
 from .base_node import BaseNode
 from src.workflows.node_registry import register_node
-from src.api.handler import process_api_request
 
 @register_node('ReviewNode')
 class ReviewNode(BaseNode):
@@ -115,28 +114,18 @@ class ReviewNode(BaseNode):
         print(f"[ReviewNode] Search Term: '{search_term}'")
 
         # Retrieve API details from configuration
-        api_details = self.config.get('interfaces', {}).get(api_endpoint_name)
-        if not api_details:
+        if api_endpoint_name not in self.config.get('interfaces', {}):
             print(f"[ReviewNode] API interface '{api_endpoint_name}' not found in configuration.")
             return {"output_true": f"API interface '{api_endpoint_name}' not found.", "output_false": f"API interface '{api_endpoint_name}' not found."}
 
-        # Make the API call using process_api_request
-        api_response_content = process_api_request(api_details, combined_prompt)
-
-        if 'error' in api_response_content:
-            print(f"[ReviewNode] API Error: {api_response_content['error']}")
-            return {"output_true": f"API Error: {api_response_content['error']}", "output_false": f"API Error: {api_response_content['error']}"}
-
-        # Extract the actual response based on API type
-        api_type = api_details.get('api_type')
-        print(f"[ReviewNode] API Type: {api_type}")
-        if api_type == "OpenAI":
-            api_response = api_response_content.get('choices', [{}])[0].get('message', {}).get('content', 'No response available')
-        elif api_type == "Ollama":
-            message = api_response_content.get('message', {})
-            api_response = message.get('content', '') if isinstance(message, dict) else 'No response available'
-        else:
-            api_response = 'Unsupported API type.'
+        # Make the API call through the shared API service
+        response = self.send_api_request(combined_prompt, api_endpoint_name)
+
+        if not response.success:
+            print(f"[ReviewNode] API Error: {response.error}")
+            return {"output_true": f"API Error: {response.error}", "output_false": f"API Error: {response.error}"}
+
+        api_response = response.content or 'No response available'
 
         print(f"[ReviewNode] Raw API Response: {api_response}")
 
@@ -25,6 +25,7 @@ from src.workflows.node_registry import register_node
 
 @register_node('SearchAndScrapeNode')
 class SearchAndScrapeNode(BaseNode):
+    worker_pool = "io"
 
     def define_inputs(self):
         return ['input']  # 'input' will be used for the user input
@@ -17,6 +17,8 @@ from src.database.db_tools import DatabaseManager
 from src.workflows.node_registry import NODE_REGISTRY, get_node_catalog
 from .agent_comms_channel_node import get_channel
 from .worker_agent_node import WorkerAgentNode
+from services.prompt_budget import PromptBlock, KEEP, compact_json
+from services.rate_limiter import concurrency_limit
 
 
 def _safe_db_name(workflow_name: str) -> str:
@@ -155,38 +157,45 @@ class TeamLeadNode(BaseNode):
             query = ' '.join(p for p in parts if p)
         queries = payload.get('queries') or ([] if not query else [query])
 
-        manager = DatabaseManager()
+        manager = DatabaseManager.get_shared()
         manager.ensure_database(db_name)
         all_dbs = manager.list_databases()
         research = []
+        # Embed every query (and the focused excerpt of long ones, which avoids
+        # embedding dilution from verbose task descriptions) in one batch.
+        queries = [q for q in queries if q]
+        focused = {q: q[:200].rsplit(' ', 1)[0] for q in queries if len(q) > 200}
+        batch = queries + list(focused.values())
+        batch_vectors = manager.embed_queries(batch) if batch else []
+        vectors = dict(zip(batch, batch_vectors))
+        batch_results = manager.search_many(batch, [db_name], top_k=top_k, query_vectors=batch_vectors)[db_name] if batch else []
+        found = dict(zip(batch, batch_results))
+        other_dbs = [other_db for other_db in all_dbs if other_db != db_name]
         for q in queries:
             if q:
-                db_results = manager.search(db_name, q, top_k=top_k)
-                # For long queries, also search with a focused excerpt
-                # to avoid embedding dilution from verbose task descriptions
-                if len(q) > 200:
-                    focused_q = q[:200].rsplit(' ', 1)[0]
-                    extra = manager.search(db_name, focused_q, top_k=max(2, top_k // 2))
+                db_results = list(found.get(q, []))
+                if q in focused:
                     seen_ids = {r.get('chunk_id') for r in db_results if r.get('chunk_id')}
-                    for r in extra:
+                    for r in found.get(focused[q], [])[:max(2, top_k // 2)]:
                         if r.get('chunk_id') not in seen_ids:
                             db_results.append(r)
                             seen_ids.add(r.get('chunk_id'))
                 # Search other databases for cross-workflow historical knowledge
                 if len(db_results) < top_k:
                     remaining = top_k - len(db_results)
-                    for other_db in all_dbs:
-                        if other_db == db_name:
-                            continue
-                        try:
-                            other_results = manager.search(other_db, q, top_k=min(remaining, 3))
-                            if other_results:
-                                db_results.extend(other_results)
-                                remaining = top_k - len(db_results)
-                            if remaining <= 0:
-                                break
-                        except Exception:
-                            pass
+                    try:
+                        other_hits = manager.search_many(
+                            [q], other_dbs, top_k=min(remaining, 3), query_vectors=[vectors.get(q)], max_workers=4
+                        )
+                    except Exception:
+                        other_hits = {}
+                    for other_db in other_dbs:
+                        other_results = other_hits.get(other_db, [[]])[0]
+                        if other_results:
+                            db_results.extend(other_results)
+                            remaining = top_k - len(db_results)
+                        if remaining <= 0:
+                            break
                 research.append({
                     'query': q,
                     'results': db_results
@@ -364,23 +373,6 @@ class TeamLeadNode(BaseNode):
             instruction = ' '.join(p for p in parts if p)
         if not instruction:
             return None
-        context_blocks = []
-        # Include submitted file contents so the LLM has the actual
-        # document text (passed through from the MCA delegation).
-        file_contents = payload.get('file_contents') or []
-        if file_contents:
-            context_blocks.append(
-                "--- SUBMITTED FILE CONTENTS ---\n"
-                + "\n\n".join(file_contents)
-                + "\n--- END OF SUBMITTED FILES ---"
-            )
-        if research:
-            context_blocks.append(f"Research Results:\n{json.dumps(research, indent=2)}")
-        if tool_results:
-            context_blocks.append(f"Tool Results:\n{json.dumps(tool_results, indent=2)}")
-        if worker_results:
-            context_blocks.append(f"Worker Results:\n{json.dumps(worker_results, indent=2)}")
-        context_text = "\n\n".join(context_blocks)
         from datetime import datetime as _dt
         _now = _dt.now()
         _date_str = _now.strftime('%A, %B %d, %Y')
@@ -400,8 +392,6 @@ class TeamLeadNode(BaseNode):
             "If tool_results or worker_results include web data, incorporate that data fully. "
             "Do NOT just repeat RAG data when fresh web search results are available."
         )
-        base_prompt = instruction if payload.get('llm_prompt') else f"{instruction}\n\n{context_text}".strip()
-        prompt = f"{guidance}\n\n{base_prompt}".strip()
         api_endpoint = self._resolve_llm_endpoint()
         if not api_endpoint:
             return None
@@ -413,6 +403,33 @@ class TeamLeadNode(BaseNode):
             self.properties.get('llm_temperature', {}).get('value')
             or self.properties.get('llm_temperature', {}).get('default')
         )
+        blocks = [
+            PromptBlock(guidance, label="guidance", shrink=KEEP),
+            PromptBlock(instruction, label="instruction", shrink=KEEP),
+        ]
+        if not payload.get('llm_prompt'):
+            # Include submitted file contents so the LLM has the actual
+            # document text (passed through from the MCA delegation).
+            # When the context does not fit, stale RAG data goes first and
+            # the submitted documents last.
+            file_contents = payload.get('file_contents') or []
+            if file_contents:
+                blocks.append(PromptBlock(
+                    "--- SUBMITTED FILE CONTENTS ---\n"
+                    + "\n\n".join(file_contents)
+                    + "\n--- END OF SUBMITTED FILES ---",
+                    priority=3, label="file contents"
+                ))
+            if research:
+                blocks.append(PromptBlock(f"Research Results:\n{compact_json(research)}",
+                                          priority=0, label="research results"))
+            if tool_results:
+                blocks.append(PromptBlock(f"Tool Results:\n{compact_json(tool_results)}",
+                                          priority=1, label="tool results"))
+            if worker_results:
+                blocks.append(PromptBlock(f"Worker Results:\n{compact_json(worker_results)}",
+                                          priority=2, label="worker results"))
+        prompt = self.fit_prompt(blocks, api_endpoint, model=model).prompt
         response = self.send_api_request(prompt, api_endpoint, model=model or None, temperature=temperature)
         if response.success:
             return response.content
@@ -1094,6 +1111,9 @@ class TeamLeadNode(BaseNode):
 
         def worker_loop():
             while True:
+                # Leave queued tasks unstarted once the workflow is stopped
+                if self.is_cancelled():
+                    return
                 try:
                     task_id, worker_id, task_payload = task_queue.get_nowait()
                 except queue.Empty:
@@ -1140,14 +1160,18 @@ class TeamLeadNode(BaseNode):
                 finally:
                     task_queue.task_done()
 
+        # Workers pull from the shared queue, one thread per concurrency slot of
+        # the worker LLM interface: fewer would hold throughput below what the
+        # provider accepts, more would only wait on RateLimiter.
         threads = []
-        for _ in range(len(tasks)):
+        for _ in range(min(len(tasks), self._get_max_parallel_workers())):
             thread = threading.Thread(target=worker_loop, daemon=True)
             thread.start()
             threads.append(thread)
 
         for thread in threads:
             thread.join()
+        self.raise_if_cancelled()
 
         completed = sum(1 for entry in task_statuses if entry['status'] == 'completed')
         errors = sum(1 for entry in task_statuses if entry['status'] == 'error')
@@ -1160,10 +1184,15 @@ class TeamLeadNode(BaseNode):
 
         return results, task_statuses, completion_summary
 
+    def _get_max_parallel_workers(self) -> int:
+        api_config = (self.config.get('interfaces') or {}).get(self._resolve_llm_endpoint()) or {}
+        return concurrency_limit(api_config)
+
     def _run_worker_task(self, task_payload: Dict[str, Any], worker_id: str,
                          channel_id: str | None, workflow_name: str,
                          inbox_folder: str, outbox_folder: str) -> Dict[str, Any]:
         worker = WorkerAgentNode(node_id=f"worker_{worker_id}", config=self.config)
+        worker.cancel_token = self.cancel_token
         worker.properties.setdefault('agent_id', {'type': 'text', 'default': worker_id})
         worker.properties['agent_id']['value'] = worker_id
         llm_endpoint = self._resolve_llm_endpoint()
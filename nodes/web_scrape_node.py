@@ -10,6 +10,7 @@ from tkinter import simpledialog, messagebox
 
 @register_node('WebScrapingNode')
 class WebScrapingNode(BaseNode):
+    worker_pool = "io"
 
     def define_inputs(self):
         return ['input']  # User input for URLs as string or list
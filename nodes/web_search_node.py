@@ -4,6 +4,7 @@ from src.workflows.node_registry import register_node
 
 @register_node('WebSearchNode')
 class WebSearchNode(BaseNode):
+    worker_pool = "io"
 
     def define_inputs(self):
         return ['input']  # User input for search query
@@ -12,6 +12,7 @@ from src.workflows.node_registry import register_node
 from src.database.db_tools import DatabaseManager
 from src.workflows.node_registry import NODE_REGISTRY, get_node_catalog
 from .agent_comms_channel_node import get_channel
+from services.prompt_budget import PromptBlock, KEEP, compact_json
 
 
 def _safe_db_name(workflow_name: str) -> str:
@@ -137,29 +138,36 @@ class WorkerAgentNode(BaseNode):
         if tool_results:
             payload['tool_results'] = tool_results
 
-        manager = DatabaseManager()
+        manager = DatabaseManager.get_shared()
         manager.ensure_database(db_name)
-        results = manager.search(db_name, query, top_k=top_k) if query else []
-
-        # For long queries, also search with a focused excerpt
-        # to avoid embedding dilution from verbose task descriptions
-        if query and len(query) > 200:
-            focused_q = query[:200].rsplit(' ', 1)[0]
-            extra = manager.search(db_name, focused_q, top_k=max(2, top_k // 2))
-            seen_ids = {r.get('chunk_id') for r in results if r.get('chunk_id')}
-            for r in extra:
-                if r.get('chunk_id') not in seen_ids:
-                    results.append(r)
-                    seen_ids.add(r.get('chunk_id'))
+        results = []
+        query_vectors = []
+        if query:
+            # For long queries, also search with a focused excerpt
+            # to avoid embedding dilution from verbose task descriptions
+            queries = [query]
+            if len(query) > 200:
+                queries.append(query[:200].rsplit(' ', 1)[0])
+            query_vectors = manager.embed_queries(queries)
+            batches = manager.search_many(queries, [db_name], top_k=top_k, query_vectors=query_vectors)[db_name]
+            results = batches[0]
+            if len(batches) > 1:
+                seen_ids = {r.get('chunk_id') for r in results if r.get('chunk_id')}
+                for r in batches[1][:max(2, top_k // 2)]:
+                    if r.get('chunk_id') not in seen_ids:
+                        results.append(r)
+                        seen_ids.add(r.get('chunk_id'))
 
         # Search other databases for cross-workflow historical knowledge
         if query and len(results) < top_k:
             try:
                 remaining = top_k - len(results)
-                for other_db in manager.list_databases():
-                    if other_db == db_name:
-                        continue
-                    other_results = manager.search(other_db, query, top_k=min(remaining, 3))
+                other_dbs = [other_db for other_db in manager.list_databases() if other_db != db_name]
+                other_hits = manager.search_many(
+                    [query], other_dbs, top_k=min(remaining, 3), query_vectors=query_vectors[:1], max_workers=4
+                )
+                for other_db in other_dbs:
+                    other_results = other_hits[other_db][0]
                     if other_results:
                         results.extend(other_results)
                         remaining = top_k - len(results)
@@ -295,21 +303,6 @@ class WorkerAgentNode(BaseNode):
         )
         if not instruction:
             return None
-        context_blocks = []
-        # Include submitted file contents so the worker has the actual
-        # document text (passed through from the MCA delegation).
-        file_contents = payload.get('file_contents') or []
-        if file_contents:
-            context_blocks.append(
-                "--- SUBMITTED FILE CONTENTS ---\n"
-                + "\n\n".join(file_contents)
-                + "\n--- END OF SUBMITTED FILES ---"
-            )
-        if rag_results:
-            context_blocks.append(f"RAG Results:\n{json.dumps(rag_results, indent=2)}")
-        if tool_results:
-            context_blocks.append(f"Tool Results:\n{json.dumps(tool_results, indent=2)}")
-        context_text = "\n\n".join(context_blocks)
         from datetime import datetime as _dt
         _now = _dt.now()
         _date_str = _now.strftime('%A, %B %d, %Y')
@@ -327,8 +320,6 @@ class WorkerAgentNode(BaseNode):
             "If the task requires web data and neither RAG nor tool_results have it, report that tools were not "
             "executed and request a rerun with tool_calls."
         )
-        base_prompt = instruction if payload.get('llm_prompt') else f"{instruction}\n\n{context_text}".strip()
-        prompt = f"{guidance}\n\n{base_prompt}".strip()
         api_endpoint = self._resolve_llm_endpoint()
         if not api_endpoint:
             return None
@@ -340,6 +331,28 @@ class WorkerAgentNode(BaseNode):
             self.properties.get('llm_temperature', {}).get('value')
             or self.properties.get('llm_temperature', {}).get('default')
         )
+        blocks = [
+            PromptBlock(guidance, label="guidance", shrink=KEEP),
+            PromptBlock(instruction, label="instruction", shrink=KEEP),
+        ]
+        if not payload.get('llm_prompt'):
+            # Include submitted file contents so the worker has the actual
+            # document text (passed through from the MCA delegation).
+            file_contents = payload.get('file_contents') or []
+            if file_contents:
+                blocks.append(PromptBlock(
+                    "--- SUBMITTED FILE CONTENTS ---\n"
+                    + "\n\n".join(file_contents)
+                    + "\n--- END OF SUBMITTED FILES ---",
+                    priority=2, label="file contents"
+                ))
+            if rag_results:
+                blocks.append(PromptBlock(f"RAG Results:\n{compact_json(rag_results)}",
+                                          priority=1, label="RAG results"))
+            if tool_results:
+                blocks.append(PromptBlock(f"Tool Results:\n{compact_json(tool_results)}",
+                                          priority=1, label="tool results"))
+        prompt = self.fit_prompt(blocks, api_endpoint, model=model).prompt
         print(f"[WorkerAgentNode] _run_llm_if_enabled: sending to api_endpoint={api_endpoint!r}, model={model!r}")
         response = self.send_api_request(prompt, api_endpoint, model=model or None, temperature=temperature)
         if response.success:
@@ -432,7 +445,7 @@ class WorkerAgentNode(BaseNode):
                            outbox_folder: str, top_k: int) -> Dict[str, Any]:
         query = task_payload.get('query') or task_payload.get('task') or ''
         tool_results = self._execute_tool_calls(task_payload.get('tool_calls') or [])
-        manager = DatabaseManager()
+        manager = DatabaseManager.get_shared()
         rag_results = manager.search(_safe_db_name(str(workflow_name)), query, top_k=top_k) if query else []
         llm_response = self._run_llm_if_enabled(task_payload, rag_results, tool_results)
         if channel_id:
@@ -11,6 +11,8 @@ from urllib.parse import urlparse, parse_qs
 
 @register_node('YoutubeTranscriptNode')
 class YoutubeTranscriptNode(BaseNode):
+    worker_pool = "io"
+
     def define_inputs(self):
         return ['input']  # Match the basic node input name
 
@@ -2,30 +2,47 @@
 API Service module for XeroFlow.
 Handles all API-related operations in a unified way.
 """
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Generator
 import logging
 import re
+import time
 from urllib.parse import urlparse
-import requests
+from services.client_registry import ClientRegistry
 from services.pricing_service import PricingService
+from services.prompt_budget import (
+    DEFAULT_OUTPUT_RESERVE, SAFETY_MARGIN, UNBOUNDED_BUDGET, PromptFit, context_window, fit_blocks
+)
+from services.providers import get_adapter
+from services.rate_limiter import RateLimiter, estimate_request_tokens
+from services.response_cache import ResponseCache, cache_key
+from services.retry_policy import (
+    CIRCUIT_OPEN, FALLBACK_ERRORS, CircuitBreaker, ProviderHTTPError, RetryPolicy,
+    classify_error, fallback_interface, retry_after_seconds,
+)
+from services.token_counter import TokenCounter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Batches complete within 24 hours; polling more often than this gains nothing.
+BATCH_POLL_SECONDS = 30.0
+BATCH_TIMEOUT_SECONDS = 24 * 3600.0
+
 class APIRequest:
-    def __init__(self, content: str, api_name: str, model: Optional[str] = None, max_tokens: Optional[int] = None, temperature: Optional[float] = None, additional_params: Optional[Dict[str, Any]] = None):
+    def __init__(self, content: str, api_name: str, model: Optional[str] = None, max_tokens: Optional[int] = None, temperature: Optional[float] = None, additional_params: Optional[Dict[str, Any]] = None, cacheable: bool = False):
         self.content = content
         self.api_name = api_name
         self.model = model
         self.max_tokens = max_tokens
         self.temperature = temperature
         self.additional_params = additional_params or {}
+        self.cacheable = cacheable  # Opt in to the response cache, see services.response_cache
 
 class APIResponse:
     def __init__(self, content: str = "", raw_response: Any = None, success: bool = False, error: str = "", 
                  prompt_tokens: int = 0, completion_tokens: int = 0, total_tokens: int = 0,
-                 pricing_model: Optional[str] = None):
+                 pricing_model: Optional[str] = None, error_class: Optional[str] = None, cached: bool = False):
         self.content = content
         self.raw_response = raw_response
         self.success = success
@@ -34,108 +51,33 @@ class APIResponse:
         self.completion_tokens = completion_tokens
         self.total_tokens = total_tokens
         self.pricing_model = pricing_model
+        self.error_class = error_class  # Set on failures, see services.retry_policy
+        self.cached = cached  # Served from the response cache; no tokens were used
 
 class APIService:
     """
     Unified API service for handling all API interactions.
     This service abstracts away the complexity of different API providers
-    and provides a consistent interface for all nodes.
+    and provides a consistent interface for all nodes.  Provider-specific
+    calls live in the adapters registered in services.providers.
     """
 
     def __init__(self, config: Dict[str, Any]):
         """
         Initialize the API service with configuration.
+
+        Construction is cheap: provider clients come from the process-wide
+        ClientRegistry and are only created when an interface is first used.
         
         Args:
             config: Dictionary containing API configurations
         """
         self.config = config
-        self._clients = {}
-        self._initialize_clients()
-
-    def _initialize_clients(self):
-        """Initialize API clients for each configured interface"""
-        interfaces = self.config.get('interfaces', {})
-        for api_name, api_config in interfaces.items():
-            try:
-                self._init_client(api_name, api_config)
-            except Exception as e:
-                logger.error(f"Failed to initialize client for {api_name}: {str(e)}")
 
-    def _init_client(self, api_name: str, api_config: Dict[str, Any]):
-        """Initialize a specific API client"""
-        api_type = api_config.get('type', '').lower()
-        api_key = api_config.get('api_key')
-        api_url = api_config.get('api_url', '').rstrip('/')
-
-        if not api_type:
-            logger.error(f"Missing API type for {api_name}")
-            return
-
-        try:
-            if api_type == "searchengine":
-                # SearchEngine doesn't need API key or client
-                self._clients[api_name] = {
-                    "type": api_type,
-                    "api_url": api_url
-                }
-                logger.info(f"Initialized SearchEngine client with URL: {api_url}")
-                return
-
-            # For other API types, check for API key
-            requires_key = api_type not in ("ollama", "lmstudio")
-            if requires_key and not api_key:
-                logger.error(f"Missing API key for {api_name}")
-                return
-
-            if api_type == "openai":
-                from openai import OpenAI
-                # OpenAI's base URL should always end with /v1
-                if api_url:
-                    api_url = api_url.rstrip('/') + '/v1'
-                client = OpenAI(api_key=api_key, base_url=api_url) if api_url else OpenAI(api_key=api_key)
-                self._clients[api_name] = {"client": client, "type": api_type}
-                logger.info(f"Initialized OpenAI client with URL: {api_url if api_url else 'default'}")
-
-            elif api_type == "ollama":
-                from ollama import Client
-                client = Client(host=api_url)
-                self._clients[api_name] = {"client": client, "type": api_type}
-                logger.info(f"Initialized Ollama client with host: {api_url}")
-
-            elif api_type == "groq":
-                from groq import Groq
-                client = Groq(api_key=api_key)
-                self._clients[api_name] = {"client": client, "type": api_type}
-                logger.info(f"Initialized Groq client for {api_name}")
-
-            elif api_type == "google":
-                import google.genai as genai
-                client = genai.Client(api_key=api_key)
-                self._clients[api_name] = {"client": client, "type": api_type}
-                logger.info(f"Initialized Google Gemini client for {api_name}")
-
-            elif api_type == "claude":
-                from anthropic import Anthropic
-                client = Anthropic(api_key=api_key)
-                self._clients[api_name] = {"client": client, "type": api_type}
-                logger.info(f"Initialized Claude client for {api_name}")
-
-            elif api_type == "lmstudio":
-                base = api_url or "http://localhost:1234"
-                base = base.rstrip('/')
-                self._clients[api_name] = {
-                    "type": api_type,
-                    "api_url": base,
-                    "api_key": api_key
-                }
-                logger.info(f"Initialized LM Studio client with base URL: {base}")
-
-            else:
-                logger.warning(f"Unsupported API type: {api_type}")
-
-        except Exception as e:
-            logger.error(f"Error initializing {api_type} client: {str(e)}")
+    def _get_client(self, api_name: str) -> Optional[Dict[str, Any]]:
+        """Return the shared client info for an interface, creating it on first use."""
+        api_config = self.config.get('interfaces', {}).get(api_name)
+        return ClientRegistry.get_client(api_name, api_config)
 
     def get_available_endpoints(self) -> List[str]:
         """Get list of available API endpoints"""
@@ -194,8 +136,9 @@ class APIService:
             if not model:
                 return params
 
-            if api_type == "openai":
-                return self._sanitize_openai_params(model, params)
+            adapter = get_adapter(api_type)
+            if adapter is not None:
+                return adapter.sanitize_params(model, params)
         except Exception as e:
             # Never let sanitization break the request path
             logger.warning(f"Param sanitization failed: {e}")
@@ -217,37 +160,69 @@ class APIService:
             return model
         return normalized
 
-    def _sanitize_openai_params(self, model: str, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Apply OpenAI model-specific parameter rules.
+    def prompt_budget(self, api_name: str, model: Optional[str] = None, max_tokens: Optional[int] = None) -> int:
+        """
+        Prompt tokens that fit in the model's context window next to the response.
 
-        - GPT-5 currently only supports default temperature=1. Remove/override any
-          non-default temperature to avoid 400 errors.
-        - o3 reasoning models ("o3" and "o3-*"): temperature is ignored; ensure it is not sent.
+        Unbounded when the model's window is unknown and the interface sets no
+        ``context_window``: guessing low would cut prompts the model accepts.
         """
-        # Normalize model name for checks
-        model_norm = (model or "").lower()
-
-        # o3 models (plain or with suffix): ensure temperature is not sent
-        if model_norm.startswith("o3"):
-            if "temperature" in params:
-                logger.info("Removing temperature for OpenAI o3-* model (ignored by API)")
-                params.pop("temperature", None)
-            return params
-
-        # gpt-5 models: only default temperature=1 is supported; best to omit parameter
-        if model_norm.startswith("gpt-5"):
-            temp = params.get("temperature")
-            if temp is not None and temp != 1:
-                logger.warning("OpenAI GPT-5 only supports default temperature=1; removing provided temperature")
-            # Omit temperature entirely to use provider default (1)
-            params.pop("temperature", None)
-            return params
+        api_config = self.get_endpoint_details(api_name) or {}
+        model = model or api_config.get('selected_model')
+        window = context_window(model, api_config)
+        if window is None:
+            return UNBOUNDED_BUDGET
+        reserve = min(int(max_tokens or api_config.get('max_tokens') or DEFAULT_OUTPUT_RESERVE), window // 2)
+        return max(0, int(window * (1 - SAFETY_MARGIN)) - reserve)
+
+    def fit_prompt(self, api_name: str, blocks, model: Optional[str] = None, max_tokens: Optional[int] = None,
+                   summarize: bool = False, separator: str = "\n\n") -> PromptFit:
+        """
+        Join prompt blocks into one prompt that fits the interface's context window.
 
-        return params
+        Blocks (services.prompt_budget.PromptBlock) are trimmed, summarised or
+        dropped lowest priority first; ``PromptFit.cuts`` reports what was cut.
+        With ``summarize`` set, blocks marked ``summarize`` are condensed by
+        the same interface instead of truncated, at the cost of one request each.
+
+        Args:
+            api_name: Interface the prompt will be sent to
+            blocks: PromptBlock list in prompt order
+            model: Model override (uses the interface's selected model if None)
+            max_tokens: Response tokens to keep free (interface max_tokens if None)
+            summarize: Allow summarising blocks with the model
+            separator: Text placed between blocks
+
+        Returns:
+            PromptFit with the prompt, its token count, the budget and the cuts
+        """
+        model = model or (self.get_endpoint_details(api_name) or {}).get('selected_model')
+        budget = self.prompt_budget(api_name, model, max_tokens)
+        summarizer = None
+        if summarize:
+            def summarizer(text: str, target_tokens: int) -> Optional[str]:
+                request = APIRequest(
+                    "Summarise the following text in at most "
+                    f"{max(1, target_tokens * 3 // 4)} words. Keep every fact, figure, name and source "
+                    "that matters; output only the summary.\n\n"
+                    + TokenCounter.truncate(text, budget, model),
+                    api_name, model=model, max_tokens=target_tokens
+                )
+                response = self.send_request(request)
+                return response.content if response.success else None
+        return fit_blocks(blocks, budget, model, separator, summarizer)
 
     def send_request(self, request: APIRequest) -> APIResponse:
         """
         Send a request to the specified API endpoint.
+
+        Transient failures (429, 5xx, timeouts, connection errors) are retried
+        with the interface's RetryPolicy; while its circuit breaker is open the
+        call fails fast.  If it still fails and the interface names a
+        ``fallback_interface``, the request is sent there instead.
+
+        Cacheable requests are answered from the ResponseCache when the same
+        request succeeded before.
         
         Args:
             request: APIRequest object containing request details
@@ -255,8 +230,74 @@ class APIService:
         Returns:
             APIResponse object containing the response
         """
+        key = self._response_cache_key(request)
+        cached = self._cached_response(key, request)
+        if cached is not None:
+            return cached
+        return self._send_and_store(request, key)
+
+    def _send_and_store(self, request: APIRequest, key: Optional[str]) -> APIResponse:
+        response = self._send_with_retry(request)
+        if response.success:
+            # Fallback responses come from another model and are not cached
+            self._store_response(key, request, response)
+            return response
+        if response.error_class in FALLBACK_ERRORS:
+            fallback_request = self._fallback_request(request)
+            if fallback_request is not None:
+                logger.warning(f"{request.api_name} failed ({response.error_class}); "
+                               f"falling back to {fallback_request.api_name}")
+                response = self._send_with_retry(fallback_request)
+        return response
+
+    def _response_cache_key(self, request: APIRequest) -> Optional[str]:
+        """Cache key for *request*, or None when it is not cacheable."""
+        if not request.cacheable or not ResponseCache.settings(self.config).get('enabled'):
+            return None
+        return cache_key(request.api_name, request.model, request.content, request.temperature,
+                         request.max_tokens, request.additional_params)
+
+    def _cached_response(self, key: Optional[str], request: APIRequest) -> Optional[APIResponse]:
+        if key is None:
+            return None
+        entry = ResponseCache.get(self.config, key)
+        if entry is None:
+            return None
+        logger.info(f"Response cache hit for {request.api_name}/{request.model}")
+        return APIResponse(
+            content=entry["content"],
+            raw_response=None,
+            success=True,
+            pricing_model=self._resolve_pricing_model(request.api_name, request.model),
+            cached=True
+        )
+
+    def _store_response(self, key: Optional[str], request: APIRequest, response: APIResponse):
+        if key is None or not response.success or response.cached:
+            return
+        ResponseCache.put(self.config, key, request.api_name, request.model, response.content or "",
+                          response.prompt_tokens, response.completion_tokens, response.total_tokens)
+
+    def _fallback_request(self, request: APIRequest) -> Optional[APIRequest]:
+        """Copy of *request* addressed to the interface's fallback_interface, if any."""
+        interfaces = self.config.get('interfaces', {})
+        fallback = fallback_interface(request.api_name, interfaces.get(request.api_name), interfaces)
+        if fallback is None:
+            return None
+        name, fallback_config = fallback
+        return APIRequest(
+            content=request.content,
+            api_name=name,
+            model=fallback_config.get('selected_model'),
+            max_tokens=request.max_tokens,
+            temperature=request.temperature,
+            additional_params=request.additional_params
+        )
+
+    def _send_with_retry(self, request: APIRequest) -> APIResponse:
         pricing_model = self._resolve_pricing_model(request.api_name, request.model)
-        if request.api_name not in self._clients:
+        client_info = self._get_client(request.api_name)
+        if client_info is None:
             return APIResponse(
                 content="API endpoint not initialized",
                 raw_response=None,
@@ -265,248 +306,301 @@ class APIService:
                 pricing_model=pricing_model
             )
 
-        client_info = self._clients[request.api_name]
-        client = client_info.get("client")
-        api_type = client_info["type"]
-
-        try:
-            logger.info(f"Sending request to {api_type} API")
-            logger.debug(f"Request details: {request}")
-
-            prompt_tokens = 0
-            completion_tokens = 0
-            total_tokens = 0
-
-            if api_type == "openai":
-                # Differentiate between chat and audio transcription models
-                if 'whisper' in request.model.lower():
-                    # This is an audio transcription request
-                    file_path = request.additional_params.get('file')
-                    if not file_path:
-                        raise ValueError("File path is required for Whisper transcription.")
-                    
-                    with open(file_path, "rb") as audio_file:
-                        response = client.audio.transcriptions.create(
-                            model=request.model,
-                            file=audio_file
-                        )
-                    content = response.text
-                    # Token usage for Whisper is based on audio duration, not standard tokens.
-                    # This is handled by the token logger based on pricing per minute.
-                else:
-                    # This is a chat completion request
-                    params = {
-                        "model": request.model,
-                        "messages": [{"role": "user", "content": request.content}]
-                    }
-                    
-                    if request.max_tokens:
-                        if request.model and request.model.lower().startswith('o3'):
-                            params["max_completion_tokens"] = request.max_tokens
-                        else:
-                            params["max_tokens"] = request.max_tokens
-                    
-                    if request.temperature and not (request.model and request.model.lower().startswith('o3')):
-                        params["temperature"] = request.temperature
-
-                    # Sanitize params based on provider/model constraints before dispatch
-                    params = self._sanitize_params(api_type, request.model, params)
-                    
-                    response = client.chat.completions.create(**params)
-                    content = response.choices[0].message.content
-                    
-                    if hasattr(response, 'usage') and response.usage:
-                        prompt_tokens = getattr(response.usage, 'prompt_tokens', 0)
-                        completion_tokens = getattr(response.usage, 'completion_tokens', 0)
-                        total_tokens = getattr(response.usage, 'total_tokens', 0)
-                        logger.info(f"OpenAI token usage - Prompt: {prompt_tokens}, Completion: {completion_tokens}, Total: {total_tokens}")
-
-            elif api_type == "google":
-                response = client.models.generate_content(
-                    model=request.model,
-                    contents=request.content
-                )
-                content = response.text
-                # Gemini API token counting
-                prompt_text = request.content or ""
-                prompt_tokens = max(1, len(str(prompt_text)) // 4) if prompt_text else 0
-                completion_tokens = max(1, len(content) // 4) if content else 0
-                total_tokens = prompt_tokens + completion_tokens
-
-            elif api_type == "ollama":
-                response = client.chat(
-                    model=request.model,
-                    messages=[{"role": "user", "content": request.content}]
-                )
-                content = response['message']['content']
-
-            elif api_type == "groq":
-                response = client.chat.completions.create(
-                    model=request.model,
-                    messages=[{"role": "user", "content": request.content}],
-                    max_tokens=request.max_tokens,
-                    temperature=request.temperature or 0.7
-                )
-                content = response.choices[0].message.content
-                
-                if hasattr(response, 'usage') and response.usage:
-                    prompt_tokens = getattr(response.usage, 'prompt_tokens', 0)
-                    completion_tokens = getattr(response.usage, 'completion_tokens', 0)
-                    total_tokens = getattr(response.usage, 'total_tokens', 0)
-                    logger.info(f"Groq token usage - Prompt: {prompt_tokens}, Completion: {completion_tokens}, Total: {total_tokens}")
-
-            elif api_type == "claude":
-                response = client.messages.create(
-                    model=request.model,
-                    max_tokens=request.max_tokens or 1024,
-                    messages=[{"role": "user", "content": request.content}]
-                )
-                content = response.content[0].text
-
-                if hasattr(response, 'usage') and response.usage:
-                    prompt_tokens = getattr(response.usage, 'input_tokens', 0)
-                    completion_tokens = getattr(response.usage, 'output_tokens', 0)
-                    total_tokens = prompt_tokens + completion_tokens
-                    logger.info(f"Claude token usage - Prompt: {prompt_tokens}, Completion: {completion_tokens}, Total: {total_tokens}")
-
-            elif api_type == "searchengine":
-                client_info = self._clients.get(request.api_name, {})
-                api_url = client_info.get('api_url', '')
-                if not api_url:
-                    raise ValueError(f"No API URL configured for {request.api_name}")
-
-                params = {
-                    'q': request.content,
-                    'format': 'json'
-                }
-
-                if request.additional_params:
-                    num_results = request.additional_params.get('num_results')
-                    if num_results is not None:
-                        params['n'] = num_results
-
-                    skip = request.additional_params.get('skip')
-                    if skip is not None:
-                        # SearxNG pageno is 1-based.
-                        params['pageno'] = skip + 1
-
-                logger.info(f"Making search request to {api_url} with params: {params}")
-                logger.debug(f"Search params: {params}")
-                response = requests.get(f"{api_url.rstrip('/')}/search", params=params)
-                
-                if response.status_code != 200:
-                    raise ValueError(f"Search request failed with status {response.status_code}")
-                
-                results = response.json()
-                search_results = []
-                clean_urls = []
-                
-                required_count = num_results
-                for result in results.get('results', []):
-                    title = result.get('title', '')
-                    url = APIService.clean_url(result.get('url', ''))
-                    if url:
-                        clean_urls.append(url)
-                        snippet = result.get('content', '')
-                        search_results.append(f"Title: {title}\nURL: {url}\nSummary: {snippet}\n")
-                    if len(clean_urls) >= required_count:
-                        break
-                
-                content = "\n".join(search_results) if search_results else "No results found"
-                
-                logger.info(f"Returning {len(clean_urls)} search results (limited to {required_count})")
-                logger.debug(f"Clean URLs: {clean_urls}")
+        api_config = self.config.get('interfaces', {}).get(request.api_name)
+        policy = RetryPolicy.from_config(api_config)
+        breaker = CircuitBreaker.for_interface(request.api_name, api_config)
+        estimated_tokens = estimate_request_tokens(request.content, request.max_tokens, request.model)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            if not breaker.allow():
                 return APIResponse(
-                    content=content, 
-                    raw_response={'results': clean_urls}, 
-                    success=True,
-                    pricing_model=pricing_model
-                )
-
-            elif api_type == "lmstudio":
-                base_url = client_info.get("api_url") or "http://localhost:1234"
-                base_url = base_url.rstrip('/')
-                if not base_url.endswith("/v1"):
-                    base_url = f"{base_url}/v1"
-                url = f"{base_url}/chat/completions"
-
-                # Determine messages payload
-                messages = request.additional_params.get('messages')
-                if not messages:
-                    messages = []
-                    system_message = request.additional_params.get('system_message')
-                    if system_message:
-                        messages.append({"role": "system", "content": system_message})
-                    messages.append({"role": "user", "content": request.content})
-
-                payload = {
-                    "model": request.model,
-                    "messages": messages
-                }
-
-                if request.max_tokens:
-                    payload["max_tokens"] = request.max_tokens
-                if request.temperature is not None:
-                    payload["temperature"] = request.temperature
-
-                headers = {"Content-Type": "application/json"}
-                api_key = client_info.get("api_key")
-                if api_key:
-                    headers["Authorization"] = f"Bearer {api_key}"
-
-                response = requests.post(url, headers=headers, json=payload, timeout=120)
-                if response.status_code != 200:
-                    raise ValueError(f"LM Studio request failed ({response.status_code}): {response.text}")
-
-                data = response.json()
-                choices = data.get("choices", [])
-                if not choices:
-                    raise ValueError("LM Studio response missing choices")
-
-                content = choices[0].get("message", {}).get("content", "")
-                usage = data.get("usage", {})
-                prompt_tokens = usage.get("prompt_tokens", 0)
-                completion_tokens = usage.get("completion_tokens", 0)
-                total_tokens = usage.get("total_tokens", prompt_tokens + completion_tokens)
-
-                return APIResponse(
-                    content=content,
-                    raw_response=data,
-                    success=True,
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens,
-                    total_tokens=total_tokens,
-                    pricing_model=pricing_model
+                    content="",
+                    raw_response=None,
+                    success=False,
+                    error=f"{request.api_name} is unavailable (circuit open, retry in {breaker.retry_in():.0f}s)",
+                    pricing_model=pricing_model,
+                    error_class=CIRCUIT_OPEN
                 )
 
-            else:
+            # Every caller shares the interface's RPM/TPM/concurrency budget
+            lease = RateLimiter.acquire(request.api_name, request.model, estimated_tokens, api_config)
+            response = None
+            try:
+                response = self._dispatch_request(request, client_info, pricing_model)
+            except Exception as e:
+                error = e
+            finally:
+                lease.release(response.total_tokens if response is not None else None)
+
+            if response is not None:
+                breaker.record_success()
+                return response
+
+            error_class = classify_error(error)
+            breaker.record_failure(error_class)
+            delay = policy.next_delay(attempt, error_class, time.monotonic() - started, retry_after_seconds(error))
+            if delay is None:
+                logger.error(f"Error in API request to {request.api_name}: {str(error)}")
                 return APIResponse(
                     content="",
                     raw_response=None,
                     success=False,
-                    error=f"Unsupported API type: {api_type}",
-                    pricing_model=pricing_model
+                    error=str(error),
+                    pricing_model=pricing_model,
+                    error_class=error_class
                 )
+            attempt += 1
+            logger.warning(f"{request.api_name} request failed ({error_class}: {error}); "
+                           f"retry {attempt}/{policy.max_attempts - 1} in {delay:.1f}s")
+            time.sleep(delay)
+
+    def _dispatch_request(self, request: APIRequest, client_info: Dict[str, Any],
+                          pricing_model: Optional[str]) -> APIResponse:
+        """Send *request* through its provider adapter; errors are raised to the retry layer."""
+        api_type = client_info["type"]
+        adapter = get_adapter(api_type)
+        if adapter is None or not adapter.supports_chat:
+            # Raised so the circuit breaker does not count it as a success
+            raise ValueError(f"Unsupported API type: {api_type}")
+
+        logger.info(f"Sending request to {api_type} API")
+        return APIResponse(success=True, pricing_model=pricing_model, **adapter.send(request, client_info))
+
+    def stream_request(self, request: APIRequest) -> Generator[str, None, APIResponse]:
+        """
+        Stream a completion, yielding text deltas as the provider produces them.
 
+        The generator's return value (``StopIteration.value``) is the final
+        APIResponse with the full content and token usage, so callers can
+        ``response = yield from service.stream_request(request)``.  Requests
+        whose adapter cannot stream (SearchEngine, Whisper) fall back to
+        ``send_request`` and yield the whole content once, as do response
+        cache hits.  Errors are
+        reported through the final response, with whatever content arrived.
+
+        Args:
+            request: APIRequest object containing request details
+
+        Returns:
+            Generator of text deltas returning an APIResponse
+        """
+        pricing_model = self._resolve_pricing_model(request.api_name, request.model)
+        client_info = self._get_client(request.api_name)
+        if client_info is None:
             return APIResponse(
-                content=content,
-                raw_response=response,
-                success=True,
-                prompt_tokens=prompt_tokens,
-                completion_tokens=completion_tokens,
-                total_tokens=total_tokens,
+                content="API endpoint not initialized",
+                success=False,
+                error=f"API endpoint {request.api_name} not initialized",
                 pricing_model=pricing_model
             )
 
-        except Exception as e:
-            logger.error(f"Error in API request to {request.api_name}: {str(e)}")
-            return APIResponse(
-                content="",
+        key = self._response_cache_key(request)
+        cached = self._cached_response(key, request)
+        if cached is not None:
+            if cached.content:
+                yield cached.content
+            return cached
+
+        api_type = client_info["type"]
+        adapter = get_adapter(api_type)
+        if adapter is None or not adapter.supports_streaming or adapter.is_whisper(request):
+            response = self._send_and_store(request, key)
+            if response.success and response.content:
+                yield response.content
+            return response
+
+        api_config = self.config.get('interfaces', {}).get(request.api_name)
+        breaker = CircuitBreaker.for_interface(request.api_name, api_config)
+        if breaker.is_open():
+            # Fails fast or uses the fallback interface
+            response = self._send_and_store(request, key)
+            if response.success and response.content:
+                yield response.content
+            return response
+
+        estimated_tokens = estimate_request_tokens(request.content, request.max_tokens, request.model)
+        lease = RateLimiter.acquire(request.api_name, request.model, estimated_tokens, api_config)
+        parts: List[str] = []
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        try:
+            logger.info(f"Streaming request to {api_type} API")
+            for delta in adapter.stream(request, client_info, usage):
+                parts.append(delta)
+                yield delta
+            if not usage["total_tokens"]:
+                # The provider did not report usage for this stream
+                usage["prompt_tokens"] = TokenCounter.count(request.content, request.model)
+                usage["completion_tokens"] = TokenCounter.count("".join(parts), request.model)
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            logger.info(f"{api_type} stream finished - Prompt: {usage['prompt_tokens']}, "
+                        f"Completion: {usage['completion_tokens']}, Total: {usage['total_tokens']}")
+            breaker.record_success()
+            response = APIResponse(
+                content="".join(parts),
                 raw_response=None,
+                success=True,
+                pricing_model=pricing_model,
+                **usage
+            )
+            self._store_response(key, request, response)
+            return response
+
+        except Exception as e:
+            error_class = classify_error(e)
+            breaker.record_failure(error_class)
+            if parts or error_class not in FALLBACK_ERRORS:
+                logger.error(f"Error in streaming request to {request.api_name}: {str(e)}")
+                return APIResponse(
+                    content="".join(parts),
+                    raw_response=None,
+                    success=False,
+                    error=str(e),
+                    pricing_model=pricing_model,
+                    error_class=error_class
+                )
+            logger.warning(f"Streaming request to {request.api_name} failed before any output ({error_class}: {e})")
+        finally:
+            lease.release(usage["total_tokens"] or None)
+
+        # Nothing was streamed yet, so retry (and fall back) as send_request would
+        response = self._send_and_store(request, key)
+        if response.success and response.content:
+            yield response.content
+        return response
+
+    def supports_batch(self, api_name: str) -> bool:
+        """Whether an interface has a provider-side batch endpoint."""
+        api_config = self.get_endpoint_details(api_name) or {}
+        adapter = get_adapter(api_config.get('type'))
+        return adapter is not None and adapter.supports_batch
+
+    def submit_batch(self, requests: List[APIRequest], poll_interval: Optional[float] = None,
+                     timeout: Optional[float] = None, on_progress=None, cancel_event=None) -> List[APIResponse]:
+        """
+        Send requests through the provider's batch endpoint and wait for the results.
+
+        OpenAI requests are uploaded as a JSONL file and run with the Batch
+        API; Claude requests go to the Message Batches API.  Batched requests
+        are billed at a discount and do not count against the interface's
+        regular rate limits, at the cost of latency of up to 24 hours.  The
+        batch is polled every ``poll_interval`` seconds (interface setting
+        ``batch_poll_seconds``) and cancelled once ``timeout`` seconds
+        (``batch_timeout_seconds``) pass or ``cancel_event`` is set.
+        Interfaces without a batch endpoint send the requests one at a time.
+        Cacheable requests found in the ResponseCache are not submitted.
+
+        Args:
+            requests: APIRequest objects, all for the same interface
+            poll_interval: Seconds between status checks
+            timeout: Seconds to wait before cancelling the batch
+            on_progress: Optional ``callback(finished, total)`` called after each status check
+            cancel_event: Optional threading.Event that cancels the batch when set
+
+        Returns:
+            List of APIResponse objects in the same order as ``requests``
+        """
+        if not requests:
+            return []
+        api_name = requests[0].api_name
+        if any(request.api_name != api_name for request in requests):
+            raise ValueError("submit_batch requests must all use the same interface")
+
+        pricing_model = self._resolve_pricing_model(api_name, requests[0].model)
+        client_info = self._get_client(api_name)
+        if client_info is None:
+            return [APIResponse(
+                content="API endpoint not initialized",
                 success=False,
-                error=str(e),
+                error=f"API endpoint {api_name} not initialized",
                 pricing_model=pricing_model
-            )
+            ) for _ in requests]
+        if not get_adapter(client_info["type"]).supports_batch:
+            logger.info(f"{api_name} has no batch endpoint; sending {len(requests)} requests individually")
+            return [self.send_request(request) for request in requests]
+
+        responses: List[Optional[APIResponse]] = [None] * len(requests)
+        keys = [self._response_cache_key(request) for request in requests]
+        pending: Dict[str, int] = {}
+        for index, (request, key) in enumerate(zip(requests, keys)):
+            responses[index] = self._cached_response(key, request)
+            if responses[index] is None:
+                pending[f"request-{index}"] = index
+        if not pending:
+            return responses
+
+        api_config = self.get_endpoint_details(api_name) or {}
+        poll_interval = float(poll_interval or api_config.get('batch_poll_seconds') or BATCH_POLL_SECONDS)
+        timeout = float(timeout or api_config.get('batch_timeout_seconds') or BATCH_TIMEOUT_SECONDS)
+        results: Dict[str, APIResponse] = {}
+        failure = None
+        try:
+            results = self._run_batch(client_info, {cid: requests[i] for cid, i in pending.items()},
+                                      pricing_model, poll_interval, timeout, on_progress, cancel_event)
+        except Exception as e:
+            logger.error(f"Batch request to {api_name} failed: {str(e)}")
+            failure = e
+
+        for custom_id, index in pending.items():
+            response = results.get(custom_id)
+            if response is None:
+                response = APIResponse(
+                    content="",
+                    success=False,
+                    error=str(failure) if failure else f"No result returned for {custom_id}",
+                    pricing_model=pricing_model,
+                    error_class=classify_error(failure) if failure else None
+                )
+            self._store_response(keys[index], requests[index], response)
+            responses[index] = response
+        return responses
+
+    def _run_batch(self, client_info: Dict[str, Any], requests: Dict[str, APIRequest], pricing_model: Optional[str],
+                   poll_interval: float, timeout: float, on_progress, cancel_event) -> Dict[str, APIResponse]:
+        """Submit one batch, poll it until it ends and return responses keyed by custom_id."""
+        client = client_info.get("client")
+        adapter = get_adapter(client_info["type"])
+
+        batch = adapter.submit_batch(client, requests)
+        logger.info(f"Submitted {adapter.api_type} batch {batch.id} with {len(requests)} requests")
+
+        deadline = time.monotonic() + timeout
+        while True:
+            batch, finished, done = adapter.poll_batch(client, batch)
+            if on_progress is not None:
+                on_progress(finished, len(requests))
+            if done:
+                break
+
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            if cancelled or time.monotonic() >= deadline:
+                adapter.cancel_batch(client, batch)
+                if cancelled:
+                    raise RuntimeError(f"Batch {batch.id} cancelled")
+                raise TimeoutError(f"Batch {batch.id} did not finish within {timeout:.0f}s")
+
+            wait = min(poll_interval, max(0.0, deadline - time.monotonic()))
+            if cancel_event is not None:
+                cancel_event.wait(wait)
+            else:
+                time.sleep(wait)
+
+        logger.info(f"{adapter.api_type} batch {batch.id} ended ({finished}/{len(requests)} requests finished)")
+        results: Dict[str, APIResponse] = {}
+        for custom_id, result in adapter.batch_results(client, batch).items():
+            if "error" in result:
+                status = result.get("status_code")
+                results[custom_id] = APIResponse(
+                    content="",
+                    raw_response=result.get("raw_response"),
+                    success=False,
+                    error=result["error"],
+                    pricing_model=pricing_model,
+                    error_class=classify_error(ProviderHTTPError(result["error"], status)) if status else None
+                )
+            else:
+                results[custom_id] = APIResponse(success=True, pricing_model=pricing_model, **result)
+        return results
 
     def send_vision_request(self, image_path: str, prompt: str, api_name: str,
                             model: Optional[str] = None,
@@ -514,9 +608,10 @@ class APIService:
                             temperature: Optional[float] = None) -> APIResponse:
         """Send a vision (image + text) request to the specified API endpoint.
 
-        Encodes the image as base64 and builds the provider-specific
-        multimodal payload.  Supports OpenAI, Google Gemini, Ollama, Groq,
-        Claude, and LM Studio.
+        Encodes the image as base64 and hands it to the interface's provider
+        adapter, which builds the multimodal payload.  Adapters with
+        ``supports_vision`` are OpenAI, Google Gemini, Ollama, Groq, Claude,
+        and LM Studio.
 
         Args:
             image_path: Local path to the image file.
@@ -535,14 +630,18 @@ class APIService:
 
         pricing_model = self._resolve_pricing_model(api_name, model)
 
-        if api_name not in self._clients:
+        client_info = self._get_client(api_name)
+        if client_info is None:
             return APIResponse(content="", success=False,
                                error=f"API endpoint {api_name} not initialized",
                                pricing_model=pricing_model)
 
-        client_info = self._clients[api_name]
-        client = client_info.get("client")
         api_type = client_info["type"]
+        adapter = get_adapter(api_type)
+        if adapter is None or not adapter.supports_vision:
+            return APIResponse(content="", success=False,
+                               error=f"Vision not supported for API type: {api_type}",
+                               pricing_model=pricing_model)
 
         # Resolve model from config if not provided
         if not model:
@@ -560,155 +659,11 @@ class APIService:
             image_bytes = f.read()
         image_b64 = base64.b64encode(image_bytes).decode("utf-8")
 
-        prompt_tokens = 0
-        completion_tokens = 0
-        total_tokens = 0
-
         try:
             logger.info(f"Sending vision request to {api_type} API ({api_name})")
-
-            if api_type == "openai":
-                messages = [{
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image_url", "image_url": {
-                            "url": f"data:{mime_type};base64,{image_b64}"
-                        }}
-                    ]
-                }]
-                params: Dict[str, Any] = {"model": model, "messages": messages}
-                if max_tokens:
-                    params["max_tokens"] = max_tokens
-                if temperature is not None:
-                    params["temperature"] = temperature
-                params = self._sanitize_params(api_type, model, params)
-                response = client.chat.completions.create(**params)
-                content = response.choices[0].message.content
-                if hasattr(response, 'usage') and response.usage:
-                    prompt_tokens = getattr(response.usage, 'prompt_tokens', 0)
-                    completion_tokens = getattr(response.usage, 'completion_tokens', 0)
-                    total_tokens = getattr(response.usage, 'total_tokens', 0)
-
-            elif api_type == "google":
-                from google.genai import types as _gtypes
-                parts = [
-                    _gtypes.Part.from_text(text=prompt),
-                    _gtypes.Part.from_bytes(data=image_bytes, mime_type=mime_type),
-                ]
-                response = client.models.generate_content(
-                    model=model, contents=parts
-                )
-                content = response.text
-                prompt_tokens = max(1, len(prompt) // 4)
-                completion_tokens = max(1, len(content) // 4) if content else 0
-                total_tokens = prompt_tokens + completion_tokens
-
-            elif api_type == "ollama":
-                messages = [{
-                    "role": "user",
-                    "content": prompt,
-                    "images": [image_b64],
-                }]
-                response = client.chat(model=model, messages=messages)
-                content = response['message']['content']
-
-            elif api_type == "groq":
-                messages = [{
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image_url", "image_url": {
-                            "url": f"data:{mime_type};base64,{image_b64}"
-                        }}
-                    ]
-                }]
-                params = {"model": model, "messages": messages}
-                if max_tokens:
-                    params["max_tokens"] = max_tokens
-                if temperature is not None:
-                    params["temperature"] = temperature
-                response = client.chat.completions.create(**params)
-                content = response.choices[0].message.content
-                if hasattr(response, 'usage') and response.usage:
-                    prompt_tokens = getattr(response.usage, 'prompt_tokens', 0)
-                    completion_tokens = getattr(response.usage, 'completion_tokens', 0)
-                    total_tokens = getattr(response.usage, 'total_tokens', 0)
-
-            elif api_type == "claude":
-                messages = [{
-                    "role": "user",
-                    "content": [
-                        {"type": "image", "source": {
-                            "type": "base64",
-                            "media_type": mime_type,
-                            "data": image_b64,
-                        }},
-                        {"type": "text", "text": prompt},
-                    ]
-                }]
-                response = client.messages.create(
-                    model=model,
-                    max_tokens=max_tokens or 1024,
-                    messages=messages,
-                )
-                content = response.content[0].text
-                if hasattr(response, 'usage') and response.usage:
-                    prompt_tokens = getattr(response.usage, 'input_tokens', 0)
-                    completion_tokens = getattr(response.usage, 'output_tokens', 0)
-                    total_tokens = prompt_tokens + completion_tokens
-
-            elif api_type == "lmstudio":
-                base_url = client_info.get("api_url") or "http://localhost:1234"
-                base_url = base_url.rstrip('/')
-                if not base_url.endswith("/v1"):
-                    base_url = f"{base_url}/v1"
-                url = f"{base_url}/chat/completions"
-                messages = [{
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image_url", "image_url": {
-                            "url": f"data:{mime_type};base64,{image_b64}"
-                        }}
-                    ]
-                }]
-                payload: Dict[str, Any] = {"model": model, "messages": messages}
-                if max_tokens:
-                    payload["max_tokens"] = max_tokens
-                if temperature is not None:
-                    payload["temperature"] = temperature
-                headers = {"Content-Type": "application/json"}
-                api_key = client_info.get("api_key")
-                if api_key:
-                    headers["Authorization"] = f"Bearer {api_key}"
-                resp = requests.post(url, headers=headers, json=payload, timeout=120)
-                if resp.status_code != 200:
-                    raise ValueError(f"LM Studio vision request failed ({resp.status_code}): {resp.text}")
-                data = resp.json()
-                choices = data.get("choices", [])
-                if not choices:
-                    raise ValueError("LM Studio response missing choices")
-                content = choices[0].get("message", {}).get("content", "")
-                usage = data.get("usage", {})
-                prompt_tokens = usage.get("prompt_tokens", 0)
-                completion_tokens = usage.get("completion_tokens", 0)
-                total_tokens = usage.get("total_tokens", prompt_tokens + completion_tokens)
-
-            else:
-                return APIResponse(content="", success=False,
-                                   error=f"Vision not supported for API type: {api_type}",
-                                   pricing_model=pricing_model)
-
-            return APIResponse(
-                content=content,
-                raw_response=response if 'response' in dir() else None,
-                success=True,
-                prompt_tokens=prompt_tokens,
-                completion_tokens=completion_tokens,
-                total_tokens=total_tokens,
-                pricing_model=pricing_model,
-            )
+            result = adapter.send_vision(client_info, model, prompt, image_bytes, image_b64, mime_type,
+                                         max_tokens, temperature)
+            return APIResponse(success=True, pricing_model=pricing_model, **result)
 
         except Exception as e:
             logger.error(f"Vision request error ({api_name}): {e}")
@@ -729,6 +684,6 @@ class APIService:
             return "API name is required"
         if not request.content:
             return "Content is required"
-        if request.api_name not in self._clients:
+        if self._get_client(request.api_name) is None:
             return f"API endpoint {request.api_name} not available"
         return None
@@ -0,0 +1,263 @@
+"""
+Async API service module for XeroFlow.
+Runs provider calls on asyncio with bounded concurrency per interface.
+"""
+from typing import Optional, Dict, Any, List, Tuple
+import asyncio
+import logging
+import threading
+import time
+
+from services.api_service import APIService, APIRequest, APIResponse
+from services.client_registry import ClientRegistry, HTTP_POOL_SIZE
+from services.providers import get_adapter
+from services.rate_limiter import RateLimiter, estimate_request_tokens
+from services.retry_policy import (
+    CIRCUIT_OPEN, FALLBACK_ERRORS, CircuitBreaker, RetryPolicy,
+    classify_error, retry_after_seconds,
+)
+
+logger = logging.getLogger(__name__)
+
+ASYNC_API_TYPES = ("openai", "groq", "claude", "google", "ollama", "lmstudio", "searchengine")
+HTTP_TIMEOUT_SECONDS = 120
+
+
+class AsyncAPIService:
+    """
+    Asyncio counterpart of APIService.
+
+    ``send_request`` awaits the providers' async clients (AsyncOpenAI,
+    AsyncAnthropic, AsyncGroq, Gemini's ``aio`` client, Ollama's AsyncClient)
+    and a shared ``httpx.AsyncClient`` for LM Studio and SearXNG.  Requests
+    take the interface's RateLimiter concurrency slots (``max_concurrency``)
+    without blocking the loop, so a fan-out of many prompts runs at the
+    provider's limit with no thread per request, and sync streaming or batch
+    calls to the same interface share that limit.  Clients are bound to the
+    event loop that uses them.
+
+    Synchronous code uses ``send_request_sync``/``send_many_sync``, which run
+    the coroutines on one process-wide background event loop.  Requests the
+    async path does not handle (e.g. Whisper transcription) fall back to
+    APIService in the loop's executor.
+    """
+
+    _lock = threading.Lock()
+    _clients: Dict[Tuple[str, str, int], Any] = {}
+    _http_clients: Dict[int, Any] = {}
+    _in_flight: Dict[str, int] = {}
+    _peak: Dict[str, int] = {}
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _loop_thread: Optional[threading.Thread] = None
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self._api_service = APIService(config)
+
+    # ------------------------------------------------------------------
+    # Sync facade
+    # ------------------------------------------------------------------
+    @classmethod
+    def get_loop(cls) -> asyncio.AbstractEventLoop:
+        """The shared background event loop used by the sync facade."""
+        loop = cls._loop
+        if loop is not None and cls._loop_thread.is_alive():
+            return loop
+        with cls._lock:
+            if cls._loop is None or not cls._loop_thread.is_alive():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="async-api-loop", daemon=True)
+                thread.start()
+                cls._loop, cls._loop_thread = loop, thread
+            return cls._loop
+
+    @classmethod
+    def run_sync(cls, coro, timeout: Optional[float] = None):
+        """Run *coro* on the background loop and block until it finishes."""
+        loop = cls.get_loop()
+        if threading.current_thread() is cls._loop_thread:
+            coro.close()
+            raise RuntimeError("run_sync cannot be called from the async API loop; await the coroutine instead")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+    def send_request_sync(self, request: APIRequest) -> APIResponse:
+        """Blocking wrapper around ``send_request`` for synchronous callers."""
+        return self.run_sync(self.send_request(request))
+
+    def send_many_sync(self, requests: List[APIRequest]) -> List[APIResponse]:
+        """Blocking wrapper around ``send_many`` for synchronous callers."""
+        return self.run_sync(self.send_many(requests))
+
+    # ------------------------------------------------------------------
+    # Async API
+    # ------------------------------------------------------------------
+    async def send_many(self, requests: List[APIRequest]) -> List[APIResponse]:
+        """Send requests concurrently; responses are returned in request order."""
+        return list(await asyncio.gather(*(self.send_request(request) for request in requests)))
+
+    async def send_request(self, request: APIRequest) -> APIResponse:
+        """
+        Send a request to the specified API endpoint.
+
+        Retries, circuit breaking and ``fallback_interface`` behave as in
+        APIService.send_request; backoff sleeps release the interface's slot.
+        Cacheable requests are answered from the ResponseCache on a hit.
+
+        Args:
+            request: APIRequest object containing request details
+
+        Returns:
+            APIResponse object containing the response
+        """
+        key = self._api_service._response_cache_key(request)
+        cached = self._api_service._cached_response(key, request)
+        if cached is not None:
+            return cached
+
+        response = await self._send_with_retry(request)
+        if response.success:
+            self._api_service._store_response(key, request, response)
+        elif response.error_class in FALLBACK_ERRORS:
+            fallback_request = self._api_service._fallback_request(request)
+            if fallback_request is not None:
+                logger.warning(f"{request.api_name} failed ({response.error_class}); "
+                               f"falling back to {fallback_request.api_name}")
+                response = await self._send_with_retry(fallback_request)
+        return response
+
+    async def _send_with_retry(self, request: APIRequest) -> APIResponse:
+        pricing_model = self._api_service._resolve_pricing_model(request.api_name, request.model)
+        api_config = self.config.get('interfaces', {}).get(request.api_name)
+        client_info = self._api_service._get_client(request.api_name)
+        if not api_config or client_info is None:
+            return APIResponse(
+                content="API endpoint not initialized",
+                raw_response=None,
+                success=False,
+                error=f"API endpoint {request.api_name} not initialized",
+                pricing_model=pricing_model
+            )
+
+        api_type = client_info["type"]
+        adapter = get_adapter(api_type)
+        if api_type not in ASYNC_API_TYPES or adapter.is_whisper(request):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._api_service._send_with_retry, request)
+
+        policy = RetryPolicy.from_config(api_config)
+        breaker = CircuitBreaker.for_interface(request.api_name, api_config)
+        estimated_tokens = estimate_request_tokens(request.content, request.max_tokens, request.model)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                return APIResponse(
+                    content="",
+                    raw_response=None,
+                    success=False,
+                    error=f"{request.api_name} is unavailable (circuit open, retry in {breaker.retry_in():.0f}s)",
+                    pricing_model=pricing_model,
+                    error_class=CIRCUIT_OPEN
+                )
+
+            response = None
+            # Concurrency slots and RPM/TPM budget are shared with the synchronous APIService path
+            lease = await RateLimiter.acquire_async(request.api_name, request.model, estimated_tokens, api_config)
+            self._track(request.api_name, 1)
+            try:
+                logger.info(f"Sending async request to {api_type} API")
+                response = await self._dispatch(api_type, request, api_config, client_info, pricing_model)
+            except Exception as e:
+                error = e
+            finally:
+                self._track(request.api_name, -1)
+                lease.release(response.total_tokens if response is not None else None)
+
+            if response is not None:
+                breaker.record_success()
+                return response
+
+            error_class = classify_error(error)
+            breaker.record_failure(error_class)
+            delay = policy.next_delay(attempt, error_class, time.monotonic() - started, retry_after_seconds(error))
+            if delay is None:
+                logger.error(f"Error in async API request to {request.api_name}: {str(error)}")
+                return APIResponse(
+                    content="",
+                    raw_response=None,
+                    success=False,
+                    error=str(error),
+                    pricing_model=pricing_model,
+                    error_class=error_class
+                )
+            attempt += 1
+            logger.warning(f"{request.api_name} request failed ({error_class}: {error}); "
+                           f"retry {attempt}/{policy.max_attempts - 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def _dispatch(self, api_type: str, request: APIRequest, api_config: Dict[str, Any],
+                        client_info: Dict[str, Any], pricing_model: Optional[str]) -> APIResponse:
+        adapter = get_adapter(api_type)
+        if adapter.uses_http_client:
+            client = self._get_http_client()
+        else:
+            client = self._get_async_client(request.api_name, api_config, client_info)
+        result = await adapter.send_async(request, client_info, client)
+        logger.info(f"{api_type} async token usage - Prompt: {result['prompt_tokens']}, "
+                    f"Completion: {result['completion_tokens']}, Total: {result['total_tokens']}")
+        return APIResponse(success=True, pricing_model=pricing_model, **result)
+
+    # ------------------------------------------------------------------
+    # Per-loop clients and limits
+    # ------------------------------------------------------------------
+    def _get_http_client(self):
+        import httpx
+        loop_id = id(asyncio.get_running_loop())
+        with self._lock:
+            client = self._http_clients.get(loop_id)
+            if client is None:
+                client = httpx.AsyncClient(
+                    timeout=HTTP_TIMEOUT_SECONDS,
+                    limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE)
+                )
+                self._http_clients[loop_id] = client
+            return client
+
+    def _get_async_client(self, api_name: str, api_config: Dict[str, Any], client_info: Dict[str, Any]):
+        key = (api_name, ClientRegistry.config_hash(api_config), id(asyncio.get_running_loop()))
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._create_async_client(api_config, client_info)
+                for stale in [k for k in self._clients if k[0] == api_name and k[2] == key[2]]:
+                    del self._clients[stale]
+                self._clients[key] = client
+            return client
+
+    @staticmethod
+    def _create_async_client(api_config: Dict[str, Any], client_info: Dict[str, Any]):
+        adapter = get_adapter(client_info["type"])
+        if adapter is None:
+            raise ValueError(f"Unsupported API type: {client_info['type']}")
+        return adapter.create_async_client(api_config, client_info)
+
+    @classmethod
+    def _track(cls, api_name: str, delta: int):
+        with cls._lock:
+            current = cls._in_flight.get(api_name, 0) + delta
+            cls._in_flight[api_name] = current
+            cls._peak[api_name] = max(cls._peak.get(api_name, 0), current)
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Dict[str, int]]:
+        """In-flight and peak concurrent requests per interface."""
+        with cls._lock:
+            return {
+                name: {"in_flight": cls._in_flight.get(name, 0), "peak": peak}
+                for name, peak in cls._peak.items()
+            }
+
+    @classmethod
+    def reset_stats(cls):
+        with cls._lock:
+            cls._peak = {name: count for name, count in cls._in_flight.items() if count}
@@ -0,0 +1,129 @@
+"""
+Client registry module for XeroFlow.
+Shares provider SDK clients and HTTP connection pools across the process.
+"""
+from typing import Optional, Dict, Any, Tuple
+import hashlib
+import json
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Connections kept alive per host by the shared requests session.
+HTTP_POOL_SIZE = 32
+
+
+class ClientRegistry:
+    """
+    Process-wide cache of API clients keyed by (interface name, config hash).
+
+    Clients are created lazily the first time an interface is used, so
+    building an APIService (and therefore a node) does no network or SDK
+    setup.  The SDK clients keep their own HTTP connection pools; LM Studio
+    and SearchEngine calls share one pooled ``requests.Session``.  Changing
+    an interface's configuration changes its hash, and ``sync_config`` (called
+    from ``save_config``) drops the clients that no longer match.
+    """
+
+    _lock = threading.Lock()
+    _clients: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    _session: Optional[requests.Session] = None
+    _created: int = 0
+
+    @staticmethod
+    def config_hash(api_config: Dict[str, Any]) -> str:
+        payload = json.dumps(api_config or {}, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get_client(cls, api_name: str, api_config: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Return the client info for an interface, creating it on first use.
+
+        Returns None when the interface is missing or cannot be initialized.
+        """
+        if not api_config:
+            return None
+        key = (api_name, cls.config_hash(api_config))
+        client_info = cls._clients.get(key)
+        if client_info is not None:
+            return client_info
+        with cls._lock:
+            client_info = cls._clients.get(key)
+            if client_info is None:
+                client_info = cls._create_client(api_name, api_config)
+                if client_info is None:
+                    return None
+                # Replace clients built from an older version of this interface.
+                for stale in [k for k in cls._clients if k[0] == api_name]:
+                    del cls._clients[stale]
+                cls._clients[key] = client_info
+                cls._created += 1
+        return client_info
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        """Shared keep-alive session for plain HTTP providers."""
+        session = cls._session
+        if session is not None:
+            return session
+        with cls._lock:
+            if cls._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                cls._session = session
+            return cls._session
+
+    @classmethod
+    def invalidate(cls, api_name: Optional[str] = None):
+        """Drop cached clients for one interface (or all of them)."""
+        with cls._lock:
+            for key in [k for k in cls._clients if api_name is None or k[0] == api_name]:
+                del cls._clients[key]
+
+    @classmethod
+    def sync_config(cls, config: Dict[str, Any]):
+        """Drop clients whose interface was removed or changed in *config*."""
+        interfaces = (config or {}).get('interfaces', {}) or {}
+        with cls._lock:
+            for key in list(cls._clients):
+                api_name, digest = key
+                api_config = interfaces.get(api_name)
+                if api_config is None or cls.config_hash(api_config) != digest:
+                    del cls._clients[key]
+                    logger.info(f"Invalidated cached client for {api_name}")
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {"clients": len(cls._clients), "created": cls._created}
+
+    @classmethod
+    def _create_client(cls, api_name: str, api_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build the client info dict for one interface (caller holds the lock)."""
+        # Imported here: the adapters use this registry's shared HTTP session
+        from services.providers import get_adapter
+
+        api_type = api_config.get('type', '').lower()
+        if not api_type:
+            logger.error(f"Missing API type for {api_name}")
+            return None
+
+        adapter = get_adapter(api_type)
+        if adapter is None:
+            logger.warning(f"Unsupported API type: {api_type}")
+            return None
+        if adapter.requires_api_key and not api_config.get('api_key'):
+            logger.error(f"Missing API key for {api_name}")
+            return None
+
+        try:
+            return adapter.create_client(api_name, api_config)
+        except Exception as e:
+            logger.error(f"Error initializing {api_type} client: {str(e)}")
+            return None
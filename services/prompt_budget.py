@@ -0,0 +1,163 @@
+"""
+Prompt budget module for XeroFlow.
+Fits prompt blocks into a model's context window, cutting the least important ones first.
+"""
+from typing import Optional, Dict, Any, List, Callable
+import json
+import logging
+import sys
+
+from services.token_counter import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+# Context windows in tokens by model-name prefix, most specific first.  An
+# interface's ``context_window`` setting overrides these.
+CONTEXT_WINDOWS = (
+    ("gpt-4.1", 1_047_576),
+    ("gpt-4.5", 128_000),
+    ("gpt-5", 400_000),
+    ("gpt-4o", 128_000),
+    ("gpt-4-turbo", 128_000),
+    ("gpt-4", 8_192),
+    ("gpt-3.5", 16_385),
+    ("gpt-oss", 131_072),
+    ("o1", 200_000),
+    ("o3", 200_000),
+    ("o4", 200_000),
+    ("claude", 200_000),
+    ("gemini", 1_048_576),
+    ("llama-3.1", 131_072),
+    ("llama-3.2", 131_072),
+    ("llama-3.3", 131_072),
+    ("llama3.1", 131_072),
+    ("llama3.2", 131_072),
+    ("llama3.3", 131_072),
+    ("llama3", 8_192),
+    ("mixtral", 32_768),
+    ("mistral-large", 131_072),
+    ("mistral", 32_768),
+    ("deepseek-r1", 128_000),
+    ("gemma3", 131_072),
+    ("gemma-3", 131_072),
+    ("qwen", 32_768),
+)
+# Budget of a model whose window is unknown: the prompt is sent untrimmed
+UNBOUNDED_BUDGET = sys.maxsize
+
+# Output tokens kept free when the request does not set max_tokens
+DEFAULT_OUTPUT_RESERVE = 4_096
+# Slack for chat formatting and tokenizer differences between providers
+SAFETY_MARGIN = 0.05
+# A truncated block shorter than this is dropped instead
+MIN_BLOCK_TOKENS = 64
+
+KEEP = "keep"
+TRUNCATE = "truncate"
+SUMMARIZE = "summarize"
+DROP = "drop"
+
+
+def context_window(model: Optional[str], api_config: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """Context window of *model* in tokens, or None when it is not known."""
+    configured = (api_config or {}).get('context_window')
+    if configured:
+        try:
+            return int(configured)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring invalid context_window: {configured!r}")
+    name = (model or "").lower().split("/")[-1]
+    for prefix, window in CONTEXT_WINDOWS:
+        if name.startswith(prefix):
+            return window
+    return None
+
+
+def compact_json(value: Any) -> str:
+    """JSON for a prompt: no indentation, non-ASCII text left as is."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class PromptBlock:
+    """
+    One part of a prompt.
+
+    ``priority`` orders what is cut first (lowest first).  ``shrink`` says
+    how the block may be cut: ``keep`` never, ``truncate`` keeps its start,
+    ``summarize`` asks the model for a shorter version (truncating if no
+    summarizer is available) and ``drop`` removes it whole.
+    """
+
+    def __init__(self, text: str, priority: int = 0, label: str = "", shrink: str = TRUNCATE):
+        self.text = text or ""
+        self.priority = priority
+        self.label = label
+        self.shrink = shrink
+
+
+class PromptFit:
+    """Result of fitting blocks: the prompt, its size and what was cut."""
+
+    def __init__(self, prompt: str, tokens: int, budget: int, cuts: List[Dict[str, Any]]):
+        self.prompt = prompt
+        self.tokens = tokens
+        self.budget = budget
+        self.cuts = cuts  # [{"label", "action", "tokens_before", "tokens_after"}]
+
+    @property
+    def trimmed(self) -> bool:
+        return bool(self.cuts)
+
+
+def fit_blocks(blocks: List[PromptBlock], budget: int, model: Optional[str] = None, separator: str = "\n\n",
+               summarizer: Optional[Callable[[str, int], Optional[str]]] = None) -> PromptFit:
+    """
+    Join *blocks* into a prompt of at most *budget* tokens.
+
+    Blocks are cut lowest priority first (later blocks first among equals)
+    until the prompt fits.  Blocks marked ``keep`` are never cut, so the
+    result can still exceed the budget when they alone do.
+    """
+    blocks = [block for block in blocks if block.text]
+    sizes = [TokenCounter.count(block.text, model) for block in blocks]
+    texts = [block.text for block in blocks]
+    overhead = TokenCounter.count(separator, model) * max(0, len(blocks) - 1)
+    cuts: List[Dict[str, Any]] = []
+
+    order = sorted((i for i, block in enumerate(blocks) if block.shrink != KEEP),
+                   key=lambda i: (blocks[i].priority, -i))
+    for i in order:
+        excess = sum(sizes) + overhead - budget
+        if excess <= 0:
+            break
+        block = blocks[i]
+        before = sizes[i]
+        target = before - excess
+        action = DROP
+        if block.shrink != DROP and target >= MIN_BLOCK_TOKENS:
+            shortened = None
+            if block.shrink == SUMMARIZE and summarizer is not None:
+                shortened = summarizer(texts[i], target)
+                action = SUMMARIZE
+            if shortened is None or TokenCounter.count(shortened, model) > target:
+                # Leave room for the marker so the model knows text is missing
+                shortened = TokenCounter.truncate(texts[i], target - 16, model) + \
+                    f"\n[... {block.label or 'content'} truncated to fit the context window ...]"
+                action = TRUNCATE
+            texts[i] = shortened
+            sizes[i] = TokenCounter.count(shortened, model)
+        else:
+            texts[i] = ""
+            sizes[i] = 0
+        cuts.append({"label": block.label, "action": action, "tokens_before": before, "tokens_after": sizes[i]})
+
+    kept = [text for text in texts if text]
+    prompt = separator.join(kept)
+    tokens = sum(sizes) + TokenCounter.count(separator, model) * max(0, len(kept) - 1)
+    if cuts:
+        logger.info(f"Prompt trimmed to {tokens}/{budget} tokens: " + ", ".join(
+            f"{cut['label'] or 'block'} {cut['action']} ({cut['tokens_before']}->{cut['tokens_after']})"
+            for cut in cuts))
+    if tokens > budget:
+        logger.warning(f"Prompt still exceeds its budget ({tokens}/{budget} tokens) after trimming")
+    return PromptFit(prompt, tokens, budget, cuts)
@@ -0,0 +1,781 @@
+"""
+Provider adapter module for XeroFlow.
+One adapter per interface type turns APIRequests into provider SDK or HTTP calls.
+"""
+from typing import Optional, Dict, Any, Iterator, List
+import inspect
+import json
+import logging
+
+from services.client_registry import ClientRegistry
+from services.rate_limiter import RateLimiter
+from services.retry_policy import ProviderHTTPError
+from services.token_counter import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+# Registry of adapter instances keyed by lower-case interface type
+ADAPTER_REGISTRY: Dict[str, "ProviderAdapter"] = {}
+
+
+def register_adapter(api_type: str):
+    """
+    Decorator to register a provider adapter class for an interface type.
+    """
+    def decorator(cls):
+        cls.api_type = api_type
+        ADAPTER_REGISTRY[api_type] = cls()
+        return cls
+    return decorator
+
+
+def get_adapter(api_type: Optional[str]) -> Optional["ProviderAdapter"]:
+    """The adapter for an interface type, or None when the type is unsupported."""
+    return ADAPTER_REGISTRY.get((api_type or "").lower())
+
+
+def _result(content: str, raw_response: Any = None, prompt_tokens: int = 0, completion_tokens: int = 0,
+            total_tokens: Optional[int] = None) -> Dict[str, Any]:
+    """Successful call as the keyword arguments APIService turns into an APIResponse."""
+    return {
+        "content": content,
+        "raw_response": raw_response,
+        "prompt_tokens": prompt_tokens or 0,
+        "completion_tokens": completion_tokens or 0,
+        "total_tokens": (prompt_tokens or 0) + (completion_tokens or 0) if total_tokens is None else total_tokens or 0,
+    }
+
+
+def _batch_error(message: str, raw_response: Any = None, status_code: Optional[int] = None) -> Dict[str, Any]:
+    """Failed batch entry; APIService turns it into an unsuccessful APIResponse."""
+    return {"error": message, "raw_response": raw_response, "status_code": status_code}
+
+
+def _image_url_messages(prompt: str, mime_type: str, image_b64: str) -> List[Dict[str, Any]]:
+    """OpenAI-style multimodal message with the image inlined as a data URL."""
+    return [{
+        "role": "user",
+        "content": [
+            {"type": "text", "text": prompt},
+            {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{image_b64}"}}
+        ]
+    }]
+
+
+async def parse_raw_response(raw):
+    """Parsed body of an async ``with_raw_response`` call."""
+    # Some SDKs return a sync ``parse`` from with_raw_response, others a coroutine
+    parsed = raw.parse()
+    if inspect.isawaitable(parsed):
+        parsed = await parsed
+    return parsed
+
+
+def _estimated_usage(prompt: Any, content: str, model: Optional[str] = None) -> Dict[str, int]:
+    """Locally counted usage for providers that do not report it."""
+    prompt_tokens = TokenCounter.count(prompt, model)
+    completion_tokens = TokenCounter.count(content, model)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+def _gemini_usage(response, prompt: Any, content: str, model: Optional[str]) -> Dict[str, int]:
+    """Gemini's reported ``usage_metadata``, or a local count when it is missing."""
+    metadata = getattr(response, 'usage_metadata', None)
+    prompt_tokens = getattr(metadata, 'prompt_token_count', None) if metadata else None
+    if not prompt_tokens:
+        return _estimated_usage(prompt, content, model)
+    completion_tokens = getattr(metadata, 'candidates_token_count', None) or 0
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": getattr(metadata, 'total_token_count', None) or prompt_tokens + completion_tokens}
+
+
+def _ollama_usage(response) -> Dict[str, int]:
+    """Ollama reports prompt/completion counts as ``prompt_eval_count``/``eval_count``."""
+    prompt_tokens = response.get('prompt_eval_count') or 0
+    completion_tokens = response.get('eval_count') or 0
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+class ProviderAdapter:
+    """
+    Translates requests for one interface type into provider calls.
+
+    Adapters are stateless: ``create_client`` builds the client info that
+    ClientRegistry caches, and clients are passed back in on every call.
+    ``send``, ``send_async`` and ``send_vision`` return the keyword arguments
+    of a successful APIResponse and raise on failure so APIService can
+    classify and retry the error.  ``stream`` yields text deltas and fills in
+    the ``usage`` dict it is given.  Adapters with ``supports_batch`` submit,
+    poll, cancel and collect provider batches; ``batch_results`` maps each
+    custom_id to APIResponse keyword arguments or a ``_batch_error`` entry.
+    The capability flags tell APIService which paths an adapter implements.
+    """
+
+    api_type = ""
+    supports_chat = True
+    supports_vision = False
+    supports_whisper = False
+    supports_streaming = False
+    supports_batch = False
+    requires_api_key = True
+    # Async calls go through AsyncAPIService's shared httpx client instead of an SDK client
+    uses_http_client = False
+
+    def is_whisper(self, request) -> bool:
+        return False
+
+    def sanitize_params(self, model: Optional[str], params: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop or adjust params the model would reject."""
+        return params
+
+    def send(self, request, client_info: Dict[str, Any]) -> Dict[str, Any]:
+        raise NotImplementedError(f"Chat is not supported for API type: {self.api_type}")
+
+    def stream(self, request, client_info: Dict[str, Any], usage: Dict[str, int]) -> Iterator[str]:
+        raise NotImplementedError(f"Streaming is not supported for API type: {self.api_type}")
+
+    def send_vision(self, client_info: Dict[str, Any], model: Optional[str], prompt: str, image_bytes: bytes,
+                    image_b64: str, mime_type: str, max_tokens: Optional[int],
+                    temperature: Optional[float]) -> Dict[str, Any]:
+        raise NotImplementedError(f"Vision not supported for API type: {self.api_type}")
+
+    def create_client(self, api_name: str, api_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Client info for an interface: ``{"type": ..., "client": ...}`` plus any settings calls need."""
+        raise ValueError(f"Unsupported API type: {self.api_type}")
+
+    def create_async_client(self, api_config: Dict[str, Any], client_info: Dict[str, Any]):
+        raise ValueError(f"Unsupported API type: {self.api_type}")
+
+    async def send_async(self, request, client_info: Dict[str, Any], client) -> Dict[str, Any]:
+        raise NotImplementedError(f"Async requests are not supported for API type: {self.api_type}")
+
+    def submit_batch(self, client, requests: Dict[str, Any]):
+        """Create a provider batch for APIRequests keyed by custom_id; returns the batch object."""
+        raise NotImplementedError(f"Batches are not supported for API type: {self.api_type}")
+
+    def poll_batch(self, client, batch):
+        """Refreshed ``(batch, finished_count, done)``."""
+        raise NotImplementedError(f"Batches are not supported for API type: {self.api_type}")
+
+    def cancel_batch(self, client, batch):
+        raise NotImplementedError(f"Batches are not supported for API type: {self.api_type}")
+
+    def batch_results(self, client, batch) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError(f"Batches are not supported for API type: {self.api_type}")
+
+    @staticmethod
+    def _chat_usage(response) -> Dict[str, int]:
+        """Token usage of an OpenAI-style chat completion object."""
+        usage = getattr(response, 'usage', None)
+        if not usage:
+            return {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        return {
+            "prompt_tokens": getattr(usage, 'prompt_tokens', 0),
+            "completion_tokens": getattr(usage, 'completion_tokens', 0),
+            "total_tokens": getattr(usage, 'total_tokens', 0),
+        }
+
+
+@register_adapter("openai")
+class OpenAIAdapter(ProviderAdapter):
+    supports_vision = True
+    supports_whisper = True
+    supports_streaming = True
+    supports_batch = True
+
+    def is_whisper(self, request) -> bool:
+        return 'whisper' in (request.model or '').lower()
+
+    def sanitize_params(self, model: Optional[str], params: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply OpenAI model-specific parameter rules.
+
+        - GPT-5 currently only supports default temperature=1. Remove/override any
+          non-default temperature to avoid 400 errors.
+        - o3 reasoning models ("o3" and "o3-*"): temperature is ignored; ensure it is not sent.
+        """
+        # Normalize model name for checks
+        model_norm = (model or "").lower()
+
+        # o3 models (plain or with suffix): ensure temperature is not sent
+        if model_norm.startswith("o3"):
+            if "temperature" in params:
+                logger.info("Removing temperature for OpenAI o3-* model (ignored by API)")
+                params.pop("temperature", None)
+            return params
+
+        # gpt-5 models: only default temperature=1 is supported; best to omit parameter
+        if model_norm.startswith("gpt-5"):
+            temp = params.get("temperature")
+            if temp is not None and temp != 1:
+                logger.warning("OpenAI GPT-5 only supports default temperature=1; removing provided temperature")
+            # Omit temperature entirely to use provider default (1)
+            params.pop("temperature", None)
+            return params
+
+        return params
+
+    def chat_params(self, request) -> Dict[str, Any]:
+        """Build sanitized chat completion params for an OpenAI request."""
+        params = {
+            "model": request.model,
+            "messages": [{"role": "user", "content": request.content}]
+        }
+
+        if request.max_tokens:
+            if request.model and request.model.lower().startswith('o3'):
+                params["max_completion_tokens"] = request.max_tokens
+            else:
+                params["max_tokens"] = request.max_tokens
+
+        if request.temperature and not (request.model and request.model.lower().startswith('o3')):
+            params["temperature"] = request.temperature
+
+        # Sanitize params based on provider/model constraints before dispatch
+        return self.sanitize_params(request.model, params)
+
+    def stream_params(self, request) -> Dict[str, Any]:
+        params = self.chat_params(request)
+        params["stream_options"] = {"include_usage": True}
+        return params
+
+    def send(self, request, client_info: Dict[str, Any]) -> Dict[str, Any]:
+        client = client_info["client"]
+        if self.is_whisper(request):
+            file_path = request.additional_params.get('file')
+            if not file_path:
+                raise ValueError("File path is required for Whisper transcription.")
+            with open(file_path, "rb") as audio_file:
+                response = client.audio.transcriptions.create(model=request.model, file=audio_file)
+            # Whisper is billed per audio minute by the token logger, not per token
+            return _result(response.text, response)
+
+        raw = client.chat.completions.with_raw_response.create(**self.chat_params(request))
+        RateLimiter.update_from_headers(request.api_name, request.model, raw.headers, self.api_type)
+        response = raw.parse()
+        usage = self._chat_usage(response)
+        logger.info(f"{self.api_type} token usage - Prompt: {usage['prompt_tokens']}, "
+                    f"Completion: {usage['completion_tokens']}, Total: {usage['total_tokens']}")
+        return _result(response.choices[0].message.content, response, **usage)
+
+    def stream(self, request, client_info: Dict[str, Any], usage: Dict[str, int]) -> Iterator[str]:
+        for chunk in client_info["client"].chat.completions.create(stream=True, **self.stream_params(request)):
+            if chunk.choices:
+                delta = getattr(chunk.choices[0].delta, 'content', None)
+                if delta:
+                    yield delta
+            chunk_usage = getattr(chunk, 'usage', None) or getattr(getattr(chunk, 'x_groq', None), 'usage', None)
+            if chunk_usage:
+                usage["prompt_tokens"] = getattr(chunk_usage, 'prompt_tokens', 0) or 0
+                usage["completion_tokens"] = getattr(chunk_usage, 'completion_tokens', 0) or 0
+                usage["total_tokens"] = getattr(chunk_usage, 'total_tokens', 0) or 0
+
+    def send_vision(self, client_info, model, prompt, image_bytes, image_b64, mime_type, max_tokens, temperature):
+        params: Dict[str, Any] = {"model": model, "messages": _image_url_messages(prompt, mime_type, image_b64)}
+        if max_tokens:
+            params["max_tokens"] = max_tokens
+        if temperature is not None:
+            params["temperature"] = temperature
+        response = client_info["client"].chat.completions.create(**self.sanitize_params(model, params))
+        return _result(response.choices[0].message.content, response, **self._chat_usage(response))
+
+    def create_client(self, api_name: str, api_config: Dict[str, Any]) -> Dict[str, Any]:
+        from openai import OpenAI
+        api_key = api_config.get('api_key')
+        api_url = (api_config.get('api_url') or '').rstrip('/')
+        # OpenAI's base URL should always end with /v1
+        if api_url:
+            api_url = api_url + '/v1'
+        client = OpenAI(api_key=api_key, base_url=api_url) if api_url else OpenAI(api_key=api_key)
+        logger.info(f"Initialized OpenAI client with URL: {api_url if api_url else 'default'}")
+        return {"client": client, "type": self.api_type}
+
+    def create_async_client(self, api_config: Dict[str, Any], client_info: Dict[str, Any]):
+        from openai import AsyncOpenAI
+        api_url = (api_config.get('api_url') or '').rstrip('/')
+        # OpenAI's base URL should always end with /v1
+        if api_url:
+            return AsyncOpenAI(api_key=api_config.get('api_key'), base_url=api_url + '/v1')
+        return AsyncOpenAI(api_key=api_config.get('api_key'))
+
+    async def send_async(self, request, client_info: Dict[str, Any], client) -> Dict[str, Any]:
+        raw = await client.chat.completions.with_raw_response.create(**self.chat_params(request))
+        RateLimiter.update_from_headers(request.api_name, request.model, raw.headers, self.api_type)
+        response = await parse_raw_response(raw)
+        return _result(response.choices[0].message.content, response, **self._chat_usage(response))
+
+    def submit_batch(self, client, requests: Dict[str, Any]):
+        # The Batch API takes the requests as an uploaded JSONL file
+        lines = [json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions",
+                             "body": self.chat_params(request)})
+                 for custom_id, request in requests.items()]
+        upload = client.files.create(file=("batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+        return client.batches.create(input_file_id=upload.id, endpoint="/v1/chat/completions",
+                                     completion_window="24h")
+
+    def poll_batch(self, client, batch):
+        batch = client.batches.retrieve(batch.id)
+        counts = batch.request_counts
+        finished = (counts.completed + counts.failed) if counts else 0
+        return batch, finished, batch.status in ("completed", "failed", "expired", "cancelled")
+
+    def cancel_batch(self, client, batch):
+        client.batches.cancel(batch.id)
+
+    def batch_results(self, client, batch) -> Dict[str, Dict[str, Any]]:
+        """Parse the output and error files of a finished batch."""
+        if batch.status == "failed" and not batch.output_file_id:
+            raise ValueError(f"Batch {batch.id} failed: {batch.errors}")
+        results: Dict[str, Dict[str, Any]] = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                response = entry.get("response") or {}
+                body = response.get("body") or {}
+                status = response.get("status_code")
+                if status == 200 and body.get("choices"):
+                    usage = body.get("usage") or {}
+                    results[entry["custom_id"]] = _result(
+                        body["choices"][0].get("message", {}).get("content", ""), body,
+                        usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0),
+                        usage.get("total_tokens", 0))
+                    continue
+                error = entry.get("error") or body.get("error") or {}
+                message = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+                results[entry["custom_id"]] = _batch_error(
+                    message or f"Batch request failed with status {status}", entry, status)
+        return results
+
+
+@register_adapter("groq")
+class GroqAdapter(OpenAIAdapter):
+    supports_whisper = False
+    supports_batch = False
+
+    def is_whisper(self, request) -> bool:
+        return False
+
+    def sanitize_params(self, model: Optional[str], params: Dict[str, Any]) -> Dict[str, Any]:
+        return params
+
+    def chat_params(self, request) -> Dict[str, Any]:
+        return {
+            "model": request.model,
+            "messages": [{"role": "user", "content": request.content}],
+            "max_tokens": request.max_tokens,
+            "temperature": request.temperature or 0.7,
+        }
+
+    def stream_params(self, request) -> Dict[str, Any]:
+        # Groq reports usage on the final chunk's ``x_groq`` field
+        return self.chat_params(request)
+
+    def create_client(self, api_name: str, api_config: Dict[str, Any]) -> Dict[str, Any]:
+        from groq import Groq
+        client = Groq(api_key=api_config.get('api_key'))
+        logger.info(f"Initialized Groq client for {api_name}")
+        return {"client": client, "type": self.api_type}
+
+    def create_async_client(self, api_config: Dict[str, Any], client_info: Dict[str, Any]):
+        from groq import AsyncGroq
+        return AsyncGroq(api_key=api_config.get('api_key'))
+
+
+@register_adapter("claude")
+class ClaudeAdapter(ProviderAdapter):
+    supports_vision = True
+    supports_streaming = True
+    supports_batch = True
+
+    @staticmethod
+    def message_params(request) -> Dict[str, Any]:
+        return {
+            "model": request.model,
+            "max_tokens": request.max_tokens or 1024,
+            "messages": [{"role": "user", "content": request.content}]
+        }
+
+    @staticmethod
+    def _usage(response) -> Dict[str, int]:
+        usage = getattr(response, 'usage', None)
+        if not usage:
+            return {"prompt_tokens": 0, "completion_tokens": 0}
+        return {"prompt_tokens": getattr(usage, 'input_tokens', 0),
+                "completion_tokens": getattr(usage, 'output_tokens', 0)}
+
+    def send(self, request, client_info: Dict[str, Any]) -> Dict[str, Any]:
+        raw = client_info["client"].messages.with_raw_response.create(**self.message_params(request))
+        RateLimiter.update_from_headers(request.api_name, request.model, raw.headers, self.api_type)
+        response = raw.parse()
+        usage = self._usage(response)
+        logger.info(f"Claude token usage - Prompt: {usage['prompt_tokens']}, "
+                    f"Completion: {usage['completion_tokens']}")
+        return _result(response.content[0].text, response, **usage)
+
+    def stream(self, request, client_info: Dict[str, Any], usage: Dict[str, int]) -> Iterator[str]:
+        with client_info["client"].messages.stream(**self.message_params(request)) as stream:
+            for delta in stream.text_stream:
+                if delta:
+                    yield delta
+            final_message = stream.get_final_message()
+        final_usage = self._usage(final_message)
+        usage.update(final_usage, total_tokens=final_usage["prompt_tokens"] + final_usage["completion_tokens"])
+
+    def send_vision(self, client_info, model, prompt, image_bytes, image_b64, mime_type, max_tokens, temperature):
+        messages = [{
+            "role": "user",
+            "content": [
+                {"type": "image", "source": {"type": "base64", "media_type": mime_type, "data": image_b64}},
+                {"type": "text", "text": prompt},
+            ]
+        }]
+        response = client_info["client"].messages.create(model=model, max_tokens=max_tokens or 1024,
+                                                          messages=messages)
+        return _result(response.content[0].text, response, **self._usage(response))
+
+    def create_client(self, api_name: str, api_config: Dict[str, Any]) -> Dict[str, Any]:
+        from anthropic import Anthropic
+        client = Anthropic(api_key=api_config.get('api_key'))
+        logger.info(f"Initialized Claude client for {api_name}")
+        return {"client": client, "type": self.api_type}
+
+    def create_async_client(self, api_config: Dict[str, Any], client_info: Dict[str, Any]):
+        from anthropic import AsyncAnthropic
+        return AsyncAnthropic(api_key=api_config.get('api_key'))
+
+    async def send_async(self, request, client_info: Dict[str, Any], client) -> Dict[str, Any]:
+        raw = await client.messages.with_raw_response.create(**self.message_params(request))
+        RateLimiter.update_from_headers(request.api_name, request.model, raw.headers, self.api_type)
+        response = await parse_raw_response(raw)
+        return _result(response.content[0].text, response, **self._usage(response))
+
+    def submit_batch(self, client, requests: Dict[str, Any]):
+        batch_requests = []
+        for custom_id, request in requests.items():
+            params = self.message_params(request)
+            if request.temperature is not None:
+                params["temperature"] = request.temperature
+            batch_requests.append({"custom_id": custom_id, "params": params})
+        return client.messages.batches.create(requests=batch_requests)
+
+    def poll_batch(self, client, batch):
+        batch = client.messages.batches.retrieve(batch.id)
+        counts = batch.request_counts
+        finished = counts.succeeded + counts.errored + counts.canceled + counts.expired
+        return batch, finished, batch.processing_status == "ended"
+
+    def cancel_batch(self, client, batch):
+        client.messages.batches.cancel(batch.id)
+
+    def batch_results(self, client, batch) -> Dict[str, Dict[str, Any]]:
+        """Collect the results of a finished message batch."""
+        results: Dict[str, Dict[str, Any]] = {}
+        for entry in client.messages.batches.results(batch.id):
+            result = entry.result
+            if result.type == "succeeded":
+                message = result.message
+                text = "".join(block.text for block in message.content if getattr(block, "type", "") == "text")
+                results[entry.custom_id] = _result(text, message, **self._usage(message))
+            else:
+                error = getattr(result, "error", None)
+                results[entry.custom_id] = _batch_error(
+                    str(getattr(error, "error", error) or f"Batch request {result.type}"), entry)
+        return results
+
+
+@register_adapter("google")
+class GoogleAdapter(ProviderAdapter):
+    supports_vision = True
+    supports_streaming = True
+
+    def send(self, request, client_info: Dict[str, Any]) -> Dict[str, Any]:
+        response = client_info["client"].models.generate_content(model=request.model, contents=request.content)
+        return _result(response.text, response,
+                       **_gemini_usage(response, request.content, response.text, request.model))
+
+    def stream(self, request, client_info: Dict[str, Any], usage: Dict[str, int]) -> Iterator[str]:
+        parts = []
+        chunk = None
+        for chunk in client_info["client"].models.generate_content_stream(model=request.model,
+                                                                          contents=request.content):
+            delta = getattr(chunk, 'text', None)
+            if delta:
+                parts.append(delta)
+                yield delta
+        # The final chunk carries the usage for the whole response
+        usage.update(_gemini_usage(chunk, request.content, "".join(parts), request.model))
+
+    def send_vision(self, client_info, model, prompt, image_bytes, image_b64, mime_type, max_tokens, temperature):
+        from google.genai import types as _gtypes
+        parts = [
+            _gtypes.Part.from_text(text=prompt),
+            _gtypes.Part.from_bytes(data=image_bytes, mime_type=mime_type),
+        ]
+        response = client_info["client"].models.generate_content(model=model, contents=parts)
+        return _result(response.text, response, **_gemini_usage(response, prompt, response.text, model))
+
+    def create_client(self, api_name: str, api_config: Dict[str, Any]) -> Dict[str, Any]:
+        import google.genai as genai
+        client = genai.Client(api_key=api_config.get('api_key'))
+        logger.info(f"Initialized Google Gemini client for {api_name}")
+        return {"client": client, "type": self.api_type}
+
+    def create_async_client(self, api_config: Dict[str, Any], client_info: Dict[str, Any]):
+        # google-genai exposes its async surface on the sync client
+        return client_info["client"].aio
+
+    async def send_async(self, request, client_info: Dict[str, Any], client) -> Dict[str, Any]:
+        response = await client.models.generate_content(model=request.model, contents=request.content)
+        return _result(response.text, response,
+                       **_gemini_usage(response, request.content, response.text, request.model))
+
+
+@register_adapter("ollama")
+class OllamaAdapter(ProviderAdapter):
+    supports_vision = True
+    supports_streaming = True
+    requires_api_key = False
+
+    def send(self, request, client_info: Dict[str, Any]) -> Dict[str, Any]:
+        response = client_info["client"].chat(model=request.model,
+                                              messages=[{"role": "user", "content": request.content}])
+        return _result(response['message']['content'], response, **_ollama_usage(response))
+
+    def stream(self, request, client_info: Dict[str, Any], usage: Dict[str, int]) -> Iterator[str]:
+        for chunk in client_info["client"].chat(
+            model=request.model,
+            messages=[{"role": "user", "content": request.content}],
+            stream=True
+        ):
+            delta = chunk['message']['content']
+            if delta:
+                yield delta
+            if chunk.get('done'):
+                usage.update(_ollama_usage(chunk))
+
+    def send_vision(self, client_info, model, prompt, image_bytes, image_b64, mime_type, max_tokens, temperature):
+        messages = [{"role": "user", "content": prompt, "images": [image_b64]}]
+        response = client_info["client"].chat(model=model, messages=messages)
+        return _result(response['message']['content'], response, **_ollama_usage(response))
+
+    def create_client(self, api_name: str, api_config: Dict[str, Any]) -> Dict[str, Any]:
+        from ollama import Client
+        api_url = (api_config.get('api_url') or '').rstrip('/')
+        client = Client(host=api_url)
+        logger.info(f"Initialized Ollama client with host: {api_url}")
+        return {"client": client, "type": self.api_type}
+
+    def create_async_client(self, api_config: Dict[str, Any], client_info: Dict[str, Any]):
+        from ollama import AsyncClient
+        return AsyncClient(host=(api_config.get('api_url') or '').rstrip('/'))
+
+    async def send_async(self, request, client_info: Dict[str, Any], client) -> Dict[str, Any]:
+        response = await client.chat(model=request.model,
+                                     messages=[{"role": "user", "content": request.content}])
+        return _result(response['message']['content'], response, **_ollama_usage(response))
+
+
+@register_adapter("lmstudio")
+class LMStudioAdapter(ProviderAdapter):
+    supports_vision = True
+    supports_streaming = True
+    requires_api_key = False
+    uses_http_client = True
+
+    @staticmethod
+    def endpoint(client_info: Dict[str, Any]):
+        """Return the LM Studio chat completions URL and request headers."""
+        base_url = client_info.get("api_url") or "http://localhost:1234"
+        base_url = base_url.rstrip('/')
+        if not base_url.endswith("/v1"):
+            base_url = f"{base_url}/v1"
+        headers = {"Content-Type": "application/json"}
+        api_key = client_info.get("api_key")
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        return f"{base_url}/chat/completions", headers
+
+    @staticmethod
+    def payload(request) -> Dict[str, Any]:
+        # Determine messages payload
+        messages = request.additional_params.get('messages')
+        if not messages:
+            messages = []
+            system_message = request.additional_params.get('system_message')
+            if system_message:
+                messages.append({"role": "system", "content": system_message})
+            messages.append({"role": "user", "content": request.content})
+
+        payload = {
+            "model": request.model,
+            "messages": messages
+        }
+
+        if request.max_tokens:
+            payload["max_tokens"] = request.max_tokens
+        if request.temperature is not None:
+            payload["temperature"] = request.temperature
+        return payload
+
+    @staticmethod
+    def parse(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Result of an LM Studio chat completions body."""
+        choices = data.get("choices", [])
+        if not choices:
+            raise ValueError("LM Studio response missing choices")
+        usage = data.get("usage", {})
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        return _result(choices[0].get("message", {}).get("content", ""), data, prompt_tokens, completion_tokens,
+                       usage.get("total_tokens", prompt_tokens + completion_tokens))
+
+    @staticmethod
+    def _check(response):
+        if response.status_code != 200:
+            raise ProviderHTTPError(f"LM Studio request failed ({response.status_code}): {response.text}",
+                                    response.status_code, response.headers)
+
+    def send(self, request, client_info: Dict[str, Any]) -> Dict[str, Any]:
+        url, headers = self.endpoint(client_info)
+        response = ClientRegistry.get_session().post(url, headers=headers, json=self.payload(request), timeout=120)
+        RateLimiter.update_from_headers(request.api_name, request.model, response.headers, self.api_type)
+        self._check(response)
+        return self.parse(response.json())
+
+    def stream(self, request, client_info: Dict[str, Any], usage: Dict[str, int]) -> Iterator[str]:
+        url, headers = self.endpoint(client_info)
+        payload = self.payload(request)
+        payload["stream"] = True
+        with ClientRegistry.get_session().post(url, headers=headers, json=payload, stream=True, timeout=120) as response:
+            RateLimiter.update_from_headers(request.api_name, request.model, response.headers, self.api_type)
+            self._check(response)
+            response.encoding = 'utf-8'
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                choices = event.get("choices") or []
+                delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                if delta:
+                    yield delta
+                if event.get("usage"):
+                    usage["prompt_tokens"] = event["usage"].get("prompt_tokens", 0)
+                    usage["completion_tokens"] = event["usage"].get("completion_tokens", 0)
+                    usage["total_tokens"] = event["usage"].get(
+                        "total_tokens", usage["prompt_tokens"] + usage["completion_tokens"])
+
+    def send_vision(self, client_info, model, prompt, image_bytes, image_b64, mime_type, max_tokens, temperature):
+        url, headers = self.endpoint(client_info)
+        payload: Dict[str, Any] = {"model": model, "messages": _image_url_messages(prompt, mime_type, image_b64)}
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        if temperature is not None:
+            payload["temperature"] = temperature
+        response = ClientRegistry.get_session().post(url, headers=headers, json=payload, timeout=120)
+        if response.status_code != 200:
+            raise ValueError(f"LM Studio vision request failed ({response.status_code}): {response.text}")
+        return self.parse(response.json())
+
+    def create_client(self, api_name: str, api_config: Dict[str, Any]) -> Dict[str, Any]:
+        # Plain HTTP through ClientRegistry's shared session; no SDK client
+        base = (api_config.get('api_url') or "http://localhost:1234").rstrip('/')
+        logger.info(f"Initialized LM Studio client with base URL: {base}")
+        return {"type": self.api_type, "api_url": base, "api_key": api_config.get('api_key')}
+
+    async def send_async(self, request, client_info: Dict[str, Any], client) -> Dict[str, Any]:
+        url, headers = self.endpoint(client_info)
+        response = await client.post(url, headers=headers, json=self.payload(request))
+        RateLimiter.update_from_headers(request.api_name, request.model, response.headers, self.api_type)
+        self._check(response)
+        return self.parse(response.json())
+
+
+@register_adapter("searchengine")
+class SearchEngineAdapter(ProviderAdapter):
+    """SearXNG ``/search``; ``raw_response['results']`` holds the cleaned result URLs."""
+
+    requires_api_key = False
+    uses_http_client = True
+
+    @staticmethod
+    def params(request) -> Dict[str, Any]:
+        """Query parameters for a SearxNG ``/search`` request."""
+        params = {
+            'q': request.content,
+            'format': 'json'
+        }
+
+        if request.additional_params:
+            num_results = request.additional_params.get('num_results')
+            if num_results is not None:
+                params['n'] = num_results
+
+            skip = request.additional_params.get('skip')
+            if skip is not None:
+                # SearxNG pageno is 1-based.
+                params['pageno'] = skip + 1
+        return params
+
+    @staticmethod
+    def search_url(request, client_info: Dict[str, Any]) -> str:
+        api_url = client_info.get('api_url', '')
+        if not api_url:
+            raise ValueError(f"No API URL configured for {request.api_name}")
+        return f"{api_url.rstrip('/')}/search"
+
+    @staticmethod
+    def parse(results: Dict[str, Any], required_count: Optional[int]) -> Dict[str, Any]:
+        """Format SearxNG JSON results, keeping at most *required_count* clean URLs."""
+        from services.api_service import APIService
+
+        search_results = []
+        clean_urls = []
+
+        for result in results.get('results', []):
+            title = result.get('title', '')
+            url = APIService.clean_url(result.get('url', ''))
+            if url:
+                clean_urls.append(url)
+                snippet = result.get('content', '')
+                search_results.append(f"Title: {title}\nURL: {url}\nSummary: {snippet}\n")
+            if required_count is not None and len(clean_urls) >= required_count:
+                break
+
+        content = "\n".join(search_results) if search_results else "No results found"
+
+        logger.info(f"Returning {len(clean_urls)} search results (limited to {required_count})")
+        return _result(content, {'results': clean_urls})
+
+    def create_client(self, api_name: str, api_config: Dict[str, Any]) -> Dict[str, Any]:
+        # SearchEngine doesn't need an API key or client
+        api_url = (api_config.get('api_url') or '').rstrip('/')
+        logger.info(f"Initialized SearchEngine client with URL: {api_url}")
+        return {"type": self.api_type, "api_url": api_url}
+
+    @staticmethod
+    def _check(response):
+        if response.status_code != 200:
+            raise ProviderHTTPError(f"Search request failed with status {response.status_code}",
+                                    response.status_code, response.headers)
+
+    def send(self, request, client_info: Dict[str, Any]) -> Dict[str, Any]:
+        url = self.search_url(request, client_info)
+        params = self.params(request)
+        logger.info(f"Making search request to {url} (n={params.get('n')}, page={params.get('pageno', 1)})")
+        response = ClientRegistry.get_session().get(url, params=params)
+        self._check(response)
+        return self.parse(response.json(), params.get('n'))
+
+    async def send_async(self, request, client_info: Dict[str, Any], client) -> Dict[str, Any]:
+        params = self.params(request)
+        response = await client.get(self.search_url(request, client_info), params=params)
+        self._check(response)
+        return self.parse(response.json(), params.get('n'))
@@ -0,0 +1,417 @@
+"""
+Rate limiter module for XeroFlow.
+Process-wide request, token and concurrency limits per API interface.
+"""
+from typing import Optional, Dict, Any, Tuple
+from datetime import datetime, timezone
+import asyncio
+import collections
+import logging
+import re
+import threading
+import time
+
+from services.token_counter import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+# Bucket capacity in seconds of refill: small enough that callers are paced
+# evenly through the minute rather than bursting into the provider's limit.
+BURST_SECONDS = 6.0
+
+# Concurrent requests allowed per interface unless it sets ``max_concurrency``.
+# Local servers process requests one or two at a time, so queueing more only
+# adds latency; hosted APIs are limited by their own rate limits instead.
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_CONCURRENCY_BY_TYPE = {
+    "lmstudio": 2,
+    "ollama": 2,
+    "searchengine": 8,
+    "openai": 16,
+    "claude": 16,
+    "groq": 16,
+    "google": 16,
+}
+
+# Providers whose ``x-ratelimit-*-requests`` headers count requests per
+# minute; Groq's count requests per day and must not feed the rpm bucket.
+PER_MINUTE_REQUEST_HEADERS = {"openai", "lmstudio"}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_SCALE = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def concurrency_limit(api_config: Dict[str, Any]) -> int:
+    """Maximum in-flight requests for an interface."""
+    configured = api_config.get('max_concurrency')
+    if configured:
+        try:
+            return max(1, int(configured))
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring invalid max_concurrency: {configured!r}")
+    api_type = str(api_config.get('type', '')).lower()
+    return DEFAULT_CONCURRENCY_BY_TYPE.get(api_type, DEFAULT_MAX_CONCURRENCY)
+
+
+def estimate_request_tokens(content: Any, max_tokens: Optional[int] = None, model: Optional[str] = None) -> int:
+    """Tokens a request is charged against TPM before its real usage is known."""
+    return max(1, TokenCounter.count(content, model)) + int(max_tokens or 0)
+
+
+def parse_reset_seconds(value: Any) -> Optional[float]:
+    """
+    Seconds until a rate limit resets.
+
+    Accepts ``x-ratelimit-reset-*`` durations such as ``"20ms"``, ``"1.5s"``,
+    ``"6m0s"`` or ``"12"`` and Anthropic's RFC 3339 timestamps.
+    """
+    if value is None:
+        return None
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        reset_at = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        reset_at = None
+    if reset_at is not None:
+        if reset_at.tzinfo is None:
+            reset_at = reset_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
+    parts = _DURATION_PART.findall(text)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_SCALE[unit] for amount, unit in parts)
+
+
+def _header_int(headers, name: str) -> Optional[int]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Reservation-based token bucket.
+
+    ``reserve`` always debits the bucket and returns how long the caller must
+    wait before using the reservation.  The balance may go negative, so
+    callers are served strictly in reservation order and the combined rate
+    converges on ``rate`` without bursts followed by backoff.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + max(0.0, now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def adjust(self, amount: float, now: Optional[float] = None):
+        """Debit (positive) or refund (negative) tokens after the fact."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.level = min(self.capacity, self.level - amount)
+
+    def sync_remaining(self, remaining: int, reset_seconds: Optional[float], now: Optional[float] = None):
+        """Lower the balance to what the provider reports as remaining."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if remaining < self.level:
+            self.level = float(remaining)
+        if remaining <= 0 and reset_seconds:
+            self.level = min(self.level, -self.rate * reset_seconds)
+
+
+class _FairSemaphore:
+    """
+    Counting semaphore shared by threads and asyncio tasks.
+
+    Waiters of both kinds join one queue and are admitted in arrival order;
+    a released slot is handed straight to the next waiter, so a blocked
+    thread and an awaiting task never race for it.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._lock = threading.Lock()
+        self._waiters = collections.deque()  # threading.Event or asyncio.Future
+
+    def _try_acquire(self) -> bool:
+        """Take a free slot when nobody is queued; caller holds the lock."""
+        if not self._waiters and self.active < self.limit:
+            self.active += 1
+            return True
+        return False
+
+    def _wake(self):
+        """Hand free slots to queued waiters; caller holds the lock."""
+        while self._waiters and self.active < self.limit:
+            waiter = self._waiters.popleft()
+            self.active += 1
+            if isinstance(waiter, threading.Event):
+                waiter.set()
+            else:
+                waiter.get_loop().call_soon_threadsafe(self._grant, waiter)
+
+    def _grant(self, future):
+        # The task may have been cancelled after the slot was handed over
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def set_limit(self, limit: int):
+        with self._lock:
+            self.limit = limit
+            self._wake()
+
+    def acquire(self):
+        with self._lock:
+            if self._try_acquire():
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()
+
+    async def acquire_async(self):
+        with self._lock:
+            if self._try_acquire():
+                return
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = future in self._waiters
+                if queued:
+                    self._waiters.remove(future)
+            if not queued and future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+            self._wake()
+
+
+class _ModelLimits:
+    def __init__(self, limits: Dict[str, Any]):
+        self.configured = dict(limits)
+        self.config = dict(limits)  # Configured limits plus any adopted from headers
+        self.requests = self._bucket(limits.get('rpm'))
+        self.tokens = self._bucket(limits.get('tpm'))
+
+    @staticmethod
+    def _bucket(per_minute) -> Optional[TokenBucket]:
+        if not per_minute:
+            return None
+        rate = float(per_minute) / 60.0
+        return TokenBucket(rate, max(1.0, rate * BURST_SECONDS))
+
+
+class RateLimitLease:
+    """Handle returned by ``RateLimiter.acquire``; call ``release`` when the request finishes."""
+
+    def __init__(self, api_name: str, model: str, estimated_tokens: int, semaphore: Optional[_FairSemaphore]):
+        self.api_name = api_name
+        self.model = model
+        self.estimated_tokens = estimated_tokens
+        self._semaphore = semaphore
+        self._released = False
+
+    def release(self, used_tokens: Optional[int] = None):
+        if self._released:
+            return
+        self._released = True
+        if self._semaphore is not None:
+            self._semaphore.release()
+        if used_tokens:
+            RateLimiter.record_usage(self.api_name, self.model, used_tokens - self.estimated_tokens)
+
+
+class RateLimiter:
+    """
+    Process-wide RPM, TPM and concurrency limits keyed by interface and model.
+
+    Limits come from each interface's ``rate_limits`` block in config.yaml
+    (``rpm``, ``tpm`` and an optional ``models`` map overriding them per
+    model) plus ``max_concurrency``.  Every caller reserves from the same
+    buckets, so parallel branches and nodes share one budget, and waiters are
+    served in arrival order.  Threads (``acquire``) and AsyncAPIService
+    coroutines (``acquire_async``) take the same concurrency slots.  Provider ``x-ratelimit-*`` headers lower the
+    buckets to the provider's view of what remains and supply limits that are
+    not configured.
+    """
+
+    _lock = threading.Lock()
+    _limits: Dict[Tuple[str, str], _ModelLimits] = {}
+    _semaphores: Dict[str, _FairSemaphore] = {}
+    _waited_seconds: Dict[str, float] = {}
+
+    @staticmethod
+    def _configured_limits(api_config: Dict[str, Any], model: str) -> Dict[str, Any]:
+        rate_limits = (api_config or {}).get('rate_limits') or {}
+        limits = {k: v for k, v in rate_limits.items() if k in ('rpm', 'tpm')}
+        limits.update((rate_limits.get('models') or {}).get(model) or {})
+        return limits
+
+    @classmethod
+    def _get_limits(cls, api_name: str, model: str, api_config: Optional[Dict[str, Any]]) -> _ModelLimits:
+        """Limits entry for (interface, model); caller holds the lock."""
+        key = (api_name, model or '')
+        entry = cls._limits.get(key)
+        if api_config is None:
+            if entry is None:
+                entry = cls._limits[key] = _ModelLimits({})
+            return entry
+        configured = cls._configured_limits(api_config, model or '')
+        if entry is None or (configured and entry.configured != configured):
+            entry = cls._limits[key] = _ModelLimits(configured)
+        return entry
+
+    @classmethod
+    def reserve(cls, api_name: str, model: Optional[str], estimated_tokens: int,
+                api_config: Optional[Dict[str, Any]]) -> float:
+        """Reserve one request and *estimated_tokens*; returns the seconds to wait before sending."""
+        with cls._lock:
+            entry = cls._get_limits(api_name, model or '', api_config)
+            now = time.monotonic()
+            wait = 0.0
+            if entry.requests is not None:
+                wait = max(wait, entry.requests.reserve(1, now))
+            if entry.tokens is not None:
+                wait = max(wait, entry.tokens.reserve(estimated_tokens, now))
+            if wait:
+                cls._waited_seconds[api_name] = cls._waited_seconds.get(api_name, 0.0) + wait
+            return wait
+
+    @classmethod
+    def acquire(cls, api_name: str, model: Optional[str], estimated_tokens: int,
+                api_config: Optional[Dict[str, Any]], limit_concurrency: bool = True) -> RateLimitLease:
+        """Block until a request may be sent; returns a lease to release afterwards."""
+        semaphore = None
+        if limit_concurrency and api_config is not None:
+            semaphore = cls._get_semaphore(api_name, concurrency_limit(api_config))
+            semaphore.acquire()
+        wait = cls.reserve(api_name, model, estimated_tokens, api_config)
+        if wait > 0:
+            logger.info(f"Rate limit for {api_name}/{model}: waiting {wait:.2f}s")
+            time.sleep(wait)
+        return RateLimitLease(api_name, model or '', estimated_tokens, semaphore)
+
+    @classmethod
+    async def acquire_async(cls, api_name: str, model: Optional[str], estimated_tokens: int,
+                            api_config: Optional[Dict[str, Any]]) -> RateLimitLease:
+        """``acquire`` for coroutines: waits without blocking the event loop, on the same slots."""
+        semaphore = None
+        if api_config is not None:
+            semaphore = cls._get_semaphore(api_name, concurrency_limit(api_config))
+            await semaphore.acquire_async()
+        try:
+            wait = cls.reserve(api_name, model, estimated_tokens, api_config)
+            if wait > 0:
+                logger.info(f"Rate limit for {api_name}/{model}: waiting {wait:.2f}s")
+                await asyncio.sleep(wait)
+        except BaseException:
+            if semaphore is not None:
+                semaphore.release()
+            raise
+        return RateLimitLease(api_name, model or '', estimated_tokens, semaphore)
+
+    @classmethod
+    def _get_semaphore(cls, api_name: str, limit: int) -> _FairSemaphore:
+        with cls._lock:
+            semaphore = cls._semaphores.get(api_name)
+            if semaphore is None:
+                semaphore = cls._semaphores[api_name] = _FairSemaphore(limit)
+        if semaphore.limit != limit:
+            semaphore.set_limit(limit)
+        return semaphore
+
+    @classmethod
+    def record_usage(cls, api_name: str, model: Optional[str], token_delta: int):
+        """Correct the token bucket once the real usage of a request is known."""
+        if not token_delta:
+            return
+        with cls._lock:
+            entry = cls._limits.get((api_name, model or ''))
+            if entry is not None and entry.tokens is not None:
+                entry.tokens.adjust(token_delta)
+
+    @classmethod
+    def update_from_headers(cls, api_name: str, model: Optional[str], headers,
+                            api_type: Optional[str] = None) -> None:
+        """
+        Apply ``x-ratelimit-*`` (OpenAI, Groq, LM Studio) or ``anthropic-ratelimit-*`` headers.
+
+        ``x-ratelimit-*-requests`` only feed the rpm bucket for *api_type*s in
+        PER_MINUTE_REQUEST_HEADERS.
+        """
+        if not headers:
+            return
+        values = {}
+        for kind in ('requests', 'tokens'):
+            if headers.get(f'anthropic-ratelimit-{kind}-limit') is not None \
+                    or headers.get(f'anthropic-ratelimit-{kind}-remaining') is not None:
+                prefix, suffix = f'anthropic-ratelimit-{kind}-', ''
+            elif kind == 'tokens' or (api_type or '').lower() in PER_MINUTE_REQUEST_HEADERS:
+                prefix, suffix = 'x-ratelimit-', f'-{kind}'
+            else:
+                continue
+            values[kind] = (
+                _header_int(headers, f'{prefix}limit{suffix}'),
+                _header_int(headers, f'{prefix}remaining{suffix}'),
+                parse_reset_seconds(headers.get(f'{prefix}reset{suffix}')),
+            )
+        with cls._lock:
+            entry = cls._get_limits(api_name, model or '', None)
+            now = time.monotonic()
+            for kind, (limit, remaining, reset) in values.items():
+                bucket = entry.requests if kind == 'requests' else entry.tokens
+                config_key = 'rpm' if kind == 'requests' else 'tpm'
+                if bucket is None and limit:
+                    # Adopt the provider's limit when none is configured
+                    bucket = _ModelLimits._bucket(limit)
+                    entry.config[config_key] = limit
+                    if kind == 'requests':
+                        entry.requests = bucket
+                    else:
+                        entry.tokens = bucket
+                if bucket is not None and remaining is not None:
+                    bucket.sync_remaining(remaining, reset, now)
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {
+                "limits": {f"{api}/{model}" if model else api: dict(entry.config)
+                           for (api, model), entry in cls._limits.items()},
+                "in_flight": {api: sem.active for api, sem in cls._semaphores.items()},
+                "waited_seconds": dict(cls._waited_seconds),
+            }
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._limits.clear()
+            cls._semaphores.clear()
+            cls._waited_seconds.clear()
@@ -0,0 +1,243 @@
+"""
+Response cache module for XeroFlow.
+Content-addressed SQLite cache of LLM completions for opted-in requests.
+"""
+from typing import Optional, Dict, Any, List
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "workflow_data", "llm_cache.sqlite")
+
+DEFAULT_RESPONSE_CACHE = {
+    "enabled": True,
+    "path": DEFAULT_CACHE_PATH,
+    "ttl_hours": 168,
+    "max_size_mb": 256,
+}
+
+# Request params that are part of the key in normalised form, or that only
+# steer how the request is made rather than what the model returns.
+_KEYED_SEPARATELY = {"messages", "system_message", "model", "max_tokens", "temperature", "cacheable"}
+# Requests carrying these cannot be keyed on their content.
+_UNCACHEABLE_PARAMS = {"file", "image", "image_path", "audio"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    api_name TEXT,
+    model TEXT,
+    content TEXT NOT NULL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    total_tokens INTEGER,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def _normalise_text(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.replace("\r\n", "\n").strip()
+    return value
+
+
+def normalise_messages(content: Any, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The chat messages a request amounts to, whichever way the caller built it."""
+    messages = params.get("messages")
+    if not messages:
+        messages = []
+        if params.get("system_message"):
+            messages.append({"role": "system", "content": params["system_message"]})
+        messages.append({"role": "user", "content": content})
+    return [{k: _normalise_text(v) for k, v in message.items()} if isinstance(message, dict)
+            else _normalise_text(message) for message in messages]
+
+
+def cache_key(api_name: str, model: Optional[str], content: Any, temperature: Optional[float],
+              max_tokens: Optional[int], params: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """SHA-256 key for a request, or None when the request cannot be cached."""
+    params = params or {}
+    if any(params.get(name) for name in _UNCACHEABLE_PARAMS):
+        return None
+    extra = {k: v for k, v in params.items() if k not in _KEYED_SEPARATELY and v is not None}
+    try:
+        payload = json.dumps({
+            "api": api_name,
+            "model": model or "",
+            "messages": normalise_messages(content, params),
+            "temperature": None if temperature is None else float(temperature),
+            "max_tokens": int(max_tokens) if max_tokens else None,
+            "params": extra,
+        }, sort_keys=True, ensure_ascii=False)
+    except (TypeError, ValueError):
+        # Params that do not serialise would make the key unstable
+        return None
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Process-wide cache of successful completions keyed by request content.
+
+    Requests opt in per node with the ``cacheable`` property; the top-level
+    ``response_cache`` block in config.yaml sets ``enabled``, ``path``,
+    ``ttl_hours`` and ``max_size_mb``.  The key covers the interface, model,
+    normalised messages, temperature, max_tokens and any other request
+    params, so a hit returns exactly what the same request produced before.
+    Entries expire after the TTL and the least recently used ones are
+    evicted once the database exceeds its size limit.
+    """
+
+    _lock = threading.Lock()
+    _connections: Dict[str, sqlite3.Connection] = {}
+    _stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "tokens_saved": 0}
+
+    @classmethod
+    def _count(cls, conn: sqlite3.Connection, name: str, amount: int = 1):
+        """Add to a counter for this process and in the database; caller holds the lock."""
+        if not amount:
+            return
+        cls._stats[name] += amount
+        conn.execute("INSERT INTO counters VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?",
+                     (name, amount, amount))
+
+    @staticmethod
+    def settings(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        settings = dict(DEFAULT_RESPONSE_CACHE)
+        settings.update((config or {}).get('response_cache') or {})
+        return settings
+
+    @classmethod
+    def _connection(cls, path: str) -> sqlite3.Connection:
+        """Shared connection for *path*; caller holds the lock."""
+        conn = cls._connections.get(path)
+        if conn is None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            cls._connections[path] = conn
+        return conn
+
+    @classmethod
+    def get(cls, config: Optional[Dict[str, Any]], key: str) -> Optional[Dict[str, Any]]:
+        """The cached response for *key*, or None on a miss."""
+        settings = cls.settings(config)
+        now = time.time()
+        try:
+            with cls._lock:
+                conn = cls._connection(settings["path"])
+                row = conn.execute(
+                    "SELECT content, prompt_tokens, completion_tokens, total_tokens, created "
+                    "FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[4] > float(settings["ttl_hours"]) * 3600:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    cls._count(conn, "evictions")
+                    row = None
+                if row is None:
+                    cls._count(conn, "misses")
+                    conn.commit()
+                    return None
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                cls._count(conn, "hits")
+                cls._count(conn, "tokens_saved", row[3] or 0)
+                conn.commit()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            return None
+        return {"content": row[0], "prompt_tokens": row[1], "completion_tokens": row[2], "total_tokens": row[3]}
+
+    @classmethod
+    def put(cls, config: Optional[Dict[str, Any]], key: str, api_name: str, model: Optional[str],
+            content: str, prompt_tokens: int = 0, completion_tokens: int = 0, total_tokens: int = 0):
+        """Store a successful response and evict expired or excess entries."""
+        settings = cls.settings(config)
+        now = time.time()
+        size = len(content.encode("utf-8")) + len(key)
+        try:
+            with cls._lock:
+                conn = cls._connection(settings["path"])
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, api_name, model or "", content, prompt_tokens, completion_tokens,
+                     total_tokens, now, now, size))
+                cls._count(conn, "stores")
+                cls._evict(conn, settings, now)
+                conn.commit()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Response cache store failed: {e}")
+
+    @classmethod
+    def _evict(cls, conn: sqlite3.Connection, settings: Dict[str, Any], now: float):
+        """Drop expired entries, then least recently used ones beyond the size limit; caller holds the lock."""
+        expired = conn.execute("DELETE FROM responses WHERE created < ?",
+                               (now - float(settings["ttl_hours"]) * 3600,)).rowcount
+        max_bytes = float(settings["max_size_mb"]) * 1024 * 1024
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        evicted = []
+        if total > max_bytes:
+            for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+                if total <= max_bytes:
+                    break
+                evicted.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        cls._count(conn, "evictions", max(0, expired) + len(evicted))
+
+    @classmethod
+    def get_stats(cls, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Hit/miss counters and the size of the cache database.
+
+        ``session`` counts this process only; ``total`` is accumulated in the
+        database across runs.
+        """
+        settings = cls.settings(config)
+        with cls._lock:
+            stats = {"session": dict(cls._stats), "total": {name: 0 for name in cls._stats}}
+            try:
+                conn = cls._connection(settings["path"])
+                stats["total"].update(conn.execute("SELECT name, value FROM counters").fetchall())
+                entries, size = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+                stats.update(entries=entries, size_bytes=size)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Response cache stats failed: {e}")
+        for counters in (stats["session"], stats["total"]):
+            lookups = counters["hits"] + counters["misses"]
+            counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+        return stats
+
+    @classmethod
+    def clear(cls, config: Optional[Dict[str, Any]] = None):
+        """Delete every cached response and the stored counters."""
+        settings = cls.settings(config)
+        with cls._lock:
+            conn = cls._connection(settings["path"])
+            conn.execute("DELETE FROM responses")
+            conn.execute("DELETE FROM counters")
+            conn.commit()
+
+    @classmethod
+    def reset(cls):
+        """Close connections and zero the counters."""
+        with cls._lock:
+            for conn in cls._connections.values():
+                conn.close()
+            cls._connections.clear()
+            cls._stats = {name: 0 for name in cls._stats}
@@ -0,0 +1,242 @@
+"""
+Retry policy module for XeroFlow.
+Backoff by error class and per-interface circuit breakers for API calls.
+"""
+from typing import Optional, Dict, Any, Tuple
+import logging
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Error classes returned by classify_error
+RATE_LIMIT = "rate_limit"
+SERVER = "server"
+TIMEOUT = "timeout"
+CONNECTION = "connection"
+CLIENT = "client"
+UNKNOWN = "unknown"
+CIRCUIT_OPEN = "circuit_open"
+
+RETRYABLE_ERRORS = (RATE_LIMIT, SERVER, TIMEOUT, CONNECTION)
+# Failures that suggest the provider is down; 429s and bad requests do not.
+OUTAGE_ERRORS = (SERVER, TIMEOUT, CONNECTION)
+# Failures worth repeating on the fallback interface.
+FALLBACK_ERRORS = RETRYABLE_ERRORS + (CIRCUIT_OPEN,)
+
+DEFAULT_RETRY = {
+    "max_attempts": 3,
+    "base_delay": 0.5,
+    "max_delay": 20.0,
+    # Stop retrying once this much time has gone by, so an outage cannot
+    # hold a worker thread for minutes.
+    "max_elapsed": 60.0,
+}
+# Rate limits reset on the provider's schedule; start from a longer delay.
+BASE_DELAY_MULTIPLIER = {RATE_LIMIT: 4.0}
+
+DEFAULT_CIRCUIT_BREAKER = {
+    "failure_threshold": 5,
+    "reset_timeout": 30.0,
+}
+
+_STATUS_IN_MESSAGE = re.compile(r"(?:\(|status(?: code)?:? )(\d{3})\b")
+
+
+class ProviderHTTPError(ValueError):
+    """Non-200 response from a plain HTTP provider (LM Studio, SearchEngine)."""
+
+    def __init__(self, message: str, status_code: int, headers=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def _status_code(exc: Exception) -> Optional[int]:
+    for source in (exc, getattr(exc, 'response', None)):
+        code = getattr(source, 'status_code', None)
+        if isinstance(code, int):
+            return code
+    match = _STATUS_IN_MESSAGE.search(str(exc))
+    return int(match.group(1)) if match else None
+
+
+def classify_error(exc: Exception) -> str:
+    """Map a provider exception to one of the error classes above."""
+    status = _status_code(exc)
+    if status is not None:
+        if status == 429:
+            return RATE_LIMIT
+        if status == 408:
+            return TIMEOUT
+        if status >= 500:
+            return SERVER
+        if 400 <= status < 500:
+            return CLIENT
+    names = [cls.__name__.lower() for cls in type(exc).__mro__]
+    if isinstance(exc, TimeoutError) or any('timeout' in name for name in names):
+        return TIMEOUT
+    if isinstance(exc, ConnectionError) or any('connect' in name for name in names):
+        return CONNECTION
+    return UNKNOWN
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """Seconds from a ``Retry-After`` header on the failed response, if any."""
+    headers = getattr(exc, 'headers', None) or getattr(getattr(exc, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    value = headers.get('retry-after') or headers.get('Retry-After')
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, applied only to retryable error classes.
+
+    Configured per interface with a ``retry`` block in config.yaml
+    (``max_attempts``, ``base_delay``, ``max_delay``, ``max_elapsed``).
+    """
+
+    def __init__(self, max_attempts: int = DEFAULT_RETRY["max_attempts"],
+                 base_delay: float = DEFAULT_RETRY["base_delay"],
+                 max_delay: float = DEFAULT_RETRY["max_delay"],
+                 max_elapsed: float = DEFAULT_RETRY["max_elapsed"]):
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+        self.max_elapsed = float(max_elapsed)
+
+    @classmethod
+    def from_config(cls, api_config: Optional[Dict[str, Any]]) -> "RetryPolicy":
+        settings = dict(DEFAULT_RETRY)
+        settings.update((api_config or {}).get('retry') or {})
+        return cls(**{k: v for k, v in settings.items() if k in DEFAULT_RETRY})
+
+    def next_delay(self, attempt: int, error_class: str, elapsed: float,
+                   retry_after: Optional[float] = None) -> Optional[float]:
+        """Seconds to wait before retry number *attempt* (0-based), or None to give up."""
+        if error_class not in RETRYABLE_ERRORS or attempt + 1 >= self.max_attempts:
+            return None
+        base = self.base_delay * BASE_DELAY_MULTIPLIER.get(error_class, 1.0)
+        delay = random.uniform(0, min(self.max_delay, base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        if elapsed + delay > self.max_elapsed:
+            return None
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Per-interface circuit breaker.
+
+    After ``failure_threshold`` consecutive outage-type failures (5xx,
+    timeouts, connection errors) the circuit opens and calls fail fast for
+    ``reset_timeout`` seconds.  Then one trial call is let through: success
+    closes the circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    _registry_lock = threading.Lock()
+    _breakers: Dict[str, "CircuitBreaker"] = {}
+
+    def __init__(self, name: str, failure_threshold: int = DEFAULT_CIRCUIT_BREAKER["failure_threshold"],
+                 reset_timeout: float = DEFAULT_CIRCUIT_BREAKER["reset_timeout"]):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_interface(cls, api_name: str, api_config: Optional[Dict[str, Any]]) -> "CircuitBreaker":
+        settings = dict(DEFAULT_CIRCUIT_BREAKER)
+        settings.update((api_config or {}).get('circuit_breaker') or {})
+        with cls._registry_lock:
+            breaker = cls._breakers.get(api_name)
+            if breaker is None:
+                breaker = cls._breakers[api_name] = cls(api_name)
+            breaker.failure_threshold = max(1, int(settings["failure_threshold"]))
+            breaker.reset_timeout = float(settings["reset_timeout"])
+            return breaker
+
+    def allow(self) -> bool:
+        """Whether a call may go out now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def is_open(self) -> bool:
+        """True while calls are being rejected (does not claim a half-open trial)."""
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self, error_class: str):
+        with self._lock:
+            if error_class not in OUTAGE_ERRORS:
+                # The provider answered; only a half-open trial needs resolving.
+                if self.state == self.HALF_OPEN:
+                    self.state = self.CLOSED
+                    self.failures = 0
+                self._trial_in_flight = False
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit for {self.name} opened after {self.failures} failure(s)")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Dict[str, Any]]:
+        with cls._registry_lock:
+            breakers = list(cls._breakers.values())
+        return {b.name: {"state": b.state, "failures": b.failures, "retry_in": b.retry_in()} for b in breakers}
+
+    @classmethod
+    def reset_all(cls):
+        with cls._registry_lock:
+            cls._breakers.clear()
+
+
+def fallback_interface(api_name: str, api_config: Optional[Dict[str, Any]],
+                       interfaces: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """The configured ``fallback_interface`` for *api_name*, if it exists."""
+    name = (api_config or {}).get('fallback_interface')
+    if not name or name == api_name or name not in interfaces:
+        return None
+    return name, interfaces[name]
@@ -0,0 +1,150 @@
+"""
+Token counting module for XeroFlow.
+Counts prompt tokens locally with the model's tokenizer, caching encoders per process.
+"""
+from typing import Optional, Dict, Any, List, Tuple
+import functools
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Fallback when no tokenizer is available: English text averages ~4 characters per token.
+CHARS_PER_TOKEN = 4
+
+# Texts longer than this are counted from evenly spaced samples and scaled up;
+# the tokens-per-character ratio of a long document is stable to within a few percent.
+FAST_PATH_CHARS = 100_000
+FAST_PATH_SAMPLES = 16
+FAST_PATH_SAMPLE_CHARS = 4096
+
+# Chat formatting overhead per message and for the reply primer (OpenAI chat format).
+MESSAGE_OVERHEAD_TOKENS = 3
+REPLY_OVERHEAD_TOKENS = 3
+
+# tiktoken encodings by model-name prefix, for names tiktoken does not know yet.
+# Non-OpenAI models (Claude, Gemini, Llama via Groq/Ollama/LM Studio) have no
+# offline tokenizer; cl100k_base is much closer to them than a character ratio.
+_ENCODING_BY_PREFIX = (
+    (("gpt-4o", "gpt-4.1", "gpt-4.5", "gpt-5", "o1", "o3", "o4", "chatgpt-"), "o200k_base"),
+)
+DEFAULT_ENCODING = "cl100k_base"
+
+
+@functools.lru_cache(maxsize=128)
+def encoding_name(model: Optional[str]) -> str:
+    """tiktoken encoding used to count tokens for *model*."""
+    name = (model or "").lower().split("/")[-1]
+    try:
+        import tiktoken
+        return tiktoken.encoding_name_for_model(name)
+    except (ImportError, KeyError, AttributeError):
+        pass
+    for prefixes, encoding in _ENCODING_BY_PREFIX:
+        if name.startswith(prefixes):
+            return encoding
+    return DEFAULT_ENCODING
+
+
+class TokenCounter:
+    """
+    Process-wide token counter backed by tiktoken.
+
+    Encoders are loaded once per encoding and shared by every caller; counts
+    for repeated texts (the same prompt is measured for rate limiting, the
+    prompt budget and cost estimates) come from a small LRU cache.  Very long
+    texts are counted from samples.  When tiktoken is not installed or its
+    vocabulary cannot be loaded, counts fall back to ``CHARS_PER_TOKEN``.
+    """
+
+    _lock = threading.Lock()
+    _encoders: Dict[str, Any] = {}
+    _warned = False
+
+    @classmethod
+    def _encoder(cls, name: str):
+        """Shared encoder for *name*, or None when tiktoken is unavailable."""
+        if name in cls._encoders:
+            return cls._encoders[name]
+        with cls._lock:
+            if name not in cls._encoders:
+                try:
+                    import tiktoken
+                    cls._encoders[name] = tiktoken.get_encoding(name)
+                except Exception as e:
+                    # Missing package or vocabulary not cached and no network
+                    if not cls._warned:
+                        logger.warning(f"tiktoken unavailable ({e}); estimating tokens from text length")
+                        cls._warned = True
+                    cls._encoders[name] = None
+            return cls._encoders[name]
+
+    @classmethod
+    def count(cls, text: Any, model: Optional[str] = None) -> int:
+        """Number of tokens *text* uses for *model*."""
+        if not text:
+            return 0
+        if not isinstance(text, str):
+            text = str(text)
+        name = encoding_name(model)
+        if cls._encoder(name) is None:
+            return max(1, len(text) // CHARS_PER_TOKEN)
+        if len(text) <= FAST_PATH_CHARS:
+            return _cached_count(name, text)
+
+        step = len(text) // FAST_PATH_SAMPLES
+        sampled = sum(cls._encode_len(name, text[i * step:i * step + FAST_PATH_SAMPLE_CHARS])
+                      for i in range(FAST_PATH_SAMPLES))
+        return max(1, round(sampled * len(text) / (FAST_PATH_SAMPLES * FAST_PATH_SAMPLE_CHARS)))
+
+    @classmethod
+    def count_messages(cls, messages: List[Dict[str, Any]], model: Optional[str] = None) -> int:
+        """Prompt tokens of a chat message list, including formatting overhead."""
+        total = REPLY_OVERHEAD_TOKENS
+        for message in messages:
+            content = message.get("content") if isinstance(message, dict) else message
+            if isinstance(content, list):
+                # Multimodal parts: only text parts can be counted locally
+                content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+            total += MESSAGE_OVERHEAD_TOKENS + cls.count(content, model)
+        return total
+
+    @classmethod
+    def truncate(cls, text: str, max_tokens: int, model: Optional[str] = None) -> str:
+        """The longest prefix of *text* that fits in *max_tokens*."""
+        if max_tokens <= 0 or not text:
+            return ""
+        encoder = cls._encoder(encoding_name(model))
+        if encoder is None:
+            return text[:max_tokens * CHARS_PER_TOKEN]
+        # Only the prefix that can possibly fit needs encoding
+        tokens = encoder.encode(text[:max_tokens * 16], disallowed_special=())
+        if len(tokens) <= max_tokens and len(text) <= max_tokens * 16:
+            return text
+        return encoder.decode(tokens[:max_tokens])
+
+    @classmethod
+    def estimate_cost(cls, model: Optional[str], prompt: Any, completion_tokens: int = 0) -> Tuple[int, float]:
+        """Prompt tokens and estimated USD cost of sending *prompt* to *model*."""
+        from services.pricing_service import PricingService
+        prompt_tokens = cls.count(prompt, model)
+        _, _, total_cost = PricingService.get_text_model_cost(
+            PricingService.normalize_model_name(model or ""), prompt_tokens, completion_tokens)
+        return prompt_tokens, total_cost
+
+    @classmethod
+    def _encode_len(cls, name: str, text: str) -> int:
+        return len(cls._encoders[name].encode(text, disallowed_special=()))
+
+    @classmethod
+    def reset(cls):
+        """Drop loaded encoders and cached counts."""
+        with cls._lock:
+            cls._encoders.clear()
+            cls._warned = False
+        _cached_count.cache_clear()
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_count(name: str, text: str) -> int:
+    return TokenCounter._encode_len(name, text)
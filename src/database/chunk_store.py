@@ -0,0 +1,293 @@
+# chunk_store.py
+
+import json
+import logging
+import os
+import sqlite3
+import struct
+from contextlib import closing, contextmanager
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+CHUNK_EMBEDDINGS_FILE = "embeddings.npy"
+CHUNK_STORE_FILE = "chunks.sqlite"
+
+# Chunk fields stored as real columns; anything else goes to the JSON "extra" column.
+CHUNK_COLUMNS = ("chunk_id", "doc_id", "source", "chunk_number", "page", "section", "content", "created_at")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    row_id INTEGER PRIMARY KEY,
+    chunk_id TEXT NOT NULL,
+    doc_id TEXT,
+    source TEXT,
+    chunk_number INTEGER,
+    page,
+    section TEXT,
+    content TEXT,
+    created_at TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_doc ON chunks(doc_id, chunk_number);
+CREATE INDEX IF NOT EXISTS idx_chunks_chunk_id ON chunks(chunk_id);
+"""
+
+_NPY_PREAMBLE_V1 = 10  # magic (6) + version (2) + header length (2)
+
+
+class ChunkStore:
+    """Binary chunk storage for one database directory.
+
+    Embeddings live in a float32 ``embeddings.npy`` matrix that is opened with
+    ``np.memmap`` so a query only touches the rows it needs.  Row *i* of the
+    matrix is the vector FAISS knows as id *i*.  Chunk text and metadata live in
+    a SQLite sidecar keyed by the same row id, indexed by ``(doc_id,
+    chunk_number)`` for context-window lookups.
+
+    Row ids are stable: deleting chunks only removes their SQLite rows, leaving
+    dead rows in the matrix until ``compact`` renumbers the live ones.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.embeddings_path = os.path.join(db_path, CHUNK_EMBEDDINGS_FILE)
+        self.sqlite_path = os.path.join(db_path, CHUNK_STORE_FILE)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def exists(self) -> bool:
+        return os.path.exists(self.sqlite_path) and os.path.exists(self.embeddings_path)
+
+    def initialize(self, dimension: int):
+        """Create an empty store (idempotent for the SQLite schema)."""
+        os.makedirs(self.db_path, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+        if not os.path.exists(self.embeddings_path):
+            self._save_matrix(np.empty((0, dimension), dtype='float32'))
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.sqlite_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        with closing(conn):
+            with conn:
+                yield conn
+
+    # ------------------------------------------------------------------
+    # Row (de)serialisation
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _to_row(row_id: int, entry: Dict[str, Any]) -> tuple:
+        extra = {k: v for k, v in entry.items() if k not in CHUNK_COLUMNS and k not in ("embedding", "row_id")}
+        return (row_id,) + tuple(entry.get(col) for col in CHUNK_COLUMNS) + (json.dumps(extra) if extra else None,)
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        entry = {col: row[col] for col in CHUNK_COLUMNS if row[col] is not None}
+        if row["extra"]:
+            try:
+                entry.update(json.loads(row["extra"]))
+            except ValueError:
+                logging.warning("Corrupt extra metadata for chunk row %s.", row["row_id"])
+        entry["row_id"] = row["row_id"]
+        return entry
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def count(self) -> int:
+        """Number of live chunks."""
+        if not os.path.exists(self.sqlite_path):
+            return 0
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def allocated_rows(self) -> int:
+        """Rows in the embedding matrix, including deleted (dead) rows."""
+        if not os.path.exists(self.embeddings_path):
+            return 0
+        with open(self.embeddings_path, "rb") as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, _, _ = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, _, _ = np.lib.format.read_array_header_2_0(f)
+        return shape[0] if shape else 0
+
+    def dead_rows(self) -> int:
+        return max(0, self.allocated_rows() - self.count())
+
+    def live_row_ids(self) -> List[int]:
+        if not os.path.exists(self.sqlite_path):
+            return []
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT row_id FROM chunks ORDER BY row_id")]
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """Return every chunk (without embeddings) ordered by row id."""
+        if not os.path.exists(self.sqlite_path):
+            return []
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM chunks ORDER BY row_id").fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def get_rows(self, row_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        ids = sorted({int(i) for i in row_ids})
+        if not ids or not os.path.exists(self.sqlite_path):
+            return {}
+        found: Dict[int, Dict[str, Any]] = {}
+        with self._connect() as conn:
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for row in conn.execute(f"SELECT * FROM chunks WHERE row_id IN ({placeholders})", batch):
+                    found[row["row_id"]] = self._from_row(row)
+        return found
+
+    def get_doc_chunks(self, doc_id: str) -> List[Dict[str, Any]]:
+        """Return one document's chunks ordered by chunk number."""
+        if not os.path.exists(self.sqlite_path):
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM chunks WHERE doc_id = ? ORDER BY chunk_number, row_id", (doc_id,)
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def embeddings(self) -> np.ndarray:
+        """Return the embedding matrix as a read-only memmap.
+
+        Callers should index it (which copies the selected rows) rather than
+        hold on to the memmap, so the file can be replaced by writers.
+        """
+        if not os.path.exists(self.embeddings_path):
+            return np.empty((0, 0), dtype='float32')
+        matrix = np.load(self.embeddings_path, mmap_mode='r')
+        if matrix.shape[0] == 0:
+            return np.empty(matrix.shape, dtype='float32')
+        return matrix
+
+    def get_embeddings(self, row_ids: List[int]) -> np.ndarray:
+        matrix = self.embeddings()
+        if not row_ids:
+            return np.empty((0, matrix.shape[1] if matrix.ndim == 2 else 0), dtype='float32')
+        selected = np.array(matrix[np.asarray(row_ids, dtype='int64')], dtype='float32')
+        del matrix
+        return selected
+
+    def load_vectors(self) -> np.ndarray:
+        """Return an in-memory copy of the full embedding matrix."""
+        matrix = self.embeddings()
+        copy = np.array(matrix, dtype='float32')
+        del matrix
+        return copy
+
+    # ------------------------------------------------------------------
+    # Writes (callers hold the database lock)
+    # ------------------------------------------------------------------
+    def append(self, entries: List[Dict[str, Any]], vectors: np.ndarray) -> List[int]:
+        """Append chunks and their vectors; returns the assigned row ids."""
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        if len(entries) != len(vectors):
+            raise ValueError("Chunk entries and vectors must have the same length.")
+        if not entries:
+            return []
+        start = self._append_matrix(vectors)
+        row_ids = list(range(start, start + len(entries)))
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            conn.executemany(
+                "INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._to_row(row_id, entry) for row_id, entry in zip(row_ids, entries)]
+            )
+        return row_ids
+
+    def write_all(self, entries: List[Dict[str, Any]], vectors: np.ndarray):
+        """Replace the whole store; row ids are renumbered from zero."""
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        if len(entries) != len(vectors):
+            raise ValueError("Chunk entries and vectors must have the same length.")
+        self._save_matrix(vectors)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            conn.execute("DELETE FROM chunks")
+            conn.executemany(
+                "INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._to_row(row_id, entry) for row_id, entry in enumerate(entries)]
+            )
+
+    def delete_docs(self, doc_ids: Iterable[str]) -> List[int]:
+        """Delete every chunk of *doc_ids*; returns the freed row ids."""
+        targets = list(doc_ids)
+        if not targets or not os.path.exists(self.sqlite_path):
+            return []
+        removed: List[int] = []
+        with self._connect() as conn:
+            for start in range(0, len(targets), 500):
+                batch = targets[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                removed.extend(row[0] for row in conn.execute(
+                    f"SELECT row_id FROM chunks WHERE doc_id IN ({placeholders})", batch
+                ))
+                conn.execute(f"DELETE FROM chunks WHERE doc_id IN ({placeholders})", batch)
+        return removed
+
+    def compact(self) -> int:
+        """Drop dead rows from the matrix, renumbering live rows from zero."""
+        chunks = self.load_all()
+        vectors = self.load_vectors()
+        live_vectors = vectors[[chunk["row_id"] for chunk in chunks]] if chunks else vectors[:0]
+        self.write_all(chunks, live_vectors)
+        return len(vectors) - len(chunks)
+
+    def _save_matrix(self, matrix: np.ndarray):
+        tmp_path = self.embeddings_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype='float32'))
+        os.replace(tmp_path, self.embeddings_path)
+
+    def _append_matrix(self, vectors: np.ndarray) -> int:
+        """Append rows to embeddings.npy in place; returns the first new row index.
+
+        The .npy header is rewritten in place when the new shape fits in the
+        existing (padded) header, otherwise the file is rewritten.  Data is
+        written before the header so an interrupted append leaves the old
+        shape valid.
+        """
+        if not os.path.exists(self.embeddings_path):
+            self._save_matrix(vectors)
+            return 0
+        with open(self.embeddings_path, "r+b") as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            data_offset = f.tell()
+            rows = shape[0] if shape else 0
+            dimension = shape[1] if len(shape) == 2 else vectors.shape[1]
+            if vectors.shape[1] != dimension:
+                raise ValueError(f"Vector dimension {vectors.shape[1]} does not match store dimension {dimension}.")
+            header = "{'descr': '<f4', 'fortran_order': False, 'shape': (%d, %d), }" % (rows + len(vectors), dimension)
+            available = data_offset - _NPY_PREAMBLE_V1
+            can_patch = (
+                version == (1, 0)
+                and not fortran_order
+                and dtype == np.dtype('<f4')
+                and len(header) + 1 <= available
+            )
+            if can_patch:
+                f.seek(data_offset + rows * dimension * 4)
+                f.write(vectors.tobytes())
+                f.flush()
+                f.seek(_NPY_PREAMBLE_V1 - 2)
+                f.write(struct.pack('<H', available))
+                f.write((header.ljust(available - 1) + "\n").encode("latin1"))
+                return rows
+        existing = self.load_vectors()
+        self._save_matrix(np.vstack([existing.reshape(-1, dimension), vectors]))
+        return rows
@@ -1,5 +1,6 @@
 # db_tools.py
 
+import atexit
 import subprocess
 import sys
 import logging
@@ -7,10 +8,12 @@ import os
 import stat
 import faiss
 import numpy as np
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from datetime import datetime
 import hashlib
+import threading
 import time
 from filelock import FileLock
 from langchain_community.document_loaders import PyPDFLoader, CSVLoader, TextLoader
@@ -18,7 +21,6 @@ try:
     from langchain_text_splitters import RecursiveCharacterTextSplitter
 except ImportError:  # pragma: no cover - compatibility shim
     from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
 import json
 import shutil
@@ -26,6 +28,22 @@ import uuid  # For generating unique chunk IDs
 import docx  # For .docx files
 import tempfile
 
+from src.database.chunk_store import ChunkStore
+from src.database.faiss_indexes import (
+    DEFAULT_INDEX_PARAMS,
+    INDEX_TYPES,
+    IVF_RETRAIN_GROWTH,
+    build_index,
+    can_build,
+    configure_search,
+    index_kind,
+    supports_removal,
+)
+from src.database.index_cache import CachedDatabase, IndexCache, StoreBackedDatabase
+from src.database.query_cache import DEFAULT_QUERY_CACHE_SIZE, QueryEmbeddingCache
+from src.database.search_metrics import SearchMetricsWriter, summarize_metrics
+from src.database.embedding_service import DEFAULT_EMBEDDING_MODEL, EmbeddingService
+
 try:
     import torch
 except ImportError:
@@ -53,35 +71,68 @@ logging.basicConfig(
 )
 
 DATABASES_DIR = "databases"
-METADATA_FILE = "metadata.json"
+METADATA_FILE = "metadata.json"  # legacy chunk store (embeddings inline as JSON)
+LEGACY_BACKUP_SUFFIX = ".migrated"
 DOCUMENTS_INDEX_FILE = "documents.json"
 NOTES_FILE = "notes.json"
+DB_CONFIG_FILE = "db_config.json"
 FAISS_INDEX_FILE = "faiss.index"
 LOCK_FILE_NAME = "db.lock"
 SEARCH_METRICS_FILE = "search_metrics.jsonl"
+QUERY_CACHE_FILE = "query_cache.npz"
 DEFAULT_CHUNK_SIZE = 800
 DEFAULT_CHUNK_OVERLAP = 150
 DEFAULT_MAX_CONTEXT_CHUNKS = 3
+DEFAULT_EMBED_BATCH_SIZE = 128
+DEFAULT_INDEX_CACHE_BYTES = 512 * 1024 * 1024
+# Background compaction kicks in once this share of embedding rows is dead.
+COMPACTION_DEAD_RATIO = 0.3
+COMPACTION_MIN_DEAD_ROWS = 1000
 DEFAULT_FILTERABLE_FIELDS = {"tags", "doc_id", "source"}
 MMR_LAMBDA = 0.6
 
 class DatabaseManager:
     _device_cache: Optional[str] = None
     _device_logged: bool = False
-
-    def __init__(self):
-        # Switch to a more robust model
+    _shared_instance: Optional["DatabaseManager"] = None
+    _shared_lock = threading.Lock()
+    _compactions_running: set = set()
+    _compactions_lock = threading.Lock()
+    # Loaded indexes/chunks shared by every manager in the process.
+    index_cache = IndexCache(DEFAULT_INDEX_CACHE_BYTES)
+    # Normalised query vectors keyed by (model name, query text).
+    query_cache = QueryEmbeddingCache(DEFAULT_QUERY_CACHE_SIZE)
+    _query_cache_path: Optional[str] = None
+    # Search metrics are written off the query path by a background thread.
+    metrics_writer = SearchMetricsWriter()
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL, embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE):
         self.device = self._detect_device()
-        model_kwargs = {"device": self.device} if self.device else {}
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="all-MiniLM-L12-v2",
-            model_kwargs=model_kwargs
-        )
-        self.embedding_dimension = self._get_embedding_dimension()
+        self.model_name = model_name
+        self.embed_batch_size = max(1, int(embed_batch_size))
+        # Models are shared process-wide; only the first manager pays the load cost.
+        self.embeddings = EmbeddingService.get_embeddings(model_name, self.device)
+        self.embedding_dimension = EmbeddingService.get_dimension(model_name, self.device)
         if not os.path.exists(DATABASES_DIR):
             os.makedirs(DATABASES_DIR)
         logging.info("Initialized DatabaseManager (embedding device=%s).", self.device or "unknown")
 
+    @classmethod
+    def get_shared(cls) -> "DatabaseManager":
+        """Return the process-wide DatabaseManager, creating it on first use."""
+        instance = cls._shared_instance
+        if instance is not None:
+            return instance
+        with cls._shared_lock:
+            if cls._shared_instance is None:
+                cls._shared_instance = cls()
+            return cls._shared_instance
+
+    @staticmethod
+    def get_embedding_stats() -> Dict[str, Any]:
+        """Expose embedding model load counters (loads should stay at 1 per device)."""
+        return EmbeddingService.get_stats()
+
     def _db_path(self, db_name: str) -> str:
         return os.path.join(DATABASES_DIR, db_name)
 
@@ -105,6 +156,17 @@ class DatabaseManager:
     def _lock_path(self, db_name: str) -> str:
         return os.path.join(self._db_path(db_name), LOCK_FILE_NAME)
 
+    def _db_config_path(self, db_name: str) -> str:
+        return os.path.join(self._db_path(db_name), DB_CONFIG_FILE)
+
+    def load_db_config(self, db_name: str) -> Dict[str, Any]:
+        """Return the database's index settings merged over the defaults."""
+        stored = self._read_json_file(self._db_config_path(db_name), {})
+        return {**DEFAULT_INDEX_PARAMS, **(stored if isinstance(stored, dict) else {})}
+
+    def save_db_config(self, db_name: str, config: Dict[str, Any]):
+        self._write_json_file(self._db_config_path(db_name), config)
+
     @contextmanager
     def _with_db_lock(self, db_name: str):
         self._ensure_db_dir(db_name)
@@ -113,8 +175,86 @@ class DatabaseManager:
         try:
             yield
         finally:
+            # Every locked section is a write; invalidate before other writers get in.
+            self._invalidate_cache(db_name)
             lock.release()
 
+    def _cache_key(self, db_name: str) -> str:
+        return os.path.abspath(self._db_path(db_name))
+
+    def _invalidate_cache(self, db_name: str):
+        self.index_cache.bump(self._cache_key(db_name))
+
+    def _db_file_signature(self, db_name: str) -> Tuple:
+        """File stats used to notice writes made by other processes."""
+        store = ChunkStore(self._db_path(db_name))
+        signature = []
+        for path in (self._faiss_path(db_name), self._documents_index_path(db_name),
+                     store.sqlite_path, store.embeddings_path):
+            try:
+                stat_result = os.stat(path)
+                signature.append((stat_result.st_mtime_ns, stat_result.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _load_search_view(self, db_name: str, store: ChunkStore):
+        """Return the in-memory view of a database, loading it on a cache miss.
+
+        Databases larger than the cache budget get a store-backed view that
+        reads only candidate rows per query.
+        """
+        key = self._cache_key(db_name)
+        signature = (self.index_cache.version(key), self._db_file_signature(db_name))
+        cached = self.index_cache.get(key, signature)
+        if cached is not None:
+            return cached
+        index = self.load_faiss_index(db_name)
+        if index is None:
+            return None
+        documents = self._load_documents_index(db_name)
+        on_disk_bytes = sum(
+            os.path.getsize(path) for path in (store.sqlite_path, store.embeddings_path) if os.path.exists(path)
+        )
+        if on_disk_bytes * 2 > self.index_cache.max_bytes:
+            return StoreBackedDatabase(index, documents, store)
+        entry = CachedDatabase(index, documents, store.load_all(), store.load_vectors(), signature)
+        self.index_cache.put(key, entry)
+        return entry
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return self.index_cache.get_stats()
+
+    @classmethod
+    def get_query_cache_stats(cls) -> Dict[str, Any]:
+        return cls.query_cache.get_stats()
+
+    @classmethod
+    def enable_query_cache_persistence(cls, path: Optional[str] = None) -> int:
+        """Load the query embedding cache from disk and save it again at exit.
+
+        Returns the number of entries loaded.  Defaults to
+        ``databases/query_cache.npz``.
+        """
+        path = path or os.path.join(DATABASES_DIR, QUERY_CACHE_FILE)
+        with cls._shared_lock:
+            first = cls._query_cache_path is None
+            cls._query_cache_path = path
+        loaded = cls.query_cache.load(path)
+        if first:
+            atexit.register(cls.save_query_cache)
+        logging.info("Loaded %d cached query embeddings from '%s'.", loaded, path)
+        return loaded
+
+    @classmethod
+    def save_query_cache(cls):
+        if not cls._query_cache_path:
+            return
+        try:
+            cls.query_cache.save(cls._query_cache_path)
+        except Exception as exc:
+            logging.error("Failed to save query cache: %s", exc)
+
     def _read_json_file(self, path: str, default):
         if not os.path.exists(path):
             return default
@@ -147,23 +287,71 @@ class DatabaseManager:
         )
 
     def _embed_text(self, text: str) -> Optional[np.ndarray]:
-        if not text:
+        matrix, kept = self._embed_texts([text])
+        if not kept:
             return None
-        embedding = self.embeddings.embed_documents([text])[0]
-        embedding = np.array(embedding).astype('float32')
-        norm = np.linalg.norm(embedding)
-        if norm == 0:
-            logging.warning("Encountered zero norm embedding.")
-            return None
-        embedding /= norm
-        return embedding
+        return matrix[0]
+
+    def _embed_texts(self, texts: List[str], batch_size: Optional[int] = None) -> Tuple[np.ndarray, List[int]]:
+        """Embed texts in batches and L2-normalise the whole matrix at once.
 
-    def _get_embedding_dimension(self) -> int:
-        test_embedding = self.embeddings.embed_query("dimension_probe")
-        embedding = np.array(test_embedding).astype('float32')
-        if embedding.ndim != 1:
-            embedding = embedding.flatten()
-        return embedding.shape[0]
+        Returns the float32 matrix of usable embeddings together with the
+        positions in *texts* each row belongs to; empty texts and zero-norm
+        embeddings are dropped.
+        """
+        batch_size = max(1, int(batch_size or self.embed_batch_size))
+        positions = [i for i, text in enumerate(texts) if text]
+        if not positions:
+            return np.empty((0, self.embedding_dimension), dtype='float32'), []
+        vectors = []
+        for start in range(0, len(positions), batch_size):
+            batch = [texts[i] for i in positions[start:start + batch_size]]
+            vectors.extend(self.embeddings.embed_documents(batch))
+        matrix = np.asarray(vectors, dtype='float32')
+        norms = np.linalg.norm(matrix, axis=1)
+        keep = norms > 0
+        if not keep.all():
+            logging.warning("Encountered %d zero norm embedding(s).", int((~keep).sum()))
+            matrix = matrix[keep]
+            norms = norms[keep]
+            positions = [pos for pos, ok in zip(positions, keep) if ok]
+        matrix /= norms[:, None]
+        return np.ascontiguousarray(matrix, dtype='float32'), positions
+
+    def _embed_query(self, query: str) -> Optional[np.ndarray]:
+        """Embed and L2-normalise a search query (None for zero-norm embeddings)."""
+        return self.embed_queries([query])[0]
+
+    def embed_queries(self, queries: List[str]) -> List[Optional[np.ndarray]]:
+        """Embed search queries in one batch, aligned with *queries*.
+
+        Entries are None for empty queries or zero-norm embeddings.  Vectors
+        come from the process-wide LRU ``query_cache`` when possible; only
+        misses reach the model.  They can be passed to
+        ``search_many(query_vectors=...)`` to search further databases
+        without embedding again.
+        """
+        vectors: List[Optional[np.ndarray]] = [None] * len(queries)
+        pending: Dict[str, List[int]] = {}
+        for position, query in enumerate(queries):
+            if not query:
+                continue
+            cached = self.query_cache.get(self.model_name, query)
+            if cached is not None:
+                vectors[position] = cached
+            else:
+                pending.setdefault(query, []).append(position)
+        if not pending:
+            return vectors
+
+        texts = list(pending)
+        matrix, kept = self._embed_texts(texts)
+        for row, text_position in enumerate(kept):
+            text = texts[text_position]
+            self.query_cache.put(self.model_name, text, matrix[row])
+            for position in pending[text]:
+                vectors[position] = matrix[row]
+        return vectors
 
     def _load_documents_index(self, db_name: str) -> List[Dict[str, Any]]:
         return self._read_json_file(self._documents_index_path(db_name), [])
@@ -171,40 +359,238 @@ class DatabaseManager:
     def _save_documents_index(self, db_name: str, documents: List[Dict[str, Any]]):
         self._write_json_file(self._documents_index_path(db_name), documents)
 
-    def _load_chunk_metadata(self, db_name: str) -> List[Dict[str, Any]]:
-        return self._read_json_file(self._metadata_path(db_name), [])
+    def _chunk_store(self, db_name: str, lock_held: bool = False) -> ChunkStore:
+        """Return the database's chunk store, migrating a legacy metadata.json on first access."""
+        store = ChunkStore(self._db_path(db_name))
+        if not store.exists() and os.path.exists(self._metadata_path(db_name)):
+            if lock_held:
+                self._migrate_legacy_metadata(db_name, store)
+            else:
+                with self._with_db_lock(db_name):
+                    if not store.exists():
+                        self._migrate_legacy_metadata(db_name, store)
+        return store
+
+    def _migrate_legacy_metadata(self, db_name: str, store: ChunkStore) -> int:
+        """Move chunks from metadata.json into the binary chunk store (caller holds the lock)."""
+        metadata_path = self._metadata_path(db_name)
+        legacy = self._read_json_file(metadata_path, [])
+        count = self._write_chunk_store(store, legacy)
+        os.replace(metadata_path, metadata_path + LEGACY_BACKUP_SUFFIX)
+        self._rebuild_faiss_index(db_name)
+        logging.info("Migrated %d chunks in '%s' to the binary chunk store.", count, db_name)
+        return count
+
+    def _write_chunk_store(self, store: ChunkStore, metadata: List[Dict[str, Any]]) -> int:
+        """Replace the store contents with *metadata*.
+
+        Vectors come from each entry's ``embedding`` if present, otherwise from
+        the vector already stored for the same chunk_id, otherwise the content
+        is re-embedded.  Entries that cannot be embedded are dropped.
+        """
+        existing_rows = {c.get("chunk_id"): c["row_id"] for c in store.load_all()} if store.exists() else {}
+        existing_vectors = None
+        vectors: List[Optional[np.ndarray]] = [None] * len(metadata)
+        missing = []
+        for position, entry in enumerate(metadata):
+            embedding = entry.get("embedding")
+            row_id = existing_rows.get(entry.get("chunk_id"))
+            if embedding is not None and len(embedding):
+                vectors[position] = np.asarray(embedding, dtype='float32')
+            elif row_id is not None:
+                if existing_vectors is None:
+                    existing_vectors = store.load_vectors()
+                vectors[position] = existing_vectors[row_id]
+            else:
+                missing.append(position)
+        if missing:
+            embedded, kept = self._embed_texts([metadata[pos].get("content", "") for pos in missing])
+            for offset, vector in zip(kept, embedded):
+                vectors[missing[offset]] = vector
+
+        keep = [pos for pos, vector in enumerate(vectors) if vector is not None and vector.size == self.embedding_dimension]
+        matrix = np.vstack([vectors[pos] for pos in keep]).astype('float32') if keep else np.empty((0, self.embedding_dimension), dtype='float32')
+        norms = np.linalg.norm(matrix, axis=1)
+        nonzero = norms > 0
+        matrix = matrix[nonzero] / norms[nonzero][:, None]
+        entries = [metadata[pos] for pos, ok in zip(keep, nonzero) if ok]
+        if len(entries) < len(metadata):
+            logging.warning("Dropped %d chunk(s) without usable embeddings.", len(metadata) - len(entries))
+        store.initialize(self.embedding_dimension)
+        store.write_all(entries, matrix)
+        return len(entries)
+
+    def _load_chunk_metadata(self, db_name: str, lock_held: bool = False) -> List[Dict[str, Any]]:
+        return self._chunk_store(db_name, lock_held=lock_held).load_all()
 
     def _save_chunk_metadata(self, db_name: str, metadata: List[Dict[str, Any]]):
-        self._write_json_file(self._metadata_path(db_name), metadata)
+        store = ChunkStore(self._db_path(db_name))
+        self._write_chunk_store(store, metadata)
+        self._rebuild_faiss_index(db_name)
+        metadata_path = self._metadata_path(db_name)
+        if os.path.exists(metadata_path):
+            os.replace(metadata_path, metadata_path + LEGACY_BACKUP_SUFFIX)
+
+    def _append_chunks(self, db_name: str, store: ChunkStore, index: faiss.Index,
+                       entries: List[Dict[str, Any]], vectors: np.ndarray):
+        """Append chunks to the store and add them to the index under their row ids."""
+        row_ids = store.append(entries, vectors)
+        index.add_with_ids(vectors, np.asarray(row_ids, dtype='int64'))
+        if self._index_needs_upgrade(db_name, index, store):
+            self._rebuild_faiss_index(db_name)
+        else:
+            self.save_faiss_index(db_name, index)
+
+    def _index_needs_upgrade(self, db_name: str, index: faiss.Index, store: ChunkStore) -> bool:
+        """True once the configured ANN index should be (re)trained for the current size."""
+        config = self.load_db_config(db_name)
+        target = config.get("index_type", "flat")
+        if target == "flat":
+            return False
+        count = store.count()
+        if count < int(config.get("ann_threshold") or 0) or not can_build(target, count):
+            return False
+        kind = index_kind(index)
+        if kind != target:
+            return True
+        if kind in ("ivf_flat", "ivf_pq"):
+            return count >= IVF_RETRAIN_GROWTH * max(1, int(config.get("trained_size") or 0))
+        return False
+
+    def _remove_doc_chunks(self, db_name: str, store: ChunkStore, index: faiss.Index, doc_ids: set) -> int:
+        """Drop every chunk of *doc_ids* from the store and index (caller holds the lock and saves).
+
+        Vectors are removed by id; the dead embedding rows are reclaimed later
+        by compaction.
+        """
+        row_ids = store.delete_docs(doc_ids)
+        if row_ids and supports_removal(index):
+            index.remove_ids(np.asarray(row_ids, dtype='int64'))
+        return len(row_ids)
+
+    def _new_faiss_index(self) -> faiss.Index:
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(self.embedding_dimension))
 
     def _ensure_faiss_index(self, db_name: str) -> faiss.Index:
+        """Load the ID-mapped index, rebuilding it if missing, legacy or out of sync (caller holds the lock)."""
         index = self.load_faiss_index(db_name)
-        if index is None:
-            index = faiss.IndexFlatIP(self.embedding_dimension)
-            self.save_faiss_index(db_name, index)
+        store = ChunkStore(self._db_path(db_name))
+        stale = index is None or not isinstance(index, faiss.IndexIDMap2)
+        if not stale:
+            # HNSW keeps deleted ids until compaction, so it may hold more than the live rows.
+            live = store.count()
+            stale = index.ntotal < live or (supports_removal(index) and index.ntotal != live)
+        if stale:
+            if index is not None:
+                logging.info("Rebuilding FAISS index for '%s' with stable chunk ids.", db_name)
+            index = self._rebuild_faiss_index(db_name)
         return index
 
-    def _rebuild_faiss_index(self, db_name: str, metadata: List[Dict[str, Any]]):
-        index = faiss.IndexFlatIP(self.embedding_dimension)
-        vectors = []
-        for entry in metadata:
-            vector = entry.get("embedding")
-            if vector is None:
-                vector = self._embed_text(entry.get("content", ""))
-                if vector is None:
-                    continue
-                entry["embedding"] = vector.tolist()
-            vector_np = np.array(vector, dtype='float32')
-            norm = np.linalg.norm(vector_np)
-            if norm == 0:
-                continue
-            vector_np /= norm
-            entry["embedding"] = vector_np.tolist()
-            vectors.append(vector_np)
-        if vectors:
-            stacked = np.vstack(vectors).astype('float32')
-            index.add(stacked)
+    def _rebuild_faiss_index(self, db_name: str) -> faiss.Index:
+        """Rebuild the FAISS index from the live rows of the chunk store.
+
+        The configured ANN type is used once the database has reached its
+        ``ann_threshold``; smaller databases get an exact Flat index.
+        """
+        config = self.load_db_config(db_name)
+        index = self.build_faiss_index(db_name, respect_threshold=True, config=config)
+        kind = index_kind(index)
+        trained_size = index.ntotal if kind in ("ivf_flat", "ivf_pq") else 0
+        if trained_size != int(config.get("trained_size") or 0):
+            config["trained_size"] = trained_size
+            self.save_db_config(db_name, config)
         self.save_faiss_index(db_name, index)
+        return index
+
+    def build_faiss_index(self, db_name: str, index_type: Optional[str] = None, respect_threshold: bool = False,
+                          config: Optional[Dict[str, Any]] = None) -> faiss.Index:
+        """Build an in-memory index over the live chunks without saving it.
+
+        Defaults to the database's configured index type; used for rebuilds
+        and by tools/rag_eval.py to compare index types against Flat.
+        """
+        config = config or self.load_db_config(db_name)
+        store = ChunkStore(self._db_path(db_name))
+        row_ids = store.live_row_ids()
+        vectors = store.get_embeddings(row_ids) if row_ids else np.empty((0, self.embedding_dimension), dtype='float32')
+        index_type = index_type or config.get("index_type", "flat")
+        if respect_threshold and len(row_ids) < int(config.get("ann_threshold") or 0):
+            index_type = "flat"
+        return build_index(index_type, self.embedding_dimension, vectors, np.asarray(row_ids, dtype='int64'), config)
+
+    def set_index_type(self, db_name: str, index_type: str, **params) -> Dict[str, Any]:
+        """Choose the database's index type (flat, hnsw, ivf_flat, ivf_pq) and rebuild.
+
+        Extra keyword arguments override index settings such as
+        ``ann_threshold``, ``hnsw_m``, ``hnsw_ef_search``, ``ivf_nprobe`` or ``pq_m``.
+        """
+        if index_type not in INDEX_TYPES:
+            return {"success": False, "error": f"Unknown index type '{index_type}'. Expected one of {INDEX_TYPES}."}
+        unknown = sorted(set(params) - set(DEFAULT_INDEX_PARAMS))
+        if unknown:
+            return {"success": False, "error": f"Unknown index settings: {', '.join(unknown)}"}
+        try:
+            with self._with_db_lock(db_name):
+                self._chunk_store(db_name, lock_held=True)
+                config = self.load_db_config(db_name)
+                config.update(params)
+                config["index_type"] = index_type
+                self.save_db_config(db_name, config)
+                index = self._rebuild_faiss_index(db_name)
+            logging.info("Index type for '%s' set to %s (active: %s).", db_name, index_type, index_kind(index))
+            return {"success": True, "index_type": index_type, "active_index": index_kind(index)}
+        except Exception as exc:
+            error_msg = f"Failed to set index type for '{db_name}': {exc}"
+            logging.error(error_msg)
+            return {"success": False, "error": error_msg}
+
+    def get_index_info(self, db_name: str) -> Dict[str, Any]:
+        """Describe the configured and currently active index for a database."""
+        config = self.load_db_config(db_name)
+        index = self.load_faiss_index(db_name)
+        return {
+            "index_type": config.get("index_type"),
+            "ann_threshold": config.get("ann_threshold"),
+            "active_index": index_kind(index),
+            "vectors": index.ntotal if index is not None else 0,
+            "chunks": ChunkStore(self._db_path(db_name)).count(),
+        }
+
+    def _maybe_schedule_compaction(self, db_name: str, store: ChunkStore):
+        """Compact in a background thread once enough embedding rows are dead."""
+        dead = store.dead_rows()
+        allocated = store.allocated_rows()
+        if dead < COMPACTION_MIN_DEAD_ROWS or not allocated or dead / allocated < COMPACTION_DEAD_RATIO:
+            return
+        key = self._cache_key(db_name)
+        with DatabaseManager._compactions_lock:
+            if key in DatabaseManager._compactions_running:
+                return
+            DatabaseManager._compactions_running.add(key)
+
+        def run():
+            try:
+                self.compact_database(db_name)
+            finally:
+                with DatabaseManager._compactions_lock:
+                    DatabaseManager._compactions_running.discard(key)
+
+        threading.Thread(target=run, name=f"compact-{db_name}", daemon=True).start()
+
+    def compact_database(self, db_name: str) -> Dict[str, Any]:
+        """Reclaim dead embedding rows left behind by deletions and rebuild the index."""
+        try:
+            with self._with_db_lock(db_name):
+                store = self._chunk_store(db_name, lock_held=True)
+                reclaimed = store.compact() if store.dead_rows() else 0
+                if reclaimed:
+                    self._rebuild_faiss_index(db_name)
+            logging.info("Compacted '%s' (%d dead rows reclaimed).", db_name, reclaimed)
+            return {"success": True, "reclaimed_rows": reclaimed}
+        except Exception as exc:
+            error_msg = f"Failed to compact database '{db_name}': {exc}"
+            logging.error(error_msg)
+            return {"success": False, "error": error_msg}
 
     def _matches_filters(self, chunk: Dict[str, Any], doc_lookup: Dict[str, Dict[str, Any]], filters: Dict[str, Any]) -> bool:
         if not filters:
@@ -232,36 +618,42 @@ class DatabaseManager:
                         return False
         return True
 
-    def _apply_mmr(self, query_embedding: np.ndarray, candidates: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+    def _apply_mmr(self, query_embedding: np.ndarray, candidates: List[Dict[str, Any]], top_k: int,
+                   mmr_lambda: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Select up to *top_k* candidates by maximal marginal relevance.
+
+        Candidates are normalised into one matrix up front and a running
+        max-similarity vector is updated with each pick's similarity row, so
+        every round is one matrix-vector product and a vectorised argmax.
+        """
         if not candidates:
             return []
-        candidate_embeddings = [
-            np.array(c["embedding"], dtype='float32')
-            for c in candidates
-            if c.get("embedding") is not None
-        ]
-        if not candidate_embeddings:
+        mmr_lambda = MMR_LAMBDA if mmr_lambda is None else float(mmr_lambda)
+        usable = [c for c in candidates if c.get("embedding") is not None]
+        if not usable:
             return candidates[:top_k]
-        candidate_embeddings = [vec / (np.linalg.norm(vec) or 1.0) for vec in candidate_embeddings]
-        query = query_embedding / (np.linalg.norm(query_embedding) or 1.0)
-        selected = []
-        selected_indices = []
-        available_indices = list(range(len(candidate_embeddings)))
-        while available_indices and len(selected) < top_k:
-            mmr_scores = []
-            for idx in available_indices:
-                candidate_vec = candidate_embeddings[idx]
-                similarity_to_query = float(np.dot(candidate_vec, query))
-                if not selected_indices:
-                    diversity = 0.0
-                else:
-                    diversity = max(float(np.dot(candidate_vec, candidate_embeddings[s_idx])) for s_idx in selected_indices)
-                score = MMR_LAMBDA * similarity_to_query - (1 - MMR_LAMBDA) * diversity
-                mmr_scores.append((score, idx))
-            _, best_idx = max(mmr_scores, key=lambda item: item[0])
-            selected.append(candidates[best_idx])
-            selected_indices.append(best_idx)
-            available_indices.remove(best_idx)
+        matrix = np.asarray([c["embedding"] for c in usable], dtype='float32')
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+        query = np.asarray(query_embedding, dtype='float32')
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        relevance = mmr_lambda * (matrix @ query).astype('float64')
+        max_similarity = np.zeros(len(usable), dtype='float64')
+        available = np.ones(len(usable), dtype=bool)
+        selected: List[Dict[str, Any]] = []
+        for _ in range(min(top_k, len(usable))):
+            scores = relevance - (1 - mmr_lambda) * max_similarity
+            scores[~available] = -np.inf
+            best = int(np.argmax(scores))
+            selected.append(usable[best])
+            available[best] = False
+            similarity = (matrix @ matrix[best]).astype('float64')
+            if len(selected) == 1:
+                max_similarity = similarity
+            else:
+                np.maximum(max_similarity, similarity, out=max_similarity)
         return selected
 
     def _assemble_context(self, chunk: Dict[str, Any], doc_chunks: List[Dict[str, Any]], window: int = DEFAULT_MAX_CONTEXT_CHUNKS) -> str:
@@ -284,11 +676,12 @@ class DatabaseManager:
         record = payload.copy()
         record["timestamp"] = datetime.utcnow().isoformat()
         metrics_path = os.path.join(self._db_path(db_name), SEARCH_METRICS_FILE)
-        try:
-            with open(metrics_path, "a", encoding="utf-8") as f:
-                f.write(json.dumps(record) + "\n")
-        except Exception as exc:
-            logging.error(f"Failed to log search metrics: {exc}")
+        self.metrics_writer.submit(metrics_path, record)
+
+    def get_search_metrics_summary(self, db_name: str) -> Dict[str, Any]:
+        """Search latency p50/p95/p99 for a database, including rotated metrics files."""
+        self.metrics_writer.flush()
+        return summarize_metrics(os.path.join(self._db_path(db_name), SEARCH_METRICS_FILE))
 
     @staticmethod
     def _handle_remove_readonly(func, path, exc_info):
@@ -503,13 +896,14 @@ class DatabaseManager:
         summary = {"added": [], "updated": [], "skipped": []}
         try:
             with self._with_db_lock(db_name):
+                store = self._chunk_store(db_name, lock_held=True)
                 index = self._ensure_faiss_index(db_name)
                 documents_index = self._load_documents_index(db_name)
-                chunk_metadata = self._load_chunk_metadata(db_name)
                 documents_by_source = {doc.get("source"): doc for doc in documents_index}
 
-                needs_rebuild = False
-                vectors_to_add: List[np.ndarray] = []
+                replaced_doc_ids = set()
+                pending_entries: List[Dict[str, Any]] = []
+                pending_vectors: List[np.ndarray] = []
 
                 for uploaded_file in uploaded_files:
                     file_name = os.path.basename(uploaded_file.name)
@@ -537,19 +931,17 @@ class DatabaseManager:
                         continue
 
                     doc_id = existing_doc.get("doc_id") if existing_doc else str(uuid.uuid4())
-                    if existing_doc:
-                        chunk_metadata = [chunk for chunk in chunk_metadata if chunk.get("doc_id") != doc_id]
-                        needs_rebuild = True
 
-                    new_chunk_entries = []
-                    chunk_number = 0
+                    cleaned_chunks = []
                     for chunk in chunks:
                         cleaned_content = self.preprocess_content(chunk.page_content)
-                        if not cleaned_content.strip():
-                            continue
-                        embedding = self._embed_text(cleaned_content)
-                        if embedding is None:
-                            continue
+                        if cleaned_content.strip():
+                            cleaned_chunks.append((chunk, cleaned_content))
+                    embeddings, kept = self._embed_texts([content for _, content in cleaned_chunks])
+
+                    new_chunk_entries = []
+                    for chunk_number, (position, embedding) in enumerate(zip(kept, embeddings)):
+                        chunk, cleaned_content = cleaned_chunks[position]
                         chunk_entry = {
                             "chunk_id": str(uuid.uuid4()),
                             "doc_id": doc_id,
@@ -558,19 +950,17 @@ class DatabaseManager:
                             "page": chunk.metadata.get("page"),
                             "section": chunk.metadata.get("section"),
                             "content": cleaned_content,
-                            "embedding": embedding.tolist(),
                             "created_at": timestamp
                         }
                         new_chunk_entries.append(chunk_entry)
-                        if not needs_rebuild and not existing_doc:
-                            vectors_to_add.append(embedding)
-                        chunk_number += 1
 
                     if not new_chunk_entries:
                         summary["skipped"].append(file_name)
                         continue
-
-                    chunk_metadata.extend(new_chunk_entries)
+                    if existing_doc:
+                        replaced_doc_ids.add(doc_id)
+                    pending_entries.extend(new_chunk_entries)
+                    pending_vectors.append(embeddings)
 
                     doc_record = existing_doc or {
                         "doc_id": doc_id,
@@ -594,15 +984,13 @@ class DatabaseManager:
                     else:
                         summary["updated"].append(file_name)
 
-                self._save_chunk_metadata(db_name, chunk_metadata)
+                if replaced_doc_ids:
+                    self._remove_doc_chunks(db_name, store, index, replaced_doc_ids)
+                if pending_entries:
+                    self._append_chunks(db_name, store, index, pending_entries, np.vstack(pending_vectors))
                 self._save_documents_index(db_name, documents_index)
-
-                if needs_rebuild:
-                    self._rebuild_faiss_index(db_name, chunk_metadata)
-                elif vectors_to_add:
-                    stacked = np.vstack(vectors_to_add).astype('float32')
-                    index.add(stacked)
-                    self.save_faiss_index(db_name, index)
+                if replaced_doc_ids:
+                    self._maybe_schedule_compaction(db_name, store)
 
             logging.info("Document ingest summary for '%s': %s", db_name, summary)
             return {"success": True, "summary": summary}
@@ -619,13 +1007,14 @@ class DatabaseManager:
             return False
         try:
             os.makedirs(db_path, exist_ok=True)
-            index = faiss.IndexFlatIP(self.embedding_dimension)
+            index = self._new_faiss_index()
             self.save_faiss_index(db_name, index)
-            self._save_chunk_metadata(db_name, [])
+            ChunkStore(db_path).initialize(self.embedding_dimension)
             self._save_documents_index(db_name, [])
             self.save_notes(db_name, {})
             metrics_path = os.path.join(db_path, SEARCH_METRICS_FILE)
             open(metrics_path, "a", encoding="utf-8").close()
+            self._invalidate_cache(db_name)
             logging.info("Initialized database '%s' with dimension %s.", db_name, self.embedding_dimension)
             return True
         except Exception as exc:
@@ -641,10 +1030,11 @@ class DatabaseManager:
         if os.path.exists(db_path):
             # Directory exists but missing FAISS index — initialize it
             try:
-                index = faiss.IndexFlatIP(self.embedding_dimension)
-                self.save_faiss_index(db_name, index)
-                if not os.path.exists(self._metadata_path(db_name)):
-                    self._save_chunk_metadata(db_name, [])
+                store = ChunkStore(db_path)
+                if not store.exists() and not os.path.exists(self._metadata_path(db_name)):
+                    store.initialize(self.embedding_dimension)
+                self._rebuild_faiss_index(db_name)
+                self._invalidate_cache(db_name)
                 if not os.path.exists(self._documents_index_path(db_name)):
                     self._save_documents_index(db_name, [])
                 if not os.path.exists(self._notes_path(db_name)):
@@ -692,8 +1082,8 @@ class DatabaseManager:
                              source_label, db_name, max_content_length)
 
             with self._with_db_lock(db_name):
+                store = self._chunk_store(db_name, lock_held=True)
                 index = self._ensure_faiss_index(db_name)
-                chunk_metadata = self._load_chunk_metadata(db_name)
                 documents_index = self._load_documents_index(db_name)
 
                 doc_id = str(uuid.uuid4())
@@ -705,31 +1095,29 @@ class DatabaseManager:
                 if not chunks:
                     return {"success": False, "error": "No chunks produced"}
 
-                new_entries = []
-                vectors = []
+                cleaned_chunks = []
                 for i, chunk in enumerate(chunks):
                     cleaned = self.preprocess_content(chunk.page_content)
-                    if not cleaned.strip():
-                        continue
-                    embedding = self._embed_text(cleaned)
-                    if embedding is None:
-                        continue
+                    if cleaned.strip():
+                        cleaned_chunks.append((i, cleaned))
+                vectors, kept = self._embed_texts([cleaned for _, cleaned in cleaned_chunks])
+
+                new_entries = []
+                for position, embedding in zip(kept, vectors):
+                    i, cleaned = cleaned_chunks[position]
                     entry = {
                         "chunk_id": str(uuid.uuid4()),
                         "doc_id": doc_id,
                         "source": source_label,
                         "chunk_number": i,
                         "content": cleaned,
-                        "embedding": embedding.tolist(),
                         "created_at": timestamp
                     }
                     new_entries.append(entry)
-                    vectors.append(embedding)
 
                 if not new_entries:
                     return {"success": False, "error": "All chunks empty after processing"}
 
-                chunk_metadata.extend(new_entries)
                 documents_index.append({
                     "doc_id": doc_id,
                     "source": source_label,
@@ -740,14 +1128,9 @@ class DatabaseManager:
                     "chunk_count": len(new_entries)
                 })
 
-                self._save_chunk_metadata(db_name, chunk_metadata)
+                self._append_chunks(db_name, store, index, new_entries, vectors)
                 self._save_documents_index(db_name, documents_index)
 
-                if vectors:
-                    stacked = np.vstack(vectors).astype('float32')
-                    index.add(stacked)
-                    self.save_faiss_index(db_name, index)
-
             logging.info("Added %d chunks to '%s' from '%s'.", len(new_entries), db_name, source_label)
             return {"success": True, "chunks_added": len(new_entries), "doc_id": doc_id}
         except Exception as exc:
@@ -756,11 +1139,12 @@ class DatabaseManager:
             return {"success": False, "error": error_msg}
 
     def delete_document(self, db_name: str, doc_identifier: str) -> Dict[str, Any]:
-        """Remove a document (by name or path) and rebuild indexes."""
+        """Remove a document (by name or path) from the store and index."""
         try:
             with self._with_db_lock(db_name):
+                store = self._chunk_store(db_name, lock_held=True)
+                index = self._ensure_faiss_index(db_name)
                 documents = self._load_documents_index(db_name)
-                chunk_metadata = self._load_chunk_metadata(db_name)
                 target_name = os.path.basename(doc_identifier)
                 doc_record = next((doc for doc in documents if doc.get("source") == target_name), None)
                 if not doc_record:
@@ -768,11 +1152,11 @@ class DatabaseManager:
 
                 doc_id = doc_record.get("doc_id")
                 documents = [doc for doc in documents if doc.get("doc_id") != doc_id]
-                chunk_metadata = [chunk for chunk in chunk_metadata if chunk.get("doc_id") != doc_id]
 
                 self._save_documents_index(db_name, documents)
-                self._save_chunk_metadata(db_name, chunk_metadata)
-                self._rebuild_faiss_index(db_name, chunk_metadata)
+                if self._remove_doc_chunks(db_name, store, index, {doc_id}):
+                    self.save_faiss_index(db_name, index)
+                self._maybe_schedule_compaction(db_name, store)
 
                 file_path = doc_record.get("path") or os.path.join(self._db_path(db_name), target_name)
                 if file_path and os.path.exists(file_path):
@@ -788,6 +1172,41 @@ class DatabaseManager:
             logging.error(error_msg)
             return {"success": False, "error": error_msg}
 
+    def delete_documents_by_id(self, db_name: str, doc_ids: List[str]) -> Dict[str, Any]:
+        """Remove documents by doc_id (e.g. agent-stored content without files)."""
+        try:
+            with self._with_db_lock(db_name):
+                store = self._chunk_store(db_name, lock_held=True)
+                index = self._ensure_faiss_index(db_name)
+                targets = set(doc_ids)
+                documents = self._load_documents_index(db_name)
+                remaining = [doc for doc in documents if doc.get("doc_id") not in targets]
+                self._save_documents_index(db_name, remaining)
+                removed_chunks = self._remove_doc_chunks(db_name, store, index, targets)
+                if removed_chunks:
+                    self.save_faiss_index(db_name, index)
+                self._maybe_schedule_compaction(db_name, store)
+            removed_docs = len(documents) - len(remaining)
+            logging.info("Deleted %d document(s) (%d chunks) from '%s'.", removed_docs, removed_chunks, db_name)
+            return {"success": True, "documents_removed": removed_docs, "chunks_removed": removed_chunks}
+        except Exception as exc:
+            error_msg = f"Failed to delete documents: {exc}"
+            logging.error(error_msg)
+            return {"success": False, "error": error_msg}
+
+    def migrate_database(self, db_name: str) -> Dict[str, Any]:
+        """Convert a legacy metadata.json database to the binary chunk store."""
+        if not os.path.exists(self._metadata_path(db_name)):
+            return {"success": True, "migrated": False, "chunks": ChunkStore(self._db_path(db_name)).count()}
+        try:
+            with self._with_db_lock(db_name):
+                count = self._migrate_legacy_metadata(db_name, ChunkStore(self._db_path(db_name)))
+            return {"success": True, "migrated": True, "chunks": count}
+        except Exception as exc:
+            error_msg = f"Failed to migrate database '{db_name}': {exc}"
+            logging.exception(error_msg)
+            return {"success": False, "error": error_msg}
+
     def delete_database(self, db_name: str) -> Dict[str, Any]:
         """
         Delete an entire database, including all its documents, metadata, and indexes.
@@ -823,6 +1242,7 @@ class DatabaseManager:
                     logging.warning("Failed to remove lock file '%s': %s", lock_path, exc)
 
             shutil.rmtree(db_path)
+            self._invalidate_cache(db_name)
             logging.info(f"Deleted database '{db_name}' successfully.")
             return {"success": True}
         except Exception as e:
@@ -883,6 +1303,7 @@ class DatabaseManager:
             return None
         try:
             index = faiss.read_index(index_path)
+            configure_search(index, self.load_db_config(db_name))
             logging.info(f"Loaded FAISS index for database '{db_name}'.")
             return index
         except Exception as e:
@@ -956,111 +1377,204 @@ class DatabaseManager:
         filters: Optional[Dict[str, Any]] = None,
         context_window: int = DEFAULT_MAX_CONTEXT_CHUNKS,
         rerank: bool = True,
-        collect_metrics: bool = True
+        collect_metrics: bool = True,
+        mmr_lambda: Optional[float] = None
     ) -> List[Dict[str, Any]]:
-        """Search the database with optional metadata filters and reranking."""
+        """Search the database with optional metadata filters and reranking.
+
+        ``mmr_lambda`` overrides the relevance/diversity trade-off used by MMR
+        reranking (1.0 = pure relevance; defaults to MMR_LAMBDA).
+        """
+        try:
+            query_vectors = self.embed_queries([query])
+        except Exception as exc:
+            logging.error("Error during search: %s", exc)
+            return []
+        return self._search_vectors(
+            db_name, [query], query_vectors, top_k, filters, context_window, rerank, collect_metrics, mmr_lambda
+        )[0]
+
+    def search_many(
+        self,
+        queries: List[str],
+        dbs: Optional[List[str]] = None,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        context_window: int = DEFAULT_MAX_CONTEXT_CHUNKS,
+        rerank: bool = True,
+        collect_metrics: bool = True,
+        mmr_lambda: Optional[float] = None,
+        max_workers: int = 1,
+        query_vectors: Optional[List[Optional[np.ndarray]]] = None
+    ) -> Dict[str, List[List[Dict[str, Any]]]]:
+        """Run several queries against several databases with one embedding call.
+
+        All queries are embedded in a single batch (or taken from
+        *query_vectors*, as returned by ``embed_queries``) and each database
+        answers them with one matrix FAISS query.  With ``max_workers > 1``
+        the databases are searched in a thread pool.
+
+        Returns ``{db_name: [results for queries[0], results for queries[1], ...]}``
+        in the order of *dbs* (all databases when None).
+        """
+        queries = list(queries)
+        dbs = list(dbs) if dbs is not None else self.list_databases()
+        if not queries or not dbs:
+            return {db_name: [[] for _ in queries] for db_name in dbs}
+        if query_vectors is None:
+            try:
+                query_vectors = self.embed_queries(queries)
+            except Exception as exc:
+                logging.error("Error embedding search queries: %s", exc)
+                return {db_name: [[] for _ in queries] for db_name in dbs}
+        elif len(query_vectors) != len(queries):
+            raise ValueError("query_vectors must align with queries.")
+
+        def run(db_name: str) -> List[List[Dict[str, Any]]]:
+            return self._search_vectors(
+                db_name, queries, query_vectors, top_k, filters, context_window, rerank, collect_metrics, mmr_lambda
+            )
+
+        if max_workers and max_workers > 1 and len(dbs) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(dbs))) as executor:
+                return dict(zip(dbs, executor.map(run, dbs)))
+        return {db_name: run(db_name) for db_name in dbs}
+
+    def _search_vectors(
+        self,
+        db_name: str,
+        queries: List[str],
+        query_vectors: List[Optional[np.ndarray]],
+        top_k: int,
+        filters: Optional[Dict[str, Any]],
+        context_window: int,
+        rerank: bool,
+        collect_metrics: bool,
+        mmr_lambda: Optional[float]
+    ) -> List[List[Dict[str, Any]]]:
+        """Search one database for pre-embedded queries using a single FAISS call."""
         start_time = time.time()
         filters = filters or {}
+        outputs: List[List[Dict[str, Any]]] = [[] for _ in queries]
         try:
-            index = self.load_faiss_index(db_name)
+            store = self._chunk_store(db_name)
+            view = self._load_search_view(db_name, store)
+            index = view.index if view is not None else None
             if index is None or index.ntotal == 0:
                 logging.warning("FAISS index unavailable or empty for '%s'.", db_name)
-                return []
-
-            chunk_metadata = self._load_chunk_metadata(db_name)
-            if not chunk_metadata:
-                logging.info("No chunk metadata found for '%s'.", db_name)
-                return []
+                return outputs
 
-            documents = self._load_documents_index(db_name)
-            doc_lookup = {doc.get("doc_id"): doc for doc in documents}
-
-            query_embedding = self.embeddings.embed_query(query)
-            query_embedding = np.array(query_embedding, dtype='float32')
-            norm = np.linalg.norm(query_embedding)
-            if norm == 0:
-                logging.warning("Zero-norm query embedding for '%s'.", query)
-                return []
-            query_embedding /= norm
-
-            fetch_k = min(max(top_k * 4, top_k), len(chunk_metadata))
-            D, I = index.search(np.array([query_embedding]).astype('float32'), fetch_k)
-
-            candidates = []
-            seen_chunk_ids = set()
-            for score, idx in zip(D[0], I[0]):
-                if idx < 0 or idx >= len(chunk_metadata):
-                    continue
-                chunk = chunk_metadata[idx]
-                chunk_id = chunk.get("chunk_id")
-                if not chunk_id or chunk_id in seen_chunk_ids:
-                    continue
-                if not self._matches_filters(chunk, doc_lookup, filters):
-                    continue
-
-                embedding = np.array(chunk.get("embedding"), dtype='float32') if chunk.get("embedding") is not None else None
-                if embedding is None or embedding.size == 0:
-                    embedding = self._embed_text(chunk.get("content", ""))
-                    if embedding is None:
-                        continue
-                    chunk["embedding"] = embedding.tolist()
-
-                chunk_copy = chunk.copy()
-                chunk_copy["similarity"] = float(score)
-                chunk_copy["embedding"] = embedding
-                candidates.append(chunk_copy)
-                seen_chunk_ids.add(chunk_id)
-                if len(candidates) >= fetch_k:
-                    break
-
-            if not candidates:
-                logging.info("No candidates found for query '%s' in '%s'.", query, db_name)
-                return []
+            positions = [i for i, vector in enumerate(query_vectors) if vector is not None]
+            if not positions:
+                return outputs
+            fetch_k = min(max(top_k * 4, top_k), index.ntotal)
+            matrix = np.asarray([query_vectors[i] for i in positions], dtype='float32')
+            D, I = index.search(matrix, fetch_k)
 
-            if rerank and len(candidates) > top_k:
-                ranked_chunks = self._apply_mmr(query_embedding, candidates, top_k)
-            else:
-                ranked_chunks = candidates[:top_k]
-
-            doc_chunks_map: Dict[str, List[Dict[str, Any]]] = {}
-            for chunk in chunk_metadata:
-                doc_chunks_map.setdefault(chunk.get("doc_id"), []).append(chunk)
-
-            results = []
-            for chunk in ranked_chunks:
-                doc_id = chunk.get("doc_id")
-                doc_chunks = doc_chunks_map.get(doc_id, [])
-                context_text = self._assemble_context(chunk, doc_chunks, window=context_window)
-                results.append({
-                    "doc_id": doc_id,
-                    "source": chunk.get("source"),
-                    "similarity": chunk.get("similarity", 0.0),
-                    "content": context_text,
-                    "chunk_id": chunk.get("chunk_id"),
-                    "metadata": {
-                        "page": chunk.get("page"),
-                        "chunk_number": chunk.get("chunk_number"),
-                        "section": chunk.get("section"),
-                        "filters": filters,
-                    },
-                    "document": doc_lookup.get(doc_id, {}),
-                })
+            for row, position in enumerate(positions):
+                outputs[position] = self._rank_hits(
+                    db_name, view, queries[position], query_vectors[position], D[row], I[row],
+                    top_k, fetch_k, filters, context_window, rerank, mmr_lambda
+                )
 
             if collect_metrics:
                 latency_ms = (time.time() - start_time) * 1000
-                self._log_search_metric(db_name, {
-                    "query": query,
-                    "top_k": top_k,
-                    "filters": filters,
-                    "results": len(results),
-                    "latency_ms": latency_ms
-                })
+                cache_stats = self.query_cache.get_stats()
+                for position in positions:
+                    self._log_search_metric(db_name, {
+                        "query": queries[position],
+                        "top_k": top_k,
+                        "filters": filters,
+                        "results": len(outputs[position]),
+                        "latency_ms": latency_ms,
+                        "batch_size": len(positions),
+                        "query_cache_hits": cache_stats["hits"],
+                        "query_cache_misses": cache_stats["misses"],
+                    })
 
-            logging.info("Search completed for '%s' (%d results).", db_name, len(results))
-            return results
+            logging.info("Search completed for '%s' (%d queries).", db_name, len(positions))
+            return outputs
         except Exception as exc:
             logging.error("Error during search: %s", exc)
+            return [[] for _ in queries]
+
+    def _rank_hits(
+        self,
+        db_name: str,
+        view: Any,
+        query: str,
+        query_embedding: np.ndarray,
+        scores: np.ndarray,
+        ids: np.ndarray,
+        top_k: int,
+        fetch_k: int,
+        filters: Dict[str, Any],
+        context_window: int,
+        rerank: bool,
+        mmr_lambda: Optional[float]
+    ) -> List[Dict[str, Any]]:
+        """Turn one query's FAISS hits into filtered, reranked results with context."""
+        doc_lookup = view.doc_lookup
+        hits = [(float(score), int(idx)) for score, idx in zip(scores, ids) if idx >= 0]
+        hit_rows = view.get_rows(idx for _, idx in hits)
+        hits = [(score, idx) for score, idx in hits if idx in hit_rows]
+        if not hits:
+            logging.info("No chunk metadata found for '%s'.", db_name)
             return []
+        hit_vectors = view.get_vectors([idx for _, idx in hits])
+
+        candidates = []
+        seen_chunk_ids = set()
+        for (score, idx), embedding in zip(hits, hit_vectors):
+            chunk = hit_rows[idx]
+            chunk_id = chunk.get("chunk_id")
+            if not chunk_id or chunk_id in seen_chunk_ids:
+                continue
+            if not self._matches_filters(chunk, doc_lookup, filters):
+                continue
+
+            chunk["similarity"] = score
+            chunk["embedding"] = embedding
+            candidates.append(chunk)
+            seen_chunk_ids.add(chunk_id)
+            if len(candidates) >= fetch_k:
+                break
+
+        if not candidates:
+            logging.info("No candidates found for query '%s' in '%s'.", query, db_name)
+            return []
+
+        if rerank and len(candidates) > top_k:
+            ranked_chunks = self._apply_mmr(query_embedding, candidates, top_k, mmr_lambda=mmr_lambda)
+        else:
+            ranked_chunks = candidates[:top_k]
+
+        doc_chunks_map: Dict[str, List[Dict[str, Any]]] = {}
+        for chunk in ranked_chunks:
+            doc_id = chunk.get("doc_id")
+            if doc_id not in doc_chunks_map:
+                doc_chunks_map[doc_id] = view.get_doc_chunks(doc_id)
+
+        results = []
+        for chunk in ranked_chunks:
+            doc_id = chunk.get("doc_id")
+            doc_chunks = doc_chunks_map.get(doc_id, [])
+            context_text = self._assemble_context(chunk, doc_chunks, window=context_window)
+            results.append({
+                "doc_id": doc_id,
+                "source": chunk.get("source"),
+                "similarity": chunk.get("similarity", 0.0),
+                "content": context_text,
+                "chunk_id": chunk.get("chunk_id"),
+                "metadata": {
+                    "page": chunk.get("page"),
+                    "chunk_number": chunk.get("chunk_number"),
+                    "section": chunk.get("section"),
+                    "filters": filters,
+                },
+                "document": dict(doc_lookup.get(doc_id, {})),
+            })
+        return results
     
     def add_note(self, db_name: str, chunk_id: str, note: str):
         """
@@ -1098,3 +1612,6 @@ class DatabaseManager:
         except Exception as e:
             logging.error(f"Error getting note: {e}")
             return ""
+
+
+atexit.register(DatabaseManager.metrics_writer.flush)
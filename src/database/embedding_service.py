@@ -0,0 +1,86 @@
+# embedding_service.py
+
+import logging
+import threading
+from typing import Any, Dict, Tuple
+
+import numpy as np
+from langchain_huggingface import HuggingFaceEmbeddings
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L12-v2"
+
+
+class EmbeddingService:
+    """Process-wide cache of loaded embedding models.
+
+    Loading a sentence-transformers model takes seconds, so every
+    ``DatabaseManager`` in the process shares one model per
+    (model name, device) pair.  Models are loaded lazily on first use and the
+    number of loads is tracked so callers can confirm reuse after warm-up.
+    """
+
+    _lock = threading.Lock()
+    _models: Dict[Tuple[str, str], Any] = {}
+    _dimensions: Dict[Tuple[str, str], int] = {}
+    _load_count: int = 0
+
+    @staticmethod
+    def _key(model_name: str, device: str) -> Tuple[str, str]:
+        return (model_name or DEFAULT_EMBEDDING_MODEL, device or "cpu")
+
+    @classmethod
+    def _load_model(cls, model_name: str, device: str) -> Any:
+        model_kwargs = {"device": device} if device else {}
+        return HuggingFaceEmbeddings(model_name=model_name, model_kwargs=model_kwargs)
+
+    @classmethod
+    def get_embeddings(cls, model_name: str = DEFAULT_EMBEDDING_MODEL, device: str = "cpu") -> Any:
+        """Return the shared embeddings object, loading it on first request."""
+        key = cls._key(model_name, device)
+        model = cls._models.get(key)
+        if model is not None:
+            return model
+        with cls._lock:
+            model = cls._models.get(key)
+            if model is None:
+                logging.info("Loading embedding model '%s' on device '%s'.", key[0], key[1])
+                model = cls._load_model(key[0], key[1])
+                cls._models[key] = model
+                cls._load_count += 1
+        return model
+
+    @classmethod
+    def get_dimension(cls, model_name: str = DEFAULT_EMBEDDING_MODEL, device: str = "cpu") -> int:
+        """Return the embedding dimension, probing the model only once."""
+        key = cls._key(model_name, device)
+        dimension = cls._dimensions.get(key)
+        if dimension is not None:
+            return dimension
+        model = cls.get_embeddings(*key)
+        with cls._lock:
+            dimension = cls._dimensions.get(key)
+            if dimension is None:
+                probe = np.array(model.embed_query("dimension_probe")).astype('float32')
+                dimension = int(probe.flatten().shape[0])
+                cls._dimensions[key] = dimension
+        return dimension
+
+    @classmethod
+    def load_count(cls) -> int:
+        """Number of embedding models loaded since process start (or last reset)."""
+        return cls._load_count
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        return {
+            "load_count": cls._load_count,
+            "loaded_models": [f"{name}@{device}" for name, device in cls._models],
+        }
+
+    @classmethod
+    def reset(cls):
+        """Drop all cached models (frees memory; next use reloads)."""
+        with cls._lock:
+            cls._models.clear()
+            cls._dimensions.clear()
+            cls._load_count = 0
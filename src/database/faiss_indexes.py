@@ -0,0 +1,129 @@
+# faiss_indexes.py
+
+import logging
+import math
+from typing import Any, Dict, Optional
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+
+DEFAULT_INDEX_PARAMS: Dict[str, Any] = {
+    "index_type": "flat",
+    # Below this many live chunks an exact Flat index is used whatever the setting.
+    "ann_threshold": 20000,
+    "hnsw_m": 32,
+    "hnsw_ef_construction": 80,
+    "hnsw_ef_search": 64,
+    "ivf_nprobe": 16,
+    "pq_m": None,
+    # Number of vectors the current IVF index was trained on (0 = untrained).
+    "trained_size": 0,
+}
+
+# IVF indexes are retrained once the corpus grows this much past the training set.
+IVF_RETRAIN_GROWTH = 4
+# k-means wants roughly this many training points per list.
+_MIN_POINTS_PER_LIST = 39
+_MAX_TRAINING_POINTS = 200000
+
+
+def unwrap_index(index: faiss.Index) -> faiss.Index:
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def index_kind(index: Optional[faiss.Index]) -> Optional[str]:
+    """Return which of INDEX_TYPES an index is (None if there is no index)."""
+    if index is None:
+        return None
+    base = unwrap_index(index)
+    if isinstance(base, faiss.IndexHNSWFlat):
+        return "hnsw"
+    if isinstance(base, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(base, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    return "flat"
+
+
+def supports_removal(index: faiss.Index) -> bool:
+    """HNSW graphs cannot drop vectors; deleted ids stay until the next rebuild."""
+    return index_kind(index) != "hnsw"
+
+
+def configure_search(index: faiss.Index, params: Dict[str, Any]):
+    """Apply query-time knobs (efSearch / nprobe) from the database config."""
+    base = unwrap_index(index)
+    kind = index_kind(index)
+    if kind == "hnsw":
+        base.hnsw.efSearch = int(params.get("hnsw_ef_search") or DEFAULT_INDEX_PARAMS["hnsw_ef_search"])
+    elif kind in ("ivf_flat", "ivf_pq"):
+        base.nprobe = max(1, min(int(params.get("ivf_nprobe") or DEFAULT_INDEX_PARAMS["ivf_nprobe"]), base.nlist))
+
+
+def choose_nlist(count: int) -> int:
+    return max(1, min(int(4 * math.sqrt(count)), count // _MIN_POINTS_PER_LIST))
+
+
+def choose_pq_m(dimension: int, requested: Optional[int] = None) -> int:
+    if requested and dimension % int(requested) == 0:
+        return int(requested)
+    for candidate in (64, 48, 32, 24, 16, 12, 8, 6, 4, 2, 1):
+        if candidate <= dimension // 4 and dimension % candidate == 0:
+            return candidate
+    return 1
+
+
+def can_build(index_type: str, count: int) -> bool:
+    """Whether there is enough data to train the requested index type."""
+    if index_type in ("ivf_flat", "ivf_pq"):
+        if count < _MIN_POINTS_PER_LIST * 2:
+            return False
+        if index_type == "ivf_pq" and count < 256:
+            return False
+    return True
+
+
+def build_index(index_type: str, dimension: int, vectors: np.ndarray, ids: np.ndarray,
+                params: Optional[Dict[str, Any]] = None) -> faiss.Index:
+    """Build an ID-mapped inner-product index of *index_type* over *vectors*.
+
+    IVF variants are trained on (a sample of) the vectors being added; if
+    there are too few vectors to train, an exact Flat index is returned.
+    """
+    params = {**DEFAULT_INDEX_PARAMS, **(params or {})}
+    count = len(vectors)
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}'. Expected one of {INDEX_TYPES}.")
+    if not can_build(index_type, count):
+        if index_type != "flat":
+            logging.info("Only %d vectors; using a Flat index instead of %s.", count, index_type)
+        index_type = "flat"
+
+    if index_type == "hnsw":
+        base = faiss.IndexHNSWFlat(dimension, int(params["hnsw_m"]), faiss.METRIC_INNER_PRODUCT)
+        base.hnsw.efConstruction = int(params["hnsw_ef_construction"])
+    elif index_type in ("ivf_flat", "ivf_pq"):
+        nlist = choose_nlist(count)
+        quantizer = faiss.IndexFlatIP(dimension)
+        if index_type == "ivf_flat":
+            base = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            pq_m = choose_pq_m(dimension, params.get("pq_m"))
+            base = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, 8, faiss.METRIC_INNER_PRODUCT)
+        training = vectors
+        if count > _MAX_TRAINING_POINTS:
+            rng = np.random.default_rng(0)
+            training = vectors[rng.choice(count, _MAX_TRAINING_POINTS, replace=False)]
+        base.train(np.ascontiguousarray(training, dtype='float32'))
+    else:
+        base = faiss.IndexFlatIP(dimension)
+
+    index = faiss.IndexIDMap2(base)
+    if count:
+        index.add_with_ids(np.ascontiguousarray(vectors, dtype='float32'), np.asarray(ids, dtype='int64'))
+    configure_search(index, params)
+    return index
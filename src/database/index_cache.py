@@ -0,0 +1,138 @@
+# index_cache.py
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Rough per-chunk bookkeeping overhead (dicts, keys, ids) on top of its text.
+_CHUNK_OVERHEAD_BYTES = 512
+
+
+class CachedDatabase:
+    """Everything ``DatabaseManager.search`` needs for one database, held in memory.
+
+    Entries are shared between threads and must be treated as read-only.
+    """
+
+    def __init__(self, index: Any, documents: List[Dict[str, Any]], chunks: List[Dict[str, Any]],
+                 vectors: np.ndarray, signature: Tuple):
+        self.index = index
+        self.signature = signature
+        self.doc_lookup = {doc.get("doc_id"): doc for doc in documents}
+        self.rows = {chunk["row_id"]: chunk for chunk in chunks}
+        self.vectors = vectors
+        doc_chunks: Dict[str, List[Dict[str, Any]]] = {}
+        for chunk in chunks:
+            doc_chunks.setdefault(chunk.get("doc_id"), []).append(chunk)
+        for entries in doc_chunks.values():
+            entries.sort(key=lambda c: (c.get("chunk_number") or 0, c["row_id"]))
+        self.doc_chunks = doc_chunks
+        # Index vectors plus our own copy, chunk text and per-row overhead.
+        self.size_bytes = (
+            2 * int(vectors.nbytes)
+            + sum(len(chunk.get("content") or "") for chunk in chunks)
+            + _CHUNK_OVERHEAD_BYTES * len(chunks)
+        )
+
+    def get_rows(self, row_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Return copies of the requested chunks so callers may annotate them."""
+        return {row_id: dict(self.rows[row_id]) for row_id in row_ids if row_id in self.rows}
+
+    def get_vectors(self, row_ids: List[int]) -> np.ndarray:
+        return self.vectors[np.asarray(row_ids, dtype='int64')] if row_ids else self.vectors[:0]
+
+    def get_doc_chunks(self, doc_id: str) -> List[Dict[str, Any]]:
+        return self.doc_chunks.get(doc_id, [])
+
+
+class StoreBackedDatabase:
+    """Uncached view with the CachedDatabase interface, for databases over the memory budget.
+
+    Reads only the candidate rows from the chunk store on every query.
+    """
+
+    def __init__(self, index: Any, documents: List[Dict[str, Any]], store: Any):
+        self.index = index
+        self.doc_lookup = {doc.get("doc_id"): doc for doc in documents}
+        self.store = store
+
+    def get_rows(self, row_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        return self.store.get_rows(row_ids)
+
+    def get_vectors(self, row_ids: List[int]) -> np.ndarray:
+        return self.store.get_embeddings(row_ids)
+
+    def get_doc_chunks(self, doc_id: str) -> List[Dict[str, Any]]:
+        return self.store.get_doc_chunks(doc_id)
+
+
+class IndexCache:
+    """LRU cache of loaded databases bounded by an approximate memory budget.
+
+    Each database has a version counter that writers bump (inside the
+    database lock); an entry is only reused while its signature - the
+    version plus the on-disk file stats, which catches writers in other
+    processes - still matches.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedDatabase]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def version(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    def bump(self, key: str):
+        """Mark a database as changed and drop its cached entry."""
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._entries.pop(key, None)
+
+    def get(self, key: str, signature: Tuple) -> Optional[CachedDatabase]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, entry: CachedDatabase):
+        with self._lock:
+            if entry.signature[0] != self._versions.get(key, 0):
+                return  # A writer finished while this entry was loading.
+            if entry.size_bytes > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while self._total_bytes() > self.max_bytes and len(self._entries) > 1:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _total_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes(),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,111 @@
+# query_cache.py
+
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_QUERY_CACHE_SIZE = 2048
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalise_query(query: str) -> str:
+    """Collapse whitespace so trivially different spellings share one entry.
+
+    Case is kept: not every embedding model is uncased.
+    """
+    return _WHITESPACE.sub(" ", query or "").strip()
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU cache of normalised query vectors keyed by (model name, query).
+
+    Vectors are stored read-only and returned as-is, so callers must not
+    modify them in place.  ``save``/``load`` persist the entries to an
+    ``.npz`` file so evaluation runs can start warm after a restart.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_QUERY_CACHE_SIZE):
+        self.max_entries = max(0, int(max_entries))
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model_name: str, query: str) -> Optional[np.ndarray]:
+        key = (model_name, normalise_query(query))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, model_name: str, query: str, vector: np.ndarray):
+        if self.max_entries == 0:
+            return
+        stored = np.array(vector, dtype='float32')
+        stored.setflags(write=False)
+        key = (model_name, normalise_query(query))
+        with self._lock:
+            self._entries[key] = stored
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self, path: str):
+        """Write the entries (oldest first) to an .npz file."""
+        with self._lock:
+            items = list(self._entries.items())
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        keys = json.dumps([list(key) for key, _ in items])
+        arrays = {f"v{i}": vector for i, (_, vector) in enumerate(items)}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, keys=np.array(keys), **arrays)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> int:
+        """Merge entries from an .npz file written by ``save``; returns how many were loaded."""
+        if not os.path.exists(path):
+            return 0
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                keys = json.loads(str(data["keys"]))
+                loaded = [(tuple(key), data[f"v{i}"]) for i, key in enumerate(keys)]
+        except Exception as exc:
+            logging.warning("Ignoring unreadable query cache '%s': %s", path, exc)
+            return 0
+        for (model_name, query), vector in loaded:
+            self.put(model_name, query, vector)
+        return len(loaded)
@@ -0,0 +1,199 @@
+# search_metrics.py
+
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_METRICS_QUEUE_SIZE = 10000
+DEFAULT_METRICS_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_METRICS_BACKUP_COUNT = 10
+# The writer wakes at least this often to flush whatever is buffered.
+_FLUSH_INTERVAL_SECONDS = 1.0
+_BATCH_SIZE = 500
+
+
+def rotated_name(path: str, stamp: str) -> str:
+    """``search_metrics.jsonl`` -> ``search_metrics.<stamp>.jsonl``."""
+    base, ext = os.path.splitext(path)
+    return f"{base}.{stamp}{ext}"
+
+
+def metrics_files(path: str) -> List[str]:
+    """Rotated files (oldest first) followed by the live file, where present."""
+    base, ext = os.path.splitext(path)
+    files = sorted(glob.glob(f"{glob.escape(base)}.*{ext}"))
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+class SearchMetricsWriter:
+    """Background writer for ``search_metrics.jsonl`` records.
+
+    ``submit`` only enqueues: when the bounded queue is full the record is
+    dropped (and counted) rather than blocking the search that produced it.
+    A daemon thread drains the queue in batches, appending each file's
+    records with one write, and rotates a file once it exceeds ``max_bytes``
+    or was last written on an earlier day.  Only ``backup_count`` rotated
+    files are kept per metrics file.
+    """
+
+    def __init__(self, max_queue: int = DEFAULT_METRICS_QUEUE_SIZE, max_bytes: int = DEFAULT_METRICS_MAX_BYTES,
+                 backup_count: int = DEFAULT_METRICS_BACKUP_COUNT):
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._queue: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+
+    def submit(self, path: str, record: Dict[str, Any]) -> bool:
+        """Queue a record for *path*; returns False if it had to be dropped."""
+        self._ensure_thread()
+        with self._lock:
+            self._pending += 1
+        try:
+            self._queue.put_nowait((path, record))
+            return True
+        except queue.Full:
+            with self._lock:
+                self._pending -= 1
+                self.dropped += 1
+                self._idle.notify_all()
+            return False
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Wait until every queued record has been written (True if drained in time)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queued": self._pending,
+                "written": self.written,
+                "dropped": self.dropped,
+                "rotations": self.rotations,
+            }
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="search-metrics-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=_FLUSH_INTERVAL_SECONDS)
+            except queue.Empty:
+                continue
+            batch = [item]
+            while len(batch) < _BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        by_path: Dict[str, List[str]] = {}
+        for path, record in batch:
+            try:
+                by_path.setdefault(path, []).append(json.dumps(record, default=str))
+            except Exception as exc:
+                logging.error("Dropping unserialisable search metric: %s", exc)
+        written = 0
+        for path, lines in by_path.items():
+            try:
+                self._rotate_if_needed(path)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                written += len(lines)
+            except Exception as exc:
+                logging.error(f"Failed to log search metrics: {exc}")
+        with self._lock:
+            self.written += written
+            self._pending -= len(batch)
+            self._idle.notify_all()
+
+    def _rotate_if_needed(self, path: str):
+        try:
+            info = os.stat(path)
+        except OSError:
+            return
+        if info.st_size == 0:
+            return
+        modified = datetime.fromtimestamp(info.st_mtime)
+        if info.st_size < self.max_bytes and modified.date() == datetime.now().date():
+            return
+        target = rotated_name(path, modified.strftime("%Y%m%d-%H%M%S"))
+        suffix = 1
+        while os.path.exists(target):
+            target = rotated_name(path, f"{modified.strftime('%Y%m%d-%H%M%S')}-{suffix}")
+            suffix += 1
+        os.replace(path, target)
+        with self._lock:
+            self.rotations += 1
+        for old in metrics_files(path)[:-self.backup_count or None]:
+            if old != path and os.path.exists(old):
+                os.remove(old)
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    rank = fraction * (len(sorted_values) - 1)
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize_metrics(path: str) -> Dict[str, Any]:
+    """Latency percentiles over a metrics file and its rotated predecessors."""
+    latencies: List[float] = []
+    first: Optional[str] = None
+    last: Optional[str] = None
+    for file_path in metrics_files(path):
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                latency = record.get("latency_ms")
+                if isinstance(latency, (int, float)):
+                    latencies.append(float(latency))
+                stamp = record.get("timestamp")
+                if stamp:
+                    first = stamp if first is None or stamp < first else first
+                    last = stamp if last is None or stamp > last else last
+    latencies.sort()
+    return {
+        "searches": len(latencies),
+        "first": first,
+        "last": last,
+        "latency_ms_p50": _percentile(latencies, 0.50),
+        "latency_ms_p95": _percentile(latencies, 0.95),
+        "latency_ms_p99": _percentile(latencies, 0.99),
+        "latency_ms_max": latencies[-1] if latencies else None,
+    }
+
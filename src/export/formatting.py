@@ -39,6 +39,31 @@ def append_formatted_text(text_widget, text):
         text_widget.insert(tk.END, text)
     text_widget.config(state=tk.DISABLED)
 
+def append_stream_text(text_widget, text, mark="stream_start"):
+    """
+    Appends a raw streamed delta without formatting and keeps the end in view.
+    The first delta sets ``mark`` where the streamed text begins so that
+    clear_stream_text can remove it again.
+    """
+    text_widget.config(state=tk.NORMAL)
+    if mark not in text_widget.mark_names():
+        text_widget.mark_set(mark, "end-1c")
+        text_widget.mark_gravity(mark, tk.LEFT)
+    text_widget.insert(tk.END, text)
+    text_widget.see(tk.END)
+    text_widget.config(state=tk.DISABLED)
+
+def clear_stream_text(text_widget, mark="stream_start"):
+    """
+    Removes the text appended by append_stream_text since ``mark`` was set.
+    """
+    if mark not in text_widget.mark_names():
+        return
+    text_widget.config(state=tk.NORMAL)
+    text_widget.delete(mark, tk.END)
+    text_widget.mark_unset(mark)
+    text_widget.config(state=tk.DISABLED)
+
 def apply_formatting(text_widget, text, base_tag=None):
     """
     Parses markdown-like syntax in the text and applies formatting tags to the Text widget.
@@ -8,7 +8,7 @@ import logging
 def manage_databases_window(parent, config, refresh_callback):
     """Embed the Manage Databases interface within the given parent frame."""
 
-    db_manager = DatabaseManager()
+    db_manager = DatabaseManager.get_shared()
     
     def refresh_db_list():
         db_listbox.delete(0, tk.END)
@@ -10,7 +10,7 @@ import os  # Import os for path manipulations
 def manage_documents_window(parent, config, refresh_callback):
     """Embed the Manage Documents interface within the given parent frame."""
 
-    db_manager = DatabaseManager()
+    db_manager = DatabaseManager.get_shared()
     document_records = []  # Map listbox indices to full metadata records
 
     def refresh_doc_list():
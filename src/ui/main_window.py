@@ -109,7 +109,7 @@ def log_accelerator_status():
 log_accelerator_status()
 
 # Initialize the Database Manager
-db_manager = DatabaseManager()
+db_manager = DatabaseManager.get_shared()
 
 def load_nodes():
     """
@@ -949,7 +949,11 @@ def submit_request(config, selected_prompt_index, user_input, output_box, submit
     thread = threading.Thread(target=process_node_graph, args=(
         config, api_endpoint, user_input, output_box, submit_button, stop_button, workflow.stop_event,
         node_graph, selected_prompt_name, root, open_editors, gui_queue, formatting_enabled_var.get(), chat_tab,
-        workflow.id, on_workflow_complete, on_workflow_error))  # Pass workflow ID and callbacks
+        workflow.id, on_workflow_complete, on_workflow_error),  # Pass workflow ID and callbacks
+        kwargs={
+            'stream_output': config.get('stream_output', True),
+            'on_stream_callback': lambda node_id, delta: workflow.append_stream(delta),
+        })
     
     # Store the thread in the workflow instance
     workflow.thread = thread
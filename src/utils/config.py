@@ -5,6 +5,8 @@ import os
 from tkinter import messagebox, Text
 import tkinter as tk
 
+from services.client_registry import ClientRegistry
+
 def load_config(config_file='config.yaml'):
     """Load configuration from a YAML file."""
     try:
@@ -41,6 +43,8 @@ def save_config(config, config_file='config.yaml'):
         with open(config_file, 'w') as file:
             yaml.safe_dump(config, file)
             print(f"Configuration saved to '{config_file}'.")
+        # Drop pooled API clients for interfaces that changed or were removed.
+        ClientRegistry.sync_config(config)
     except Exception as e:
         print(f"Failed to save configuration to '{config_file}': {e}")
         messagebox.showerror("Error", f"Failed to save configuration: {e}")
@@ -0,0 +1,55 @@
+# cancellation.py
+
+"""
+Cooperative cancellation for workflow runs.
+
+A CancellationToken is a threading.Event that also notifies callbacks the
+moment it is set, so the scheduler can stop without polling.  Nodes receive
+the run's token as ``inputs['stop_event']`` / ``self.cancel_token``; looping
+nodes call ``BaseNode.raise_if_cancelled()`` before each API call.
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class WorkflowCancelled(Exception):
+    """Raised by a node that noticed its workflow was stopped."""
+
+
+class CancellationToken(threading.Event):
+    """threading.Event that runs registered callbacks when it is set."""
+
+    def __init__(self):
+        super().__init__()
+        self._callbacks = []
+        self._callbacks_lock = threading.Lock()
+
+    def add_callback(self, callback):
+        """Call ``callback()`` once when the token is set (immediately if it already is)."""
+        with self._callbacks_lock:
+            if not self.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._callbacks_lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def set(self):
+        with self._callbacks_lock:
+            super().set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Cancellation callback failed: {e}")
+
+    def raise_if_cancelled(self):
+        if self.is_set():
+            raise WorkflowCancelled()
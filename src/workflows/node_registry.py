@@ -76,6 +76,10 @@ def reload_nodes():
     NODE_REGISTRY.clear()
     print("Cleared NODE_REGISTRY for reloading nodes.")
 
+    # Compiled workflow plans hold the old node classes
+    from src.workflows.execution_plan import ExecutionPlan
+    ExecutionPlan.clear_cache()
+
     # Get the project root directory
     current_file = os.path.abspath(__file__)
     project_root = os.path.dirname(os.path.dirname(os.path.dirname(current_file)))
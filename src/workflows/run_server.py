@@ -0,0 +1,333 @@
+# run_server.py
+
+"""
+Local workflow run server.
+
+Integrations submit workflow runs over HTTP/JSON instead of driving the GUI:
+
+    POST /runs                {"workflow": "General Requests", "input": "...", "priority": 5}
+                              -> 202 {"run_id": ..., "status": "queued"}
+    GET  /runs                queued and running runs
+    GET  /runs/<id>           status, timings and (when finished) the output
+    GET  /runs/<id>/result    output once finished; 202 with the status until then
+    POST /runs/<id>/stop      stop a queued or running run
+    GET  /health              queue depth, running runs and limits
+
+Runs wait in a priority queue (higher ``priority`` first, then submission
+order) and at most ``max_concurrent_runs`` execute at once.  All runs share
+one set of WorkerPools, so the llm pool size (``max_llm_calls``) bounds the
+LLM node calls in flight across every run; RateLimiter still applies each
+interface's max_concurrency and rpm/tpm limits on top.  Runs are tracked in
+WorkflowManager and land in the workflow history like GUI runs.
+
+Start it with ``python xeroflow.py serve``; settings come from the
+``workflow_server`` block in config.yaml.
+"""
+
+import itertools
+import json
+import queue
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from src.workflows.runner import WorkflowEventSink, load_workflow_file, run_workflow
+from src.workflows.worker_pools import LLM, WorkerPools, pool_settings
+
+DEFAULT_SERVER_SETTINGS = {
+    'host': '127.0.0.1',
+    'port': 8770,
+    'max_concurrent_runs': 4,
+    'max_queued_runs': 500,
+    'max_llm_calls': None,  # None keeps worker_pools.llm
+    'token': None,          # Require "Authorization: Bearer <token>" when set
+}
+
+
+class QueueFullError(Exception):
+    """Raised by WorkflowRunService.submit when max_queued_runs runs are waiting."""
+
+
+def server_settings(config, **overrides):
+    """``workflow_server`` settings from config.yaml merged over the defaults."""
+    settings = dict(DEFAULT_SERVER_SETTINGS)
+    configured = (config or {}).get('workflow_server')
+    if isinstance(configured, dict):
+        settings.update({key: value for key, value in configured.items() if key in settings})
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    return settings
+
+
+class _ManagerSink(WorkflowEventSink):
+    """Records a server run's progress on its WorkflowManager instance."""
+
+    def __init__(self, manager, workflow):
+        self.manager = manager
+        self.workflow = workflow
+
+    def node_finished(self, node_id, output, seconds):
+        self.workflow.node_timings[node_id] = round(seconds, 3)
+
+    def run_completed(self, output):
+        self.manager.complete_workflow(self.workflow.id, output)
+
+    def run_failed(self, error):
+        self.manager.set_workflow_error(self.workflow.id, error)
+
+
+class WorkflowRunService:
+    """Queues workflow runs by priority and executes them with bounded concurrency."""
+
+    def __init__(self, config, manager=None, workflows_dir='workflows', **overrides):
+        if manager is None:
+            from src.workflows.workflow_manager import workflow_manager as manager
+        self.config = config
+        self.manager = manager
+        self.workflows_dir = Path(workflows_dir)
+        self.settings = server_settings(config, **overrides)
+        self.max_concurrent_runs = max(1, int(self.settings['max_concurrent_runs']))
+        self.max_queued_runs = max(1, int(self.settings['max_queued_runs']))
+
+        # One set of pools for every run: their sizes are global bounds
+        pools = pool_settings(config)
+        if self.settings['max_llm_calls']:
+            pools[LLM] = max(1, int(self.settings['max_llm_calls']))
+        self.pools = WorkerPools(pools)
+
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._queued = set()  # run ids waiting in the queue
+        self._run_ids = {}    # every run submitted to this service, oldest first
+        self._lock = threading.Lock()
+        self._closed = False
+        self._dispatchers = [
+            threading.Thread(target=self._dispatch, name=f"xeroflow-run-{i}", daemon=True)
+            for i in range(self.max_concurrent_runs)
+        ]
+        for thread in self._dispatchers:
+            thread.start()
+
+    def load_workflow(self, name):
+        """(name, graph) of a workflow saved in workflows_dir."""
+        root = self.workflows_dir.resolve()
+        path = (root / f"{name}.yaml").resolve()
+        if path.parent != root or not path.exists():
+            raise ValueError(f"Workflow '{name}' not found.")
+        return load_workflow_file(path)
+
+    def submit(self, workflow=None, user_input='', priority=0, graph=None):
+        """Queue a run of a saved workflow (or an inline graph); returns its WorkflowInstance."""
+        if graph is None:
+            name, graph = self.load_workflow(workflow)
+        else:
+            name = workflow or 'inline'
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The workflow server is shutting down.")
+            if self._pending_count() >= self.max_queued_runs:
+                raise QueueFullError(f"{self.max_queued_runs} runs are already queued.")
+            instance = self.manager.create_workflow(name, user_input, queued=True)
+            instance.priority = priority
+            self._queued.add(instance.id)
+            self._run_ids[instance.id] = None
+        # Higher priority first, then first come first served
+        self._queue.put((-priority, next(self._seq), instance.id, graph))
+        return instance
+
+    def _pending_count(self):
+        return sum(1 for run_id in self._queued
+                   if getattr(self.manager.get_workflow(run_id), 'status', None) == "queued")
+
+    def _dispatch(self):
+        while True:
+            _, _, run_id, graph = self._queue.get()
+            if run_id is None:
+                return
+            with self._lock:
+                self._queued.discard(run_id)
+            # False when the run was stopped while it waited
+            if self.manager.start_workflow(run_id):
+                self._execute(self.manager.get_workflow(run_id), graph)
+
+    def _execute(self, workflow, graph):
+        try:
+            result = run_workflow(self.config, graph, workflow.user_input,
+                                  sink=_ManagerSink(self.manager, workflow), stop_event=workflow.stop_event,
+                                  workflow_id=workflow.id, workflow_name=workflow.workflow_name,
+                                  pools=self.pools)
+            if workflow.status == "running":
+                # Finished without an end-node output
+                self.manager.complete_workflow(workflow.id, result.output or '')
+        except Exception as e:
+            traceback.print_exc()
+            self.manager.set_workflow_error(workflow.id, str(e))
+
+    def get_run(self, run_id):
+        """The WorkflowInstance of a run submitted to this service, or None."""
+        return self.manager.get_workflow(run_id) if run_id in self._run_ids else None
+
+    def stop(self, run_id):
+        """Stop a queued or running run; False if it already finished."""
+        return self.get_run(run_id) is not None and self.manager.stop_workflow(run_id)
+
+    def active_runs(self):
+        runs = (self.manager.get_workflow(run_id) for run_id in list(self._run_ids))
+        return [run for run in runs if run is not None and run.status in ("queued", "running")]
+
+    def stats(self):
+        runs = self.active_runs()
+        return {
+            'queued': sum(1 for run in runs if run.status == "queued"),
+            'running': sum(1 for run in runs if run.status == "running"),
+            'max_concurrent_runs': self.max_concurrent_runs,
+            'max_queued_runs': self.max_queued_runs,
+            'max_llm_calls': self.pools.settings[LLM],
+        }
+
+    def shutdown(self, wait=True):
+        """Stop queued and running runs, then the dispatchers and shared pools."""
+        with self._lock:
+            self._closed = True
+        for run in self.active_runs():
+            self.manager.stop_workflow(run.id)
+        for _ in self._dispatchers:
+            self._queue.put((float('-inf'), next(self._seq), None, None))
+        if wait:
+            for thread in self._dispatchers:
+                thread.join()
+        self.pools.shutdown(wait=wait, cancel_futures=True)
+
+
+def run_to_dict(workflow, include_output=True):
+    """JSON view of a server run."""
+    finished = workflow.status not in ("queued", "running")
+    data = {
+        'run_id': workflow.id,
+        'workflow': workflow.workflow_name,
+        'status': workflow.status,
+        'priority': workflow.priority,
+        'queued_at': workflow.queued_time.isoformat() if workflow.queued_time else None,
+        'started_at': workflow.start_time.isoformat() if workflow.status != "queued" else None,
+        'ended_at': workflow.end_time.isoformat() if workflow.end_time else None,
+        'duration': round(workflow.get_duration(), 3) if workflow.status != "queued" else None,
+        'node_timings': dict(workflow.node_timings),
+    }
+    if include_output and finished:
+        data['output'] = workflow.output
+        data['error'] = workflow.error
+    return data
+
+
+class WorkflowServer:
+    """HTTP/JSON front end for a WorkflowRunService, bound to localhost by default."""
+
+    def __init__(self, service, host=None, port=None, token=None):
+        self.service = service
+        host = host or service.settings['host']
+        port = service.settings['port'] if port is None else port
+        self.token = token or service.settings['token']
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="xeroflow-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler_class(self):
+        server = self
+        service = self.service
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, payload, status=200):
+                data = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _error(self, message, status):
+                self._send_json({'error': {'message': message}}, status)
+
+            def _authorized(self):
+                if not server.token:
+                    return True
+                if self.headers.get("Authorization", "") == f"Bearer {server.token}":
+                    return True
+                self._error("unauthorized", 401)
+                return False
+
+            def _parts(self):
+                return [part for part in self.path.split("?")[0].split("/") if part]
+
+            def _run(self, run_id):
+                run = service.get_run(run_id)
+                if run is None:
+                    self._error("run not found", 404)
+                return run
+
+            def do_POST(self):
+                if not self._authorized():
+                    return
+                parts = self._parts()
+                if parts == ["runs"]:
+                    try:
+                        params = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                        if not isinstance(params, dict) or not (params.get('workflow') or params.get('graph')):
+                            raise ValueError("'workflow' or 'graph' is required.")
+                        run = service.submit(params.get('workflow'), str(params.get('input', '')),
+                                             priority=int(params.get('priority', 0)), graph=params.get('graph'))
+                    except QueueFullError as e:
+                        return self._error(str(e), 429)
+                    except RuntimeError as e:
+                        return self._error(str(e), 503)
+                    except (ValueError, TypeError) as e:
+                        return self._error(str(e), 400)
+                    return self._send_json({'run_id': run.id, 'status': run.status}, 202)
+                if len(parts) == 3 and parts[0] == "runs" and parts[2] == "stop":
+                    run = self._run(parts[1])
+                    if run is not None:
+                        service.stop(run.id)
+                        self._send_json(run_to_dict(run))
+                    return
+                self._error(f"Unsupported endpoint {self.path}", 404)
+
+            def do_GET(self):
+                if not self._authorized():
+                    return
+                parts = self._parts()
+                if parts == ["health"]:
+                    return self._send_json(service.stats())
+                if parts == ["runs"]:
+                    return self._send_json({'runs': [run_to_dict(run, include_output=False)
+                                                     for run in service.active_runs()]})
+                if len(parts) in (2, 3) and parts[0] == "runs" and parts[2:] in ([], ["result"]):
+                    run = self._run(parts[1])
+                    if run is None:
+                        return
+                    if len(parts) == 2:
+                        return self._send_json(run_to_dict(run))
+                    if run.status in ("queued", "running"):
+                        return self._send_json({'run_id': run.id, 'status': run.status}, 202)
+                    return self._send_json({'run_id': run.id, 'status': run.status,
+                                            'output': run.output, 'error': run.error})
+                self._error("not found", 404)
+
+        return Handler
@@ -0,0 +1,446 @@
+# runner.py
+
+"""
+Workflow execution engine.
+
+run_workflow executes a workflow graph and reports progress to a
+WorkflowEventSink; it has no GUI dependencies, so workflows can run on a
+headless server, from cron or in load tests.  The Tk front end
+(process_graph.process_node_graph) is one sink; xeroflow.py run is another.
+
+Python API:
+
+    from src.workflows.runner import run_workflow_file
+    result = run_workflow_file("workflows/General Requests.yaml", "Summarise ...")
+    print(result.status, result.output, result.node_timings)
+"""
+
+import queue
+import threading
+import time
+import traceback
+from pathlib import Path
+
+import yaml
+
+from src.workflows.execution_plan import ExecutionPlan
+from src.workflows.cancellation import CancellationToken, WorkflowCancelled
+from src.workflows.worker_pools import THREAD_ONLY_INPUTS, WorkerPools, node_pool, pool_settings
+
+STOP_POLL_INTERVAL = 0.05  # Stop-event poll interval when it is a plain threading.Event
+_STOP = object()  # Posted to the completion queue when the stop event is set
+
+
+class WorkflowEventSink:
+    """
+    Receives the progress of a workflow run.
+
+    Node and stream events are called from worker threads; the run_* events
+    from the thread that called run_workflow, with run_finished always last.
+    The base class ignores every event.
+    """
+
+    def run_started(self, workflow_name):
+        pass
+
+    def node_started(self, node_id, node_type):
+        pass
+
+    def node_finished(self, node_id, output, seconds):
+        pass
+
+    def node_failed(self, node_id, error):
+        pass
+
+    def stream(self, node_id, delta, is_end_node):
+        """A streamed text delta (only with stream_output enabled)."""
+        pass
+
+    def run_completed(self, output):
+        pass
+
+    def run_failed(self, error):
+        pass
+
+    def run_stopped(self):
+        pass
+
+    def run_finished(self):
+        pass
+
+
+class WorkflowRunResult:
+    """Outcome of run_workflow: final output, per-node outputs and timings."""
+
+    def __init__(self, workflow_name=None, workflow_id=None):
+        self.workflow_name = workflow_name
+        self.workflow_id = workflow_id
+        self.output = None       # Output of the last end node to finish
+        self.end_outputs = []    # Output dicts of every end node
+        self.node_outputs = {}   # node_id -> output dict
+        self.node_timings = {}   # node_id -> seconds spent in process()
+        self.error = None
+        self.stopped = False
+        self.duration = 0.0
+
+    @property
+    def status(self):
+        if self.stopped:
+            return "stopped"
+        if self.error:
+            return "error"
+        return "completed"
+
+    def to_dict(self):
+        return {
+            'workflow_name': self.workflow_name,
+            'workflow_id': self.workflow_id,
+            'status': self.status,
+            'output': self.output,
+            'error': self.error,
+            'duration': round(self.duration, 3),
+            'node_timings': {node_id: round(seconds, 3) for node_id, seconds in self.node_timings.items()},
+        }
+
+
+def run_workflow(config, node_graph, user_input, sink=None, stop_event=None, workflow_id=None,
+                 workflow_name=None, stream_output=False, gui_queue=None, parent_window=None, pools=None):
+    """
+    Run a workflow graph with TRUE PARALLEL execution and return a WorkflowRunResult.
+
+    Independent branches run simultaneously in named worker pools (io, llm,
+    cpu and dedicated threads for persistent nodes, see worker_pools.py);
+    each finished node immediately submits the downstream nodes it made ready.
+
+    When ``stop_event`` is a CancellationToken (the default) the run stops as
+    soon as it is set: queued nodes are cancelled and running nodes see the
+    same token as ``inputs['stop_event']`` and ``self.cancel_token``.
+
+    With stream_output enabled, nodes send their LLM requests through
+    APIService.stream_request and every delta is passed to ``sink.stream``.
+    ``gui_queue`` and ``parent_window`` are handed to nodes that can show
+    dialogs; headless runs leave them None.  ``pools`` shares one set of
+    WorkerPools between runs instead of creating pools for this run.
+    """
+    sink = sink or WorkflowEventSink()
+    stop_event = stop_event if stop_event is not None else CancellationToken()
+    result = WorkflowRunResult(workflow_name, workflow_id)
+    started_at = time.monotonic()
+
+    try:
+        nodes = node_graph['nodes']
+        node_lookup = nodes
+
+        # Compiled once per graph: edges by (node_id, output), in-degrees and
+        # the start/persistent/end node sets, so dispatch never scans the graph.
+        plan = ExecutionPlan.for_graph(node_graph)
+
+        # Find the Start Node
+        if len(plan.start_node_ids) != 1:
+            raise ValueError("There must be exactly one node marked as Start Node.")
+        start_node = nodes[next(iter(plan.start_node_ids))]
+
+        print(f"[PARALLEL] Starting workflow with start node ID: {start_node['id']}")
+
+        # Find persistent nodes that should auto-launch alongside the start node.
+        # These are always-on service nodes (e.g. WhatsAppWebNode) that have
+        # is_persistent=True and are NOT the start node.
+        persistent_nodes = [nodes[nid] for nid in plan.node_ids if nid in plan.persistent_node_ids]
+        if persistent_nodes:
+            print(f"[PARALLEL] Found {len(persistent_nodes)} persistent node(s) to auto-launch: {[n['id'] for n in persistent_nodes]}")
+
+        sink.run_started(workflow_name)
+
+        # === THREAD-SAFE STATE ===
+        state_lock = threading.Lock()
+        pending_inputs = {}  # node_id -> {input_name: value, '_count': int}
+        ready_nodes = []     # node_ids whose inputs are complete, awaiting submission
+        node_results = result.node_outputs
+        completed_nodes = set()
+        workflow_error = [None]  # Use list to allow modification in nested function
+        final_output = [None]
+
+        # Metadata to pass to all nodes
+        base_metadata = {
+            'gui_queue': gui_queue,
+            'parent_window': parent_window,
+            'stop_event': stop_event,
+            'cancel_token': stop_event,
+            'workflow_id': workflow_id,
+            'workflow_name': workflow_name
+        }
+
+        def make_stream_callback(node_id, is_end_node):
+            def on_token(delta):
+                if stop_event.is_set():
+                    return
+                sink.stream(node_id, delta, is_end_node)
+            return on_token
+
+        def process_single_node(node_id, inputs, pool):
+            """Process a single node - runs in its worker pool."""
+            try:
+                if stop_event.is_set():
+                    return None, None, []
+
+                node_data = node_lookup.get(node_id)
+                if not node_data:
+                    raise ValueError(f"Node with ID '{node_id}' not found.")
+
+                # Instantiate and process
+                node_type = node_data['type']
+                node_class = plan.node_class(node_id)
+                if not node_class:
+                    raise ValueError(f"No node class registered for type '{node_type}'.")
+
+                node_instance = node_class(node_id=node_id, config=config)
+                node_instance.set_properties(node_data)
+                node_instance.cancel_token = stop_event
+                is_end_node = node_instance.properties.get('is_end_node', {}).get('default', False)
+
+                if stream_output:
+                    node_instance.stream_callback = make_stream_callback(node_id, is_end_node)
+
+                print(f"[PARALLEL] Processing node '{node_id}' ({node_type}) in pool '{pool}' with inputs: {[k for k in inputs.keys() if k not in base_metadata]}")
+                sink.node_started(node_id, node_type)
+                node_started_at = time.monotonic()
+
+                if run_pools.uses_processes(pool) and node_instance.can_run_in_process(inputs):
+                    process_inputs = {k: v for k, v in inputs.items() if k not in THREAD_ONLY_INPUTS}
+                    node_output = run_pools.run_in_process(node_class, node_id, config, node_data, process_inputs)
+                else:
+                    node_output = node_instance.process(inputs)
+
+                seconds = time.monotonic() - node_started_at
+                with state_lock:
+                    result.node_timings[node_id] = seconds
+                sink.node_finished(node_id, node_output, seconds)
+
+                print(f"[PARALLEL] Node '{node_id}' completed in {seconds:.2f}s. Output keys: {list(node_output.keys()) if node_output else 'None'}")
+
+                # Find downstream nodes
+                downstream = []
+                if node_output:
+                    for output_key, output_value in node_output.items():
+                        if not output_value:
+                            continue
+                        for to_node, to_input in plan.targets(node_id, output_key):
+                            downstream.append({
+                                'to_node': to_node,
+                                'to_input': to_input,
+                                'value': output_value
+                            })
+
+                # Track end nodes without downstream connections (no early termination)
+                if is_end_node and not downstream:
+                    return node_id, node_output, 'END_NODE'
+
+                print(f"[PARALLEL] Node '{node_id}' returning downstream: {len(downstream)} targets: {[d['to_node'] for d in downstream]}")
+                return node_id, node_output, downstream
+
+            except WorkflowCancelled:
+                print(f"[PARALLEL] Node '{node_id}' cancelled")
+                return None, None, []
+            except Exception as e:
+                print(f"[PARALLEL] Error in node '{node_id}': {e}")
+                traceback.print_exc()
+                sink.node_failed(node_id, str(e))
+                return node_id, None, f"ERROR: {e}"
+
+        def take_ready_nodes():
+            """Pop the nodes deliver_outputs marked ready, with their inputs."""
+            nodes_to_submit = []
+
+            with state_lock:
+                while ready_nodes:
+                    node_id = ready_nodes.pop()
+                    if node_id in completed_nodes or node_id not in pending_inputs:
+                        continue
+                    pending = pending_inputs.pop(node_id)
+                    # Node is ready - prepare inputs
+                    inputs = dict(base_metadata)
+                    for k, v in pending.items():
+                        if k != '_count':
+                            inputs[k] = v
+                    nodes_to_submit.append((node_id, inputs))
+            return nodes_to_submit
+
+        def deliver_outputs(from_node_id, downstream_list):
+            """Deliver outputs to downstream nodes, tracking received counts."""
+            with state_lock:
+                for item in downstream_list:
+                    to_node = item['to_node']
+                    to_input = item['to_input']
+                    value = item['value']
+
+                    if to_node not in pending_inputs:
+                        pending_inputs[to_node] = {'_count': 0}
+
+                    pending_inputs[to_node]['_count'] += 1
+
+                    # Store the input value
+                    if to_input in pending_inputs[to_node]:
+                        existing = pending_inputs[to_node][to_input]
+                        if isinstance(existing, list):
+                            existing.append(value)
+                        else:
+                            pending_inputs[to_node][to_input] = [existing, value]
+                    else:
+                        pending_inputs[to_node][to_input] = value
+
+                    expected = plan.expected_inputs(to_node)
+                    if pending_inputs[to_node]['_count'] == expected:
+                        ready_nodes.append(to_node)
+
+                    print(f"[PARALLEL] Delivered output from '{from_node_id}' to '{to_node}' input '{to_input}' (count: {pending_inputs[to_node]['_count']}/{expected})")
+
+        # === MAIN EXECUTION LOOP ===
+        # Event driven: every future reports its completion on this queue,
+        # and the stop event posts _STOP the moment it is set.
+        end_node_outputs = result.end_outputs
+        completions = queue.Queue()
+        wake_on_stop = lambda: completions.put(_STOP)
+        immediate_stop = hasattr(stop_event, 'add_callback')
+        if immediate_stop:
+            stop_event.add_callback(wake_on_stop)
+
+        settings = pool_settings(config, node_graph)
+        run_pools = pools.for_run() if pools is not None else WorkerPools(settings)
+        futures = {}
+        stopped = False
+        try:
+            def submit(node_id, inputs):
+                pool = node_pool(node_lookup.get(node_id, {}), plan.node_class(node_id), settings['node_pools'])
+                future = run_pools.submit(pool, process_single_node, node_id, inputs, pool)
+                futures[future] = node_id
+                future.add_done_callback(completions.put)
+
+            # Start with the start node
+            start_inputs = dict(base_metadata)
+            start_inputs['input'] = user_input
+            submit(start_node['id'], start_inputs)
+
+            # Also launch persistent nodes immediately (they don't wait for inputs)
+            for pnode in persistent_nodes:
+                pnode_inputs = dict(base_metadata)
+                print(f"[PARALLEL] Auto-launching persistent node '{pnode['id']}' ({pnode['type']})")
+                submit(pnode['id'], pnode_inputs)
+
+            while futures:
+                try:
+                    # Plain threading.Events cannot notify; poll them briefly
+                    future = completions.get(timeout=None if immediate_stop else STOP_POLL_INTERVAL)
+                except queue.Empty:
+                    future = None
+                if stop_event.is_set():
+                    print("[PARALLEL] Stop event detected, cancelling...")
+                    stopped = True
+                    break
+                if future is None or future is _STOP or future not in futures:
+                    continue
+                node_id = futures.pop(future)
+
+                try:
+                    result_node_id, output, downstream = future.result()
+                    print(f"[PARALLEL] Node '{result_node_id}' completed")
+                except Exception as e:
+                    workflow_error[0] = str(e)
+                    print(f"[PARALLEL] Node '{node_id}' failed: {e}")
+                    traceback.print_exc()
+                    continue
+
+                if output is None and downstream is None:
+                    continue
+
+                if isinstance(downstream, str):
+                    if downstream.startswith('ERROR:'):
+                        workflow_error[0] = downstream
+                        continue
+                    elif downstream == 'END_NODE':
+                        if output:
+                            end_node_outputs.append(output)
+                            final_output[0] = next(iter(output.values()))
+                            print(f"[PARALLEL] End node output received from '{result_node_id}'")
+                        downstream = []
+
+                with state_lock:
+                    completed_nodes.add(result_node_id)
+                    if output:
+                        node_results[result_node_id] = output
+
+                # Deliver outputs and submit the nodes they completed
+                if downstream and isinstance(downstream, list):
+                    deliver_outputs(result_node_id, downstream)
+                for ready_id, inputs in take_ready_nodes():
+                    print(f"[PARALLEL] Submitting node '{ready_id}' for parallel execution")
+                    submit(ready_id, inputs)
+
+            if not stopped:
+                with state_lock:
+                    if not pending_inputs:
+                        print("[PARALLEL] All nodes processed, workflow complete")
+                    else:
+                        # Inputs arrived for nodes that can no longer run
+                        print(f"[PARALLEL] WARNING: Deadlock detected - pending inputs but no futures")
+                        for pid, pdata in pending_inputs.items():
+                            print(f"[PARALLEL]   '{pid}': count={pdata.get('_count', 0)}/{plan.expected_inputs(pid)}")
+        finally:
+            if immediate_stop:
+                stop_event.remove_callback(wake_on_stop)
+            # On stop, queued nodes are cancelled and running ones are left to
+            # notice the cancellation token; their results are discarded.
+            run_pools.shutdown(wait=not stopped, cancel_futures=stopped)
+
+        # === HANDLE COMPLETION ===
+        result.output = final_output[0]
+        result.duration = time.monotonic() - started_at
+        if stop_event.is_set():
+            result.stopped = True
+            sink.run_stopped()
+        elif workflow_error[0]:
+            result.error = workflow_error[0]
+            sink.run_failed(workflow_error[0])
+        elif final_output[0] is not None or end_node_outputs:
+            sink.run_completed(final_output[0] if final_output[0] is not None else '')
+
+    except Exception as e:
+        traceback.print_exc()
+        result.error = str(e)
+        result.duration = time.monotonic() - started_at
+        sink.run_failed(result.error)
+
+    sink.run_finished()
+    return result
+
+
+def load_workflow_file(path):
+    """Load a workflow YAML file as saved by the editor; returns (name, graph)."""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as file:
+        workflow = yaml.safe_load(file) or {}
+    graph = workflow.get('graph', workflow) if isinstance(workflow, dict) else None
+    if not isinstance(graph, dict) or not graph.get('nodes'):
+        raise ValueError(f"'{path}' does not contain a workflow graph.")
+    return path.stem, graph
+
+
+def load_run_config(config_file='config.yaml'):
+    """config.yaml for headless runs (no GUI prompts); empty interfaces if missing."""
+    try:
+        with open(config_file, 'r', encoding='utf-8') as file:
+            config = yaml.safe_load(file) or {}
+    except FileNotFoundError:
+        print(f"Configuration file '{config_file}' not found. Using default configuration.")
+        config = {}
+    if not isinstance(config.get('interfaces'), dict):
+        config['interfaces'] = {}
+    return config
+
+
+def run_workflow_file(path, user_input, config=None, config_file='config.yaml', **kwargs):
+    """Load a workflow file and run it headless; see run_workflow for kwargs."""
+    name, graph = load_workflow_file(path)
+    if config is None:
+        config = load_run_config(config_file)
+    kwargs.setdefault('workflow_name', name)
+    return run_workflow(config, graph, user_input, **kwargs)
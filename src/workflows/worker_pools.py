@@ -0,0 +1,190 @@
+# worker_pools.py
+
+"""
+Named worker pools for process_node_graph.
+
+Nodes run in one of four pools so slow or never-ending work cannot starve
+the rest of a workflow:
+
+    io          file, database, search and scrape work
+    llm         nodes waiting on model providers (the default)
+    cpu         CPU-bound work such as document export; optionally handed
+                to a shared process pool
+    persistent  always-on service nodes; each gets a dedicated thread and
+                never takes a pool slot
+
+Pool sizes come from ``worker_pools`` in config.yaml, overridden by a
+``worker_pools`` entry in the workflow graph.  A node's pool is, in order:
+its ``worker_pool`` property, the workflow's ``node_pools`` mapping by node
+type, ``persistent`` for nodes with ``is_persistent`` set, and the node
+class's ``worker_pool`` attribute.
+"""
+
+import importlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait as wait_futures
+
+IO = "io"
+LLM = "llm"
+CPU = "cpu"
+PERSISTENT = "persistent"
+POOL_NAMES = (IO, LLM, CPU, PERSISTENT)
+
+# Run-scoped inputs that only make sense in the scheduler's process
+THREAD_ONLY_INPUTS = ('gui_queue', 'parent_window', 'stop_event', 'cancel_token')
+
+DEFAULT_POOL_SIZES = {
+    IO: 8,
+    LLM: 10,
+    CPU: max(2, os.cpu_count() or 2),
+}
+
+
+def pool_settings(config, node_graph=None):
+    """Merged pool settings: sizes per pool plus ``processes`` and ``node_pools``."""
+    settings = dict(DEFAULT_POOL_SIZES)
+    settings['processes'] = False
+    settings['node_pools'] = {}
+    for source in ((config or {}).get('worker_pools'), (node_graph or {}).get('worker_pools')):
+        if not isinstance(source, dict):
+            continue
+        for key, value in source.items():
+            if key in DEFAULT_POOL_SIZES:
+                try:
+                    settings[key] = max(1, int(value))
+                except (TypeError, ValueError):
+                    pass
+            elif key == 'processes':
+                settings['processes'] = bool(value)
+            elif key == 'node_pools' and isinstance(value, dict):
+                settings['node_pools'] = {**settings['node_pools'], **value}
+    return settings
+
+
+def node_pool(node_data, node_class=None, node_pools=None):
+    """
+    Name of the pool *node_data* runs in.
+
+    Network-bound nodes that make no model calls (search, scrape, transcript
+    fetches) set the class attribute ``worker_pool = "io"`` so they never
+    wait behind LLM nodes for a slot.
+    """
+    properties = node_data.get('properties', {}) or {}
+    prop = properties.get('worker_pool', {})
+    configured = (prop.get('value') or prop.get('default')) if isinstance(prop, dict) else prop
+    if configured in POOL_NAMES:
+        return configured
+    by_type = (node_pools or {}).get(node_data.get('type'))
+    if by_type in POOL_NAMES:
+        return by_type
+    if properties.get('is_persistent', {}).get('default', False):
+        return PERSISTENT
+    default = getattr(node_class, 'worker_pool', None)
+    return default if default in POOL_NAMES else LLM
+
+
+def _run_node_process(module_name, class_name, node_id, config, node_data, inputs):
+    """Process-pool entry point: rebuild the node in this process and run it."""
+    node_class = getattr(importlib.import_module(module_name), class_name)
+    node_instance = node_class(node_id=node_id, config=config)
+    node_instance.set_properties(node_data)
+    return node_instance.process(inputs)
+
+
+class WorkerPools:
+    """
+    Named executors, sized by pool_settings.
+
+    By default each workflow run creates its own.  A long-lived owner (the
+    workflow server) creates one set and hands each run ``for_run()``, so
+    all runs share the pool sizes as global bounds.  The process pool is
+    shared by every run in the process and created on first use.
+    """
+
+    _process_pool = None
+    _process_lock = threading.Lock()
+
+    def __init__(self, settings):
+        self.settings = settings
+        self._executors = {
+            name: ThreadPoolExecutor(max_workers=settings[name], thread_name_prefix=f"xeroflow-{name}")
+            for name in DEFAULT_POOL_SIZES
+        }
+        self._dedicated = []
+
+    def submit(self, pool, fn, *args):
+        """Run ``fn(*args)`` in *pool*; returns a Future."""
+        if pool == PERSISTENT:
+            return self._submit_dedicated(fn, *args)
+        return self._executors.get(pool, self._executors[LLM]).submit(fn, *args)
+
+    def _submit_dedicated(self, fn, *args):
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+        thread = threading.Thread(target=run, name="xeroflow-persistent", daemon=True)
+        self._dedicated.append(thread)
+        thread.start()
+        return future
+
+    def uses_processes(self, pool):
+        return pool == CPU and self.settings.get('processes', False)
+
+    def run_in_process(self, node_class, node_id, config, node_data, inputs):
+        """Run a node in the shared process pool and wait for its output."""
+        cls = type(self)
+        with cls._process_lock:
+            if cls._process_pool is None:
+                # spawn: forking a process that runs Tk and worker threads is unsafe
+                cls._process_pool = ProcessPoolExecutor(max_workers=self.settings[CPU],
+                                                        mp_context=multiprocessing.get_context('spawn'))
+            pool = cls._process_pool
+        return pool.submit(_run_node_process, node_class.__module__, node_class.__name__,
+                           node_id, config, node_data, inputs).result()
+
+    def for_run(self):
+        """View for one run on these shared pools; its shutdown only affects the run's own work."""
+        return _RunPools(self)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+        if wait:
+            for thread in self._dedicated:
+                thread.join()
+
+
+class _RunPools:
+    """One run's work on shared WorkerPools."""
+
+    def __init__(self, pools):
+        self._pools = pools
+        self.settings = pools.settings
+        self._futures = []
+
+    def submit(self, pool, fn, *args):
+        future = self._pools.submit(pool, fn, *args)
+        self._futures.append(future)
+        return future
+
+    def uses_processes(self, pool):
+        return self._pools.uses_processes(pool)
+
+    def run_in_process(self, *args):
+        return self._pools.run_in_process(*args)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        if cancel_futures:
+            for future in self._futures:
+                future.cancel()
+        if wait:
+            wait_futures(self._futures)
@@ -13,22 +13,41 @@ import csv
 from src.export.word import convert_markdown_to_docx
 from src.utils.config import load_config
 from services.pricing_service import PricingService
+from src.workflows.cancellation import CancellationToken
+
+STREAM_REFRESH_MS = 250  # How often the details panel picks up newly streamed tokens
+ACTIVE_STATUSES = ("queued", "running")  # Workflows that have not finished yet
 
 class WorkflowInstance:
     """Represents a single workflow instance with its state and data."""
     
-    def __init__(self, workflow_name, user_input, thread=None):
+    def __init__(self, workflow_name, user_input, thread=None, queued=False):
         self.id = str(uuid.uuid4())
         self.workflow_name = workflow_name
         self.user_input = user_input
         self.start_time = datetime.datetime.now()
+        self.queued_time = self.start_time if queued else None
         self.end_time = None
-        self.status = "running"  # "running", "completed", "stopped", "error"
+        self.status = "queued" if queued else "running"  # "queued", "running", "completed", "stopped", "error"
+        self.priority = 0
+        self.node_timings = {}  # node_id -> seconds, filled in by the workflow server
         self.thread = thread
-        self.stop_event = threading.Event()
+        self.stop_event = CancellationToken()
         self.output = ""
         self.error = None
         self.token_summary = None
+        self.streamed_output = ""  # Tokens streamed so far while the workflow runs
+        self._stream_lock = threading.Lock()
+    
+    def append_stream(self, text):
+        """Append a streamed token delta (called from workflow threads)."""
+        with self._stream_lock:
+            self.streamed_output += text
+    
+    def start(self):
+        """Move a queued workflow to running; its duration starts now."""
+        self.start_time = datetime.datetime.now()
+        self.status = "running"
     
     def complete(self, output):
         """Mark the workflow as completed with the given output."""
@@ -69,6 +88,8 @@ class WorkflowInstance:
     
     def get_status_display(self):
         """Get a display-friendly status string."""
+        if self.status == "queued":
+            return "Queued"
         if self.status == "running":
             return f"Running ({self.get_formatted_duration()})"
         elif self.status == "completed":
@@ -98,20 +119,29 @@ class WorkflowManager:
         self._run_token_log_migration()
         self.load_workflow_history()
     
-    def create_workflow(self, workflow_name, user_input, thread=None):
+    def create_workflow(self, workflow_name, user_input, thread=None, queued=False):
         """Create a new workflow instance and return its ID."""
-        workflow = WorkflowInstance(workflow_name, user_input, thread)
+        workflow = WorkflowInstance(workflow_name, user_input, thread, queued=queued)
         self.workflows[workflow.id] = workflow
         self._notify_listeners()
         return workflow
     
+    def start_workflow(self, workflow_id):
+        """Start a queued workflow; False if it was stopped while waiting."""
+        workflow = self.get_workflow(workflow_id)
+        if workflow and workflow.status == "queued":
+            workflow.start()
+            self._notify_listeners()
+            return True
+        return False
+    
     def get_workflow(self, workflow_id):
         """Get a workflow instance by ID."""
         return self.workflows.get(workflow_id)
     
     def get_active_workflows(self):
-        """Get all active (running) workflow instances."""
-        return {wf_id: wf for wf_id, wf in self.workflows.items() if wf.status == "running"}
+        """Get all active (queued or running) workflow instances."""
+        return {wf_id: wf for wf_id, wf in self.workflows.items() if wf.status in ACTIVE_STATUSES}
     
     def get_completed_workflows(self):
         """Get all completed workflow instances."""
@@ -119,9 +149,9 @@ class WorkflowManager:
                 if wf.status in ["completed", "stopped", "error"]}
     
     def stop_workflow(self, workflow_id):
-        """Stop a running workflow by ID."""
+        """Stop a queued or running workflow by ID."""
         workflow = self.get_workflow(workflow_id)
-        if workflow and workflow.status == "running":
+        if workflow and workflow.status in ACTIVE_STATUSES:
             workflow.stop()
             workflow.token_summary = self._summarize_workflow_tokens(workflow)
             self._notify_listeners()
@@ -302,7 +332,7 @@ class WorkflowManager:
         """Remove all completed workflows."""
         workflow_ids = list(self.workflows.keys())
         for wf_id in workflow_ids:
-            if self.workflows[wf_id].status != "running":
+            if self.workflows[wf_id].status not in ACTIVE_STATUSES:
                 del self.workflows[wf_id]
         self._notify_listeners()
         self.save_workflow_history()  # Save history after clearing completed workflows
@@ -310,8 +340,8 @@ class WorkflowManager:
     def delete_workflow(self, workflow_id):
         """Delete a specific workflow by ID."""
         if workflow_id in self.workflows:
-            # Don't allow deleting running workflows
-            if self.workflows[workflow_id].status == "running":
+            # Don't allow deleting queued or running workflows
+            if self.workflows[workflow_id].status in ACTIVE_STATUSES:
                 return False
                 
             # Delete associated files
@@ -869,9 +899,33 @@ def create_workflow_management_tab(notebook, config, gui_queue):
     
     # Store the last selected workflow ID
     workflow_tab.last_selected_workflow_id = None
+    # Running workflow whose streamed output is shown in the details panel
+    workflow_tab.streaming_workflow_id = None
+    workflow_tab.streamed_chars = 0
     
     # Set up selection change event
     completed_tree.bind("<<TreeviewSelect>>", lambda event: on_completed_workflow_selected(event, workflow_tab, formatting_var))
+    active_tree.bind("<<TreeviewSelect>>", lambda event: on_active_workflow_selected(event, workflow_tab, formatting_var))
+    
+    # Append newly streamed tokens for a selected running workflow between tree refreshes
+    def refresh_stream():
+        workflow_id = workflow_tab.streaming_workflow_id
+        if workflow_id and not getattr(workflow_tab, 'user_interacting', False):
+            workflow = workflow_manager.get_workflow(workflow_id)
+            if workflow is None or workflow.status != "running":
+                update_workflow_details(workflow_tab, workflow_id, formatting_var)
+            else:
+                streamed = workflow.streamed_output
+                shown = workflow_tab.streamed_chars
+                if len(streamed) > shown:
+                    output_text.config(state="normal")
+                    output_text.insert(tk.END, streamed[shown:])
+                    output_text.see(tk.END)
+                    output_text.config(state="disabled")
+                    workflow_tab.streamed_chars = len(streamed)
+        workflow_tab.after(STREAM_REFRESH_MS, refresh_stream)
+    
+    workflow_tab.after(STREAM_REFRESH_MS, refresh_stream)
     
     # Set up periodic refresh
     def refresh_trees():
@@ -1031,6 +1085,11 @@ def update_workflow_details(workflow_tab, workflow_id, formatting_var=None):
         return
     
     elements = workflow_tab.elements
+    if workflow.status == "running":
+        workflow_tab.streaming_workflow_id = workflow.id
+        workflow_tab.streamed_chars = len(workflow.streamed_output)
+    else:
+        workflow_tab.streaming_workflow_id = None
     
     # Update labels
     elements['name_label'].config(text=workflow.workflow_name)
@@ -1073,6 +1132,9 @@ def update_workflow_details(workflow_tab, workflow_id, formatting_var=None):
         elements['output_text'].insert("1.0", f"ERROR: {workflow.error}")
         elements['output_text'].tag_configure("error", foreground="red")
         elements['output_text'].tag_add("error", "1.0", "end")
+    elif workflow.status == "running":
+        elements['output_text'].insert("1.0", workflow.streamed_output[:workflow_tab.streamed_chars])
+        elements['output_text'].see(tk.END)
     else:
         if formatting_var and formatting_var.get():
             # Apply formatting
@@ -1085,6 +1147,7 @@ def update_workflow_details(workflow_tab, workflow_id, formatting_var=None):
 def clear_workflow_details(workflow_tab):
     """Clear the details panel."""
     elements = workflow_tab.elements
+    workflow_tab.streaming_workflow_id = None
     
     # Clear labels
     elements['name_label'].config(text="")
@@ -1182,5 +1245,13 @@ def on_completed_workflow_selected(event, workflow_tab, formatting_var):
         workflow_tab.last_selected_workflow_id = workflow_id
         update_workflow_details(workflow_tab, workflow_id, formatting_var)
 
+def on_active_workflow_selected(event, workflow_tab, formatting_var):
+    """Handle selection of a running workflow: show its output as it streams."""
+    selected_items = workflow_tab.elements['active_tree'].selection()
+    if selected_items:
+        workflow_id = selected_items[0]
+        workflow_tab.last_selected_workflow_id = workflow_id
+        update_workflow_details(workflow_tab, workflow_id, formatting_var)
+
 # Create a singleton instance
 workflow_manager = WorkflowManager()
@@ -0,0 +1,67 @@
+import json
+import unittest
+from unittest import mock
+
+from services.api_service import APIRequest, APIService
+from services.client_registry import ClientRegistry
+
+
+class _FakeStreamResponse:
+    status_code = 200
+    text = ""
+    encoding = None
+    headers = {}
+
+    def __init__(self, events):
+        self.lines = [f"data: {json.dumps(event)}" for event in events] + ["", "data: [DONE]"]
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class TestStreamRequest(unittest.TestCase):
+    def setUp(self):
+        ClientRegistry.invalidate()
+        self.addCleanup(ClientRegistry.invalidate)
+        self.service = APIService({
+            "interfaces": {"local": {"type": "lmstudio", "api_url": "http://localhost:1234"}}
+        })
+
+    def test_lmstudio_yields_deltas_and_returns_usage(self):
+        events = [
+            {"choices": [{"delta": {"content": "Hel"}}]},
+            {"choices": [{"delta": {"content": "lo"}}]},
+            {"choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}},
+        ]
+        session = mock.Mock()
+        session.post.return_value = _FakeStreamResponse(events)
+        with mock.patch.object(ClientRegistry, "get_session", return_value=session):
+            stream = self.service.stream_request(APIRequest("hi", "local", model="m"))
+            deltas = []
+            try:
+                while True:
+                    deltas.append(next(stream))
+            except StopIteration as stop:
+                response = stop.value
+
+        self.assertEqual(deltas, ["Hel", "lo"])
+        self.assertTrue(response.success)
+        self.assertEqual(response.content, "Hello")
+        self.assertEqual(response.total_tokens, 5)
+        self.assertTrue(session.post.call_args.kwargs["json"]["stream"])
+
+    def test_unknown_interface_returns_error_response(self):
+        stream = self.service.stream_request(APIRequest("hi", "missing"))
+        with self.assertRaises(StopIteration) as stop:
+            next(stream)
+        self.assertFalse(stop.exception.value.success)
+
+
+if __name__ == "__main__":
+    unittest.main()
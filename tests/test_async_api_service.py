@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import unittest
+
+import httpx
+
+from services.api_service import APIRequest
+from services.async_api_service import AsyncAPIService
+from services.client_registry import ClientRegistry
+from services.rate_limiter import RateLimiter
+
+
+class TestAsyncAPIService(unittest.TestCase):
+    def setUp(self):
+        ClientRegistry.invalidate()
+        self.addCleanup(ClientRegistry.invalidate)
+        RateLimiter.reset()
+        self.addCleanup(RateLimiter.reset)
+        AsyncAPIService.reset_stats()
+        self.service = AsyncAPIService({
+            "interfaces": {
+                "local": {"type": "lmstudio", "api_url": "http://localhost:1234", "max_concurrency": 3},
+            }
+        })
+
+    def _install_transport(self):
+        async def handler(request):
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={
+                "choices": [{"message": {"content": "ok"}}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1},
+            })
+
+        async def install():
+            loop_id = id(asyncio.get_running_loop())
+            AsyncAPIService._http_clients[loop_id] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        AsyncAPIService.run_sync(install())
+
+    def test_fan_out_is_bounded_per_interface(self):
+        self._install_transport()
+        threads_before = threading.active_count()
+        requests = [APIRequest(f"prompt {i}", "local", model="m") for i in range(50)]
+
+        responses = self.service.send_many_sync(requests)
+
+        self.assertEqual(len(responses), 50)
+        self.assertTrue(all(r.success and r.content == "ok" for r in responses))
+        self.assertEqual(responses[0].total_tokens, 2)
+        self.assertEqual(AsyncAPIService.get_stats()["local"]["peak"], 3)
+        self.assertLessEqual(threading.active_count(), threads_before + 1)
+
+    def test_sync_calls_take_the_same_concurrency_slots(self):
+        self._install_transport()
+        api_config = self.service.config["interfaces"]["local"]
+        lease = RateLimiter.acquire("local", "m", 1, api_config)  # e.g. a streaming call in progress
+        try:
+            responses = self.service.send_many_sync([APIRequest(f"p{i}", "local", model="m") for i in range(10)])
+        finally:
+            lease.release()
+
+        self.assertTrue(all(r.success for r in responses))
+        self.assertEqual(AsyncAPIService.get_stats()["local"]["peak"], 2)
+        self.assertEqual(RateLimiter.get_stats()["in_flight"]["local"], 0)
+
+    def test_unknown_interface_returns_error_response(self):
+        response = self.service.send_request_sync(APIRequest("hi", "missing"))
+        self.assertFalse(response.success)
+
+
+if __name__ == "__main__":
+    unittest.main()
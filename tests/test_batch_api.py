@@ -0,0 +1,53 @@
+import threading
+import unittest
+from unittest import mock
+
+from services.api_service import APIRequest, APIService
+from services.client_registry import ClientRegistry
+from tools.local_batch_server import LocalBatchServer
+
+
+class TestSubmitBatch(unittest.TestCase):
+    def setUp(self):
+        ClientRegistry.invalidate()
+        self.addCleanup(ClientRegistry.invalidate)
+        self.server = LocalBatchServer().start()
+        self.addCleanup(self.server.stop)
+        self.service = APIService({
+            "interfaces": {
+                "batch": {"type": "OpenAI", "api_url": self.server.url, "api_key": "local",
+                          "batch_poll_seconds": 0.01},
+                "local": {"type": "lmstudio", "api_url": "http://localhost:1234"},
+            }
+        })
+
+    def test_results_are_mapped_back_in_request_order(self):
+        progress = []
+        responses = self.service.submit_batch(
+            [APIRequest(f"prompt {i}", "batch", model="m") for i in range(20)],
+            on_progress=lambda finished, total: progress.append((finished, total)))
+
+        self.assertEqual([r.content for r in responses], [f"Echo: prompt {i}" for i in range(20)])
+        self.assertTrue(all(r.success and r.total_tokens for r in responses))
+        self.assertEqual(progress[-1], (20, 20))
+
+    def test_cancel_event_cancels_the_batch(self):
+        self.server.delay = 0.05
+        cancel_event = threading.Event()
+        cancel_event.set()
+        responses = self.service.submit_batch(
+            [APIRequest(f"prompt {i}", "batch", model="m") for i in range(5)], cancel_event=cancel_event)
+
+        self.assertTrue(all(not r.success and "cancelled" in r.error for r in responses))
+        self.assertIn(list(self.server.batches.values())[0]["status"], ("cancelling", "cancelled"))
+
+    def test_interfaces_without_batch_endpoint_send_individually(self):
+        self.assertFalse(self.service.supports_batch("local"))
+        with mock.patch.object(APIService, "send_request", return_value=mock.Mock(success=True)) as send:
+            responses = self.service.submit_batch([APIRequest("a", "local"), APIRequest("b", "local")])
+        self.assertEqual(len(responses), 2)
+        self.assertEqual(send.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
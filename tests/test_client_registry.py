@@ -0,0 +1,48 @@
+import unittest
+
+from services.api_service import APIService
+from services.client_registry import ClientRegistry
+
+
+class TestClientRegistry(unittest.TestCase):
+    def setUp(self):
+        ClientRegistry.invalidate()
+        self.addCleanup(ClientRegistry.invalidate)
+        self.config = {
+            "interfaces": {
+                "local": {"type": "lmstudio", "api_url": "http://localhost:1234/"},
+                "search": {"type": "searchengine", "api_url": "http://localhost:8888"},
+            }
+        }
+
+    def test_construction_is_lazy_and_clients_are_shared(self):
+        first = APIService(self.config)
+        second = APIService(self.config)
+        self.assertEqual(ClientRegistry.get_stats()["clients"], 0)
+
+        info = first._get_client("local")
+        self.assertEqual(info["api_url"], "http://localhost:1234")
+        self.assertIs(second._get_client("local"), info)
+        self.assertEqual(ClientRegistry.get_stats()["clients"], 1)
+
+    def test_sync_config_drops_changed_and_removed_interfaces(self):
+        service = APIService(self.config)
+        local = service._get_client("local")
+        service._get_client("search")
+
+        self.config["interfaces"]["local"]["api_url"] = "http://127.0.0.1:5000"
+        del self.config["interfaces"]["search"]
+        ClientRegistry.sync_config(self.config)
+        self.assertEqual(ClientRegistry.get_stats()["clients"], 0)
+
+        refreshed = service._get_client("local")
+        self.assertIsNot(refreshed, local)
+        self.assertEqual(refreshed["api_url"], "http://127.0.0.1:5000")
+
+    def test_unknown_interface_is_reported(self):
+        service = APIService(self.config)
+        self.assertIsNone(service._get_client("missing"))
+
+
+if __name__ == "__main__":
+    unittest.main()
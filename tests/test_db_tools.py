@@ -0,0 +1,314 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from src.database import db_tools
+from src.database.chunk_store import ChunkStore
+from src.database.db_tools import DatabaseManager
+from src.database.embedding_service import EmbeddingService
+
+
+class _HashEmbeddings:
+    """Deterministic stand-in for HuggingFaceEmbeddings (no model download)."""
+
+    dimension = 16
+
+    def __init__(self):
+        self.document_calls = []
+
+    def _vector(self, text):
+        if text == "zero":
+            return [0.0] * self.dimension
+        seed = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(self.dimension).tolist()
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+    def embed_documents(self, texts):
+        self.document_calls.append(len(texts))
+        return [self._vector(text) for text in texts]
+
+
+class DatabaseManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        EmbeddingService.reset()
+        self.fake = _HashEmbeddings()
+        patcher = mock.patch.object(EmbeddingService, "_load_model", side_effect=lambda name, device: self.fake)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(EmbeddingService.reset)
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        dir_patcher = mock.patch.object(db_tools, "DATABASES_DIR", os.path.join(self.tmpdir.name, "databases"))
+        dir_patcher.start()
+        self.addCleanup(dir_patcher.stop)
+
+        DatabaseManager.query_cache.clear()
+        self.addCleanup(DatabaseManager.query_cache.clear)
+        self.manager = DatabaseManager(embed_batch_size=4)
+
+    @staticmethod
+    def make_file(name, text):
+        handle = io.BytesIO(text.encode("utf-8"))
+        handle.name = name
+        return handle
+
+
+class TestBatchedEmbedding(DatabaseManagerTestCase):
+    def test_embed_texts_batches_and_normalises(self):
+        texts = [f"chunk {i}" for i in range(10)]
+        matrix, kept = self.manager._embed_texts(texts)
+        self.assertEqual(self.fake.document_calls, [4, 4, 2])
+        self.assertEqual(kept, list(range(10)))
+        np.testing.assert_allclose(np.linalg.norm(matrix, axis=1), np.ones(10), rtol=1e-5)
+
+    def test_embed_texts_drops_empty_and_zero_norm(self):
+        matrix, kept = self.manager._embed_texts(["a", "", "zero", "b"])
+        self.assertEqual(kept, [0, 3])
+        self.assertEqual(matrix.shape, (2, _HashEmbeddings.dimension))
+
+    def test_add_documents_indexes_every_chunk(self):
+        self.manager.create_database("docs")
+        text = "\n\n".join(f"Paragraph {i} " + "words " * 60 for i in range(12))
+        result = self.manager.add_documents("docs", [self.make_file("notes.txt", text)])
+        self.assertTrue(result["success"])
+        metadata = self.manager.load_metadata("docs")
+        self.assertEqual(self.manager.load_faiss_index("docs").ntotal, len(metadata))
+        self.assertEqual([c["chunk_number"] for c in metadata], list(range(len(metadata))))
+
+
+class TestChunkStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.store = ChunkStore(self.tmpdir.name)
+        self.store.initialize(4)
+
+    def test_append_grows_npy_in_place(self):
+        rng = np.random.default_rng(0)
+        batches = [rng.standard_normal((n, 4)).astype("float32") for n in (3, 1, 250)]
+        for offset, batch in enumerate(batches):
+            entries = [{"chunk_id": f"{offset}-{i}", "doc_id": f"doc{offset}", "chunk_number": i, "content": "x"}
+                       for i in range(len(batch))]
+            self.store.append(entries, batch)
+        np.testing.assert_array_equal(np.load(self.store.embeddings_path), np.vstack(batches))
+        self.assertEqual(self.store.count(), 254)
+        rows = self.store.get_rows([0, 3, 253])
+        self.assertEqual(rows[3]["chunk_id"], "1-0")
+        np.testing.assert_array_equal(self.store.get_embeddings([253]), batches[2][-1:])
+
+    def test_doc_chunks_ordered_and_extra_fields_round_trip(self):
+        entries = [
+            {"chunk_id": "b", "doc_id": "d", "chunk_number": 1, "content": "second", "metadata": {"heading": "H"}},
+            {"chunk_id": "a", "doc_id": "d", "chunk_number": 0, "content": "first"},
+        ]
+        self.store.append(entries, np.ones((2, 4), dtype="float32"))
+        chunks = self.store.get_doc_chunks("d")
+        self.assertEqual([c["chunk_id"] for c in chunks], ["a", "b"])
+        self.assertEqual(chunks[1]["metadata"], {"heading": "H"})
+
+
+class TestLegacyMigration(DatabaseManagerTestCase):
+    def test_search_migrates_metadata_json(self):
+        self.manager.create_database("legacy")
+        db_path = self.manager._db_path("legacy")
+        os.remove(os.path.join(db_path, "chunks.sqlite"))
+        os.remove(os.path.join(db_path, "embeddings.npy"))
+        legacy = [
+            {"chunk_id": f"c{i}", "doc_id": "d1", "source": "old.txt", "chunk_number": i,
+             "content": f"legacy chunk {i}", "embedding": self.fake.embed_query(f"legacy chunk {i}")}
+            for i in range(5)
+        ]
+        with open(os.path.join(db_path, "metadata.json"), "w", encoding="utf-8") as f:
+            json.dump(legacy, f)
+        self.manager._save_documents_index("legacy", [{"doc_id": "d1", "source": "old.txt", "tags": []}])
+
+        results = self.manager.search("legacy", "legacy chunk 3", top_k=1, collect_metrics=False)
+        self.assertEqual(results[0]["chunk_id"], "c3")
+        self.assertFalse(os.path.exists(os.path.join(db_path, "metadata.json")))
+        self.assertTrue(os.path.exists(os.path.join(db_path, "metadata.json.migrated")))
+        self.assertEqual(self.manager.load_faiss_index("legacy").ntotal, 5)
+
+
+class TestIndexCache(DatabaseManagerTestCase):
+    def setUp(self):
+        super().setUp()
+        DatabaseManager.index_cache.clear()
+        self.manager.create_database("cached")
+        for i in range(3):
+            self.manager.add_text_content("cached", f"stored research note {i}")
+
+    def test_repeat_search_is_served_from_memory(self):
+        self.manager.search("cached", "stored research note 1", collect_metrics=False)
+        with mock.patch.object(ChunkStore, "load_all") as load_all, \
+                mock.patch.object(DatabaseManager, "load_faiss_index") as load_index:
+            results = self.manager.search("cached", "stored research note 1", collect_metrics=False)
+            load_all.assert_not_called()
+            load_index.assert_not_called()
+        self.assertEqual(results[0]["content"].split("\n\n")[0], "stored research note 1")
+
+    def test_write_invalidates_cached_entry(self):
+        self.manager.search("cached", "anything", collect_metrics=False)
+        self.manager.add_text_content("cached", "fresh knowledge")
+        results = self.manager.search("cached", "fresh knowledge", top_k=1, collect_metrics=False)
+        self.assertEqual(results[0]["content"], "fresh knowledge")
+
+
+class TestIncrementalDeletion(DatabaseManagerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manager.create_database("agents")
+        self.doc_ids = [
+            self.manager.add_text_content("agents", f"agent memory entry {i}")["doc_id"] for i in range(4)
+        ]
+
+    def test_delete_removes_ids_without_rebuilding(self):
+        with mock.patch.object(DatabaseManager, "_rebuild_faiss_index") as rebuild:
+            result = self.manager.delete_documents_by_id("agents", [self.doc_ids[1]])
+            rebuild.assert_not_called()
+        self.assertEqual(result["chunks_removed"], 1)
+        index = self.manager.load_faiss_index("agents")
+        self.assertEqual(index.ntotal, 3)
+        results = self.manager.search("agents", "agent memory entry 1", top_k=3, collect_metrics=False)
+        self.assertNotIn(self.doc_ids[1], [r["doc_id"] for r in results])
+
+    def test_compaction_reclaims_dead_rows_and_keeps_search_working(self):
+        self.manager.delete_documents_by_id("agents", self.doc_ids[:2])
+        store = self.manager._chunk_store("agents")
+        self.assertEqual(store.dead_rows(), 2)
+
+        result = self.manager.compact_database("agents")
+        self.assertEqual(result["reclaimed_rows"], 2)
+        self.assertEqual(store.allocated_rows(), 2)
+        results = self.manager.search("agents", "agent memory entry 3", top_k=1, collect_metrics=False)
+        self.assertEqual(results[0]["doc_id"], self.doc_ids[3])
+
+
+class TestIndexModes(DatabaseManagerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manager.create_database("ann")
+        self.doc_ids = [
+            self.manager.add_text_content("ann", f"research finding number {i}")["doc_id"] for i in range(100)
+        ]
+
+    def test_hnsw_setting_is_persisted_and_searchable(self):
+        result = self.manager.set_index_type("ann", "hnsw", ann_threshold=0)
+        self.assertTrue(result["success"])
+        self.assertEqual(self.manager.load_db_config("ann")["index_type"], "hnsw")
+        self.assertEqual(self.manager.get_index_info("ann")["active_index"], "hnsw")
+
+        self.manager.delete_documents_by_id("ann", [self.doc_ids[7]])
+        results = self.manager.search("ann", "research finding number 8", top_k=3, collect_metrics=False)
+        self.assertEqual(results[0]["doc_id"], self.doc_ids[8])
+        self.assertNotIn(self.doc_ids[7], [r["doc_id"] for r in results])
+
+    def test_ivf_is_trained_once_threshold_is_crossed(self):
+        self.manager.set_index_type("ann", "ivf_flat", ann_threshold=120, ivf_nprobe=64)
+        self.assertEqual(self.manager.get_index_info("ann")["active_index"], "flat")
+        for i in range(100, 120):
+            self.manager.add_text_content("ann", f"research finding number {i}")
+        info = self.manager.get_index_info("ann")
+        self.assertEqual(info["active_index"], "ivf_flat")
+        self.assertEqual(self.manager.load_db_config("ann")["trained_size"], 120)
+        results = self.manager.search("ann", "research finding number 42", top_k=1, collect_metrics=False)
+        self.assertEqual(results[0]["doc_id"], self.doc_ids[42])
+
+    def test_unknown_index_type_is_rejected(self):
+        result = self.manager.set_index_type("ann", "lsh")
+        self.assertFalse(result["success"])
+
+
+class TestMMR(DatabaseManagerTestCase):
+    def test_vectorised_mmr_matches_reference_order(self):
+        from tools.mmr_benchmark import reference_mmr
+
+        rng = np.random.default_rng(3)
+        for mmr_lambda in (0.6, 0.2, 1.0):
+            query = rng.standard_normal(16).astype("float32")
+            candidates = [{"chunk_id": str(i), "embedding": rng.standard_normal(16).astype("float32")}
+                          for i in range(60)]
+            fast = self.manager._apply_mmr(query, candidates, 8, mmr_lambda=mmr_lambda)
+            slow = reference_mmr(query, candidates, 8, mmr_lambda=mmr_lambda)
+            self.assertEqual([c["chunk_id"] for c in fast], [c["chunk_id"] for c in slow])
+
+    def test_search_accepts_mmr_lambda(self):
+        self.manager.create_database("mmr")
+        for i in range(6):
+            self.manager.add_text_content("mmr", f"diverse topic {i}")
+        results = self.manager.search("mmr", "diverse topic 2", top_k=2, mmr_lambda=1.0, collect_metrics=False)
+        self.assertEqual(results[0]["content"], "diverse topic 2")
+
+
+class TestSearchMany(DatabaseManagerTestCase):
+    def setUp(self):
+        super().setUp()
+        for db_name in ("alpha", "beta"):
+            self.manager.create_database(db_name)
+            for i in range(5):
+                self.manager.add_text_content(db_name, f"{db_name} fact {i}")
+
+    def test_queries_are_embedded_once_and_match_single_search(self):
+        queries = ["alpha fact 1", "beta fact 3"]
+        self.fake.document_calls.clear()
+        batched = self.manager.search_many(queries, ["alpha", "beta"], top_k=2, collect_metrics=False, max_workers=2)
+        self.assertEqual(self.fake.document_calls, [2])
+        self.assertEqual(list(batched), ["alpha", "beta"])
+        for db_name in ("alpha", "beta"):
+            for query, results in zip(queries, batched[db_name]):
+                single = self.manager.search(db_name, query, top_k=2, collect_metrics=False)
+                self.assertEqual([r["chunk_id"] for r in results], [r["chunk_id"] for r in single])
+
+    def test_precomputed_vectors_skip_embedding(self):
+        vectors = self.manager.embed_queries(["beta fact 4", ""])
+        self.assertIsNone(vectors[1])
+        self.fake.document_calls.clear()
+        results = self.manager.search_many(["beta fact 4", ""], ["beta"], top_k=1,
+                                           collect_metrics=False, query_vectors=vectors)["beta"]
+        self.assertEqual(self.fake.document_calls, [])
+        self.assertEqual(results[0][0]["content"], "beta fact 4")
+        self.assertEqual(results[1], [])
+
+
+class TestQueryCache(DatabaseManagerTestCase):
+    def test_repeated_queries_hit_the_cache(self):
+        first = self.manager.embed_queries(["what is  the plan?"])[0]
+        self.fake.document_calls.clear()
+        second = self.manager.embed_queries(["what is the plan? "])[0]
+        self.assertEqual(self.fake.document_calls, [])
+        np.testing.assert_array_equal(first, second)
+        stats = DatabaseManager.get_query_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_search_metrics_record_cache_counters(self):
+        self.manager.create_database("metrics")
+        self.manager.add_text_content("metrics", "quarterly budget review")
+        self.manager.search("metrics", "budget", top_k=1)
+        self.manager.search("metrics", "budget", top_k=1)
+        self.assertTrue(DatabaseManager.metrics_writer.flush())
+        path = os.path.join(self.manager._db_path("metrics"), db_tools.SEARCH_METRICS_FILE)
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        self.assertEqual(records[-1]["query_cache_hits"], 1)
+
+    def test_cache_round_trips_through_disk(self):
+        self.manager.embed_queries(["persist me"])
+        path = os.path.join(self.tmpdir.name, "query_cache.npz")
+        DatabaseManager.query_cache.save(path)
+        DatabaseManager.query_cache.clear()
+        self.assertEqual(DatabaseManager.query_cache.load(path), 1)
+        self.fake.document_calls.clear()
+        self.manager.embed_queries(["persist me"])
+        self.assertEqual(self.fake.document_calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import threading
+import unittest
+from unittest import mock
+
+from src.database.embedding_service import EmbeddingService
+
+
+class _FakeEmbeddings:
+    def __init__(self, dimension=8):
+        self.dimension = dimension
+
+    def embed_query(self, text):
+        return [1.0] * self.dimension
+
+    def embed_documents(self, texts):
+        return [[1.0] * self.dimension for _ in texts]
+
+
+class TestEmbeddingService(unittest.TestCase):
+    def setUp(self):
+        EmbeddingService.reset()
+        patcher = mock.patch.object(
+            EmbeddingService, "_load_model", side_effect=lambda name, device: _FakeEmbeddings()
+        )
+        self.load_model = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(EmbeddingService.reset)
+
+    def test_model_loaded_once_per_device(self):
+        first = EmbeddingService.get_embeddings("model", "cpu")
+        second = EmbeddingService.get_embeddings("model", "cpu")
+        self.assertIs(first, second)
+        self.assertEqual(EmbeddingService.load_count(), 1)
+
+        EmbeddingService.get_embeddings("model", "cuda")
+        self.assertEqual(EmbeddingService.load_count(), 2)
+
+    def test_dimension_probed_once(self):
+        self.assertEqual(EmbeddingService.get_dimension("model", "cpu"), 8)
+        with mock.patch.object(_FakeEmbeddings, "embed_query") as probe:
+            self.assertEqual(EmbeddingService.get_dimension("model", "cpu"), 8)
+            probe.assert_not_called()
+
+    def test_concurrent_first_use_loads_once(self):
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            EmbeddingService.get_embeddings("model", "cpu")
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(EmbeddingService.load_count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import queue
+import threading
+import unittest
+from unittest import mock
+
+from src.workflows.execution_plan import ExecutionPlan
+from src.workflows.node_registry import NODE_REGISTRY
+from src.workflows.process_graph import process_node_graph
+
+
+class _EchoNode:
+    """Minimal node: passes its input through, tagged with its ID."""
+    calls = []
+
+    def __init__(self, node_id, config):
+        self.node_id = node_id
+        self.properties = {}
+
+    def set_properties(self, node_data):
+        self.properties = node_data.get('properties', {})
+
+    def process(self, inputs):
+        value = inputs.get('input')
+        _EchoNode.calls.append((self.node_id, value))
+        return {'output': f"{self.node_id}({value})"}
+
+
+def _node(node_id, **flags):
+    return {'id': node_id, 'type': 'Echo',
+            'properties': {name: {'default': True} for name in flags}}
+
+
+def _edge(src, dst):
+    return {'from_node': src, 'from_output': 'output', 'to_node': dst, 'to_input': 'input'}
+
+
+def _diamond():
+    return {
+        'nodes': {
+            'a': _node('a', is_start_node=True),
+            'b': _node('b'),
+            'c': _node('c'),
+            'd': _node('d', is_end_node=True),
+        },
+        'connections': [_edge('a', 'b'), _edge('a', 'c'), _edge('b', 'd'), _edge('c', 'd'),
+                        dict(_edge('a', 'd'), disabled=True)],
+    }
+
+
+class TestExecutionPlan(unittest.TestCase):
+    def setUp(self):
+        ExecutionPlan.clear_cache()
+        self.addCleanup(ExecutionPlan.clear_cache)
+        patcher = mock.patch.dict(NODE_REGISTRY, {'Echo': _EchoNode})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        _EchoNode.calls = []
+
+    def test_compiles_adjacency_and_degrees(self):
+        plan = ExecutionPlan.for_graph(_diamond())
+        self.assertEqual(plan.targets('a', 'output'), (('b', 'input'), ('c', 'input')))
+        self.assertEqual(plan.targets('d', 'output'), ())
+        self.assertEqual(plan.expected_inputs('d'), 2)
+        self.assertEqual(plan.expected_inputs('a'), 1)
+        self.assertEqual(plan.start_node_ids, {'a'})
+        self.assertEqual(plan.end_node_ids, {'d'})
+        self.assertIs(plan.node_class('b'), _EchoNode)
+
+    def test_plan_is_cached_by_graph_content(self):
+        plan = ExecutionPlan.for_graph(_diamond())
+        self.assertIs(ExecutionPlan.for_graph(_diamond()), plan)
+        changed = _diamond()
+        changed['connections'].pop()
+        self.assertIsNot(ExecutionPlan.for_graph(changed), plan)
+
+    def test_runs_diamond_graph(self):
+        gui_queue = queue.Queue()
+        process_node_graph(
+            {}, None, "x", mock.Mock(), mock.Mock(), mock.Mock(), threading.Event(), _diamond(),
+            "diamond", mock.Mock(), {}, gui_queue, False, mock.Mock()
+        )
+        ran = [node_id for node_id, _ in _EchoNode.calls]
+        self.assertEqual(ran[0], 'a')
+        self.assertEqual(sorted(ran[1:3]), ['b', 'c'])
+        self.assertEqual(ran[3], 'd')
+        self.assertEqual(len(ran), 4)
+        # d waited for both branches
+        self.assertEqual(sorted(_EchoNode.calls[3][1]), ['b(a(x))', 'c(a(x))'])
+
+
+if __name__ == "__main__":
+    unittest.main()
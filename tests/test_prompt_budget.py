@@ -0,0 +1,81 @@
+import unittest
+
+from services.api_service import APIService
+from services.prompt_budget import DROP, KEEP, SUMMARIZE, UNBOUNDED_BUDGET, PromptBlock, context_window, fit_blocks
+from services.token_counter import TokenCounter
+
+
+class TestPromptBudget(unittest.TestCase):
+    def setUp(self):
+        # Character estimate: one token per four characters
+        TokenCounter.reset()
+        self.addCleanup(TokenCounter.reset)
+        TokenCounter._encoders["cl100k_base"] = None
+
+    def test_context_window(self):
+        self.assertEqual(context_window("gpt-4o-mini"), 128_000)
+        self.assertEqual(context_window("models/gemini-2.0-flash"), 1_048_576)
+        self.assertEqual(context_window("local-model", {"context_window": 32768}), 32768)
+        self.assertEqual(context_window("gpt-4.5-preview"), 128_000)
+        self.assertEqual(context_window("openai/gpt-oss-120b"), 131_072)
+        self.assertEqual(context_window("mistral:7b"), 32_768)
+        self.assertIsNone(context_window("local-model"))
+        self.assertIsNone(context_window(None))
+
+    def test_fits_without_cuts(self):
+        fit = fit_blocks([PromptBlock("a" * 40), PromptBlock("b" * 40)], budget=100)
+        self.assertEqual(fit.prompt, "a" * 40 + "\n\n" + "b" * 40)
+        self.assertFalse(fit.trimmed)
+        self.assertEqual(fit.tokens, 21)
+
+    def test_cuts_lowest_priority_first(self):
+        blocks = [
+            PromptBlock("I" * 400, label="instruction", shrink=KEEP),
+            PromptBlock("F" * 2000, priority=2, label="files"),
+            PromptBlock("R" * 2000, priority=0, label="research"),
+            PromptBlock("O" * 400, priority=1, label="old", shrink=DROP),
+        ]
+        fit = fit_blocks(blocks, budget=900)
+        self.assertLessEqual(fit.tokens, 900)
+        self.assertEqual([(cut["label"], cut["action"]) for cut in fit.cuts],
+                         [("research", "truncate")])
+        self.assertTrue(fit.prompt.startswith("I" * 400))
+        self.assertIn("F" * 2000, fit.prompt)
+        self.assertIn("research truncated to fit", fit.prompt)
+
+        fit = fit_blocks(blocks, budget=300)
+        actions = {cut["label"]: cut["action"] for cut in fit.cuts}
+        self.assertEqual(actions, {"research": "drop", "old": "drop", "files": "truncate"})
+        self.assertIn("I" * 400, fit.prompt)
+
+    def test_summarizes_when_allowed(self):
+        calls = []
+
+        def summarizer(text, target_tokens):
+            calls.append(target_tokens)
+            return "short summary"
+
+        blocks = [PromptBlock("q" * 40, shrink=KEEP), PromptBlock("x" * 4000, label="doc", shrink=SUMMARIZE)]
+        fit = fit_blocks(blocks, budget=200, summarizer=summarizer)
+        self.assertEqual(fit.prompt, "q" * 40 + "\n\nshort summary")
+        self.assertEqual(fit.cuts[0]["action"], "summarize")
+        self.assertEqual(len(calls), 1)
+
+    def test_service_budget_reserves_output(self):
+        service = APIService({"interfaces": {
+            "Local": {"type": "Ollama", "selected_model": "mistral", "context_window": 10000, "max_tokens": 1000},
+        }})
+        self.assertEqual(service.prompt_budget("Local"), 8500)
+        fit = service.fit_prompt("Local", [PromptBlock("k" * 400, shrink=KEEP), PromptBlock("y" * 40000)])
+        self.assertLessEqual(fit.tokens, 8500)
+        self.assertTrue(fit.trimmed)
+
+    def test_unknown_window_is_not_trimmed(self):
+        service = APIService({"interfaces": {"Local": {"type": "Ollama", "selected_model": "my-finetune"}}})
+        self.assertEqual(service.prompt_budget("Local"), UNBOUNDED_BUDGET)
+        fit = service.fit_prompt("Local", [PromptBlock("y" * 40000)])
+        self.assertFalse(fit.trimmed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from unittest import mock
+
+from services.api_service import APIRequest, APIService
+from services.client_registry import ClientRegistry
+from services.providers import get_adapter
+
+
+class TestProviderAdapters(unittest.TestCase):
+    def setUp(self):
+        ClientRegistry.invalidate()
+        self.addCleanup(ClientRegistry.invalidate)
+
+    def test_capability_flags(self):
+        self.assertTrue(get_adapter("OpenAI").supports_whisper)
+        self.assertTrue(get_adapter("claude").supports_batch)
+        self.assertFalse(get_adapter("groq").supports_batch)
+        self.assertFalse(get_adapter("searchengine").supports_streaming)
+        self.assertFalse(get_adapter("searchengine").supports_vision)
+        self.assertIsNone(get_adapter("unknown"))
+
+    def test_search_results_keep_clean_urls(self):
+        service = APIService({"interfaces": {"search": {"type": "SearchEngine", "api_url": "http://localhost:8888"}}})
+        session = mock.Mock()
+        session.get.return_value = mock.Mock(status_code=200, headers={}, json=lambda: {"results": [
+            {"title": "A", "url": "https://example.com/a", "content": "first"},
+            {"title": "PDF", "url": "https://example.com/b.pdf", "content": "skipped"},
+            {"title": "C", "url": "https://example.com/c", "content": "third"},
+        ]})
+        with mock.patch.object(ClientRegistry, "get_session", return_value=session):
+            response = service.send_request(APIRequest("query", "search", additional_params={"num_results": 1}))
+
+        self.assertTrue(response.success)
+        self.assertEqual(response.raw_response, {"results": ["https://example.com/a"]})
+        self.assertEqual(session.get.call_args.kwargs["params"]["n"], 1)
+
+    def test_clients_are_built_by_the_adapter(self):
+        service = APIService({"interfaces": {
+            "claude": {"type": "Claude"},
+            "local": {"type": "LMStudio", "api_url": "http://localhost:1234/"},
+            "odd": {"type": "unknown", "api_key": "x"},
+        }})
+        self.assertIsNone(service._get_client("claude"))  # missing API key
+        self.assertIsNone(service._get_client("odd"))
+        self.assertEqual(service._get_client("local"),
+                         {"type": "lmstudio", "api_url": "http://localhost:1234", "api_key": None})
+
+    def test_claude_batch_goes_through_the_adapter(self):
+        client = mock.Mock()
+        client.messages.batches.create.return_value = mock.Mock(id="b1")
+        client.messages.batches.retrieve.return_value = mock.Mock(
+            id="b1", processing_status="ended",
+            request_counts=mock.Mock(succeeded=1, errored=1, canceled=0, expired=0))
+        text = mock.Mock(type="text", text="hi")
+        succeeded = mock.Mock(custom_id="request-0", result=mock.Mock(
+            type="succeeded", message=mock.Mock(content=[text], usage=mock.Mock(input_tokens=3, output_tokens=2))))
+        errored = mock.Mock(custom_id="request-1", result=mock.Mock(type="errored", error="overloaded"))
+        client.messages.batches.results.return_value = [succeeded, errored]
+        service = APIService({"interfaces": {"claude": {"type": "Claude", "api_key": "k"}}})
+
+        with mock.patch.object(ClientRegistry, "get_client", return_value={"client": client, "type": "claude"}):
+            responses = service.submit_batch([APIRequest("a", "claude", model="m", temperature=0.2),
+                                              APIRequest("b", "claude", model="m")])
+
+        params = client.messages.batches.create.call_args.kwargs["requests"][0]["params"]
+        self.assertEqual(params["temperature"], 0.2)
+        self.assertEqual((responses[0].content, responses[0].total_tokens), ("hi", 5))
+        self.assertFalse(responses[1].success)
+        self.assertEqual(responses[1].error, "overloaded")
+
+    def test_vision_on_unsupported_type_returns_error(self):
+        service = APIService({"interfaces": {"search": {"type": "SearchEngine", "api_url": "http://localhost:8888"}}})
+        response = service.send_vision_request("missing.png", "describe", "search")
+        self.assertFalse(response.success)
+        self.assertIn("Vision not supported", response.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
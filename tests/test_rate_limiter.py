@@ -0,0 +1,65 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from services.rate_limiter import RateLimiter, TokenBucket, parse_reset_seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_reservations_are_paced_at_the_refill_rate(self):
+        bucket = TokenBucket(rate_per_second=2.0, capacity=2.0)
+        waits = [bucket.reserve(1, now=0.0) for _ in range(5)]
+        self.assertEqual(waits, [0.0, 0.0, 0.5, 1.0, 1.5])
+
+    def test_remaining_header_lowers_the_balance(self):
+        bucket = TokenBucket(rate_per_second=1.0, capacity=10.0)
+        bucket.sync_remaining(0, reset_seconds=3.0, now=0.0)
+        self.assertAlmostEqual(bucket.reserve(1, now=0.0), 4.0)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        RateLimiter.reset()
+        self.addCleanup(RateLimiter.reset)
+        self.api_config = {"type": "openai", "rate_limits": {"rpm": 60, "models": {"small": {"rpm": 600}}}}
+
+    def test_limits_are_shared_per_interface_and_model(self):
+        waits = [RateLimiter.reserve("OpenAI", "gpt", 10, self.api_config) for _ in range(8)]
+        self.assertEqual(waits[:6], [0.0] * 6)
+        self.assertGreater(waits[6], 0.0)
+        self.assertGreater(waits[7], waits[6])
+        self.assertEqual(RateLimiter.reserve("OpenAI", "small", 10, self.api_config), 0.0)
+
+    def test_headers_supply_missing_limits(self):
+        RateLimiter.update_from_headers("Groq", "llama", {
+            "x-ratelimit-limit-tokens": "6000",
+            "x-ratelimit-remaining-tokens": "0",
+            "x-ratelimit-reset-tokens": "1m30s",
+        })
+        self.assertEqual(RateLimiter.get_stats()["limits"]["Groq/llama"], {"tpm": 6000})
+        self.assertGreater(RateLimiter.reserve("Groq", "llama", 1, {"type": "groq"}), 89.0)
+        self.assertEqual(parse_reset_seconds("20ms"), 0.02)
+
+    def test_daily_request_headers_are_ignored(self):
+        # Groq's request headers count per day, not per minute
+        RateLimiter.update_from_headers("Groq", "llama", {
+            "x-ratelimit-limit-requests": "14400",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "2m59.56s",
+        }, "groq")
+        self.assertEqual(RateLimiter.get_stats()["limits"]["Groq/llama"], {})
+        RateLimiter.update_from_headers("OpenAI", "gpt", {"x-ratelimit-limit-requests": "500"}, "openai")
+        self.assertEqual(RateLimiter.get_stats()["limits"]["OpenAI/gpt"], {"rpm": 500})
+
+    def test_anthropic_reset_timestamps(self):
+        reset = (datetime.now(timezone.utc) + timedelta(seconds=30)).isoformat().replace("+00:00", "Z")
+        RateLimiter.update_from_headers("Claude", "sonnet", {
+            "anthropic-ratelimit-requests-limit": "50",
+            "anthropic-ratelimit-requests-remaining": "0",
+            "anthropic-ratelimit-requests-reset": reset,
+        }, "claude")
+        self.assertAlmostEqual(parse_reset_seconds(reset), 30.0, delta=1.0)
+        self.assertGreater(RateLimiter.reserve("Claude", "sonnet", 1, {"type": "claude"}), 29.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
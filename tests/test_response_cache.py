@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from services.api_service import APIRequest, APIService
+from services.client_registry import ClientRegistry
+from services.response_cache import ResponseCache, cache_key
+
+
+def _response(content):
+    response = mock.Mock(status_code=200, headers={})
+    response.json.return_value = {
+        "choices": [{"message": {"content": content}}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    }
+    return response
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        for reset in (ClientRegistry.invalidate, ResponseCache.reset):
+            reset()
+            self.addCleanup(reset)
+        self.config = {
+            "interfaces": {"local": {"type": "lmstudio", "api_url": "http://localhost:1234"}},
+            "response_cache": {"path": os.path.join(tmp.name, "cache.sqlite")},
+        }
+        self.service = APIService(self.config)
+
+    def test_key_normalises_messages(self):
+        plain = cache_key("local", "m", "Hello\r\n", 0, 100)
+        as_messages = cache_key("local", "m", "ignored", 0, 100,
+                                {"messages": [{"role": "user", "content": "Hello"}]})
+        self.assertEqual(plain, as_messages)
+        self.assertNotEqual(plain, cache_key("local", "m", "Hello", 0.7, 100))
+        self.assertIsNone(cache_key("local", "m", "Hello", 0, 100, {"file": "a.wav"}))
+
+    def test_repeated_cacheable_request_is_served_from_cache(self):
+        session = mock.Mock()
+        session.post.return_value = _response("answer")
+        with mock.patch.object(ClientRegistry, "get_session", return_value=session):
+            first = self.service.send_request(APIRequest("q", "local", model="m", temperature=0, cacheable=True))
+            second = self.service.send_request(APIRequest("q", "local", model="m", temperature=0, cacheable=True))
+            uncached = self.service.send_request(APIRequest("q", "local", model="m", temperature=0))
+
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertEqual(second.content, "answer")
+        self.assertEqual(second.total_tokens, 0)
+        self.assertFalse(uncached.cached)
+        self.assertEqual(session.post.call_count, 2)
+        stats = ResponseCache.get_stats(self.config)
+        self.assertEqual((stats["total"]["hits"], stats["total"]["misses"]), (1, 1))
+        self.assertEqual(stats["total"]["tokens_saved"], 15)
+
+    def test_size_limit_evicts_least_recently_used(self):
+        self.config["response_cache"]["max_size_mb"] = 300 / (1024 * 1024)
+        for i in range(3):
+            ResponseCache.put(self.config, f"key{i}", "local", "m", "x" * 100)
+        self.assertIsNone(ResponseCache.get(self.config, "key0"))
+        self.assertIsNotNone(ResponseCache.get(self.config, "key2"))
+        self.assertEqual(ResponseCache.get_stats(self.config)["entries"], 2)
+
+    def test_expired_entries_are_misses(self):
+        ResponseCache.put(self.config, "old", "local", "m", "stale")
+        self.config["response_cache"]["ttl_hours"] = 0
+        self.assertIsNone(ResponseCache.get(self.config, "old"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+
+from services.api_service import APIRequest, APIService
+from services.client_registry import ClientRegistry
+from services.providers import get_adapter
+from services.rate_limiter import RateLimiter
+from services.retry_policy import (
+    CIRCUIT_OPEN, CLIENT, RATE_LIMIT, SERVER, TIMEOUT, CircuitBreaker, ProviderHTTPError, classify_error,
+)
+
+
+def _response(status, content="ok"):
+    response = mock.Mock(status_code=status, text="error", headers={})
+    response.json.return_value = {"choices": [{"message": {"content": content}}], "usage": {}}
+    return response
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        for reset in (ClientRegistry.invalidate, CircuitBreaker.reset_all, RateLimiter.reset):
+            reset()
+            self.addCleanup(reset)
+        fast_retry = {"max_attempts": 3, "base_delay": 0.001, "max_delay": 0.01}
+        self.service = APIService({
+            "interfaces": {
+                "primary": {"type": "lmstudio", "api_url": "http://primary", "retry": fast_retry,
+                            "circuit_breaker": {"failure_threshold": 2, "reset_timeout": 60},
+                            "fallback_interface": "backup"},
+                "backup": {"type": "lmstudio", "api_url": "http://backup", "selected_model": "small"},
+            }
+        })
+
+    def test_classify_error(self):
+        self.assertEqual(classify_error(ProviderHTTPError("x", 429)), RATE_LIMIT)
+        self.assertEqual(classify_error(ProviderHTTPError("x", 503)), SERVER)
+        self.assertEqual(classify_error(ProviderHTTPError("x", 400)), CLIENT)
+        self.assertEqual(classify_error(TimeoutError()), TIMEOUT)
+
+    def test_transient_errors_are_retried(self):
+        session = mock.Mock()
+        session.post.side_effect = [_response(503), _response(200, "recovered")]
+        with mock.patch.object(ClientRegistry, "get_session", return_value=session):
+            response = self.service.send_request(APIRequest("hi", "primary", model="m"))
+        self.assertTrue(response.success)
+        self.assertEqual(response.content, "recovered")
+        self.assertEqual(session.post.call_count, 2)
+
+    def test_open_circuit_fails_fast_to_fallback(self):
+        def post(url, **kwargs):
+            return _response(500) if "primary" in url else _response(200, "from backup")
+
+        session = mock.Mock()
+        session.post.side_effect = post
+        with mock.patch.object(ClientRegistry, "get_session", return_value=session):
+            first = self.service.send_request(APIRequest("hi", "primary", model="m"))
+            primary_calls = sum("primary" in c.args[0] for c in session.post.call_args_list)
+            second = self.service.send_request(APIRequest("hi", "primary", model="m"))
+
+        self.assertEqual(first.content, "from backup")
+        self.assertEqual(CircuitBreaker.get_stats()["primary"]["state"], CircuitBreaker.OPEN)
+        self.assertEqual(second.content, "from backup")
+        # The second call never reached the primary interface
+        self.assertEqual(sum("primary" in c.args[0] for c in session.post.call_args_list), primary_calls)
+        self.assertEqual(session.post.call_args_list[-1].kwargs["json"]["model"], "small")
+
+    def test_client_errors_are_not_retried(self):
+        session = mock.Mock()
+        session.post.return_value = _response(400)
+        with mock.patch.object(ClientRegistry, "get_session", return_value=session):
+            response = self.service.send_request(APIRequest("hi", "primary", model="m"))
+        self.assertFalse(response.success)
+        self.assertEqual(response.error_class, CLIENT)
+        self.assertEqual(session.post.call_count, 1)
+        self.assertNotEqual(response.error_class, CIRCUIT_OPEN)
+
+    def test_unsupported_type_is_not_a_success(self):
+        breaker = CircuitBreaker.for_interface("primary", self.service.config["interfaces"]["primary"])
+        breaker.record_failure(SERVER)
+        with mock.patch.object(get_adapter("lmstudio"), "supports_chat", False):
+            response = self.service.send_request(APIRequest("hi", "primary", model="m"))
+        self.assertFalse(response.success)
+        self.assertIn("Unsupported API type", response.error)
+        self.assertEqual(CircuitBreaker.get_stats()["primary"]["failures"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
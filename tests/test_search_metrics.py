@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+
+from src.database.search_metrics import SearchMetricsWriter, metrics_files, summarize_metrics
+
+
+class TestSearchMetricsWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "search_metrics.jsonl")
+
+    def test_records_are_written_in_background_and_rotated_by_size(self):
+        writer = SearchMetricsWriter(max_bytes=2000, backup_count=2)
+        for batch in range(4):
+            for i in range(20):
+                self.assertTrue(writer.submit(self.path, {"latency_ms": float(batch * 20 + i), "query": "q" * 20}))
+            self.assertTrue(writer.flush())
+        stats = writer.get_stats()
+        self.assertEqual(stats["written"], 80)
+        self.assertGreaterEqual(stats["rotations"], 1)
+        # Live file plus at most backup_count rotated files.
+        self.assertLessEqual(len(metrics_files(self.path)), 3)
+
+    def test_summary_reports_percentiles_across_rotated_files(self):
+        writer = SearchMetricsWriter(max_bytes=10 ** 6)
+        for i in range(1, 101):
+            writer.submit(self.path, {"latency_ms": float(i), "timestamp": f"2026-01-01T00:00:{i % 60:02d}"})
+        writer.flush()
+        os.replace(self.path, os.path.join(self.tmpdir.name, "search_metrics.20260101-000000.jsonl"))
+        writer.submit(self.path, {"latency_ms": 1000.0})
+        writer.flush()
+
+        summary = summarize_metrics(self.path)
+        self.assertEqual(summary["searches"], 101)
+        self.assertAlmostEqual(summary["latency_ms_p50"], 51.0)
+        self.assertEqual(summary["latency_ms_max"], 1000.0)
+        self.assertGreater(summary["latency_ms_p99"], summary["latency_ms_p95"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from services.rate_limiter import estimate_request_tokens
+from services.token_counter import FAST_PATH_CHARS, TokenCounter, encoding_name
+
+
+class _ThreeCharEncoder:
+    """Stand-in for a tiktoken encoding: one token per three characters."""
+
+    def encode(self, text, disallowed_special=()):
+        return [text[i:i + 3] for i in range(0, len(text), 3)]
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+class TestTokenCounter(unittest.TestCase):
+    def setUp(self):
+        TokenCounter.reset()
+        self.addCleanup(TokenCounter.reset)
+        TokenCounter._encoders["cl100k_base"] = _ThreeCharEncoder()
+
+    def test_counts_with_shared_encoder(self):
+        self.assertEqual(TokenCounter.count("abcdefghi", "llama3"), 3)
+        self.assertEqual(TokenCounter.count(""), 0)
+        self.assertEqual(estimate_request_tokens("abcdef", 10, "llama3"), 12)
+
+    def test_long_text_fast_path_is_close(self):
+        text = "word " * (FAST_PATH_CHARS // 2)
+        exact = len(_ThreeCharEncoder().encode(text))
+        self.assertAlmostEqual(TokenCounter.count(text, "llama3") / exact, 1.0, delta=0.01)
+
+    def test_truncate_and_messages(self):
+        self.assertEqual(TokenCounter.truncate("abcdefghij", 2, "llama3"), "abcdef")
+        self.assertEqual(TokenCounter.truncate("abc", 2, "llama3"), "abc")
+        messages = [{"role": "system", "content": "abc"}, {"role": "user", "content": "abcdef"}]
+        self.assertEqual(TokenCounter.count_messages(messages, "llama3"), 3 + (3 + 1) + (3 + 2))
+
+    def test_falls_back_to_character_estimate(self):
+        TokenCounter._encoders["cl100k_base"] = None
+        self.assertEqual(TokenCounter.count("x" * 40, "llama3"), 10)
+
+    def test_openai_models_use_their_encoding(self):
+        self.assertEqual(encoding_name("gpt-4o-mini"), "o200k_base")
+        self.assertEqual(encoding_name("claude-haiku-4-5"), "cl100k_base")
+
+
+if __name__ == "__main__":
+    unittest.main()
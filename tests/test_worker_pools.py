@@ -0,0 +1,45 @@
+import threading
+import unittest
+
+from src.workflows.worker_pools import WorkerPools, node_pool, pool_settings
+
+
+class _IONode:
+    worker_pool = "io"
+
+
+class TestWorkerPools(unittest.TestCase):
+    def test_settings_merge_config_and_workflow(self):
+        settings = pool_settings({'worker_pools': {'llm': 4, 'io': 'bad', 'node_pools': {'A': 'cpu'}}},
+                                 {'worker_pools': {'llm': 2, 'processes': True, 'node_pools': {'B': 'io'}}})
+        self.assertEqual(settings['llm'], 2)
+        self.assertEqual(settings['io'], 8)
+        self.assertTrue(settings['processes'])
+        self.assertEqual(settings['node_pools'], {'A': 'cpu', 'B': 'io'})
+
+    def test_node_pool_precedence(self):
+        persistent = {'type': 'EmailNode', 'properties': {'is_persistent': {'default': True}}}
+        self.assertEqual(node_pool(persistent, _IONode), 'persistent')
+        self.assertEqual(node_pool({'type': 'X', 'properties': {}}, _IONode), 'io')
+        self.assertEqual(node_pool({'type': 'X', 'properties': {}}, None), 'llm')
+        self.assertEqual(node_pool({'type': 'X', 'properties': {}}, _IONode, {'X': 'cpu'}), 'cpu')
+        overridden = {'type': 'X', 'properties': {'worker_pool': {'default': 'llm'},
+                                                  'is_persistent': {'default': True}}}
+        self.assertEqual(node_pool(overridden, _IONode), 'llm')
+
+    def test_persistent_nodes_do_not_take_pool_slots(self):
+        pools = WorkerPools(pool_settings({'worker_pools': {'llm': 2}}))
+        release = threading.Event()
+        services = [pools.submit('persistent', release.wait, 5) for _ in range(6)]
+        branches = [pools.submit('llm', lambda i=i: i * 2) for i in range(4)]
+        try:
+            self.assertEqual([future.result(timeout=2) for future in branches], [0, 2, 4, 6])
+            self.assertFalse(any(future.done() for future in services))
+        finally:
+            release.set()
+            pools.shutdown()
+        self.assertTrue(all(future.result() for future in services))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import yaml
+
+from src.workflows.execution_plan import ExecutionPlan
+from src.workflows.node_registry import NODE_REGISTRY
+from src.workflows.runner import WorkflowEventSink, run_workflow, run_workflow_file
+
+
+class _UpperNode:
+    def __init__(self, node_id, config):
+        self.properties = {}
+
+    def set_properties(self, node_data):
+        self.properties = node_data.get('properties', {})
+
+    def process(self, inputs):
+        if inputs.get('input') == 'boom':
+            raise RuntimeError('boom')
+        return {'output': str(inputs.get('input')).upper()}
+
+
+class _RecordingSink(WorkflowEventSink):
+    def __init__(self):
+        self.events = []
+
+    def node_finished(self, node_id, output, seconds):
+        self.events.append(('node_finished', node_id))
+
+    def run_completed(self, output):
+        self.events.append(('completed', output))
+
+    def run_failed(self, error):
+        self.events.append(('failed', error))
+
+    def run_finished(self):
+        self.events.append(('finished',))
+
+
+def _graph():
+    return {
+        'nodes': {
+            'a': {'id': 'a', 'type': 'Upper', 'properties': {'is_start_node': {'default': True}}},
+            'b': {'id': 'b', 'type': 'Upper', 'properties': {'is_end_node': {'default': True}}},
+        },
+        'connections': [{'from_node': 'a', 'from_output': 'output', 'to_node': 'b', 'to_input': 'input'}],
+    }
+
+
+class TestWorkflowRunner(unittest.TestCase):
+    def setUp(self):
+        ExecutionPlan.clear_cache()
+        self.addCleanup(ExecutionPlan.clear_cache)
+        patcher = mock.patch.dict(NODE_REGISTRY, {'Upper': _UpperNode})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_returns_output_and_timings(self):
+        sink = _RecordingSink()
+        result = run_workflow({}, _graph(), "hi", sink=sink)
+        self.assertEqual(result.status, "completed")
+        self.assertEqual(result.output, "HI")
+        self.assertEqual(set(result.node_timings), {'a', 'b'})
+        self.assertEqual(sink.events, [('node_finished', 'a'), ('node_finished', 'b'),
+                                       ('completed', 'HI'), ('finished',)])
+
+    def test_reports_errors(self):
+        sink = _RecordingSink()
+        result = run_workflow({}, _graph(), "boom", sink=sink)
+        self.assertEqual(result.status, "error")
+        self.assertIn("boom", result.error)
+        self.assertEqual(sink.events[-2:], [('failed', result.error), ('finished',)])
+
+        graph = _graph()
+        graph['nodes']['a']['properties'] = {}
+        self.assertIn("Start Node", run_workflow({}, graph, "hi").error)
+
+    def test_runs_workflow_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "upper.yaml")
+            with open(path, "w") as file:
+                yaml.safe_dump({'graph': _graph()}, file)
+            result = run_workflow_file(path, "x", config={})
+        self.assertEqual(result.workflow_name, "upper")
+        self.assertEqual(result.to_dict()['output'], "X")
+
+
+if __name__ == "__main__":
+    unittest.main()
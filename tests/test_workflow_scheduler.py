@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+import unittest
+from unittest import mock
+
+from nodes.array_processor_node import ArrayProcessorNode
+from src.workflows.cancellation import CancellationToken
+from src.workflows.execution_plan import ExecutionPlan
+from src.workflows.node_registry import NODE_REGISTRY
+from src.workflows.process_graph import process_node_graph
+
+
+class _BlockingNode:
+    """Node that blocks until released, ignoring cancellation."""
+    release = threading.Event()
+    started = []
+
+    def __init__(self, node_id, config):
+        self.node_id = node_id
+        self.properties = {}
+
+    def set_properties(self, node_data):
+        self.properties = node_data.get('properties', {})
+
+    def process(self, inputs):
+        _BlockingNode.started.append(self.node_id)
+        _BlockingNode.release.wait(5)
+        return {'output': self.node_id}
+
+
+class _LoopingNode(ArrayProcessorNode):
+    """ArrayProcessorNode whose API never accepts a result; stops the run on its third call."""
+    calls = 0
+    stop_event = None
+
+    def make_api_call(self, prompt, api_name):
+        _LoopingNode.calls += 1
+        if _LoopingNode.calls == 3:
+            _LoopingNode.stop_event.set()
+        return "rejected"
+
+    def process(self, inputs):
+        self.process_single_element("element", "api", "validate", "refine", "accepted", 100)
+        return {'output': "finished"}
+
+
+def _single_node_graph(node_type='Blocking'):
+    start = {'id': 'start', 'type': node_type, 'properties': {'is_start_node': {'default': True}}}
+    return {'nodes': {'start': start}, 'connections': []}
+
+
+class TestCancellationToken(unittest.TestCase):
+    def test_callbacks_run_once_when_set(self):
+        token = CancellationToken()
+        calls = []
+        token.add_callback(lambda: calls.append("a"))
+        removed = lambda: calls.append("removed")
+        token.add_callback(removed)
+        token.remove_callback(removed)
+        token.set()
+        token.set()
+        token.add_callback(lambda: calls.append("late"))
+        self.assertEqual(calls, ["a", "late"])
+        self.assertTrue(token.is_set())
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        ExecutionPlan.clear_cache()
+        self.addCleanup(ExecutionPlan.clear_cache)
+        patcher = mock.patch.dict(NODE_REGISTRY, {'Blocking': _BlockingNode, 'Looping': _LoopingNode})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        _BlockingNode.release = threading.Event()
+        _BlockingNode.started = []
+        self.addCleanup(lambda: _BlockingNode.release.set())
+
+    def _run(self, graph, stop_event):
+        process_node_graph(
+            {}, None, "x", mock.Mock(), mock.Mock(), mock.Mock(), stop_event, graph,
+            "blocking", mock.Mock(), {}, queue.Queue(), False, mock.Mock()
+        )
+
+    def test_stop_returns_without_waiting_for_running_nodes(self):
+        graph = _single_node_graph()
+        stop_event = CancellationToken()
+        threading.Timer(0.1, stop_event.set).start()
+        started = time.monotonic()
+        self._run(graph, stop_event)
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(_BlockingNode.started, ['start'])
+
+    def test_plain_event_stop_is_polled(self):
+        graph = _single_node_graph()
+        stop_event = threading.Event()
+        threading.Timer(0.1, stop_event.set).start()
+        started = time.monotonic()
+        self._run(graph, stop_event)
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_looping_node_stops_within_one_iteration(self):
+        for stop_event in (CancellationToken(), threading.Event()):
+            _LoopingNode.calls = 0
+            _LoopingNode.stop_event = stop_event
+            self._run(_single_node_graph('Looping'), stop_event)
+            self.assertEqual(_LoopingNode.calls, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
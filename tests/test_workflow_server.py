@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from unittest import mock
+
+from src.workflows.execution_plan import ExecutionPlan
+from src.workflows.node_registry import NODE_REGISTRY
+from src.workflows.run_server import QueueFullError, WorkflowRunService, WorkflowServer
+from src.workflows.workflow_manager import WorkflowManager
+
+
+class _MemoryManager(WorkflowManager):
+    """WorkflowManager without history files or token logs."""
+
+    def __init__(self):
+        self.workflows = {}
+        self.listeners = []
+
+    def save_workflow_history(self):
+        pass
+
+    def _summarize_workflow_tokens(self, workflow):
+        return None
+
+
+class _GateNode:
+    """Echoes its input once the gate opens; records the order runs started."""
+    gate = threading.Event()
+    started = []
+
+    def __init__(self, node_id, config):
+        self.properties = {}
+
+    def set_properties(self, node_data):
+        self.properties = node_data.get('properties', {})
+
+    def process(self, inputs):
+        _GateNode.started.append(inputs.get('input'))
+        _GateNode.gate.wait(5)
+        return {'output': f"done {inputs.get('input')}"}
+
+
+def _graph():
+    node = {'id': 'a', 'type': 'Gate',
+            'properties': {'is_start_node': {'default': True}, 'is_end_node': {'default': True}}}
+    return {'nodes': {'a': node}, 'connections': []}
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+class TestWorkflowRunService(unittest.TestCase):
+    def setUp(self):
+        ExecutionPlan.clear_cache()
+        self.addCleanup(ExecutionPlan.clear_cache)
+        patcher = mock.patch.dict(NODE_REGISTRY, {'Gate': _GateNode})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        _GateNode.gate = threading.Event()
+        _GateNode.started = []
+        self.addCleanup(lambda: _GateNode.gate.set())
+        self.manager = _MemoryManager()
+
+    def _service(self, **settings):
+        service = WorkflowRunService({}, manager=self.manager, **settings)
+        self.addCleanup(service.shutdown)
+        return service
+
+    def test_bounds_concurrent_runs_and_orders_by_priority(self):
+        service = self._service(max_concurrent_runs=1)
+        first = service.submit(user_input="first", graph=_graph())
+        _wait_for(lambda: first.status == "running")
+        low = service.submit(user_input="low", graph=_graph())
+        high = service.submit(user_input="high", priority=5, graph=_graph())
+        self.assertEqual((low.status, high.status), ("queued", "queued"))
+        self.assertEqual(service.stats()['running'], 1)
+
+        _GateNode.gate.set()
+        _wait_for(lambda: low.status == "completed")
+        self.assertEqual(_GateNode.started, ["first", "high", "low"])
+        self.assertEqual(low.output, "done low")
+        self.assertIn('a', low.node_timings)
+
+    def test_stopped_queued_run_never_starts_and_queue_is_bounded(self):
+        service = self._service(max_concurrent_runs=1, max_queued_runs=1)
+        first = service.submit(user_input="first", graph=_graph())
+        _wait_for(lambda: first.status == "running")
+        waiting = service.submit(user_input="waiting", graph=_graph())
+        with self.assertRaises(QueueFullError):
+            service.submit(user_input="overflow", graph=_graph())
+        self.assertTrue(service.stop(waiting.id))
+
+        _GateNode.gate.set()
+        _wait_for(lambda: first.status == "completed")
+        time.sleep(0.05)
+        self.assertEqual(waiting.status, "stopped")
+        self.assertEqual(_GateNode.started, ["first"])
+
+    def test_http_endpoints(self):
+        service = self._service(max_concurrent_runs=2)
+        server = WorkflowServer(service, port=0, token="secret").start()
+        self.addCleanup(server.stop)
+
+        def call(path, payload=None, token="secret"):
+            data = json.dumps(payload).encode("utf-8") if payload is not None else None
+            request = urllib.request.Request(server.url + path, data=data,
+                                             headers={"Authorization": f"Bearer {token}"})
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status, json.loads(response.read())
+
+        with self.assertRaises(urllib.error.HTTPError) as caught:
+            call("/runs", {'graph': _graph()}, token="wrong")
+        self.assertEqual(caught.exception.code, 401)
+
+        status, body = call("/runs", {'graph': _graph(), 'input': "x", 'priority': 1})
+        self.assertEqual(status, 202)
+        run_id = body['run_id']
+        self.assertEqual(call(f"/runs/{run_id}/result")[0], 202)
+
+        _GateNode.gate.set()
+        _wait_for(lambda: service.get_run(run_id).status == "completed")
+        status, body = call(f"/runs/{run_id}/result")
+        self.assertEqual((status, body['status'], body['output']), (200, "completed", "done x"))
+        self.assertEqual(call(f"/runs/{run_id}")[1]['priority'], 1)
+        with self.assertRaises(urllib.error.HTTPError) as caught:
+            call("/runs", {'workflow': "../config"})
+        self.assertEqual(caught.exception.code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
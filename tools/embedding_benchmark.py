@@ -0,0 +1,113 @@
+"""Benchmark embedding throughput for document ingestion.
+
+Usage:
+    python tools/embedding_benchmark.py --file manual.pdf --batch-sizes 1 32 64 128 256
+    python tools/embedding_benchmark.py --synthetic 2000
+
+Chunks are produced with the same splitter and preprocessing that
+``DatabaseManager.add_documents`` uses, then embedded with
+``DatabaseManager._embed_texts`` at each batch size.  A batch size of 1 matches
+the old one-call-per-chunk ingestion path.  The script reports chunks/sec per
+batch size and the speed-up relative to the smallest batch size.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Ensure project root is on sys.path so we can import DatabaseManager
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.database.db_tools import DatabaseManager  # noqa: E402
+
+WORDS = (
+    "network router firmware reset configure policy backup server client storage "
+    "latency throughput cluster ingest document section summary report security "
+    "account invoice customer support ticket escalation schedule maintenance"
+).split()
+
+
+def synthetic_chunks(count: int, words_per_chunk: int = 120, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words_per_chunk)) for _ in range(count)]
+
+
+def file_chunks(manager: DatabaseManager, path: Path) -> List[str]:
+    file_type = path.suffix.lower().lstrip(".")
+    documents = manager._load_documents_from_path(file_type, str(path), path.name)
+    if not documents:
+        raise ValueError(f"No text could be loaded from {path}")
+    chunks = manager._get_text_splitter().split_documents(documents)
+    cleaned = [manager.preprocess_content(chunk.page_content) for chunk in chunks]
+    return [text for text in cleaned if text.strip()]
+
+
+def run_benchmark(manager: DatabaseManager, texts: List[str], batch_sizes: List[int], repeats: int) -> List[Dict[str, Any]]:
+    # Warm up the model so the first measured batch size is not penalised.
+    manager._embed_texts(texts[: min(len(texts), 8)])
+
+    rows: List[Dict[str, Any]] = []
+    for batch_size in batch_sizes:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            matrix, kept = manager._embed_texts(texts, batch_size=batch_size)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        rows.append({
+            "batch_size": batch_size,
+            "chunks": len(kept),
+            "seconds": best,
+            "chunks_per_sec": len(kept) / best if best else None,
+        })
+
+    baseline = rows[0]["chunks_per_sec"] if rows else None
+    for row in rows:
+        row["speedup"] = (row["chunks_per_sec"] / baseline) if baseline and row["chunks_per_sec"] else None
+    return rows
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark batched embedding throughput.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="Document to chunk and embed (pdf, txt, csv, docx).")
+    source.add_argument("--synthetic", type=int, help="Number of synthetic chunks to generate.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 64, 128, 256],
+                        help="Batch sizes to compare (the first one is the speed-up baseline).")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per batch size; the best time is reported.")
+    parser.add_argument("--report", help="Optional path to write results JSON.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    manager = DatabaseManager.get_shared()
+    if args.file:
+        texts = file_chunks(manager, Path(args.file))
+    else:
+        texts = synthetic_chunks(args.synthetic)
+
+    rows = run_benchmark(manager, texts, sorted(set(args.batch_sizes)), max(1, args.repeats))
+
+    print(f"Embedding benchmark ({len(texts)} chunks, device={manager.device}, pid={os.getpid()})")
+    print("=" * 60)
+    print(f"{'batch':>8} {'chunks':>8} {'seconds':>10} {'chunks/sec':>12} {'speedup':>9}")
+    for row in rows:
+        print(f"{row['batch_size']:>8} {row['chunks']:>8} {row['seconds']:>10.2f} "
+              f"{row['chunks_per_sec']:>12.1f} {row['speedup']:>8.1f}x")
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"Results written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
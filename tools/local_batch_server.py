@@ -0,0 +1,209 @@
+"""Local stand-in for the OpenAI Files and Batch APIs.
+
+Usage:
+    python tools/local_batch_server.py --port 8765
+    python tools/local_batch_server.py --port 8765 --upstream http://localhost:1234/v1/chat/completions
+
+Point an interface at it to try batch mode without spending tokens:
+
+    interfaces:
+      LocalBatch:
+        type: OpenAI
+        api_url: http://localhost:8765
+        api_key: local
+        selected_model: local-model
+        batch_poll_seconds: 1
+
+Each batch line is answered by the ``--upstream`` OpenAI-compatible chat
+completions endpoint (e.g. LM Studio) when given; otherwise the prompt is
+echoed back.  Only the endpoints APIService.submit_batch uses are served.
+"""
+from __future__ import annotations
+
+import argparse
+import email
+import email.policy
+import itertools
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+
+class LocalBatchServer:
+    """In-process server implementing the ``/v1/files`` and ``/v1/batches`` subset."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, upstream: Optional[str] = None,
+                 delay: float = 0.0):
+        self.upstream = upstream
+        self.delay = delay
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LocalBatchServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="local-batch-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _new_id(self, prefix: str) -> str:
+        return f"{prefix}-{next(self._ids)}"
+
+    def _complete(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Chat completion for one batch line."""
+        if self.upstream:
+            request = urllib.request.Request(self.upstream, data=json.dumps(body).encode("utf-8"),
+                                             headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(request, timeout=600) as response:
+                return json.loads(response.read())
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        tokens = max(1, len(str(prompt)) // 4)
+        return {
+            "id": self._new_id("chatcmpl"),
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": f"Echo: {prompt}"}}],
+            "usage": {"prompt_tokens": tokens, "completion_tokens": tokens + 2, "total_tokens": 2 * tokens + 2},
+        }
+
+    def _run_batch(self, batch: Dict[str, Any]):
+        lines = [json.loads(line) for line in self.files[batch["input_file_id"]].decode("utf-8").splitlines()
+                 if line.strip()]
+        batch["request_counts"]["total"] = len(lines)
+        batch["status"] = "in_progress"
+        output, errors = [], []
+        for line in lines:
+            if batch["status"] == "cancelling":
+                break
+            if self.delay:
+                time.sleep(self.delay)
+            try:
+                output.append({"id": self._new_id("batch_req"), "custom_id": line["custom_id"], "error": None,
+                               "response": {"status_code": 200, "body": self._complete(line["body"])}})
+                batch["request_counts"]["completed"] += 1
+            except Exception as e:
+                errors.append({"id": self._new_id("batch_req"), "custom_id": line["custom_id"], "response": None,
+                               "error": {"code": "upstream_error", "message": str(e)}})
+                batch["request_counts"]["failed"] += 1
+        with self._lock:
+            for key, entries in (("output_file_id", output), ("error_file_id", errors)):
+                if entries:
+                    file_id = self._new_id("file")
+                    self.files[file_id] = "\n".join(json.dumps(entry) for entry in entries).encode("utf-8")
+                    batch[key] = file_id
+            batch["status"] = "cancelled" if batch["status"] == "cancelling" else "completed"
+            batch["completed_at"] = int(time.time())
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, payload: Dict[str, Any], status: int = 200):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+            def do_POST(self):
+                path = self.path.split("?")[0].rstrip("/")
+                if path == "/v1/files":
+                    message = email.message_from_bytes(
+                        f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + self._body(),
+                        policy=email.policy.HTTP)
+                    content = next((part.get_payload(decode=True) for part in message.iter_parts()
+                                    if part.get_param("name", header="content-disposition") == "file"), b"")
+                    with server._lock:
+                        file_id = server._new_id("file")
+                        server.files[file_id] = content
+                    return self._send_json({"id": file_id, "object": "file", "bytes": len(content),
+                                            "created_at": int(time.time()), "filename": "batch.jsonl",
+                                            "purpose": "batch", "status": "processed"})
+                if path == "/v1/batches":
+                    params = json.loads(self._body() or b"{}")
+                    if params.get("input_file_id") not in server.files:
+                        return self._send_json({"error": {"message": "input file not found"}}, 404)
+                    with server._lock:
+                        batch = {
+                            "id": server._new_id("batch"), "object": "batch", "endpoint": params.get("endpoint"),
+                            "input_file_id": params["input_file_id"],
+                            "completion_window": params.get("completion_window", "24h"),
+                            "status": "validating", "created_at": int(time.time()),
+                            "output_file_id": None, "error_file_id": None, "errors": None,
+                            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+                        }
+                        server.batches[batch["id"]] = batch
+                    threading.Thread(target=server._run_batch, args=(batch,), daemon=True).start()
+                    return self._send_json(batch)
+                if path.startswith("/v1/batches/") and path.endswith("/cancel"):
+                    batch = server.batches.get(path.split("/")[3])
+                    if batch is None:
+                        return self._send_json({"error": {"message": "batch not found"}}, 404)
+                    if batch["status"] in ("validating", "in_progress"):
+                        batch["status"] = "cancelling"
+                    return self._send_json(batch)
+                self._send_json({"error": {"message": f"Unsupported endpoint {path}"}}, 404)
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                if len(parts) == 3 and parts[:2] == ["v1", "batches"] and parts[2] in server.batches:
+                    return self._send_json(server.batches[parts[2]])
+                if len(parts) == 4 and parts[:2] == ["v1", "files"] and parts[3] == "content":
+                    content = server.files.get(parts[2])
+                    if content is not None:
+                        self.send_response(200)
+                        self.send_header("Content-Type", "application/octet-stream")
+                        self.send_header("Content-Length", str(len(content)))
+                        self.end_headers()
+                        self.wfile.write(content)
+                        return
+                self._send_json({"error": {"message": "not found"}}, 404)
+
+        return Handler
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the OpenAI Batch API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on.")
+    parser.add_argument("--upstream", help="OpenAI-compatible chat completions URL that answers each request.")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before each request.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    server = LocalBatchServer(args.host, args.port, upstream=args.upstream, delay=args.delay).start()
+    print(f"Local batch server listening on {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
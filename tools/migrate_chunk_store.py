@@ -0,0 +1,60 @@
+"""Convert legacy RAG databases to the binary chunk store.
+
+Usage:
+    python tools/migrate_chunk_store.py            # every database in databases/
+    python tools/migrate_chunk_store.py --db workflow --db agentic_test
+
+Older databases keep every chunk, including its embedding as a JSON list of
+floats, in ``metadata.json``.  Migration moves the vectors into a float32
+``embeddings.npy`` (memory-mapped at query time) and the chunk text/metadata
+into ``chunks.sqlite``, then rebuilds ``faiss.index`` if it no longer lines
+up.  The original file is kept as ``metadata.json.migrated``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Ensure project root is on sys.path so we can import DatabaseManager
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.database.db_tools import DatabaseManager  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Migrate metadata.json databases to the binary chunk store.")
+    parser.add_argument("--db", action="append", help="Database to migrate (repeatable). Defaults to all.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    manager = DatabaseManager.get_shared()
+    db_names = args.db or manager.list_databases()
+
+    results: List[Dict[str, Any]] = []
+    for db_name in db_names:
+        result = manager.migrate_database(db_name)
+        result["db"] = db_name
+        results.append(result)
+        if not result.get("success"):
+            status = f"FAILED: {result.get('error')}"
+        elif result.get("migrated"):
+            status = f"migrated {result.get('chunks', 0)} chunks"
+        else:
+            status = f"already current ({result.get('chunks', 0)} chunks)"
+        print(f"{db_name}: {status}")
+
+    failures = [r for r in results if not r.get("success")]
+    print(json.dumps({"databases": len(results), "failed": len(failures)}, indent=2))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
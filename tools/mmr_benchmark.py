@@ -0,0 +1,109 @@
+"""Micro-benchmark for MMR reranking in DatabaseManager.
+
+Usage:
+    python tools/mmr_benchmark.py
+    python tools/mmr_benchmark.py --candidates 200 --top-k 10 --dimension 384 --trials 200
+
+Runs the vectorised ``DatabaseManager._apply_mmr`` against the previous
+per-candidate Python loop on random unit vectors, checks that both select the
+same chunks in the same order, and reports per-call latency for each.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Ensure project root is on sys.path so we can import DatabaseManager
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.database.db_tools import MMR_LAMBDA, DatabaseManager  # noqa: E402
+
+
+def reference_mmr(query_embedding: np.ndarray, candidates: List[Dict[str, Any]], top_k: int,
+                  mmr_lambda: float = MMR_LAMBDA) -> List[Dict[str, Any]]:
+    """The original loop-based MMR, kept as the parity baseline."""
+    candidate_embeddings = [np.array(c["embedding"], dtype='float32') for c in candidates]
+    candidate_embeddings = [vec / (np.linalg.norm(vec) or 1.0) for vec in candidate_embeddings]
+    query = query_embedding / (np.linalg.norm(query_embedding) or 1.0)
+    selected = []
+    selected_indices = []
+    available_indices = list(range(len(candidate_embeddings)))
+    while available_indices and len(selected) < top_k:
+        mmr_scores = []
+        for idx in available_indices:
+            candidate_vec = candidate_embeddings[idx]
+            similarity_to_query = float(np.dot(candidate_vec, query))
+            if not selected_indices:
+                diversity = 0.0
+            else:
+                diversity = max(float(np.dot(candidate_vec, candidate_embeddings[s_idx])) for s_idx in selected_indices)
+            score = mmr_lambda * similarity_to_query - (1 - mmr_lambda) * diversity
+            mmr_scores.append((score, idx))
+        _, best_idx = max(mmr_scores, key=lambda item: item[0])
+        selected.append(candidates[best_idx])
+        selected_indices.append(best_idx)
+        available_indices.remove(best_idx)
+    return selected
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark vectorised MMR against the loop implementation.")
+    parser.add_argument("--candidates", type=int, default=200, help="Candidates per rerank call.")
+    parser.add_argument("--top-k", type=int, default=10, help="Results selected per call.")
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding dimension.")
+    parser.add_argument("--trials", type=int, default=100, help="Random candidate sets to compare.")
+    parser.add_argument("--lambda", dest="mmr_lambda", type=float, default=MMR_LAMBDA, help="MMR lambda.")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    # _apply_mmr does not touch instance state, so skip loading an embedding model.
+    manager = DatabaseManager.__new__(DatabaseManager)
+
+    mismatches = 0
+    vector_ms: List[float] = []
+    loop_ms: List[float] = []
+    for _ in range(args.trials):
+        query = rng.standard_normal(args.dimension).astype('float32')
+        vectors = rng.standard_normal((args.candidates, args.dimension)).astype('float32')
+        candidates = [{"chunk_id": str(i), "embedding": vec} for i, vec in enumerate(vectors)]
+
+        start = time.perf_counter()
+        fast = manager._apply_mmr(query, candidates, args.top_k, mmr_lambda=args.mmr_lambda)
+        vector_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        slow = reference_mmr(query, candidates, args.top_k, mmr_lambda=args.mmr_lambda)
+        loop_ms.append((time.perf_counter() - start) * 1000)
+
+        if [c["chunk_id"] for c in fast] != [c["chunk_id"] for c in slow]:
+            mismatches += 1
+
+    report = {
+        "trials": args.trials,
+        "candidates": args.candidates,
+        "top_k": args.top_k,
+        "order_mismatches": mismatches,
+        "vectorised_ms_p50": statistics.median(vector_ms),
+        "loop_ms_p50": statistics.median(loop_ms),
+        "speedup": statistics.median(loop_ms) / max(statistics.median(vector_ms), 1e-9),
+    }
+    print(json.dumps(report, indent=2))
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,14 @@ following fields (all optional except `query`):
 
 The script reports hit rates, latency stats, and saves per-case results when
 --report or --details is provided.
+
+Index comparison:
+    python tools/rag_eval.py --db my_database --cases eval_cases.json \
+        --compare-index hnsw ivf_flat ivf_pq
+
+builds each requested index type in memory over the database's chunks and
+reports recall@k against the exact Flat index plus raw FAISS query latency,
+without touching the index saved on disk.
 """
 from __future__ import annotations
 
@@ -39,6 +47,7 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from src.database.db_tools import DatabaseManager  # noqa: E402
+from src.database.faiss_indexes import INDEX_TYPES, index_kind  # noqa: E402
 
 
 def load_cases(path: Path) -> List[Dict[str, Any]]:
@@ -79,7 +88,44 @@ def evaluate_case(
     start = time.perf_counter()
     results = manager.search(db_name, query, top_k=top_k, filters=filters, collect_metrics=False)
     latency_ms = (time.perf_counter() - start) * 1000
+    return score_case(case, results, top_k, latency_ms)
 
+
+def evaluate_cases_batched(
+    manager: DatabaseManager,
+    db_name: str,
+    cases: List[Dict[str, Any]],
+    default_top_k: int,
+) -> List[Dict[str, Any]]:
+    """Evaluate cases with one search_many call per (top_k, filters) group.
+
+    Per-case latency is the group's wall time divided by its size.
+    """
+    groups: Dict[Any, List[int]] = {}
+    for position, case in enumerate(cases):
+        key = (int(case.get("top_k") or default_top_k), json.dumps(case.get("filters") or None, sort_keys=True))
+        groups.setdefault(key, []).append(position)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(cases)
+    for (top_k, filters_json), positions in groups.items():
+        filters = json.loads(filters_json)
+        queries = [cases[p]["query"] for p in positions]
+        start = time.perf_counter()
+        batch = manager.search_many(queries, [db_name], top_k=top_k, filters=filters, collect_metrics=False)[db_name]
+        latency_ms = (time.perf_counter() - start) * 1000 / len(positions)
+        for position, case_results in zip(positions, batch):
+            results[position] = score_case(cases[position], case_results, top_k, latency_ms)
+    return [r for r in results if r is not None]
+
+
+def score_case(
+    case: Dict[str, Any],
+    results: List[Dict[str, Any]],
+    top_k: int,
+    latency_ms: float,
+) -> Dict[str, Any]:
+    query: str = case["query"]
+    filters = case.get("filters") or None
     expected_doc = case.get("expected_doc")
     expected_keywords = [kw.lower() for kw in case.get("expected_keywords", [])]
 
@@ -145,6 +191,77 @@ def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
     return summary
 
 
+def _latency_stats(latencies: List[float]) -> Dict[str, Optional[float]]:
+    if not latencies:
+        return {"latency_ms_avg": None, "latency_ms_p50": None, "latency_ms_p95": None}
+    return {
+        "latency_ms_avg": statistics.mean(latencies),
+        "latency_ms_p50": statistics.median(latencies),
+        "latency_ms_p95": statistics.quantiles(latencies, n=20)[-1] if len(latencies) >= 20 else max(latencies),
+    }
+
+
+def compare_indexes(
+    manager: DatabaseManager,
+    db_name: str,
+    cases: List[Dict[str, Any]],
+    index_types: List[str],
+    default_top_k: int,
+) -> Dict[str, Any]:
+    """Measure recall@k and query latency of each index type against exact Flat search.
+
+    ``current`` evaluates the index saved on disk with its configured settings.
+    """
+    queries = []
+    for case in cases:
+        vector = manager._embed_query(case["query"])
+        if vector is not None:
+            queries.append((vector.reshape(1, -1), int(case.get("top_k") or default_top_k)))
+
+    def run(index) -> List[Any]:
+        outcomes = []
+        for vector, top_k in queries:
+            start = time.perf_counter()
+            _, ids = index.search(vector, min(top_k, max(index.ntotal, 1)))
+            outcomes.append(({int(i) for i in ids[0] if i >= 0}, (time.perf_counter() - start) * 1000))
+        return outcomes
+
+    exact = manager.build_faiss_index(db_name, "flat")
+    baseline = run(exact)
+    comparison: Dict[str, Any] = {
+        "vectors": exact.ntotal,
+        "queries": len(queries),
+        "flat": {"active_index": "flat", "recall_at_k": 1.0, **_latency_stats([ms for _, ms in baseline])},
+    }
+
+    for index_type in index_types:
+        if index_type == "flat":
+            continue
+        start = time.perf_counter()
+        if index_type == "current":
+            index = manager.load_faiss_index(db_name)
+        else:
+            index = manager.build_faiss_index(db_name, index_type)
+        build_ms = (time.perf_counter() - start) * 1000
+        if index is None:
+            comparison[index_type] = {"error": "No index found on disk."}
+            continue
+
+        outcomes = run(index)
+        recalls = [
+            len(found & expected) / len(expected)
+            for (found, _), (expected, _) in zip(outcomes, baseline)
+            if expected
+        ]
+        comparison[index_type] = {
+            "active_index": index_kind(index),
+            "build_ms": build_ms,
+            "recall_at_k": statistics.mean(recalls) if recalls else None,
+            **_latency_stats([ms for _, ms in outcomes]),
+        }
+    return comparison
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Evaluate RAG retrieval quality.")
     parser.add_argument("--db", required=True, help="Database name to query.")
@@ -152,6 +269,24 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--top-k", type=int, default=5, help="Default top_k if a case does not override it.")
     parser.add_argument("--report", help="Optional path to write aggregated summary JSON.")
     parser.add_argument("--details", help="Optional path to write per-case results JSON.")
+    parser.add_argument(
+        "--query-cache",
+        nargs="?",
+        const="",
+        metavar="PATH",
+        help="Persist query embeddings between runs (default path: databases/query_cache.npz).",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Embed and search all cases with DatabaseManager.search_many instead of one by one.",
+    )
+    parser.add_argument(
+        "--compare-index",
+        nargs="+",
+        choices=list(INDEX_TYPES) + ["current"],
+        help="Compare recall@k/latency of these index types against exact Flat search.",
+    )
     return parser.parse_args()
 
 
@@ -159,27 +294,39 @@ def main() -> None:
     args = parse_args()
     cases_path = Path(args.cases)
     cases = load_cases(cases_path)
-    manager = DatabaseManager()
+    manager = DatabaseManager.get_shared()
+    if args.query_cache is not None:
+        DatabaseManager.enable_query_cache_persistence(args.query_cache or None)
 
     results: List[Dict[str, Any]] = []
-    for case in cases:
-        try:
-            result = evaluate_case(manager, args.db, case, args.top_k)
-            results.append(result)
-        except Exception as exc:
-            results.append({
-                "query": case["query"],
-                "error": str(exc),
-                "latency_ms": None,
-                "result_count": 0,
-            })
+    if args.batch:
+        results = evaluate_cases_batched(manager, args.db, cases, args.top_k)
+    else:
+        for case in cases:
+            try:
+                result = evaluate_case(manager, args.db, case, args.top_k)
+                results.append(result)
+            except Exception as exc:
+                results.append({
+                    "query": case["query"],
+                    "error": str(exc),
+                    "latency_ms": None,
+                    "result_count": 0,
+                })
 
     summary = summarize(results)
+    summary["query_cache"] = DatabaseManager.get_query_cache_stats()
 
     print("RAG Evaluation Summary")
     print("=======================")
     print(json.dumps(summary, indent=2))
 
+    if args.compare_index:
+        summary["index_comparison"] = compare_indexes(manager, args.db, cases, args.compare_index, args.top_k)
+        print("\nIndex Comparison (vs exact Flat)")
+        print("================================")
+        print(json.dumps(summary["index_comparison"], indent=2))
+
     if args.report:
         Path(args.report).write_text(json.dumps(summary, indent=2), encoding="utf-8")
         print(f"Summary written to {args.report}")
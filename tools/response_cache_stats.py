@@ -0,0 +1,62 @@
+"""Report (or clear) the LLM response cache.
+
+Usage:
+    python tools/response_cache_stats.py
+    python tools/response_cache_stats.py --config config.yaml --clear
+
+Prints the hit/miss counters accumulated in the cache database, the number of
+cached responses and the database size.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import yaml
+
+# Ensure project root is on sys.path so we can import the services package
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from services.response_cache import ResponseCache  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Report LLM response cache statistics.")
+    parser.add_argument("--config", default=str(PROJECT_ROOT / "config.yaml"),
+                        help="config.yaml with an optional response_cache block.")
+    parser.add_argument("--clear", action="store_true", help="Delete every cached response and counter.")
+    parser.add_argument("--json", action="store_true", help="Print the statistics as JSON.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    config_path = Path(args.config)
+    config = {}
+    if config_path.exists():
+        config = yaml.safe_load(config_path.read_text(encoding="utf-8")) or {}
+
+    if args.clear:
+        ResponseCache.clear(config)
+        print(f"Cleared {ResponseCache.settings(config)['path']}")
+        return
+
+    stats = ResponseCache.get_stats(config)
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return
+
+    total = stats["total"]
+    print(f"cache:        {ResponseCache.settings(config)['path']}")
+    print(f"entries:      {stats.get('entries', 0)} ({stats.get('size_bytes', 0) / 1024 / 1024:.1f} MB)")
+    print(f"hits:         {total['hits']} ({total['hit_rate']:.1%} of {total['hits'] + total['misses']} lookups)")
+    print(f"tokens saved: {total['tokens_saved']}")
+    print(f"evictions:    {total['evictions']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Summarise RAG search latency from search_metrics.jsonl files.
+
+Usage:
+    python tools/search_metrics_summary.py               # every database in databases/
+    python tools/search_metrics_summary.py --db workflow --report summary.json
+
+Reads each database's live ``search_metrics.jsonl`` plus its rotated
+``search_metrics.<timestamp>.jsonl`` files and reports the number of searches
+and p50/p95/p99 latency per database.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+# Ensure project root is on sys.path so we can import the database package
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.database.db_tools import DATABASES_DIR, SEARCH_METRICS_FILE  # noqa: E402
+from src.database.search_metrics import summarize_metrics  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Report search latency percentiles per database.")
+    parser.add_argument("--db", action="append", help="Database to summarise (repeatable). Defaults to all.")
+    parser.add_argument("--databases-dir", default=DATABASES_DIR, help="Directory containing the databases.")
+    parser.add_argument("--report", help="Optional path to write the summary JSON.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    root = Path(args.databases_dir)
+    db_names = args.db
+    if not db_names:
+        db_names = sorted(p.name for p in root.iterdir() if p.is_dir()) if root.exists() else []
+
+    summary: Dict[str, Any] = {}
+    for db_name in db_names:
+        summary[db_name] = summarize_metrics(os.path.join(root, db_name, SEARCH_METRICS_FILE))
+
+    print(f"{'database':<30} {'searches':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for db_name, stats in summary.items():
+        def fmt(value):
+            return f"{value:9.1f}" if value is not None else f"{'-':>9}"
+        print(f"{db_name:<30} {stats['searches']:>9} {fmt(stats['latency_ms_p50'])} "
+              f"{fmt(stats['latency_ms_p95'])} {fmt(stats['latency_ms_p99'])}")
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        print(f"Summary written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
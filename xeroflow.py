@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+XeroFlow command line.
+
+Runs workflows without the GUI, e.g. on a headless server, from cron or in
+load tests:
+
+    python xeroflow.py run workflows/General\\ Requests.yaml --input "Summarise ..."
+    python xeroflow.py run "General Requests" --input-file prompt.txt --json
+    echo "question" | python xeroflow.py run my_flow.yaml --input-file - --timeout 600
+
+The final output goes to stdout; node logs go to stderr.  Exit status is 0
+when the workflow completed, 1 on error and 130 when stopped (Ctrl+C or
+--timeout).
+
+``serve`` starts the local workflow run server (see
+src/workflows/run_server.py) so integrations can queue runs over HTTP:
+
+    python xeroflow.py serve --port 8770 --max-runs 4 --max-llm-calls 16
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import sys
+import threading
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+EXIT_STATUS = {"completed": 0, "error": 1, "stopped": 130}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="xeroflow", description="Run XeroFlow workflows without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run a workflow and print its output.")
+    run.add_argument("workflow", help="Workflow YAML file, or the name of a workflow in workflows/.")
+    source = run.add_mutually_exclusive_group()
+    source.add_argument("--input", default="", help="Input text for the start node.")
+    source.add_argument("--input-file", help="Read the input from a file ('-' for stdin).")
+    run.add_argument("--config", default=str(PROJECT_ROOT / "config.yaml"), help="config.yaml with the API interfaces.")
+    run.add_argument("--timeout", type=float, help="Stop the workflow after this many seconds.")
+    run.add_argument("--stream", action="store_true", help="Echo end-node tokens to stderr as they arrive.")
+    run.add_argument("--json", action="store_true", help="Print status, output and per-node timings as JSON.")
+
+    serve = commands.add_parser("serve", help="Queue and run workflows submitted over HTTP.")
+    serve.add_argument("--config", default=str(PROJECT_ROOT / "config.yaml"), help="config.yaml with the API interfaces.")
+    serve.add_argument("--host", help="Interface to bind (default: workflow_server.host, 127.0.0.1).")
+    serve.add_argument("--port", type=int, help="Port to listen on (default: workflow_server.port, 8770).")
+    serve.add_argument("--max-runs", type=int, help="Workflow runs executing at once.")
+    serve.add_argument("--max-llm-calls", type=int, help="LLM node calls in flight across all runs.")
+    return parser.parse_args(argv)
+
+
+def resolve_workflow(name: str) -> Path:
+    path = Path(name)
+    if path.exists():
+        return path
+    candidate = PROJECT_ROOT / "workflows" / f"{name}.yaml"
+    if candidate.exists():
+        return candidate
+    raise SystemExit(f"xeroflow: workflow not found: {name}")
+
+
+def read_input(args: argparse.Namespace) -> str:
+    if args.input_file == "-":
+        return sys.stdin.read()
+    if args.input_file:
+        return Path(args.input_file).read_text(encoding="utf-8")
+    return args.input
+
+
+def run_command(args: argparse.Namespace) -> int:
+    workflow_path = resolve_workflow(args.workflow)
+    user_input = read_input(args)
+    stdout = sys.stdout
+
+    # Nodes and the registry print progress; keep stdout for the result
+    with contextlib.redirect_stdout(sys.stderr):
+        from src.workflows.cancellation import CancellationToken
+        from src.workflows.runner import WorkflowEventSink, load_run_config, load_workflow_file, run_workflow
+
+        class CliEventSink(WorkflowEventSink):
+            def stream(self, node_id, delta, is_end_node):
+                if args.stream and is_end_node:
+                    sys.stderr.write(delta)
+                    sys.stderr.flush()
+
+            def node_finished(self, node_id, output, seconds):
+                print(f"[xeroflow] {node_id} finished in {seconds:.2f}s")
+
+        name, graph = load_workflow_file(workflow_path)
+        config = load_run_config(args.config)
+        stop_event = CancellationToken()
+        outcome = {}
+
+        def target():
+            outcome["result"] = run_workflow(config, graph, user_input, sink=CliEventSink(),
+                                             stop_event=stop_event, workflow_name=name,
+                                             stream_output=args.stream)
+
+        worker = threading.Thread(target=target, name="xeroflow-run")
+        worker.start()
+        timer = None
+        if args.timeout:
+            timer = threading.Timer(args.timeout, stop_event.set)
+            timer.daemon = True
+            timer.start()
+        try:
+            while worker.is_alive():
+                worker.join(0.2)
+        except KeyboardInterrupt:
+            stop_event.set()
+            worker.join()
+        if timer is not None:
+            timer.cancel()
+
+    result = outcome["result"]
+    if args.json:
+        json.dump(result.to_dict(), stdout, ensure_ascii=False, indent=2, default=str)
+        stdout.write("\n")
+    else:
+        if result.output is not None:
+            stdout.write(f"{result.output}\n")
+        if result.error:
+            print(f"xeroflow: {result.error}", file=sys.stderr)
+        timings = ", ".join(f"{node_id} {seconds:.2f}s" for node_id, seconds in result.node_timings.items())
+        print(f"xeroflow: {result.status} in {result.duration:.2f}s ({timings})", file=sys.stderr)
+    return EXIT_STATUS[result.status]
+
+
+def serve_command(args: argparse.Namespace) -> int:
+    from src.workflows.run_server import WorkflowRunService, WorkflowServer
+    from src.workflows.runner import load_run_config
+
+    service = WorkflowRunService(load_run_config(args.config), workflows_dir=PROJECT_ROOT / "workflows",
+                                 max_concurrent_runs=args.max_runs, max_llm_calls=args.max_llm_calls)
+    server = WorkflowServer(service, host=args.host, port=args.port)
+    stats = service.stats()
+    print(f"xeroflow: serving on {server.url} ({stats['max_concurrent_runs']} concurrent runs, "
+          f"{stats['max_llm_calls']} LLM calls; Ctrl+C to stop)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        service.shutdown()
+    return 0
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.command == "run":
+        return run_command(args)
+    if args.command == "serve":
+        return serve_command(args)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())